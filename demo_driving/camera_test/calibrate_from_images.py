@@ -7,14 +7,109 @@
 import cv2
 import numpy as np
 import os
+import sys
 import glob
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from chessboard_detection import find_chessboard_fast
+from incremental_calibration import IncrementalCalibrator
+
 # 체커보드 설정 (checkerboard.py와 동일하게 설정)
 CHECKERBOARD_SIZE = (6, 5)  # 내부 코너 개수 (가로, 세로)
 SQUARE_SIZE = 20.0  # 체커보드 한 칸의 실제 크기 (mm)
 
-def calibrate_camera_from_images(image_folder, checkerboard_size, square_size):
+# 코너 검출 결과 캐시 폴더 (이미지 폴더 안에 생성)
+# 파일 내용 해시 + 체커보드 크기로 구분하므로 이미지가 추가/삭제되면 새 이미지만 다시 처리
+CORNER_CACHE_DIR = ".corner_cache"
+CORNER_CACHE_VERSION = 2  # 검출 방식이 바뀌면 올려서 이전 캐시 무효화 (2: 축소 빠른 검출)
+
+def file_hash(path):
+    """이미지 파일 내용의 SHA1 해시"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def corner_cache_path(image_folder, image_hash, checkerboard_size):
+    return os.path.join(image_folder, CORNER_CACHE_DIR,
+                        f"v{CORNER_CACHE_VERSION}_{image_hash}_{checkerboard_size[0]}x{checkerboard_size[1]}.npz")
+
+def load_cached_corners(cache_path):
+    """캐시된 검출 결과 (found, corners, image_size) - 없거나 깨졌으면 None"""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with np.load(cache_path) as data:
+            found = bool(data["found"])
+            corners = data["corners"] if found else None
+            return found, corners, tuple(int(v) for v in data["image_size"])
+    except Exception:
+        return None
+
+def save_cached_corners(cache_path, found, corners, image_size):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    np.savez(cache_path, found=found,
+             corners=corners if found else np.zeros((0, 1, 2), np.float32),
+             image_size=np.array(image_size))
+
+def detect_corners_in_image(job):
+    """
+    이미지 1장에서 체커보드 코너 검출 (프로세스 풀 작업 단위)
+    
+    Args:
+        job: (image_path, checkerboard_size)
+    
+    Returns:
+        (image_path, found, corners, image_size) - 이미지를 못 읽으면 image_size가 None
+    """
+    image_path, checkerboard_size = job
+    img = cv2.imread(image_path)
+    if img is None:
+        return image_path, False, None, None
+    
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    image_size = gray.shape[::-1]
+    # 축소 이미지에서 빠른 검출 → 성공한 경우에만 원본 해상도에서 서브픽셀 정밀화
+    ret, corners = find_chessboard_fast(gray, checkerboard_size)
+    if not ret:
+        return image_path, False, None, image_size
+    return image_path, True, corners, image_size
+
+def collect_corners(image_files, image_folder, checkerboard_size, workers=None):
+    """
+    모든 이미지의 코너를 캐시에서 읽거나, 캐시에 없는 이미지만 프로세스 풀로 병렬 검출
+    
+    Returns:
+        {image_path: (found, corners, image_size)}, 새로 처리한 이미지 경로 목록
+    """
+    results = {}
+    pending = {}  # {image_path: cache_path}
+    for image_path in image_files:
+        cache_path = corner_cache_path(image_folder, file_hash(image_path), checkerboard_size)
+        cached = load_cached_corners(cache_path)
+        if cached is not None:
+            results[image_path] = cached
+        else:
+            pending[image_path] = cache_path
+    
+    print(f"💾 캐시 사용: {len(results)}개, 새로 검출: {len(pending)}개")
+    if pending:
+        jobs = [(image_path, checkerboard_size) for image_path in pending]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for image_path, found, corners, image_size in executor.map(detect_corners_in_image, jobs):
+                if image_size is None:
+                    # 읽기 실패는 캐시하지 않음 (파일이 고쳐지면 다시 시도)
+                    results[image_path] = (False, None, None)
+                    continue
+                save_cached_corners(pending[image_path], found, corners, image_size)
+                results[image_path] = (found, corners, image_size)
+    return results, list(pending)
+
+def calibrate_camera_from_images(image_folder, checkerboard_size, square_size, image_pattern="capture_*.jpg", workers=None,
+                                 stop_when_converged=False):
     """
     저장된 체커보드 이미지들로부터 카메라 캘리브레이션 수행
     
@@ -22,30 +117,27 @@ def calibrate_camera_from_images(image_folder, checkerboard_size, square_size):
         image_folder: 체커보드 이미지가 저장된 폴더
         checkerboard_size: 체커보드 내부 코너 개수 (가로, 세로)
         square_size: 체커보드 한 칸의 실제 크기 (mm)
+        image_pattern: 이미지 파일 패턴
+        workers: 코너 검출 프로세스 수 (None이면 CPU 코어 수)
+        stop_when_converged: True면 파라미터가 수렴한 뒤의 이미지는 사용하지 않음
     
     Returns:
         camera_matrix: 카메라 매트릭스
         dist_coeffs: 왜곡 계수
         reprojection_error: 재투영 오차
-        valid_images: 사용된 유효 이미지 수
+        valid_images: 사용된 유효 이미지 수 (이상치로 제외된 뷰 제외)
+        calibrator: IncrementalCalibrator (뷰별 오차, 제외된 뷰, coverage map)
     """
     print(f"📐 체커보드 캘리브레이션 시작...")
     print(f"📁 이미지 폴더: {image_folder}")
     print(f"📏 체커보드 설정: {checkerboard_size[0]}x{checkerboard_size[1]} 코너, {square_size}mm 격자")
     print("=" * 60)
     
-    # 3D 객체 포인트 준비 (실제 체커보드 좌표)
-    objp = np.zeros((checkerboard_size[0] * checkerboard_size[1], 3), np.float32)
-    objp[:, :2] = np.mgrid[0:checkerboard_size[0], 0:checkerboard_size[1]].T.reshape(-1, 2)
-    objp *= square_size  # mm 단위로 스케일링
-    
-    # 3D와 2D 포인트 저장 배열
-    objpoints = []  # 3D 포인트 (실제 세계 좌표)
-    imgpoints = []  # 2D 포인트 (이미지 픽셀 좌표)
-    
     # 이미지 파일들 찾기
-    image_pattern = os.path.join(image_folder, "capture_*.jpg")
-    image_files = glob.glob(image_pattern)
+    image_pattern = os.path.join(image_folder, image_pattern)
+    # 이전 실행에서 저장한 detected_*.jpg 결과 이미지는 제외
+    image_files = sorted(f for f in glob.glob(image_pattern)
+                         if not os.path.basename(f).startswith("detected_"))
     
     if not image_files:
         print(f"❌ 오류: {image_folder}에서 체커보드 이미지를 찾을 수 없습니다.")
@@ -54,53 +146,52 @@ def calibrate_camera_from_images(image_folder, checkerboard_size, square_size):
     print(f"🔍 발견된 이미지 파일: {len(image_files)}개")
     print("-" * 60)
     
-    # 체커보드 검출 기준
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    # 코너 검출 (캐시 + 병렬 처리)
+    corner_results, processed = collect_corners(image_files, image_folder, checkerboard_size, workers)
     
     valid_images = 0
     failed_images = []
+    valid_files = []
+    calibrator = None  # 첫 유효 이미지의 크기로 생성
     
-    for i, image_path in enumerate(sorted(image_files)):
+    for i, image_path in enumerate(image_files):
         filename = os.path.basename(image_path)
-        print(f"[{i+1:2d}/{len(image_files)}] 처리 중: {filename}", end=" ... ")
+        found, corners_refined, image_size = corner_results[image_path]
         
-        # 이미지 읽기
-        img = cv2.imread(image_path)
-        if img is None:
-            print("❌ 이미지 읽기 실패")
+        if image_size is None:
+            print(f"[{i+1:2d}/{len(image_files)}] {filename} ... ❌ 이미지 읽기 실패")
             failed_images.append(filename)
-            continue
-        
-        # 그레이스케일 변환
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # 체커보드 코너 검출
-        ret, corners = cv2.findChessboardCorners(gray, checkerboard_size, None)
-        
-        if ret:
-            # 서브픽셀 정확도로 코너 위치 개선
-            corners_refined = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
-            
-            # 3D-2D 포인트 쌍 저장
-            objpoints.append(objp)
-            imgpoints.append(corners_refined)
-            
+        elif found:
+            if calibrator is None:
+                calibrator = IncrementalCalibrator(checkerboard_size, square_size, image_size)
+            if tuple(image_size) != calibrator.image_size:
+                print(f"[{i+1:2d}/{len(image_files)}] {filename} ... ❌ 해상도 다름 {image_size}")
+                failed_images.append(filename)
+                continue
+            if stop_when_converged and calibrator.converged:
+                print(f"[{i+1:2d}/{len(image_files)}] {filename} ... ⏭️  수렴 후 건너뜀")
+                continue
+            # 뷰 추가 → (뷰가 충분하면) 이전 결과를 초기값으로 다시 풀고 이상치 제외
+            calibrator.add_view(corners_refined, filename)
+            valid_files.append(image_path)
             valid_images += 1
-            print("✅ 성공")
-            
-            # 첫 번째와 마지막 이미지는 결과 표시 (선택사항)
-            if i == 0 or i == len(image_files) - 1:
-                img_with_corners = img.copy()
-                cv2.drawChessboardCorners(img_with_corners, checkerboard_size, corners_refined, ret)
-                
-                # 결과 이미지 저장
-                result_path = os.path.join(image_folder, f"detected_{filename}")
-                cv2.imwrite(result_path, img_with_corners)
-                
+            status = ""
+            if calibrator.rms is not None:
+                status = f" (RMS {calibrator.rms:.3f}{', 수렴' if calibrator.converged else ''})"
+            print(f"[{i+1:2d}/{len(image_files)}] {filename} ... ✅ 성공{status}")
         else:
-            print("❌ 체커보드 검출 실패")
+            print(f"[{i+1:2d}/{len(image_files)}] {filename} ... ❌ 체커보드 검출 실패")
             failed_images.append(filename)
     
+    # 첫 번째와 마지막 유효 이미지는 결과 표시 (새로 처리한 경우만)
+    for image_path in {valid_files[0], valid_files[-1]} if valid_files else ():
+        if image_path in processed:
+            img_with_corners = cv2.imread(image_path)
+            cv2.drawChessboardCorners(img_with_corners, checkerboard_size,
+                                      corner_results[image_path][1], True)
+            result_path = os.path.join(image_folder, f"detected_{os.path.basename(image_path)}")
+            cv2.imwrite(result_path, img_with_corners)
+    
     print("-" * 60)
     print(f"📊 검출 결과:")
     print(f"   ✅ 성공: {valid_images}개")
@@ -116,33 +207,21 @@ def calibrate_camera_from_images(image_folder, checkerboard_size, square_size):
         print(f"❌ 오류: 유효한 이미지가 부족합니다. (최소 3개 필요, 현재 {valid_images}개)")
         return None
     
-    print(f"\n🔧 카메라 캘리브레이션 수행 중... ({valid_images}개 이미지 사용)")
-    
-    # 이미지 크기 (첫 번째 유효 이미지에서 가져오기)
-    img_shape = gray.shape[::-1]
-    
-    # 카메라 캘리브레이션 실행
-    ret, camera_matrix, dist_coeffs, rvecs, tvecs = cv2.calibrateCamera(
-        objpoints, imgpoints, img_shape, None, None
-    )
-    
-    if not ret:
-        print("❌ 오류: 캘리브레이션이 실패했습니다.")
-        return None
-    
-    # 재투영 오차 계산
-    total_error = 0
-    for i in range(len(objpoints)):
-        imgpoints2, _ = cv2.projectPoints(objpoints[i], rvecs[i], tvecs[i], camera_matrix, dist_coeffs)
-        error = cv2.norm(imgpoints[i], imgpoints2, cv2.NORM_L2) / len(imgpoints2)
-        total_error += error
+    # 뷰가 min_views보다 적으면 아직 한 번도 풀지 않았으므로 여기서 풀기
+    if calibrator.rms is None:
+        calibrator.solve()
     
-    reprojection_error = total_error / len(objpoints)
+    summary = calibrator.summary()
+    print(f"\n🔧 점진적 캘리브레이션 완료: 뷰 {summary['views']}개 사용, {len(summary['rejected'])}개 제외, "
+          f"{summary['solves']}회 풀이{' (수렴)' if summary['converged'] else ''}")
+    print(f"🗺️  코너 분포 (coverage {summary['coverage'] * 100:.0f}%):")
+    print(calibrator.coverage_text())
     
-    return camera_matrix, dist_coeffs, reprojection_error, valid_images
+    return (calibrator.camera_matrix, calibrator.dist_coeffs, calibrator.reprojection_error,
+            summary["views"], calibrator)
 
 def save_calibration_results(camera_matrix, dist_coeffs, reprojection_error, valid_images, 
-                           checkerboard_size, square_size, output_folder):
+                           checkerboard_size, square_size, output_folder, calibrator=None):
     """
     캘리브레이션 결과를 파일로 저장
     """
@@ -189,20 +268,42 @@ def save_calibration_results(camera_matrix, dist_coeffs, reprojection_error, val
         
         f.write("왜곡 계수 (전체):\n")
         f.write(f"[{' '.join([f'{x:.6f}' for x in dist_coeffs.flatten()])}]\n")
+        
+        if calibrator is not None:
+            f.write(f"\n뷰별 RMS 오차 (픽셀):\n")
+            for (name, _), error in zip(calibrator.views, calibrator.view_rms):
+                f.write(f"{name}: {error:.4f}\n")
+            if calibrator.rejected:
+                f.write(f"\n이상치로 제외된 뷰:\n")
+                for name, error in calibrator.rejected:
+                    f.write(f"{name}: {error:.4f}\n")
+            f.write(f"\n코너 분포 (coverage {calibrator.coverage_ratio() * 100:.0f}%):\n")
+            f.write(calibrator.coverage_text() + "\n")
+    
+    coverage_path = None
+    if calibrator is not None:
+        coverage_path = os.path.join(output_folder, "coverage_map.png")
+        cv2.imwrite(coverage_path, calibrator.coverage_image())
     
     print(f"💾 결과 저장 완료:")
     print(f"   📄 카메라 매트릭스: {camera_matrix_path}")
     print(f"   📄 왜곡 계수: {dist_coeffs_path}")
     print(f"   📄 상세 정보: {info_path}")
+    if coverage_path:
+        print(f"   🗺️  코너 분포: {coverage_path}")
 
 def main():
     """메인 함수"""
     print("🎯 체커보드 이미지 캘리브레이션 프로그램")
     print("=" * 60)
     
-    # 이미지 폴더 경로
+    # 이미지 폴더 경로 (인자: [이미지 폴더] [파일 패턴] [--converge], 예: ../../aruco/image_back "*.jpg")
+    # --converge: 파라미터가 수렴하면 나머지 이미지는 사용하지 않음
+    args = [arg for arg in sys.argv[1:] if arg != "--converge"]
+    stop_when_converged = "--converge" in sys.argv[1:]
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    image_folder = os.path.join(script_dir, "checkerboard_images_back")
+    image_folder = args[0] if len(args) > 0 else os.path.join(script_dir, "checkerboard_images_back")
+    image_pattern = args[1] if len(args) > 1 else "capture_*.jpg"
     output_folder = os.path.join(script_dir, "calibration_result")
     
     if not os.path.exists(image_folder):
@@ -210,13 +311,14 @@ def main():
         return
     
     # 캘리브레이션 수행
-    result = calibrate_camera_from_images(image_folder, CHECKERBOARD_SIZE, SQUARE_SIZE)
+    result = calibrate_camera_from_images(image_folder, CHECKERBOARD_SIZE, SQUARE_SIZE, image_pattern,
+                                          stop_when_converged=stop_when_converged)
     
     if result is None:
         print("❌ 캘리브레이션이 실패했습니다.")
         return
     
-    camera_matrix, dist_coeffs, reprojection_error, valid_images = result
+    camera_matrix, dist_coeffs, reprojection_error, valid_images, calibrator = result
     
     # 결과 출력
     print("\n🎉 캘리브레이션 완료!")
@@ -240,7 +342,7 @@ def main():
     
     # 결과 저장
     save_calibration_results(camera_matrix, dist_coeffs, reprojection_error, valid_images,
-                           CHECKERBOARD_SIZE, SQUARE_SIZE, output_folder)
+                           CHECKERBOARD_SIZE, SQUARE_SIZE, output_folder, calibrator)
     
     print(f"\n📁 결과는 다음 폴더에 저장되었습니다: {output_folder}")
     print("🎯 ArUco 마커 거리 측정 등에 사용할 수 있습니다!")
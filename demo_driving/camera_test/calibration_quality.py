@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+캘리브레이션 품질 검사 (로봇에 배포하기 전 통과/실패 판정)
+1. 재투영 오차: 체커보드 이미지 폴더의 모든 뷰를 한 번에 투영해서 코너별 잔차 통계 계산
+   - 이미지 격자별 / 체커보드 코너별 잔차 히트맵 저장
+2. 직진성 검사: 미리 만든 remap 테이블로 왜곡 보정한 이미지에서 체커보드 가로/세로 줄이
+   직선인지 (직선 맞춤 잔차) 확인
+
+사용법:
+  python calibration_quality.py <이미지 폴더> [--pattern "*.jpg"]
+                                [--camera front|back | --matrix camera_matrix.npy --dist dist_coeffs.npy]
+  종료 코드 0 = 통과, 1 = 실패
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from calibrate_from_images import CHECKERBOARD_SIZE, SQUARE_SIZE, collect_corners
+from chessboard_detection import find_chessboard_fast
+from incremental_calibration import make_object_points, project_views, view_residuals
+
+# 판정 기준 (픽셀)
+MAX_RMS = 1.0               # 전체 재투영 RMS
+MAX_P95 = 2.0               # 코너 잔차 95 백분위
+MAX_STRAIGHTNESS_RMS = 0.5  # 보정 이미지에서 체커보드 줄의 직선 맞춤 RMS
+MAX_STRAIGHTNESS = 2.0      # 보정 이미지에서 직선에서 가장 많이 벗어난 코너
+
+HEATMAP_GRID = (16, 12)     # 이미지 격자 히트맵 칸 수 (가로, 세로)
+HEATMAP_CELL = 40           # 체커보드 코너 히트맵 한 칸 크기 (픽셀)
+
+
+def load_calibration(camera=None, matrix_path=None, dist_path=None):
+    """camera(front/back)면 calibration_result의 파일, 아니면 경로로 로드"""
+    if camera is not None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        calibration_dir = os.path.join(script_dir, "calibration_result")
+        matrix_path = os.path.join(calibration_dir, f"camera_{camera}_matrix.npy")
+        dist_path = os.path.join(calibration_dir, f"dist_{camera}_coeffs.npy")
+    return np.load(matrix_path), np.load(dist_path)
+
+
+def undistort_maps(camera_matrix, dist_coeffs, image_size):
+    """왜곡 보정 remap 테이블 (한 번 만들어서 모든 이미지에 재사용)"""
+    return cv2.initUndistortRectifyMap(camera_matrix, dist_coeffs, None, camera_matrix,
+                                       tuple(image_size), cv2.CV_16SC2)
+
+
+def estimate_poses(objp, imgpoints, camera_matrix, dist_coeffs):
+    """고정된 내부 파라미터로 뷰별 자세 추정"""
+    rvecs, tvecs = [], []
+    for corners in imgpoints:
+        _, rvec, tvec = cv2.solvePnP(objp, corners, camera_matrix, dist_coeffs)
+        rvecs.append(rvec)
+        tvecs.append(tvec)
+    return rvecs, tvecs
+
+
+def residual_statistics(residuals):
+    """
+    잔차 (뷰 수, 코너 수, 2) → 통계
+    - corner_bias: 코너별 평균 잔차 벡터 (같은 방향으로 계속 틀리면 모델 오차)
+    - corner_rms: 코너별 RMS
+    """
+    magnitude = np.linalg.norm(residuals, axis=2)
+    return {
+        "rms": float(np.sqrt(np.mean(magnitude ** 2))),
+        "mean": float(magnitude.mean()),
+        "p50": float(np.percentile(magnitude, 50)),
+        "p95": float(np.percentile(magnitude, 95)),
+        "max": float(magnitude.max()),
+        "view_rms": np.sqrt(np.mean(magnitude ** 2, axis=1)),
+        "corner_rms": np.sqrt(np.mean(magnitude ** 2, axis=0)),
+        "corner_bias": residuals.mean(axis=0),
+    }
+
+
+def image_heatmap(points, magnitude, image_size, grid=HEATMAP_GRID):
+    """이미지 격자 칸별 평균 잔차 히트맵 (관측이 없는 칸은 검정)"""
+    width, height = image_size
+    cols, rows = grid
+    x = np.clip((points[:, 0] * cols / width).astype(int), 0, cols - 1)
+    y = np.clip((points[:, 1] * rows / height).astype(int), 0, rows - 1)
+    total = np.zeros((rows, cols))
+    count = np.zeros((rows, cols))
+    np.add.at(total, (y, x), magnitude)
+    np.add.at(count, (y, x), 1)
+    mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+    return render_heatmap(mean, count > 0, (width, height), max(MAX_P95, mean.max()))
+
+
+def corner_heatmap(stats, checkerboard_size):
+    """체커보드 코너별 RMS 히트맵 + 평균 잔차 방향 화살표"""
+    cols, rows = checkerboard_size
+    values = stats["corner_rms"].reshape(rows, cols)
+    cell = HEATMAP_CELL
+    image = render_heatmap(values, np.ones_like(values, bool), (cols * cell, rows * cell), max(MAX_P95, values.max()))
+    bias = stats["corner_bias"].reshape(rows, cols, 2)
+    arrow_scale = cell * 0.4 / max(1e-6, np.abs(bias).max())
+    for r in range(rows):
+        for c in range(cols):
+            center = (c * cell + cell // 2, r * cell + cell // 2)
+            tip = (int(center[0] + bias[r, c, 0] * arrow_scale), int(center[1] + bias[r, c, 1] * arrow_scale))
+            cv2.arrowedLine(image, center, tip, (255, 255, 255), 1, tipLength=0.3)
+    return image
+
+
+def render_heatmap(values, valid, size, vmax):
+    scaled = np.clip(255 * values / vmax, 0, 255).astype(np.uint8)
+    heat = cv2.applyColorMap(cv2.resize(scaled, size, interpolation=cv2.INTER_NEAREST), cv2.COLORMAP_JET)
+    heat[cv2.resize((~valid).astype(np.uint8), size, interpolation=cv2.INTER_NEAREST) > 0] = 0
+    return heat
+
+
+def line_straightness(corners, checkerboard_size):
+    """
+    체커보드 가로줄/세로줄마다 직선 맞춤 (모든 줄을 한 번에 계산)
+
+    Returns:
+        (rms, max) - 직선에서 벗어난 거리 (픽셀)
+    """
+    cols, rows = checkerboard_size
+    grid = corners.reshape(rows, cols, 2).astype(np.float64)
+    deviations = []
+    for lines in (grid, grid.transpose(1, 0, 2)):           # 가로줄 (rows, cols, 2), 세로줄 (cols, rows, 2)
+        centered = lines - lines.mean(axis=1, keepdims=True)
+        covariance = np.einsum("lmi,lmj->lij", centered, centered)
+        _, vectors = np.linalg.eigh(covariance)
+        normal = vectors[:, :, 0]                           # 가장 작은 고유값 방향 = 직선의 법선
+        deviations.append(np.abs(np.einsum("lmi,li->lm", centered, normal)).ravel())
+    deviations = np.concatenate(deviations)
+    return float(np.sqrt(np.mean(deviations ** 2))), float(deviations.max())
+
+
+def check_straightness(image_files, maps, checkerboard_size):
+    """remap 테이블로 보정한 이미지에서 체커보드 직진성 검사"""
+    map1, map2 = maps
+    results = []
+    for image_path in image_files:
+        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if img is None or img.shape[::-1] != map1.shape[1::-1]:
+            continue
+        undistorted = cv2.remap(img, map1, map2, cv2.INTER_LINEAR)
+        found, corners = find_chessboard_fast(undistorted, checkerboard_size)
+        if found:
+            results.append((image_path, *line_straightness(corners, checkerboard_size)))
+    return results
+
+
+def evaluate(image_folder, camera_matrix, dist_coeffs, image_pattern="*.jpg",
+             checkerboard_size=CHECKERBOARD_SIZE, square_size=SQUARE_SIZE, output_folder=None):
+    """
+    품질 검사 실행
+
+    Returns:
+        (passed, report) - report는 통계/판정 사유 딕셔너리, 이미지가 없으면 (False, None)
+    """
+    image_files = sorted(f for f in glob.glob(os.path.join(image_folder, image_pattern))
+                         if not os.path.basename(f).startswith("detected_"))
+    if not image_files:
+        print(f"❌ 오류: {image_folder}에서 이미지를 찾을 수 없습니다.")
+        return False, None
+
+    corner_results, _ = collect_corners(image_files, image_folder, checkerboard_size)
+    views = [(path, corner_results[path][1]) for path in image_files if corner_results[path][0]]
+    sizes = {tuple(corner_results[path][2]) for path, _ in views}
+    if not views:
+        print("❌ 오류: 체커보드가 검출된 이미지가 없습니다.")
+        return False, None
+    if len(sizes) != 1:
+        print(f"❌ 오류: 이미지 해상도가 섞여 있습니다: {sizes}")
+        return False, None
+    image_size = sizes.pop()
+
+    # 1. 재투영 잔차 (모든 뷰 일괄 투영)
+    start = time.time()
+    objp = make_object_points(checkerboard_size, square_size)
+    imgpoints = [corners for _, corners in views]
+    rvecs, tvecs = estimate_poses(objp, imgpoints, camera_matrix, dist_coeffs)
+    projected = project_views(objp, rvecs, tvecs, camera_matrix, dist_coeffs)
+    residuals = view_residuals(imgpoints, projected)
+    stats = residual_statistics(residuals)
+    reprojection_time = time.time() - start
+
+    # 2. 직진성 (remap 테이블 한 번 생성 후 폴더 전체에 적용)
+    start = time.time()
+    maps = undistort_maps(camera_matrix, dist_coeffs, image_size)
+    straightness = check_straightness([path for path, _ in views], maps, checkerboard_size)
+    straightness_time = time.time() - start
+
+    failures = []
+    if stats["rms"] > MAX_RMS:
+        failures.append(f"재투영 RMS {stats['rms']:.3f} > {MAX_RMS}")
+    if stats["p95"] > MAX_P95:
+        failures.append(f"잔차 p95 {stats['p95']:.3f} > {MAX_P95}")
+    if not straightness:
+        failures.append("보정 이미지에서 체커보드를 찾지 못함")
+    else:
+        straight_rms = float(np.sqrt(np.mean([r[1] ** 2 for r in straightness])))
+        straight_max = max(r[2] for r in straightness)
+        if straight_rms > MAX_STRAIGHTNESS_RMS:
+            failures.append(f"직진성 RMS {straight_rms:.3f} > {MAX_STRAIGHTNESS_RMS}")
+        if straight_max > MAX_STRAIGHTNESS:
+            failures.append(f"직진성 최대 {straight_max:.3f} > {MAX_STRAIGHTNESS}")
+
+    print("-" * 60)
+    print(f"📊 재투영 잔차 ({len(views)}개 뷰, {residuals.shape[0] * residuals.shape[1]}개 코너, {reprojection_time * 1000:.0f}ms)")
+    print(f"   RMS {stats['rms']:.3f} / 평균 {stats['mean']:.3f} / p50 {stats['p50']:.3f} / "
+          f"p95 {stats['p95']:.3f} / 최대 {stats['max']:.3f} 픽셀")
+    worst = np.argsort(stats["view_rms"])[::-1][:3]
+    for i in worst:
+        print(f"   나쁜 뷰: {os.path.basename(views[i][0])} (RMS {stats['view_rms'][i]:.3f})")
+    if straightness:
+        print(f"📏 직진성 ({len(straightness)}개 보정 이미지, {straightness_time * 1000:.0f}ms)")
+        print(f"   RMS {straight_rms:.3f} / 최대 {straight_max:.3f} 픽셀")
+
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+        points = np.concatenate([corners.reshape(-1, 2) for corners in imgpoints])
+        magnitude = np.linalg.norm(residuals, axis=2).ravel()
+        cv2.imwrite(os.path.join(output_folder, "residual_image_heatmap.png"),
+                    image_heatmap(points, magnitude, image_size))
+        cv2.imwrite(os.path.join(output_folder, "residual_corner_heatmap.png"),
+                    corner_heatmap(stats, checkerboard_size))
+        print(f"🗺️  잔차 히트맵 저장: {output_folder}")
+
+    report = {
+        "views": len(views),
+        "reprojection": {k: v for k, v in stats.items() if not isinstance(v, np.ndarray)},
+        "straightness": straightness,
+        "failures": failures,
+    }
+    return not failures, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캘리브레이션 품질 검사 (통과/실패 판정)")
+    parser.add_argument("image_folder", help="체커보드 이미지 폴더")
+    parser.add_argument("--pattern", default="*.jpg", help="이미지 파일 패턴")
+    parser.add_argument("--camera", choices=["front", "back"], help="calibration_result의 front/back 파일 사용")
+    parser.add_argument("--matrix", help="camera_matrix.npy 경로")
+    parser.add_argument("--dist", help="dist_coeffs.npy 경로")
+    parser.add_argument("--output", help="히트맵 저장 폴더 (생략하면 저장 안 함)")
+    args = parser.parse_args()
+
+    if args.camera is None and (args.matrix is None or args.dist is None):
+        parser.error("--camera 또는 --matrix/--dist를 지정하세요")
+
+    print("🎯 캘리브레이션 품질 검사")
+    print("=" * 60)
+    camera_matrix, dist_coeffs = load_calibration(args.camera, args.matrix, args.dist)
+    passed, report = evaluate(args.image_folder, camera_matrix, dist_coeffs, args.pattern,
+                              output_folder=args.output)
+
+    print("=" * 60)
+    if passed:
+        print("✅ 통과 - 배포 가능")
+    else:
+        print("❌ 실패 - 배포하지 마세요")
+        for reason in (report or {}).get("failures", []):
+            print(f"   - {reason}")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
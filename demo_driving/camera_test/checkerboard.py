@@ -11,6 +11,8 @@ import time
 import platform
 from datetime import datetime
 
+from chessboard_detection import find_chessboard_fast
+
 # 설정값
 CHECKERBOARD_SIZE = (7, 6)  # 체커보드 내부 코너 개수 (가로, 세로)
 SQUARE_SIZE = 20.0  # 체커보드 한 칸의 실제 크기 (mm)
@@ -20,6 +22,9 @@ CAMERA_WIDTH = 640
 CAMERA_HEIGHT = 480
 CAMERA_FPS = 30
 
+# 실시간 검출 시 축소 크기 (640x480 → 320x240에서 먼저 찾고 원본에서 정밀화)
+LIVE_DETECTION_WIDTH = 320
+
 # 저장 설정
 SAVE_FOLDER = "checkerboard_images_back"
 MIN_DETECTION_INTERVAL = 2.0  # 자동 저장 최소 간격 (초)
@@ -148,18 +153,12 @@ def detect_checkerboard(frame, checkerboard_size):
     """
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     
-    # 체커보드 코너 검출
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-    
-    # 코너 검출
-    ret, corners = cv2.findChessboardCorners(gray, checkerboard_size, None)
+    # 축소 이미지에서 빠른 검출 → 성공한 경우에만 원본 해상도에서 서브픽셀 정밀화
+    ret, corners_refined = find_chessboard_fast(gray, checkerboard_size, max_width=LIVE_DETECTION_WIDTH)
     
     frame_with_corners = frame.copy()
     
     if ret:
-        # 서브픽셀 정확도로 코너 위치 개선
-        corners_refined = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
-        
         # 코너 그리기
         cv2.drawChessboardCorners(frame_with_corners, checkerboard_size, corners_refined, ret)
         
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+빠른 체커보드 검출
+- 축소 이미지에서 CALIB_CB_FAST_CHECK로 먼저 검출 (체커보드가 없는 프레임은 여기서 바로 탈락)
+- 검출된 경우에만 코너를 원본 크기로 확대한 뒤 원본 해상도에서 cornerSubPix로 정밀화
+
+calibrate_from_images.py(일괄 처리)와 checkerboard.py(실시간 캡처)에서 같이 사용
+"""
+
+import cv2
+import numpy as np
+
+# 축소 검출 시 최대 가로 크기 (640x480 카메라 프레임은 그대로, 1920x1080 사진은 1/3로 축소)
+DETECTION_MAX_WIDTH = 640
+
+# 빠른 검출용 플래그: 기본 플래그(적응 이진화 + 정규화) + 체커보드 없는 이미지 빠른 탈락
+FAST_FLAGS = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE + cv2.CALIB_CB_FAST_CHECK
+
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+
+def subpix_window(corners, checkerboard_size, scale):
+    """
+    cornerSubPix 탐색 창 크기
+    확대 오차(약 1/scale 픽셀)를 덮을 만큼 크게 하되, 이웃 코너를 넘지 않도록 격자 간격의 40% 이내로 제한
+    """
+    grid = corners.reshape(checkerboard_size[1], checkerboard_size[0], 2)
+    spacing = min(np.linalg.norm(np.diff(grid, axis=1), axis=2).min(),
+                  np.linalg.norm(np.diff(grid, axis=0), axis=2).min())
+    half = int(round(5 + 2.0 / scale))
+    half = max(2, min(half, int(spacing * 0.4)))
+    return (half, half)
+
+
+def find_chessboard_fast(gray, checkerboard_size, max_width=DETECTION_MAX_WIDTH, fallback=False):
+    """
+    축소 이미지에서 빠르게 검출 후 원본 해상도에서 코너 정밀화
+
+    Args:
+        gray: 그레이스케일 원본 이미지
+        checkerboard_size: 체커보드 내부 코너 개수 (가로, 세로)
+        max_width: 축소 검출 시 최대 가로 크기
+        fallback: True면 빠른 검출 실패 시 원본 해상도 기본 검출을 한 번 더 시도 (느림)
+
+    Returns:
+        (found, corners) - corners는 원본 좌표계 (N, 1, 2) float32, 실패 시 None
+    """
+    height, width = gray.shape[:2]
+    scale = min(1.0, float(max_width) / width)
+    small = gray if scale == 1.0 else cv2.resize(gray, (int(round(width * scale)), int(round(height * scale))),
+                                                 interpolation=cv2.INTER_AREA)
+
+    found, corners = cv2.findChessboardCorners(small, checkerboard_size, FAST_FLAGS)
+    if found:
+        corners = corners.reshape(-1, 1, 2).astype(np.float32)
+        if scale != 1.0:
+            # 축소 이미지의 픽셀 중심 기준 좌표를 원본 좌표로 변환
+            corners = (corners + 0.5) / scale - 0.5
+        window = subpix_window(corners, checkerboard_size, scale)
+        corners = cv2.cornerSubPix(gray, corners, window, (-1, -1), SUBPIX_CRITERIA)
+        return True, corners.reshape(-1, 1, 2)
+
+    if fallback:
+        found, corners = cv2.findChessboardCorners(gray, checkerboard_size, None)
+        if found:
+            corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), SUBPIX_CRITERIA)
+            return True, corners.reshape(-1, 1, 2)
+    return False, None
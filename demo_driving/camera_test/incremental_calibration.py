@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+점진적(온라인) 카메라 캘리브레이션
+- 체커보드 뷰를 한 장씩 추가하면서 이전 결과를 초기값으로 다시 풀기
+- 모든 뷰의 재투영 오차를 한 번에(벡터화) 계산해서 이상치 뷰를 자동 제외
+- 파라미터가 수렴하면 더 이상 이미지를 넣지 않아도 되도록 converged 표시
+- 코너가 이미지의 어디에 찍혔는지 격자별 개수(coverage map) 제공
+
+calibrate_from_images.py에서 사용
+"""
+
+import cv2
+import numpy as np
+
+# 캘리브레이션을 시작할 최소 뷰 수
+MIN_VIEWS = 5
+
+# 이상치 판정: 뷰 RMS 오차가 (중앙값 + OUTLIER_SIGMA × 강건 표준편차)와 OUTLIER_FLOOR 중 큰 값을 넘으면 제외
+OUTLIER_SIGMA = 3.0
+OUTLIER_FLOOR = 1.0  # 픽셀 - 이보다 작은 오차의 뷰는 제외하지 않음
+
+# 수렴 판정: 뷰를 추가해도 fx, fy, cx, cy 변화율이 CONVERGE_TOL 이하, k1 변화가 CONVERGE_K1_TOL 이하인
+# 상태가 CONVERGE_PATIENCE번 연속이면 수렴
+CONVERGE_TOL = 0.005
+CONVERGE_K1_TOL = 0.01
+CONVERGE_PATIENCE = 3
+
+# coverage map 격자 (가로, 세로 칸 수)
+COVERAGE_GRID = (8, 6)
+
+
+def make_object_points(checkerboard_size, square_size):
+    """체커보드 3D 좌표 (N, 3) - mm 단위"""
+    objp = np.zeros((checkerboard_size[0] * checkerboard_size[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:checkerboard_size[0], 0:checkerboard_size[1]].T.reshape(-1, 2)
+    return objp * square_size
+
+
+def project_views(objp, rvecs, tvecs, camera_matrix, dist_coeffs):
+    """
+    모든 뷰를 한 번에 투영
+    뷰별 회전/이동을 NumPy로 카메라 좌표계에 적용한 뒤 projectPoints를 한 번만 호출
+
+    Returns:
+        (뷰 수, 코너 수, 2) 투영 좌표
+    """
+    n_views = len(rvecs)
+    if n_views == 0:
+        return np.zeros((0, len(objp), 2), np.float64)
+    rotations = np.stack([cv2.Rodrigues(np.asarray(r, np.float64))[0] for r in rvecs])    # (V, 3, 3)
+    translations = np.stack([np.asarray(t, np.float64).reshape(3) for t in tvecs])          # (V, 3)
+    camera_points = np.einsum("vij,nj->vni", rotations, objp.astype(np.float64)) + translations[:, None, :]
+    projected, _ = cv2.projectPoints(camera_points.reshape(-1, 1, 3), np.zeros(3), np.zeros(3),
+                                     camera_matrix, dist_coeffs)
+    return projected.reshape(n_views, len(objp), 2)
+
+
+def view_residuals(imgpoints, projected):
+    """관측 코너 - 투영 코너 (뷰 수, 코너 수, 2)"""
+    observed = np.stack([np.asarray(p, np.float64).reshape(-1, 2) for p in imgpoints])
+    return observed - projected
+
+
+def per_view_errors(residuals):
+    """
+    뷰별 오차
+    Returns:
+        rms: 뷰별 RMS 오차 (픽셀)
+        legacy: 기존 calibrate_from_images 방식 오차 (L2 norm / 코너 수)
+    """
+    squared = np.sum(residuals ** 2, axis=2)              # (V, N)
+    rms = np.sqrt(squared.mean(axis=1))
+    legacy = np.sqrt(squared.sum(axis=1)) / residuals.shape[1]
+    return rms, legacy
+
+
+class IncrementalCalibrator:
+    """뷰를 하나씩 추가하며 캘리브레이션을 갱신"""
+    def __init__(self, checkerboard_size, square_size, image_size,
+                 min_views=MIN_VIEWS, outlier_sigma=OUTLIER_SIGMA, outlier_floor=OUTLIER_FLOOR,
+                 converge_tol=CONVERGE_TOL, converge_patience=CONVERGE_PATIENCE, coverage_grid=COVERAGE_GRID):
+        self.checkerboard_size = checkerboard_size
+        self.image_size = tuple(image_size)  # (가로, 세로)
+        self.objp = make_object_points(checkerboard_size, square_size)
+        self.min_views = min_views
+        self.outlier_sigma = outlier_sigma
+        self.outlier_floor = outlier_floor
+        self.converge_tol = converge_tol
+        self.converge_patience = converge_patience
+        self.coverage_grid = coverage_grid
+
+        self.views = []         # [(이름, 코너 (N, 1, 2))] - 현재 사용 중인 뷰
+        self.rejected = []      # [(이름, RMS 오차)] - 이상치로 제외된 뷰
+        self.camera_matrix = None
+        self.dist_coeffs = None
+        self.rvecs = []
+        self.tvecs = []
+        self.rms = None         # calibrateCamera 전체 RMS
+        self.view_rms = np.zeros(0)
+        self.view_legacy = np.zeros(0)
+        self.stable_count = 0
+        self.solve_count = 0
+
+    # ------------------------------------------------------------------
+    # 뷰 추가 / 풀이
+    # ------------------------------------------------------------------
+    def add_view(self, corners, name=None):
+        """
+        뷰 1개 추가 후 (뷰가 충분하면) 다시 풀기
+
+        Returns:
+            현재 사용 중인 뷰 수
+        """
+        corners = np.asarray(corners, np.float32).reshape(-1, 1, 2)
+        if len(corners) != len(self.objp):
+            raise ValueError(f"코너 개수 불일치: {len(corners)} (필요: {len(self.objp)})")
+        self.views.append((name if name is not None else f"view_{len(self.views) + len(self.rejected)}", corners))
+        if len(self.views) < self.min_views:
+            return len(self.views)
+
+        previous = self.parameters()
+        self.solve()
+        self.reject_outliers()
+        current = self.parameters()
+        if previous is not None and self.is_stable(previous, current):
+            self.stable_count += 1
+        else:
+            self.stable_count = 0
+        return len(self.views)
+
+    def solve(self):
+        """현재 뷰로 캘리브레이션 - 이전 결과가 있으면 초기값으로 사용해서 빨리 수렴"""
+        objpoints = [self.objp] * len(self.views)
+        imgpoints = [corners for _, corners in self.views]
+        flags = 0
+        camera_matrix = dist_coeffs = None
+        if self.camera_matrix is not None:
+            flags = cv2.CALIB_USE_INTRINSIC_GUESS
+            camera_matrix = self.camera_matrix.copy()
+            dist_coeffs = self.dist_coeffs.copy()
+        self.rms, self.camera_matrix, self.dist_coeffs, rvecs, tvecs = cv2.calibrateCamera(
+            objpoints, imgpoints, self.image_size, camera_matrix, dist_coeffs, flags=flags)
+        self.rvecs, self.tvecs = list(rvecs), list(tvecs)
+        self.solve_count += 1
+        self.update_errors()
+
+    def update_errors(self):
+        projected = project_views(self.objp, self.rvecs, self.tvecs, self.camera_matrix, self.dist_coeffs)
+        residuals = view_residuals([corners for _, corners in self.views], projected)
+        self.view_rms, self.view_legacy = per_view_errors(residuals)
+
+    def outlier_threshold(self):
+        median = np.median(self.view_rms)
+        mad = np.median(np.abs(self.view_rms - median)) * 1.4826
+        return max(self.outlier_floor, median + self.outlier_sigma * mad)
+
+    def reject_outliers(self):
+        """기준을 넘는 뷰 중 가장 나쁜 것부터 하나씩 빼고 다시 풀기"""
+        while len(self.views) > self.min_views:
+            worst = int(np.argmax(self.view_rms))
+            if self.view_rms[worst] <= self.outlier_threshold():
+                break
+            name, _ = self.views.pop(worst)
+            self.rejected.append((name, float(self.view_rms[worst])))
+            print(f"   ⚠️  이상치 뷰 제외: {name} (RMS {self.view_rms[worst]:.3f} 픽셀)")
+            self.solve()
+
+    # ------------------------------------------------------------------
+    # 수렴 판정
+    # ------------------------------------------------------------------
+    def parameters(self):
+        if self.camera_matrix is None:
+            return None
+        k = self.camera_matrix
+        return np.array([k[0, 0], k[1, 1], k[0, 2], k[1, 2], self.dist_coeffs.ravel()[0]])
+
+    def is_stable(self, previous, current):
+        relative = np.abs(current[:4] - previous[:4]) / np.abs(previous[:4])
+        return bool(np.all(relative <= self.converge_tol) and abs(current[4] - previous[4]) <= CONVERGE_K1_TOL)
+
+    @property
+    def converged(self):
+        return self.stable_count >= self.converge_patience
+
+    # ------------------------------------------------------------------
+    # 결과 / coverage map
+    # ------------------------------------------------------------------
+    @property
+    def reprojection_error(self):
+        """기존 calibrate_from_images와 같은 방식의 평균 재투영 오차"""
+        return float(self.view_legacy.mean()) if len(self.view_legacy) else None
+
+    def coverage_map(self):
+        """격자 칸별 코너 개수 (세로 칸 수, 가로 칸 수)"""
+        cols, rows = self.coverage_grid
+        width, height = self.image_size
+        if not self.views:
+            return np.zeros((rows, cols), np.int32)
+        points = np.concatenate([corners.reshape(-1, 2) for _, corners in self.views])
+        counts, _, _ = np.histogram2d(points[:, 1], points[:, 0], bins=(rows, cols),
+                                      range=((0, height), (0, width)))
+        return counts.astype(np.int32)
+
+    def coverage_ratio(self):
+        """코너가 하나라도 찍힌 격자 칸 비율 (0~1)"""
+        return float(np.count_nonzero(self.coverage_map())) / (self.coverage_grid[0] * self.coverage_grid[1])
+
+    def coverage_text(self):
+        """터미널 출력용 coverage map (칸별 코너 수, 빈 칸은 '.')"""
+        lines = []
+        for row in self.coverage_map():
+            lines.append(" ".join(f"{c:4d}" if c else "   ." for c in row))
+        return "\n".join(lines)
+
+    def coverage_image(self, image=None):
+        """coverage map을 컬러맵으로 그린 이미지 (image를 주면 그 위에 반투명으로 겹침)"""
+        width, height = self.image_size
+        counts = self.coverage_map().astype(np.float32)
+        scaled = (255 * counts / max(1.0, counts.max())).astype(np.uint8)
+        heat = cv2.applyColorMap(cv2.resize(scaled, (width, height), interpolation=cv2.INTER_NEAREST),
+                                 cv2.COLORMAP_JET)
+        heat[cv2.resize((counts == 0).astype(np.uint8), (width, height), interpolation=cv2.INTER_NEAREST) > 0] = 0
+        if image is not None:
+            heat = cv2.addWeighted(image, 0.5, heat, 0.5, 0)
+        for _, corners in self.views:
+            for x, y in corners.reshape(-1, 2):
+                cv2.circle(heat, (int(round(x)), int(round(y))), 2, (255, 255, 255), -1)
+        return heat
+
+    def summary(self):
+        return {
+            "views": len(self.views),
+            "rejected": list(self.rejected),
+            "rms": self.rms,
+            "reprojection_error": self.reprojection_error,
+            "converged": self.converged,
+            "coverage": self.coverage_ratio(),
+            "solves": self.solve_count,
+        }
@@ -71,6 +71,13 @@ def load_calibration_data(camera_type="front"):
         print(f"❌ 캘리브레이션 데이터 로드 실패: {e}")
         return None, None
 
+def get_undistort_maps(maps, camera_matrix, dist_coeffs, frame):
+    """왜곡 보정 remap 테이블 - 해상도가 같으면 재사용 (매 프레임 cv2.undistort 대신 remap만 수행)"""
+    h, w = frame.shape[:2]
+    if maps is None or maps[0].shape[:2] != (h, w):
+        maps = cv2.initUndistortRectifyMap(camera_matrix, dist_coeffs, None, camera_matrix, (w, h), cv2.CV_16SC2)
+    return maps
+
 def test_calibration_realtime():
     """실시간 캘리브레이션 테스트"""
     
@@ -173,6 +180,7 @@ def test_calibration_realtime():
     
     show_comparison = True
     frame_count = 0
+    undistort_maps = None
     
     while True:
         ret, frame = cap.read()
@@ -181,10 +189,11 @@ def test_calibration_realtime():
             break
         
         frame_count += 1
+        undistort_maps = get_undistort_maps(undistort_maps, camera_matrix, dist_coeffs, frame)
         
         if show_comparison:
             # 왜곡 보정 적용
-            undistorted_frame = cv2.undistort(frame, camera_matrix, dist_coeffs)
+            undistorted_frame = cv2.remap(frame, undistort_maps[0], undistort_maps[1], cv2.INTER_LINEAR)
             
             # 두 화면을 나란히 배치
             h, w = frame.shape[:2]
@@ -206,7 +215,7 @@ def test_calibration_realtime():
             
         else:
             # 보정된 화면만 표시
-            undistorted_frame = cv2.undistort(frame, camera_matrix, dist_coeffs)
+            undistorted_frame = cv2.remap(frame, undistort_maps[0], undistort_maps[1], cv2.INTER_LINEAR)
             
             cv2.putText(undistorted_frame, f"Undistorted ({camera_name})", (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
@@ -296,6 +305,7 @@ def test_calibration_with_saved_images():
     print("-" * 50)
     
     current_index = 0
+    undistort_maps = None
     
     while True:
         image_path = image_files[current_index]
@@ -309,7 +319,8 @@ def test_calibration_with_saved_images():
             continue
         
         # 왜곡 보정 적용
-        undistorted_img = cv2.undistort(img, camera_matrix, dist_coeffs)
+        undistort_maps = get_undistort_maps(undistort_maps, camera_matrix, dist_coeffs, img)
+        undistorted_img = cv2.remap(img, undistort_maps[0], undistort_maps[1], cv2.INTER_LINEAR)
         
         # 두 화면을 나란히 배치
         h, w = img.shape[:2]
@@ -1,4 +1,5 @@
 # 기본적으로 필요한 모듈
+import contextlib
 import cv2 as cv
 import numpy as np
 import serial
@@ -10,6 +11,9 @@ from cv2 import aruco
 # 다른 모듈 불러오기
 import driving
 import detect_aruco
+import inference_scheduler
+import telemetry
+import vehicle_gap
 
 # 코드 내에서 사용할 상수 및 변수 정의
 FRAME_WIDTH = 640
@@ -111,11 +115,33 @@ if serial_port:
         print(f"Serial communication error: {e}")
         serial_server = None
 
+# 시리얼 명령을 텔레메트리의 현재 명령(c)으로 기록
+if serial_server is not None:
+    serial_server = telemetry.SerialCommandTap(serial_server, telemetry.publisher)
+
+@contextlib.contextmanager
+def gap_estimation():
+    """
+    리프트 동작(7/8번 명령) 동안만 비전 간격 추정 - with 블록이 끝나면 결과를 읽었든 안 읽었든 중지
+    (추정 스레드가 cap_front를 계속 읽으면 다음 주행의 프레임/CPU를 빼앗음)
+    """
+    if gap_estimator is not None:
+        gap_estimator.start()
+    try:
+        yield
+    finally:
+        if gap_estimator is not None:
+            gap_estimator.stop()
+
 def receive_vehicle_distance_data():
     """
     차량 리프팅 후 STM32에서 전송하는 차량과 로봇 간격 데이터를 수신
     예상 데이터 형식: "150" (mm 단위 정수값, 예: 150mm)
     """
+    if gap_estimator is not None and gap_estimator.running:
+        # 리프트 명령과 함께 시작한 비전 추정이 있으면 시리얼 값과 먼저 준비되는 값 사용
+        return vehicle_gap.receive_gap(serial_server, gap_estimator)
+
     if not serial_server or not serial_server.is_open:
         print("시리얼 연결이 없어 간격 데이터를 받을 수 없습니다.")
         return None
@@ -339,6 +365,15 @@ else:
 camera_front_matrix = np.load(r"camera_value/camera_front_matrix.npy")
 dist_front_coeffs = np.load(r"camera_value/dist_front_coeffs.npy")
 
+# 제어 루프의 카메라 read 사이 처리 시간으로 프레임 여유를 측정 (검출기 추론 간격/입력 크기 조절용)
+if cap_front is not None:
+    cap_front = inference_scheduler.CaptureTap(cap_front, inference_scheduler.scheduler)
+if cap_back is not None:
+    cap_back = inference_scheduler.CaptureTap(cap_back, inference_scheduler.scheduler)
+
+# 리프트 중 전방 카메라로 차량 간격 추정 (YOLO 모델이 없으면 None → 시리얼 간격만 사용)
+gap_estimator = vehicle_gap.create_estimator(cap_front, camera_front_matrix, dist_front_coeffs)
+
 # 보정 행렬과 왜곡 계수를 불러옵니다.
 print("Loaded front camera matrix : \n", camera_front_matrix)
 print("Loaded front distortion coefficients : \n", dist_front_coeffs)
@@ -411,6 +446,10 @@ print(f"[Client] Connected to server: {HOST}:{PORT}")
 # 서버에 기기 타입 전송 (예: robot)
 client_socket.sendall(b"robot\n")
 
+# 텔레메트리 스트림 시작 (기존 sendall과 같은 소켓을 락으로 공유)
+client_socket = telemetry.publisher.attach(client_socket)
+telemetry.publisher.start()
+
 try:
     while True:
         # 서버로부터 명령을 받음
@@ -420,6 +459,7 @@ try:
             break
         command = data.decode().strip()
         print(f"[Server] Command received: {command}")
+        telemetry.publisher.update(step=command.split(",")[0])
 
         # 명령에 따라 동작 수행 (아래는 예시)
         if command.startswith("PARK"):
@@ -438,33 +478,34 @@ try:
                     # 7번 명령 전 버퍼 클리어 (안전장치)
                     serial_server.reset_input_buffer()
                     
-                    serial_server.write(b"7")  # 차량 들어올리기 명령
-                    print("[Client] 들어올리기 완료 신호('a') 대기 중...")
+                    with gap_estimation():  # 리프트 동작 중 간격 추정 (끝나면 항상 중지)
+                        serial_server.write(b"7")  # 차량 들어올리기 명령
+                        print("[Client] 들어올리기 완료 신호('a') 대기 중...")
                     
-                    # STM32로부터 'a' 신호 대기
-                    while True:
-                        if serial_server.in_waiting:
-                            recv = serial_server.read().decode()
-                            print(f"[Client] 시리얼 수신: '{recv}'")
-                            if recv == "a":
-                                print("[Client] 차량 들어올리기 완료!")
+                        # STM32로부터 'a' 신호 대기
+                        while True:
+                            if serial_server.in_waiting:
+                                recv = serial_server.read().decode()
+                                print(f"[Client] 시리얼 수신: '{recv}'")
+                                if recv == "a":
+                                    print("[Client] 차량 들어올리기 완료!")
                                 
-                                # 리프팅 완료 후 차량 간격 데이터 수신
-                                print("[Client] 차량 간격 데이터 수신 시작...")
-                                distance_mm = receive_vehicle_distance_data()
-                                if distance_mm is not None:
-                                    print(f"[Client] 차량과 로봇 간격: {distance_mm}mm ({distance_mm/10.0}cm)")
-                                    # 간격 데이터를 바탕으로 ArUco 인식 거리 계산
-                                    dynamic_target_distance = calculate_aruco_target_distance(distance_mm)
-                                    print(f"[Client] 동적 ArUco 인식 거리: {dynamic_target_distance:.3f}m")
-                                else:
-                                    print("[Client] 차량 간격 데이터 수신 실패 - 기본 거리 사용")
-                                    dynamic_target_distance = DEFAULT_ARUCO_DISTANCE  # 기본값
+                                    # 리프팅 완료 후 차량 간격 데이터 수신
+                                    print("[Client] 차량 간격 데이터 수신 시작...")
+                                    distance_mm = receive_vehicle_distance_data()
+                                    if distance_mm is not None:
+                                        print(f"[Client] 차량과 로봇 간격: {distance_mm}mm ({distance_mm/10.0}cm)")
+                                        # 간격 데이터를 바탕으로 ArUco 인식 거리 계산
+                                        dynamic_target_distance = calculate_aruco_target_distance(distance_mm)
+                                        print(f"[Client] 동적 ArUco 인식 거리: {dynamic_target_distance:.3f}m")
+                                    else:
+                                        print("[Client] 차량 간격 데이터 수신 실패 - 기본 거리 사용")
+                                        dynamic_target_distance = DEFAULT_ARUCO_DISTANCE  # 기본값
                                 
-                                break
-                            else:
-                                print(f"[Client] 예상치 못한 신호: '{recv}' - 계속 대기...")
-                        time.sleep(0.1)
+                                    break
+                                else:
+                                    print(f"[Client] 예상치 못한 신호: '{recv}' - 계속 대기...")
+                            time.sleep(0.1)
                     
                     # 들어올리기 완료 후 정지 및 안정화
                     serial_server.write(b"9")  # 정지 명령
@@ -645,33 +686,34 @@ try:
                     # 8번 명령 전 버퍼 클리어 (안전장치)
                     serial_server.reset_input_buffer()
                     
-                    serial_server.write(b"8")  # 차량 내려놓기 명령
-                    print("[Client] 내려놓기 완료 신호('c') 대기 중...")
+                    with gap_estimation():  # 리프트 동작 중 간격 추정 (끝나면 항상 중지)
+                        serial_server.write(b"8")  # 차량 내려놓기 명령
+                        print("[Client] 내려놓기 완료 신호('c') 대기 중...")
                     
-                    # STM32로부터 'c' 신호 대기
-                    while True:
-                        if serial_server.in_waiting:
-                            recv = serial_server.read().decode()
-                            print(f"[Client] 시리얼 수신: '{recv}'")
-                            if recv == "c":
-                                print("[Client] 차량 내려놓기 완료!")
+                        # STM32로부터 'c' 신호 대기
+                        while True:
+                            if serial_server.in_waiting:
+                                recv = serial_server.read().decode()
+                                print(f"[Client] 시리얼 수신: '{recv}'")
+                                if recv == "c":
+                                    print("[Client] 차량 내려놓기 완료!")
                                 
-                                # 내려놓기 완료 후 차량 간격 데이터 업데이트
-                                print("[Client] 내려놓기 후 차량 간격 데이터 수신 시작...")
-                                final_distance_mm = receive_vehicle_distance_data()
-                                if final_distance_mm is not None:
-                                    print(f"[Client] 최종 차량과 로봇 간격: {final_distance_mm}mm ({final_distance_mm/10.0}cm)")
-                                    # 최종 간격 데이터를 바탕으로 복귀 시 사용할 거리 계산
-                                    final_target_distance = calculate_aruco_target_distance(final_distance_mm)
-                                    print(f"[Client] 복귀용 동적 ArUco 인식 거리: {final_target_distance:.3f}m")
-                                else:
-                                    print("[Client] 최종 차량 간격 데이터 수신 실패 - 기본 거리 사용")
-                                    final_target_distance = DEFAULT_ARUCO_DISTANCE  # 기본값
+                                    # 내려놓기 완료 후 차량 간격 데이터 업데이트
+                                    print("[Client] 내려놓기 후 차량 간격 데이터 수신 시작...")
+                                    final_distance_mm = receive_vehicle_distance_data()
+                                    if final_distance_mm is not None:
+                                        print(f"[Client] 최종 차량과 로봇 간격: {final_distance_mm}mm ({final_distance_mm/10.0}cm)")
+                                        # 최종 간격 데이터를 바탕으로 복귀 시 사용할 거리 계산
+                                        final_target_distance = calculate_aruco_target_distance(final_distance_mm)
+                                        print(f"[Client] 복귀용 동적 ArUco 인식 거리: {final_target_distance:.3f}m")
+                                    else:
+                                        print("[Client] 최종 차량 간격 데이터 수신 실패 - 기본 거리 사용")
+                                        final_target_distance = DEFAULT_ARUCO_DISTANCE  # 기본값
                                 
-                                break
-                            else:
-                                print(f"[Client] 예상치 못한 신호: '{recv}' - 계속 대기...")
-                        time.sleep(0.1)
+                                    break
+                                else:
+                                    print(f"[Client] 예상치 못한 신호: '{recv}' - 계속 대기...")
+                            time.sleep(0.1)
                     
                     # 내려놓기 완료 후 정지 및 안정화
                     serial_server.write(b"9")  # 정지 명령
@@ -989,29 +1031,30 @@ try:
                 # 3. 차량 들어올리기 (7번 명령으로 진입)
                 print("[Client] 차량 들어올리기 시작...")
                 if serial_server is not None:
-                    serial_server.write(b"7")  # 차량 들어올리기 명령
-                    print("[Client] 들어올리기 완료 신호('a') 대기 중...")
+                    with gap_estimation():  # 리프트 동작 중 간격 추정 (끝나면 항상 중지)
+                        serial_server.write(b"7")  # 차량 들어올리기 명령
+                        print("[Client] 들어올리기 완료 신호('a') 대기 중...")
                     
-                    # STM32로부터 'a' 신호 대기
-                    while True:
-                        if serial_server.in_waiting:
-                            recv = serial_server.read().decode()
-                            if recv == "a":
-                                print("[Client] 차량 들어올리기 완료!")
+                        # STM32로부터 'a' 신호 대기
+                        while True:
+                            if serial_server.in_waiting:
+                                recv = serial_server.read().decode()
+                                if recv == "a":
+                                    print("[Client] 차량 들어올리기 완료!")
                                 
-                                # 리프팅 완료 후 차량 간격 데이터 수신
-                                print("[Client] 차량 간격 데이터 수신 시작...")
-                                distance_mm = receive_vehicle_distance_data()
-                                if distance_mm is not None:
-                                    print(f"[Client] 차량과 로봇 간격: {distance_mm}mm ({distance_mm/10.0}cm)")
-                                    # 간격 데이터를 바탕으로 ArUco 인식 거리 계산
-                                    dynamic_target_distance_out = calculate_aruco_target_distance(distance_mm)
-                                    print(f"[Client] 동적 ArUco 인식 거리: {dynamic_target_distance_out:.3f}m")
-                                else:
-                                    print("[Client] 차량 간격 데이터 수신 실패 - 기본 거리 사용")
-                                    dynamic_target_distance_out = DEFAULT_ARUCO_DISTANCE  # 기본값
+                                    # 리프팅 완료 후 차량 간격 데이터 수신
+                                    print("[Client] 차량 간격 데이터 수신 시작...")
+                                    distance_mm = receive_vehicle_distance_data()
+                                    if distance_mm is not None:
+                                        print(f"[Client] 차량과 로봇 간격: {distance_mm}mm ({distance_mm/10.0}cm)")
+                                        # 간격 데이터를 바탕으로 ArUco 인식 거리 계산
+                                        dynamic_target_distance_out = calculate_aruco_target_distance(distance_mm)
+                                        print(f"[Client] 동적 ArUco 인식 거리: {dynamic_target_distance_out:.3f}m")
+                                    else:
+                                        print("[Client] 차량 간격 데이터 수신 실패 - 기본 거리 사용")
+                                        dynamic_target_distance_out = DEFAULT_ARUCO_DISTANCE  # 기본값
                                 
-                                break
+                                    break
                     
                     # 들어올리기 완료 후 정지 및 안정화
                     serial_server.write(b"9")
@@ -1158,32 +1201,33 @@ try:
                     # 8번 명령 전 버퍼 클리어 (안전장치)
                     serial_server.reset_input_buffer()
                     
-                    serial_server.write(b"8")  # 차량 내려놓기 명령
-                    print("[Client] 내려놓기 완료 신호('c') 대기 중...")
+                    with gap_estimation():  # 리프트 동작 중 간격 추정 (끝나면 항상 중지)
+                        serial_server.write(b"8")  # 차량 내려놓기 명령
+                        print("[Client] 내려놓기 완료 신호('c') 대기 중...")
                     
-                    # STM32로부터 'c' 신호 대기
-                    while True:
-                        if serial_server.in_waiting:
-                            recv = serial_server.read().decode()
-                            print(f"[Client] 시리얼 수신: '{recv}'")
-                            if recv == "c":
-                                print("[Client] 차량 내려놓기 완료!")
+                        # STM32로부터 'c' 신호 대기
+                        while True:
+                            if serial_server.in_waiting:
+                                recv = serial_server.read().decode()
+                                print(f"[Client] 시리얼 수신: '{recv}'")
+                                if recv == "c":
+                                    print("[Client] 차량 내려놓기 완료!")
                                 
-                                # 내려놓기 완료 후 차량 간격 데이터 업데이트
-                                print("[Client] 내려놓기 후 차량 간격 데이터 수신 시작...")
-                                final_distance_mm = receive_vehicle_distance_data()
-                                if final_distance_mm is not None:
-                                    print(f"[Client] 최종 차량과 로봇 간격: {final_distance_mm}mm ({final_distance_mm/10.0}cm)")
-                                    # 최종 간격 데이터 확인용 (출차에서는 로그만 기록)
-                                    final_target_distance = calculate_aruco_target_distance(final_distance_mm)
-                                    print(f"[Client] 계산된 ArUco 인식 거리: {final_target_distance:.3f}m")
-                                else:
-                                    print("[Client] 최종 차량 간격 데이터 수신 실패")
+                                    # 내려놓기 완료 후 차량 간격 데이터 업데이트
+                                    print("[Client] 내려놓기 후 차량 간격 데이터 수신 시작...")
+                                    final_distance_mm = receive_vehicle_distance_data()
+                                    if final_distance_mm is not None:
+                                        print(f"[Client] 최종 차량과 로봇 간격: {final_distance_mm}mm ({final_distance_mm/10.0}cm)")
+                                        # 최종 간격 데이터 확인용 (출차에서는 로그만 기록)
+                                        final_target_distance = calculate_aruco_target_distance(final_distance_mm)
+                                        print(f"[Client] 계산된 ArUco 인식 거리: {final_target_distance:.3f}m")
+                                    else:
+                                        print("[Client] 최종 차량 간격 데이터 수신 실패")
                                 
-                                break
-                            else:
-                                print(f"[Client] 예상치 못한 신호: '{recv}' - 계속 대기...")
-                        time.sleep(0.1)
+                                    break
+                                else:
+                                    print(f"[Client] 예상치 못한 신호: '{recv}' - 계속 대기...")
+                            time.sleep(0.1)
                     
                     # 내려놓기 완료 후 정지 및 안정화
                     serial_server.write(b"9")  # 정지 명령
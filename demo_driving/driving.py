@@ -10,10 +10,23 @@ Driving 모듈 - camera_test 최적화 적용
 import cv2
 import cv2.aruco as aruco
 import numpy as np
+import os
 import serial
+import sys
 import time
 import platform
 
+import telemetry
+
+# 공용 이동 인터페이스/도킹 제어기 (저장소 최상위 robot_hal - lhj_agv와 같은 코드)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from robot_hal.docking import DockingController, MarkerObserver
+from robot_hal.stm32 import Stm32SerialBackend, supports_velocity_frames, velocity_frame
+
+# driving_with_marker10_alignment 결합 이동 모드 (combined_motion=True, 'v' 속도 프레임)
+COMBINED_DEADBAND_PX = 5     # 이 편차 이하는 평행이동 0
+COMBINED_FULL_SLIDE_PX = 40  # 이 편차 이상이면 평행이동 최대 속도 (기존 alignment_tolerance)
+
 # 플랫폼 확인
 current_platform = platform.system()
 
@@ -26,7 +39,7 @@ cv_version = cv2.__version__.split(".")
 print(f"OpenCV 버전: {cv2.__version__}, 플랫폼: {current_platform}")
 
 # 플랫폼별 분기 처리 (Jetson의 경우 특별 처리)
-if current_platform == "Linux":  # Jetson Nano/Xavier 등
+if current_platform == "Linux" and hasattr(aruco, "Dictionary_get"):  # Jetson Nano/Xavier 등
     print("Jetson (Linux) 환경 - DetectorParameters_create() 사용")
     marker_dict = aruco.Dictionary_get(aruco.DICT_5X5_250)
     param_markers = aruco.DetectorParameters_create()
@@ -36,7 +49,7 @@ elif int(cv_version[0]) == 3 and int(cv_version[1]) <= 2:
     marker_dict = aruco.Dictionary_get(aruco.DICT_5X5_250)
     param_markers = aruco.DetectorParameters_create()
 else:
-    print("OpenCV 4.x (Windows) - 신규 방식 사용")
+    print("OpenCV 4.x (Windows / 4.7 이상) - 신규 방식 사용")
     marker_dict = aruco.getPredefinedDictionary(aruco.DICT_5X5_250)
     param_markers = aruco.DetectorParameters()
 
@@ -77,6 +90,53 @@ def flush_camera(cap, num=5):
     for _ in range(num):
         cap.read()
 
+# OpenCV 버전 호환 (Jetson의 이전 API / 4.7 이상 ArucoDetector, GUI 없는 빌드) - 시뮬레이터(parking_sim.py)도 같은 코드로 실행
+_aruco_detectors = {}
+_gui_available = True
+
+def detect_markers(gray, aruco_dict, parameters):
+    """(corners, ids, rejected) - detectMarkers가 없으면 ArucoDetector (ids는 이전 API와 같은 (N, 1) 모양)"""
+    if hasattr(aruco, "detectMarkers"):
+        return aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
+    key = (id(aruco_dict), id(parameters))
+    if key not in _aruco_detectors:
+        _aruco_detectors[key] = aruco.ArucoDetector(aruco_dict, parameters)
+    corners, ids, rejected = _aruco_detectors[key].detectMarkers(gray)
+    if ids is not None:
+        ids = ids.reshape(-1, 1)
+    return corners, ids, rejected
+
+def estimate_marker_pose(corners, marker_length, camera_matrix, dist_coeffs):
+    """(rvecs, tvecs) - estimatePoseSingleMarkers와 같은 모양 (N, 1, 3), 없으면 solvePnP(IPPE_SQUARE)"""
+    if hasattr(aruco, "estimatePoseSingleMarkers"):
+        result = aruco.estimatePoseSingleMarkers(corners, marker_length, camera_matrix, dist_coeffs)
+        return result[0], result[1]
+    half = marker_length / 2
+    object_points = np.array([[-half, half, 0], [half, half, 0], [half, -half, 0], [-half, -half, 0]], np.float32)
+    rvecs, tvecs = [], []
+    for c in np.asarray(corners, np.float32).reshape(-1, 4, 2):
+        _, rvec, tvec = cv2.solvePnP(object_points, c, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_IPPE_SQUARE)
+        rvecs.append(rvec.reshape(1, 3))
+        tvecs.append(tvec.reshape(1, 3))
+    return np.array(rvecs), np.array(tvecs)
+
+def poll_key():
+    """cv2.waitKey(1) - GUI 없는 OpenCV에서는 -1"""
+    global _gui_available
+    if _gui_available:
+        try:
+            return cv2.waitKey(1)
+        except cv2.error:
+            _gui_available = False
+    return -1
+
+def close_windows():
+    if _gui_available:
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass
+
 def initialize_robot(cap, aruco_dict, parameters, marker_index, serial_server, camera_matrix, dist_coeffs, is_back_camera=False):
     FRAME_CENTER_X = 320   # 640 x 480 해상도 기준
     FRAME_CENTER_Y = 240
@@ -178,7 +238,7 @@ def initialize_robot(cap, aruco_dict, parameters, marker_index, serial_server, c
                 serial_server.write('9'.encode())  # 정지 명령
                 break
 
-    cv2.destroyAllWindows()
+    close_windows()
 
 # 직진 아르코마커 인식
 def driving(cap, aruco_dict, parameters, marker_index, camera_matrix, dist_coeffs, target_distance=0.4):
@@ -196,6 +256,7 @@ def driving(cap, aruco_dict, parameters, marker_index, camera_matrix, dist_coeff
         if distance is not None:
             distance_cm = distance * 100
             print(f"[ID{marker_index}] Distance: {distance_cm:.1f}cm, Z-Angle: {z_angle:.1f}, Center: ({center_x}, {center_y})")
+            telemetry.publisher.update(marker=marker_index, distance=distance)
 
             # 시각화
             cv2.putText(
@@ -213,9 +274,9 @@ def driving(cap, aruco_dict, parameters, marker_index, camera_matrix, dist_coeff
                 break
 
         #cv2.imshow("frame", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
+        if poll_key() & 0xFF == ord("q"):
             break
-    cv2.destroyAllWindows()
+    close_windows()
 
 def find_aruco_info(frame, aruco_dict, parameters, marker_index, camera_matrix, dist_coeffs, marker_length):
     """
@@ -241,23 +302,15 @@ def find_aruco_info(frame, aruco_dict, parameters, marker_index, camera_matrix,
         # csi_5x5_aruco 방식: 왜곡 보정 먼저 적용
         frame_undistorted = cv2.undistort(frame, camera_matrix, dist_coeffs)
         gray = cv2.cvtColor(frame_undistorted, cv2.COLOR_BGR2GRAY)
-        corners, ids, _ = cv2.aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
+        corners, ids, _ = detect_markers(gray, aruco_dict, parameters)
 
         if ids is not None:
             for i in range(len(ids)):
                 if ids[i][0] == marker_index:
                     # csi_5x5_aruco 방식: 포즈 추정 (OpenCV 버전 호환성 처리)
-                    cv_version = cv2.__version__.split(".")
-                    if int(cv_version[0]) == 3 and int(cv_version[1]) <= 2:
-                        # OpenCV 3.2.x 이하
-                        rvecs, tvecs = cv2.aruco.estimatePoseSingleMarkers(
-                            np.array([corners[i]]), marker_length, camera_matrix, dist_coeffs
-                        )
-                    else:
-                        # OpenCV 3.3.x 이상 또는 4.x
-                        rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(
-                            np.array([corners[i]]), marker_length, camera_matrix, dist_coeffs
-                        )
+                    rvecs, tvecs = estimate_marker_pose(
+                        np.array([corners[i]]), marker_length, camera_matrix, dist_coeffs
+                    )
                     
                     # csi_5x5_aruco 방식: 3D 벡터 크기로 거리 계산
                     distance = np.linalg.norm(tvecs[0][0])
@@ -357,7 +410,7 @@ def advanced_parking_control(cap_front, cap_back, aruco_dict, parameters,
                 if ret_front:
                     # 지정된 마커 탐지 및 중앙정렬
                     gray_front = cv2.cvtColor(frame_front, cv2.COLOR_BGR2GRAY)
-                    corners, ids, _ = cv2.aruco.detectMarkers(gray_front, aruco_dict, parameters=parameters)
+                    corners, ids, _ = detect_markers(gray_front, aruco_dict, parameters)
                     
                     if ids is not None:
                         closest_marker_center = None
@@ -455,21 +508,15 @@ def escape_from_parking(cap, aruco_dict, parameters, marker_index, camera_matrix
 
         # ArUco 마커 검출
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        corners, ids, _ = cv2.aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
+        corners, ids, _ = detect_markers(gray, aruco_dict, parameters)
 
         if ids is not None:
             for i in range(len(ids)):
                 if ids[i][0] == marker_index:
                     # 마커 발견 - 거리 계산
-                    cv_version = cv2.__version__.split(".")
-                    if int(cv_version[0]) == 3 and int(cv_version[1]) <= 2:
-                        rvecs, tvecs = cv2.aruco.estimatePoseSingleMarkers(
-                            np.array([corners[i]]), marker_length, camera_matrix, dist_coeffs
-                        )
-                    else:
-                        rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(
-                            np.array([corners[i]]), marker_length, camera_matrix, dist_coeffs
-                        )
+                    rvecs, tvecs = estimate_marker_pose(
+                        np.array([corners[i]]), marker_length, camera_matrix, dist_coeffs
+                    )
                     
                     distance = np.linalg.norm(tvecs[0][0])
                     print(f"[Escape] 마커 {marker_index} 거리: {distance:.3f}m (목표: {target_distance}m 이상)")
@@ -481,17 +528,18 @@ def escape_from_parking(cap, aruco_dict, parameters, marker_index, camera_matrix
                     break
         
         # ESC 키로 강제 종료
-        if cv2.waitKey(1) & 0xFF == 27:  # ESC 키
+        if poll_key() & 0xFF == 27:  # ESC 키
             print("[Escape] 사용자가 탈출을 중단했습니다")
             break
     
-    cv2.destroyAllWindows()
+    close_windows()
     return False
 
 def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_markers, target_marker_id, 
                                    camera_front_matrix, dist_front_coeffs,
                                    camera_back_matrix, dist_back_coeffs, target_distance=0.15, 
-                                   serial_server=None, direction="forward", opposite_camera=False, use_command_7=False):
+                                   serial_server=None, direction="forward", opposite_camera=False, use_command_7=False,
+                                   combined_motion=False):
     """
     10번 마커를 기준으로 중앙 정렬하면서 특정 마커를 찾을 때까지 직진/후진하는 함수
     
@@ -510,6 +558,8 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
     - direction: 이동 방향 ("forward" 또는 "backward")
     - opposite_camera: True면 진행방향과 반대 카메라 사용 (예: 전방카메라로 후진)
     - use_command_7: True면 후진 시 b"2" 대신 b"7" 명령 사용
+    - combined_motion: True면 멈추고 평행이동하는 대신 전진/후진 + 편차 비례 평행이동을 매 프레임 한 번에 전송
+                       ('v' 속도 프레임 - '?' 기능 확인에 응답한 펌웨어에서만, 7번 명령과는 같이 못 씀)
     
     Returns:
     - bool: 목표 마커 발견 시 True, 실패 시 False
@@ -518,6 +568,13 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
     print(f"[Marker10 Alignment] 시작 - 목표 마커: {target_marker_id}, 방향: {direction}")
     print(f"[Marker10 Alignment] 반대 카메라 사용: {opposite_camera}")
     print(f"[Marker10 Alignment] 7번 명령 사용: {use_command_7}")
+    if combined_motion and (use_command_7 or serial_server is None):
+        print("[Marker10 Alignment] 7번 명령/시리얼 없음 - 결합 이동 모드 대신 기존 평행이동 방식 사용")
+        combined_motion = False
+    if combined_motion and not supports_velocity_frames(serial_server):
+        print("[Marker10 Alignment] 펌웨어가 속도 프레임을 지원하지 않음 - 기존 평행이동 방식 사용")
+        combined_motion = False
+    print(f"[Marker10 Alignment] 결합 이동 모드: {combined_motion}")
     print("[Marker10 Alignment] 10번 마커로 중앙 정렬하면서 진행합니다.")
     
     # 실제 사용할 명령 결정
@@ -595,6 +652,10 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
     last_alignment_time = time.time()
     alignment_interval = 0.4  # 정렬 명령 간격
     
+    # 결합 이동 모드: 편차 +(마커가 화면 오른쪽)일 때 평행이동 방향 (아래 평행이동 방향 선택과 같은 규칙)
+    forward_ratio = 1.0 if direction == "forward" else -1.0
+    positive_deviation_left = 1.0 if (direction == "forward") == opposite_camera else -1.0
+    
     frame_count = 0
     status_interval = 30  # 30프레임마다 상태 출력
     
@@ -602,6 +663,7 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
     
     while True:
         frame_count += 1
+        lateral_ratio = 0.0  # 결합 이동 모드 평행이동 비율 (10번 마커가 안 보이면 0)
         ret, frame = cap.read()
         if not ret:
             print("[Marker10 Alignment] 카메라 프레임 읽기 실패")
@@ -616,7 +678,7 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
         gray = cv2.cvtColor(undistorted_frame, cv2.COLOR_BGR2GRAY)
         
         # ArUco 마커 검출
-        corners, ids, _ = aruco.detectMarkers(gray, marker_dict, parameters=param_markers)
+        corners, ids, _ = detect_markers(gray, marker_dict, param_markers)
         
         # 검출된 마커가 있는 경우
         if ids is not None:
@@ -629,12 +691,13 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
                 target_idx = np.where(ids == target_marker_id)[0][0]
                 
                 # 목표 마커와의 거리 측정
-                target_rvecs, target_tvecs, _ = aruco.estimatePoseSingleMarkers(
+                target_rvecs, target_tvecs = estimate_marker_pose(
                     corners[target_idx:target_idx+1], marker_length, camera_matrix, dist_coeffs
                 )
                 target_distance_measured = np.linalg.norm(target_tvecs[0][0])
                 
                 print(f"[Marker10 Alignment] 목표 마커 {target_marker_id} 발견! 거리: {target_distance_measured:.3f}m")
+                telemetry.publisher.update(marker=target_marker_id, distance=target_distance_measured)
                 
                 # 목표 거리에 도달했으면 완료
                 if opposite_camera == False:
@@ -664,12 +727,18 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
                 
                 # 중앙에서의 편차 계산
                 deviation_x = center_x - frame_center_x
+                telemetry.publisher.update(deviation=deviation_x)
                 
                 print(f"[Marker10 Alignment] 10번 마커 발견 - 중심: ({center_x}, {center_y}), 편차: {deviation_x}")
                 
-                # 중앙 정렬이 필요한 경우 (일정 간격으로만 실행)
+                # 결합 이동 모드: 편차에 비례한 평행이동 속도 (아래에서 진행 방향과 함께 전송)
                 current_time = time.time()
-                if abs(deviation_x) > alignment_tolerance and current_time - last_alignment_time > alignment_interval:
+                if combined_motion:
+                    slide = np.clip((abs(deviation_x) - COMBINED_DEADBAND_PX) / (COMBINED_FULL_SLIDE_PX - COMBINED_DEADBAND_PX), 0.0, 1.0)
+                    lateral_ratio = float(np.sign(deviation_x) * positive_deviation_left * slide)
+                    print(f"[Marker10 Alignment] 결합 이동 - 편차: {deviation_x}, 평행이동 비율: {lateral_ratio:+.2f}")
+                # 중앙 정렬이 필요한 경우 (일정 간격으로만 실행)
+                elif abs(deviation_x) > alignment_tolerance and current_time - last_alignment_time > alignment_interval:
                     print(f"[Marker10 Alignment] 중앙보정 필요! 편차: {deviation_x} (허용값: {alignment_tolerance})")
                     if serial_server:
                         print(f"[Marker10 Alignment] 시리얼 서버 연결 상태: OK")
@@ -733,7 +802,7 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
                             gray_slide = cv2.cvtColor(undistorted_frame_slide, cv2.COLOR_BGR2GRAY)
                             
                             # ArUco 마커 검출
-                            corners_slide, ids_slide, _ = aruco.detectMarkers(gray_slide, marker_dict, parameters=param_markers)
+                            corners_slide, ids_slide, _ = detect_markers(gray_slide, marker_dict, param_markers)
                             
                             # 10번 마커 다시 확인
                             if ids_slide is not None:
@@ -745,6 +814,7 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
                                     # 10번 마커 중심점 재계산
                                     center_x_slide = int(marker10_corners_slide[0][:, 0].mean())
                                     deviation_x_slide = center_x_slide - frame_center_x
+                                    telemetry.publisher.update(deviation=deviation_x_slide)
                                     
                                     print(f"[Marker10 Alignment] 평행이동 중 - 편차: {deviation_x_slide}")
                                     
@@ -789,8 +859,12 @@ def driving_with_marker10_alignment(cap_front, cap_back, marker_dict, param_mark
         else:
             print("[Marker10 Alignment] 마커 검출 실패 - 화면에 마커가 없음")
         
+        # 결합 이동 모드: 진행 방향 + 평행이동을 한 프레임으로 (매 프레임 갱신)
+        if combined_motion:
+            serial_server.write(velocity_frame(forward_ratio, lateral_ratio))
+        
         # ESC 키로 종료
-        if cv2.waitKey(1) & 0xFF == 27:
+        if poll_key() & 0xFF == 27:
             print("[Marker10 Alignment] 사용자가 중단했습니다")
             if serial_server:
                 serial_server.write(direction_commands["stop"])
@@ -879,7 +953,7 @@ def command7_backward_with_sensor_control(
         gray = cv2.cvtColor(undistorted_frame, cv2.COLOR_BGR2GRAY)
         
         # ArUco 마커 검출
-        corners, ids, _ = cv2.aruco.detectMarkers(gray, marker_dict, parameters=param_markers)
+        corners, ids, _ = detect_markers(gray, marker_dict, param_markers)
         
         # 마커가 검출된 경우 중앙정렬 처리
         if ids is not None and len(ids) > 0:
@@ -935,7 +1009,7 @@ def command7_backward_with_sensor_control(
                             gray_slide = cv2.cvtColor(undistorted_frame_slide, cv2.COLOR_BGR2GRAY)
                             
                             # ArUco 마커 검출
-                            corners_slide, ids_slide, _ = aruco.detectMarkers(gray_slide, marker_dict, parameters=param_markers)
+                            corners_slide, ids_slide, _ = detect_markers(gray_slide, marker_dict, param_markers)
                             
                             # 마커 재확인
                             if ids_slide is not None:
@@ -1002,7 +1076,7 @@ def command7_backward_with_sensor_control(
                 last_alignment_time = current_time
         
         # ESC 키로 종료
-        if cv2.waitKey(1) & 0xFF == 27:
+        if poll_key() & 0xFF == 27:
             print("[Command7 Backward] 사용자가 중단했습니다")
             serial_server.write(direction_commands["stop"])
             return False
@@ -1024,7 +1098,7 @@ def command7_backward_with_sensor_control(
                 print(f"[Command7 Backward] 예상치 못한 신호: '{recv}' - 'a' 신호 계속 대기...")
         
         # ESC 키로 종료
-        if cv2.waitKey(1) & 0xFF == 27:
+        if poll_key() & 0xFF == 27:
             print("[Command7 Backward] 사용자가 중단했습니다")
             return False
         
@@ -1106,7 +1180,7 @@ def sensor_based_backward_with_alignment(cap, marker_dict, param_markers,
         gray = cv2.cvtColor(undistorted_frame, cv2.COLOR_BGR2GRAY)
         
         # ArUco 마커 검출
-        corners, ids, _ = cv2.aruco.detectMarkers(gray, marker_dict, parameters=param_markers)
+        corners, ids, _ = detect_markers(gray, marker_dict, param_markers)
         
         # 마커가 검출된 경우
         if ids is not None and len(ids) > 0:
@@ -1163,7 +1237,7 @@ def sensor_based_backward_with_alignment(cap, marker_dict, param_markers,
                 last_alignment_time = current_time
         
         # ESC 키로 종료
-        if cv2.waitKey(1) & 0xFF == 27:
+        if poll_key() & 0xFF == 27:
             print("[Sensor Backward] 사용자가 중단했습니다")
             serial_server.write(direction_commands["stop"])
             return False
@@ -1249,7 +1323,7 @@ def slide_until_marker_detected(cap, marker_dict, param_markers,
         gray = cv2.cvtColor(undistorted_frame, cv2.COLOR_BGR2GRAY)
         
         # ArUco 마커 검출
-        corners, ids, _ = cv2.aruco.detectMarkers(gray, marker_dict, parameters=param_markers)
+        corners, ids, _ = detect_markers(gray, marker_dict, param_markers)
         
         # 주기적 상태 출력
         if frame_count % status_interval == 0:
@@ -1286,7 +1360,7 @@ def slide_until_marker_detected(cap, marker_dict, param_markers,
                 return True
         
         # ESC 키로 수동 종료
-        if cv2.waitKey(1) & 0xFF == 27:
+        if poll_key() & 0xFF == 27:
             print("[Slide Until Marker] 사용자가 중단했습니다")
             serial_server.write(direction_commands["stop"])
             return False
@@ -1296,3 +1370,24 @@ def slide_until_marker_detected(cap, marker_dict, param_markers,
     
     return False
 
+
+def dock_to_marker(cap, marker_dict, param_markers, marker_index, serial_server,
+                   camera_matrix, dist_coeffs, stop_distance=0.3, timeout=30.0):
+    """
+    공용 연속 도킹 제어기(robot_hal.docking)로 마커 앞 stop_distance(m)까지 접근
+    좌우 편차와 거리를 동시에 보면서 STM32 방향 명령(1/2/5/6/9)을 고름 (정렬 후 직진 대신)
+
+    Returns:
+    - True: 목표 거리 도달 / False: 실패 또는 시간 초과
+    """
+    if serial_server is None:
+        print("[Dock] 시리얼 통신이 연결되지 않았습니다.")
+        return False
+    backend = Stm32SerialBackend(serial_server)
+    observer = MarkerObserver(cap, camera_matrix, dist_coeffs, marker_dict, param_markers,
+                              marker_length, marker_id=marker_index)
+    print(f"[Dock] 마커 {marker_index} 도킹 시작 (목표 거리 {stop_distance * 100:.0f}cm)")
+    try:
+        return DockingController(backend, observer).dock(stop_distance=stop_distance, timeout=timeout)
+    finally:
+        backend.stop()
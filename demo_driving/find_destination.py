@@ -99,6 +99,38 @@ def find_car(parking_lot: list, car_number: str):
     print(f"차량 {car_number}을 찾을 수 없습니다.")
     return None
 
+def iter_spaces(parking_lot: list):
+    """DFS와 같은 순서로 모든 주차칸을 (sector, side, subzone, direction, space)로 순회"""
+    for sector_idx, sector in enumerate(parking_lot):
+        for side in ["left", "right"]:
+            subzones = getattr(sector, side)
+            for subzone_idx, subzone in enumerate(subzones):
+                for direction in ["left", "right"]:
+                    yield (sector_idx+1, side, subzone_idx+1, direction, getattr(subzone, direction))
+
+def find_empty_spaces(parking_lot: list, count: int):
+    """빈자리를 DFS 순서로 최대 count개 찾음 (일괄 입차용, 한 번만 순회)"""
+    result = []
+    if count <= 0:
+        return result
+    for sector, side, subzone, direction, space in iter_spaces(parking_lot):
+        if space.is_empty():
+            result.append((sector, side, subzone, direction))
+            if len(result) == count:
+                break
+    return result
+
+def find_cars(parking_lot: list, car_numbers):
+    """여러 차량의 위치를 한 번의 순회로 찾음 (일괄 출차용) -> {car_number: 위치}"""
+    wanted = set(car_numbers)
+    result = {}
+    for sector, side, subzone, direction, space in iter_spaces(parking_lot):
+        if space.car_number in wanted:
+            result[space.car_number] = (sector, side, subzone, direction)
+            if len(result) == len(wanted):
+                break
+    return result
+
 def park_car_at(parking_lot: list, sector_idx: int, side: str, subzone_idx: int, direction: str, car_number: str = ""):
     sector_idx -= 1
     subzone_idx -= 1
@@ -114,6 +146,17 @@ def park_car_at(parking_lot: list, sector_idx: int, side: str, subzone_idx: int,
     print(f"Vehicle {car_number} parked at sector {sector_idx+1}, {side}, subzone {subzone_idx+1}, {direction}.")
     return True
 
+def remove_car_at(parking_lot: list, sector_idx: int, side: str, subzone_idx: int, direction: str):
+    """주차칸 비우기 (출차 완료 시) - park_car_at은 빈칸에만 주차하므로 별도 함수 사용"""
+    if side not in ["left", "right"] or direction not in ["left", "right"]:
+        print("Error: side와 direction은 left 또는 right여야 합니다.")
+        return None
+    subzone = getattr(parking_lot[sector_idx - 1], side)[subzone_idx - 1]
+    space = getattr(subzone, direction)
+    car_number = space.car_number
+    space.car_number = None
+    return car_number
+
 if __name__ == "__main__":
     # 테스트: 모든 공간이 비어있음
     print(DFS(parking_lot))  # 섹터 1, 방향 left, subzone 1, 방향 left
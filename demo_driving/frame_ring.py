@@ -0,0 +1,163 @@
+"""
+공유 메모리 프레임 링 버퍼
+카메라 스레드(쓰기)와 검출 워커(읽기) 사이에서 프레임을 복사/파일 저장 없이 넘기기 위한 모듈.
+미리 할당한 슬롯 N개에 카메라가 직접 프레임을 쓰고(cap.read(slot)), 워커는 가장 최신 시퀀스 번호의
+슬롯만 읽는다. 읽는 동안 슬롯은 고정(pin)되어 덮어써지지 않고, 밀린 오래된 프레임은 자동으로 건너뛴다.
+
+- 쓰기: index, buf = ring.write_slot() → buf에 프레임 채우기 → ring.publish(index, tag)
+- 읽기: frames = ring.read_new(last_seq) → 처리 → ring.release(index)
+- 다른 프로세스: FrameRing(shape, name=ring.name, create=False, lock=같은 multiprocessing.Lock)
+  (슬롯 수는 공유 메모리 헤더에서 읽음)
+
+YOLO 엔진(yolo_engine.py)에서 사용하며, ArUco 검출 루프에도 같은 방식으로 쓸 수 있다.
+"""
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_SLOTS = 4
+
+# 헤더 (int64): [슬롯 수, 시퀀스 카운터, 최신 슬롯, 슬롯별 (시퀀스, 읽는 중인 수, 쓰는 중, 태그)...]
+_SLOTS = 0
+_COUNTER = 1
+_LATEST = 2
+_SLOT_BASE = 3
+_SLOT_FIELDS = 4
+_SEQ, _PINS, _WRITING, _TAG = range(_SLOT_FIELDS)
+
+
+class FrameRing:
+    def __init__(self, shape, dtype=np.uint8, slots=DEFAULT_SLOTS, name=None, create=True, lock=None):
+        """
+        Args:
+            shape: 프레임 크기 (예: (480, 640, 3))
+            slots: 슬롯 수 - 동시에 읽는 워커 수 + 2 이상 (쓰는 슬롯 1 + 최신 슬롯 1), 연결할 때는 무시
+            name: 공유 메모리 이름 (None이면 자동 생성)
+            create: False면 이미 만들어진 링(name)에 연결
+            lock: 다른 프로세스와 같이 쓸 경우 multiprocessing.Lock (기본: 스레드 락)
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        if create:
+            header_bytes = (_SLOT_BASE + slots * _SLOT_FIELDS) * 8
+            self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                                  size=header_bytes + self.frame_bytes * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            slots = int(np.ndarray((1,), np.int64, self.shm.buf)[0])
+            header_bytes = (_SLOT_BASE + slots * _SLOT_FIELDS) * 8
+        self.slots = slots
+        self.name = self.shm.name
+        self.owner = create
+        self.header = np.ndarray((_SLOT_BASE + slots * _SLOT_FIELDS,), np.int64, self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.shape, self.dtype, self.shm.buf, offset=header_bytes)
+        if create:
+            self.header[:] = 0
+            self.header[_SLOTS] = slots
+            self.header[_LATEST] = -1
+        self.lock = lock if lock is not None else threading.Lock()
+        self.cond = threading.Condition()   # 같은 프로세스 안에서 새 프레임 알림용
+
+    def _field(self, index, field):
+        return _SLOT_BASE + index * _SLOT_FIELDS + field
+
+    # ------------------------------------------------------------------
+    # 쓰기 (카메라 스레드)
+    # ------------------------------------------------------------------
+    def write_slot(self):
+        """
+        쓸 슬롯 확보 - 읽는 중이 아니고 최신 프레임도 아닌 슬롯 중 가장 오래된 것
+
+        Returns:
+            (index, 프레임 버퍼) - 모든 슬롯이 읽히는 중이면 (None, None)
+        """
+        with self.lock:
+            latest = self.header[_LATEST]
+            candidates = [i for i in range(self.slots)
+                          if i != latest and self.header[self._field(i, _PINS)] == 0
+                          and self.header[self._field(i, _WRITING)] == 0]
+            if not candidates:
+                return None, None
+            index = min(candidates, key=lambda i: self.header[self._field(i, _SEQ)])
+            self.header[self._field(index, _WRITING)] = 1
+            self.header[self._field(index, _SEQ)] = 0   # 쓰는 동안은 읽기 대상에서 제외
+        return index, self.frames[index]
+
+    def publish(self, index, tag=0):
+        """슬롯 쓰기 완료 - 새 시퀀스 번호를 붙여 최신 프레임으로 등록"""
+        with self.lock:
+            self.header[_COUNTER] += 1
+            seq = int(self.header[_COUNTER])
+            self.header[self._field(index, _SEQ)] = seq
+            self.header[self._field(index, _TAG)] = tag
+            self.header[self._field(index, _WRITING)] = 0
+            self.header[_LATEST] = index
+        with self.cond:
+            self.cond.notify_all()
+        return seq
+
+    def cancel(self, index):
+        """쓰기 취소 (카메라 읽기 실패 등)"""
+        with self.lock:
+            self.header[self._field(index, _WRITING)] = 0
+
+    def write(self, frame, tag=0):
+        """이미 있는 프레임을 슬롯에 복사해서 등록 (추가 메모리 할당 없음). 슬롯이 없으면 None"""
+        index, buf = self.write_slot()
+        if index is None:
+            return None
+        np.copyto(buf, frame)
+        return self.publish(index, tag)
+
+    # ------------------------------------------------------------------
+    # 읽기 (검출 워커)
+    # ------------------------------------------------------------------
+    def read_new(self, last_seq=0, limit=1):
+        """
+        last_seq 이후에 등록된 프레임 중 최신 limit개를 고정(pin)해서 반환 (오래된 순)
+        다 쓰면 각 index를 release 해야 함
+
+        Returns:
+            [(seq, index, 프레임 배열, tag)] - 새 프레임이 없으면 빈 목록
+        """
+        with self.lock:
+            fresh = [(int(self.header[self._field(i, _SEQ)]), i) for i in range(self.slots)
+                     if self.header[self._field(i, _SEQ)] > last_seq]
+            fresh.sort()
+            fresh = fresh[-limit:]
+            for _, i in fresh:
+                self.header[self._field(i, _PINS)] += 1
+            return [(seq, i, self.frames[i], int(self.header[self._field(i, _TAG)])) for seq, i in fresh]
+
+    def release(self, index):
+        with self.lock:
+            if self.header[self._field(index, _PINS)] > 0:
+                self.header[self._field(index, _PINS)] -= 1
+
+    def wait(self, last_seq, timeout=1.0):
+        """last_seq보다 새 프레임이 등록될 때까지 대기 (다른 프로세스가 쓰는 경우 짧게 폴링)"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while self.latest_seq() <= last_seq:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(min(remaining, 0.005))
+        return True
+
+    def latest_seq(self):
+        return int(self.header[_COUNTER])
+
+    # ------------------------------------------------------------------
+    # 정리
+    # ------------------------------------------------------------------
+    def close(self):
+        # numpy 뷰를 먼저 놓아야 공유 메모리를 닫을 수 있음
+        self.header = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,298 @@
+"""
+검출기 추론 스케줄러
+젯슨 CPU에서 ArUco 제어 루프와 YOLO 같은 무거운 검출기를 같이 돌릴 때,
+제어 루프의 프레임별 여유 시간(slack)을 재서 검출기의 프레임 간격(stride)과 입력 크기를 자동으로 조절한다.
+
+- 제어 루프: 카메라를 CaptureTap으로 감싸면 cap.read() 사이의 처리 시간을 자동으로 측정
+  (직접 쓰려면 frame_start() / frame_end())
+- 검출기: due()로 stride 확인 → acquire()로 제어 프레임 사이 빈 시간에만 추론 시작 → record_inference()
+  추론 예상 시간이 다음 제어 프레임 전까지 남은 시간보다 길면 시작하지 않으므로 제어 프레임을 밀어내지 않는다.
+- 결정: DECISION_WINDOW 프레임마다 여유가 부족하면 한 단계 낮추고(stride↑, 입력 크기↓),
+  UPGRADE_WINDOWS번 연속 여유가 충분하면 한 단계 올린다.
+- 지표: metrics() / metrics_text() (단계 변경은 로그로도 출력)
+
+제어 루프가 없으면(측정된 프레임이 없으면) 항상 추론을 허용하고 단계도 바꾸지 않는다.
+"""
+import threading
+import time
+from collections import deque
+
+CONTROL_PERIOD = 1 / 30.0       # 제어 프레임 기본 주기 (카메라 30fps) - 실제 간격으로 계속 갱신
+INPUT_SIZES = (416, 320, 256, 224)  # 검출기 입력 크기 후보 (32의 배수)
+MAX_STRIDE = 15                 # 최대 프레임 간격 (기존 yolo_fast.py 고정값)
+DECISION_WINDOW = 30            # 이 프레임 수마다 단계 결정
+UPGRADE_WINDOWS = 3             # 연속으로 여유가 있어야 단계를 올리는 구간 수
+LOW_SLACK = 0.25                # 평균 여유가 주기의 이 비율보다 적으면 단계 낮춤
+HIGH_SLACK = 0.6                # 평균 여유가 주기의 이 비율보다 많으면 단계 올림 후보
+MAX_DEFER_RATIO = 0.5           # 추론 시도 중 이 비율 이상이 시간 부족으로 밀리면 단계 낮춤
+SAFETY_MARGIN = 0.002           # 추론 예상 시간에 더하는 여유 (초)
+IDLE_GAP = 3.0                  # 프레임 간격이 주기의 이 배수보다 길면 제어 루프가 쉬는 중으로 봄
+EMA_ALPHA = 0.2
+DECISION_LOG_SIZE = 20
+
+
+def build_levels(input_sizes=INPUT_SIZES, max_stride=MAX_STRIDE):
+    """
+    (stride, 입력 크기) 단계 목록 - 0번이 가장 무거움
+    먼저 stride를 4까지 늘리고, 그다음 입력 크기를 줄이고, 마지막으로 stride를 최대까지 늘림
+    """
+    sizes = sorted(input_sizes, reverse=True)
+    levels = [(stride, sizes[0]) for stride in (1, 2, 4) if stride <= max_stride]
+    stride = levels[-1][0]
+    levels += [(stride, size) for size in sizes[1:]]
+    while stride * 2 < max_stride:
+        stride *= 2
+        levels.append((stride, sizes[-1]))
+    if stride < max_stride:
+        levels.append((max_stride, sizes[-1]))
+    return levels
+
+
+class InferenceScheduler:
+    def __init__(self, period=CONTROL_PERIOD, input_sizes=INPUT_SIZES, max_input_size=None,
+                 max_stride=MAX_STRIDE, window=DECISION_WINDOW):
+        """
+        Args:
+            max_input_size: 검출기 최대 입력 크기 (엔진 설정값) - 이보다 큰 후보는 제외
+        """
+        self.input_sizes = tuple(input_sizes)
+        self.max_stride = max_stride
+        self.levels = []
+        self.level = 0
+        self.set_max_input_size(max_input_size)
+        self.window = window
+        self.cond = threading.Condition()
+
+        # 제어 루프 측정값
+        self.period = period
+        self.in_frame = False
+        self.frame_started = None
+        self.last_start = None
+        self.last_end = None
+        self.control_frames = 0
+        self.deadline_misses = 0
+        self.overlap_misses = 0         # 추론 중에 난 마감 초과
+        self.slack_ema = None
+        self.min_slack = None
+
+        # 검출기 측정값
+        self.inferring = False
+        self.inference_ema = {}         # {입력 크기: 평균 추론 시간}
+        self.inferences = 0
+        self.deferred = 0
+
+        # 현재 결정 구간
+        self.window_slack = []
+        self.window_misses = 0
+        self.window_attempts = 0
+        self.window_deferred = 0
+        self.good_windows = 0
+        self.changes = 0
+        self.decisions = deque(maxlen=DECISION_LOG_SIZE)
+
+    def set_max_input_size(self, max_input_size):
+        """검출기 최대 입력 크기에 맞춰 단계 목록 다시 만들기 (가장 무거운 단계부터 시작)"""
+        sizes = self.input_sizes
+        if max_input_size is not None:
+            sizes = [size for size in sizes if size <= max_input_size]
+            if max_input_size not in sizes:
+                sizes.append(max_input_size)
+        self.levels = build_levels(sizes, self.max_stride)
+        self.level = 0
+
+    @property
+    def stride(self):
+        return self.levels[self.level][0]
+
+    @property
+    def input_size(self):
+        return self.levels[self.level][1]
+
+    # ------------------------------------------------------------------
+    # 제어 루프
+    # ------------------------------------------------------------------
+    def frame_start(self, now=None):
+        now = time.time() if now is None else now
+        with self.cond:
+            if self.last_start is not None:
+                interval = now - self.last_start
+                if interval < self.period * IDLE_GAP:
+                    self.period += EMA_ALPHA * (interval - self.period)
+            self.last_start = self.frame_started = now
+            self.in_frame = True
+
+    def frame_end(self, now=None):
+        now = time.time() if now is None else now
+        with self.cond:
+            if not self.in_frame:
+                return
+            self.in_frame = False
+            self.last_end = now
+            work = now - self.frame_started
+            if work > self.period * IDLE_GAP:
+                # 시리얼 대기 등으로 루프가 멈췄던 경우 - 제어 프레임으로 보지 않음
+                self.cond.notify_all()
+                return
+            slack = self.period - work
+            self.control_frames += 1
+            self.slack_ema = slack if self.slack_ema is None else self.slack_ema + EMA_ALPHA * (slack - self.slack_ema)
+            self.min_slack = slack if self.min_slack is None else min(self.min_slack, slack)
+            self.window_slack.append(slack)
+            if slack < 0:
+                self.deadline_misses += 1
+                self.window_misses += 1
+                if self.inferring:
+                    self.overlap_misses += 1
+            if len(self.window_slack) >= self.window:
+                self._decide()
+            self.cond.notify_all()
+
+    def control_active(self, now=None):
+        """최근에 제어 프레임이 있었으면 True"""
+        now = time.time() if now is None else now
+        return self.last_start is not None and now - self.last_start < self.period * IDLE_GAP
+
+    # ------------------------------------------------------------------
+    # 검출기
+    # ------------------------------------------------------------------
+    def due(self, frames_since_last):
+        """마지막 추론 이후 카메라 프레임 수가 stride 이상이면 True"""
+        return frames_since_last >= self.stride
+
+    def expected_inference(self, size=None):
+        """입력 크기별 예상 추론 시간 - 측정 안 된 크기는 면적 비율로 추정 (측정값이 없으면 0)"""
+        size = self.input_size if size is None else size
+        if size in self.inference_ema:
+            return self.inference_ema[size]
+        if not self.inference_ema:
+            return 0.0
+        known, elapsed = max(self.inference_ema.items())
+        return elapsed * (size / known) ** 2
+
+    def acquire(self, timeout=None):
+        """
+        제어 프레임 사이 빈 시간에 추론이 끝날 수 있을 때까지 대기 후 True
+        timeout 안에 시간이 안 나면 False (밀린 추론으로 기록)
+        """
+        timeout = self.period * 2 if timeout is None else timeout
+        deadline = time.time() + timeout
+        with self.cond:
+            self.window_attempts += 1
+            while True:
+                now = time.time()
+                if not self.control_active(now):
+                    break
+                if not self.in_frame:
+                    next_start = self.last_start + self.period
+                    if next_start - now >= self.expected_inference() + SAFETY_MARGIN:
+                        break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.deferred += 1
+                    self.window_deferred += 1
+                    return False
+                self.cond.wait(min(remaining, 0.002))
+            self.inferring = True
+            return True
+
+    def record_inference(self, elapsed, size=None):
+        """acquire() 후 추론을 마치면 호출"""
+        size = self.input_size if size is None else size
+        with self.cond:
+            self.inferring = False
+            self.inferences += 1
+            previous = self.inference_ema.get(size)
+            self.inference_ema[size] = elapsed if previous is None else previous + EMA_ALPHA * (elapsed - previous)
+
+    def cancel(self):
+        """acquire() 후 추론을 하지 못한 경우"""
+        with self.cond:
+            self.inferring = False
+
+    # ------------------------------------------------------------------
+    # 단계 결정
+    # ------------------------------------------------------------------
+    def _decide(self):
+        mean_slack = sum(self.window_slack) / len(self.window_slack)
+        slack_ratio = mean_slack / self.period
+        defer_ratio = self.window_deferred / self.window_attempts if self.window_attempts else 0.0
+        reason = None
+        if self.window_misses or slack_ratio < LOW_SLACK or defer_ratio >= MAX_DEFER_RATIO:
+            self.good_windows = 0
+            if self.level < len(self.levels) - 1:
+                reason = (f"여유 부족 (평균 {mean_slack * 1000:.1f}ms, 초과 {self.window_misses}회, "
+                          f"밀림 {defer_ratio * 100:.0f}%)")
+                self._set_level(self.level + 1, reason)
+        elif slack_ratio > HIGH_SLACK and self.window_attempts and not self.window_deferred:
+            self.good_windows += 1
+            if self.good_windows >= UPGRADE_WINDOWS and self.level > 0:
+                self.good_windows = 0
+                self._set_level(self.level - 1, f"여유 충분 (평균 {mean_slack * 1000:.1f}ms)")
+        else:
+            self.good_windows = 0
+        self.window_slack = []
+        self.window_misses = self.window_attempts = self.window_deferred = 0
+
+    def _set_level(self, level, reason):
+        old_stride, old_size = self.levels[self.level]
+        self.level = level
+        self.changes += 1
+        self.decisions.append((time.time(), (old_stride, old_size), self.levels[level], reason))
+        print(f"[스케줄러] stride {old_stride}→{self.stride}, 입력 {old_size}→{self.input_size}: {reason}")
+
+    # ------------------------------------------------------------------
+    # 지표
+    # ------------------------------------------------------------------
+    def metrics(self):
+        with self.cond:
+            return {
+                'level': self.level,
+                'stride': self.stride,
+                'input_size': self.input_size,
+                'period_ms': self.period * 1000,
+                'slack_ms': None if self.slack_ema is None else self.slack_ema * 1000,
+                'min_slack_ms': None if self.min_slack is None else self.min_slack * 1000,
+                'control_frames': self.control_frames,
+                'deadline_misses': self.deadline_misses,
+                'overlap_misses': self.overlap_misses,
+                'inferences': self.inferences,
+                'deferred': self.deferred,
+                'inference_ms': {size: elapsed * 1000 for size, elapsed in self.inference_ema.items()},
+                'changes': self.changes,
+                'decisions': list(self.decisions),
+            }
+
+    def metrics_text(self):
+        m = self.metrics()
+        slack = "-" if m['slack_ms'] is None else f"{m['slack_ms']:.1f}ms"
+        inference = m['inference_ms'].get(m['input_size'])
+        inference = "-" if inference is None else f"{inference:.1f}ms"
+        return (f"stride {m['stride']} / 입력 {m['input_size']} | 주기 {m['period_ms']:.1f}ms 여유 {slack} | "
+                f"초과 {m['deadline_misses']}(추론 중 {m['overlap_misses']}) | "
+                f"추론 {m['inferences']}회 {inference} 밀림 {m['deferred']}")
+
+
+class CaptureTap:
+    """
+    카메라 래퍼: 제어 스레드의 read() 사이 시간을 제어 프레임 처리 시간으로 기록
+    (read 반환 → 다음 read 호출 전까지가 한 프레임의 처리). 다른 스레드의 read는 그대로 전달.
+    """
+    def __init__(self, cap, scheduler):
+        self._cap = cap
+        self._scheduler = scheduler
+        self._owner = threading.get_ident()
+
+    def read(self, *args, **kwargs):
+        if threading.get_ident() != self._owner:
+            return self._cap.read(*args, **kwargs)
+        self._scheduler.frame_end()
+        result = self._cap.read(*args, **kwargs)
+        self._scheduler.frame_start()
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._cap, name)
+
+
+# 모듈 전역 스케줄러 (제어 루프와 검출기가 같이 사용)
+scheduler = InferenceScheduler()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+주차 서버 부하 테스트 / 장시간(soak) 벤치마크
+running_server.py에 가짜 앱 N개와 TestRobotClient 기반 가짜 로봇 M대를 붙여서
+앱은 정해진 속도로 IN/OUT 요청을 보내고, 로봇은 실제와 같은 메시지 순서
+(sector_arrived, subzone_arrived, DONE/OUT_DONE, COMPLETE)로 응답한다.
+
+측정 항목
+- 요청 → 앱 알림(parked/lifted)까지의 종단 간 지연 (p50/p90/p99/최대)
+- 시간 안에 응답이 오지 않은 요청(dropped), 형식이 맞지 않는 메시지(misparsed)
+- 서버 프로세스 CPU 사용률 / 메모리(RSS) - /proc 기반이라 리눅스 전용
+
+모두 localhost에서 동작한다. 서버는 기본적으로 임시 폴더에서 자식 프로세스로 띄우며
+(parking_status.json 영향 없음), --port만 주면 이미 떠 있는 서버에 붙는다.
+
+※ 현재 서버는 parked/lifted 알림을 app #1에게만 보내므로, 지연은 어느 앱에서 받든 차량 번호로 매칭한다.
+
+사용법: python load_test_server.py --apps 4 --robots 2 --rate 2 --duration 60 --delay-scale 0.05
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from test_robot_client import TestRobotClient
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 앱이 받을 수 있는 정상 메시지 형식
+APP_MESSAGE_PATTERNS = [
+    re.compile(r"^parked,[a-z][LRM][a-zM][LRM],\S+$"),
+    re.compile(r"^lifted,[a-z][LRM][a-zM][LRM],\S+$"),
+    re.compile(r"^MOVE,(waiting_point|[a-z]MM|[a-z][LRM][a-zM])$"),
+    re.compile(r"^COMPLETE$"),
+]
+
+
+def percentile(sorted_values, p):
+    """정렬된 리스트의 p 백분위 (최근접 순위)"""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+class ProcessMonitor:
+    """/proc/<pid>로 서버 프로세스 CPU/메모리 측정"""
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.samples = []   # (시각, cpu%, rss_kb)
+        self.running = False
+
+    def read_cpu_time(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime, stime (man proc: 14, 15번째 필드 → ')' 이후 인덱스 11, 12)
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def read_memory(self):
+        rss = hwm = 0
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    hwm = int(line.split()[1])
+        return rss, hwm
+
+    def run(self):
+        prev_time = time.time()
+        prev_cpu = self.read_cpu_time()
+        while self.running:
+            time.sleep(self.interval)
+            try:
+                now, cpu = time.time(), self.read_cpu_time()
+                rss, _ = self.read_memory()
+            except (OSError, IndexError, ValueError):
+                break
+            self.samples.append((now, 100.0 * (cpu - prev_cpu) / (now - prev_time), rss))
+            prev_time, prev_cpu = now, cpu
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def summary(self):
+        if not self.samples:
+            return None
+        cpu = [s[1] for s in self.samples]
+        rss = [s[2] for s in self.samples]
+        try:
+            _, hwm = self.read_memory()
+        except OSError:
+            hwm = max(rss)
+        return {
+            "cpu_avg": sum(cpu) / len(cpu),
+            "cpu_max": max(cpu),
+            "rss_last_kb": rss[-1],
+            "rss_peak_kb": max(hwm, max(rss)),
+        }
+
+
+class LoadStats:
+    """요청/응답 매칭 및 통계 (모든 앱 스레드에서 공유)"""
+    def __init__(self, capacity):
+        self.lock = threading.Lock()
+        self.capacity = capacity
+        self.pending = {}       # {(cmd, car_number): 전송 시각}
+        self.parked = []        # 주차 완료된 차량 (출차 요청 대상)
+        self.latencies = {"IN": [], "OUT": []}
+        self.sent = {"IN": 0, "OUT": 0}
+        self.dropped = {"IN": 0, "OUT": 0}
+        self.misparsed = []
+        self.unexpected = 0     # 요청하지 않은 차량에 대한 알림
+        self.received = 0
+        self.car_counter = 0
+
+    def next_request(self):
+        """다음 요청 선택: 빈자리가 남으면 입차, 아니면 주차된 차량 출차"""
+        with self.lock:
+            # 출차 중인 자리도 OUT_DONE 전까지는 차 있는 것으로 계산
+            occupied = len(self.parked) + len(self.pending)
+            if occupied < self.capacity:
+                self.car_counter += 1
+                car_number = f"L{self.car_counter:05d}"
+                cmd = "IN"
+            elif self.parked:
+                car_number = self.parked.pop(0)
+                cmd = "OUT"
+            else:
+                return None
+            self.pending[(cmd, car_number)] = time.time()
+            self.sent[cmd] += 1
+            return cmd, car_number
+
+    def on_app_message(self, line):
+        now = time.time()
+        with self.lock:
+            self.received += 1
+            if not any(p.match(line) for p in APP_MESSAGE_PATTERNS):
+                self.misparsed.append(line)
+                return
+            kind = line.split(",", 1)[0]
+            if kind not in ("parked", "lifted"):
+                return
+            car_number = line.rsplit(",", 1)[1]
+            cmd = "IN" if kind == "parked" else "OUT"
+            sent_at = self.pending.pop((cmd, car_number), None)
+            if sent_at is None:
+                self.unexpected += 1
+                return
+            self.latencies[cmd].append(now - sent_at)
+            if cmd == "IN":
+                self.parked.append(car_number)
+
+    def expire(self, timeout):
+        """timeout이 지난 요청을 dropped로 처리"""
+        now = time.time()
+        with self.lock:
+            for key, sent_at in list(self.pending.items()):
+                if now - sent_at > timeout:
+                    del self.pending[key]
+                    self.dropped[key[0]] += 1
+
+
+class SimulatedApp:
+    def __init__(self, host, port, stats, rate):
+        self.stats = stats
+        self.rate = rate        # 초당 요청 수
+        self.running = False
+        self.sock = socket.create_connection((host, port))
+        self.sock.sendall(b"app\n")
+
+    def listen(self):
+        buffer = ""
+        while self.running:
+            try:
+                data = self.sock.recv(4096)
+            except OSError:
+                break
+            if not data:
+                break
+            buffer += data.decode(errors="replace")
+            while "\n" in buffer:
+                line, buffer = buffer.split("\n", 1)
+                if line.strip():
+                    self.stats.on_app_message(line.strip())
+
+    def generate(self, stop_at):
+        interval = 1.0 / self.rate
+        next_at = time.time()
+        while self.running and time.time() < stop_at:
+            request = self.stats.next_request()
+            if request is not None:
+                cmd, car_number = request
+                try:
+                    self.sock.sendall(f"{cmd},{car_number}\n".encode())
+                except OSError:
+                    break
+            # 고정 속도(open-loop) 전송 - 응답을 기다리지 않음
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.time()))
+
+    def start(self, stop_at):
+        self.running = True
+        threading.Thread(target=self.listen, daemon=True).start()
+        thread = threading.Thread(target=self.generate, args=(stop_at,), daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+
+
+def spawn_server(port, log_path):
+    """running_server를 임시 폴더에서 자식 프로세스로 실행 (parking_status.json 없이 빈 주차장)"""
+    workdir = tempfile.mkdtemp(prefix="parking_load_")
+    code = (
+        f"import sys; sys.path.insert(0, {SCRIPT_DIR!r}); "
+        f"import running_server; running_server.PORT = {port}; running_server.start_server()"
+    )
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    proc = subprocess.Popen([sys.executable, "-u", "-c", code], cwd=workdir,
+                            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+    # 서버가 listen할 때까지 대기
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("서버 시작 실패")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value * 1000:.0f}ms"
+
+
+def run(args):
+    proc = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        proc = spawn_server(port, args.server_log)
+        print(f"[부하 테스트] 서버 실행: pid {proc.pid}, 포트 {port}")
+    pid = proc.pid if proc else args.server_pid
+
+    monitor = None
+    if pid and os.path.exists(f"/proc/{pid}"):
+        monitor = ProcessMonitor(pid)
+        monitor.start()
+
+    # 주차장 크기: sector 2 × side 2 × subzone 2 × direction 2
+    stats = LoadStats(capacity=args.capacity)
+
+    robots = []
+    for _ in range(args.robots):
+        robot = TestRobotClient("127.0.0.1", port, delay_scale=args.delay_scale, verbose=False)
+        if not robot.connect_to_server():
+            raise RuntimeError("로봇 연결 실패")
+        threading.Thread(target=robot.listen_for_commands, daemon=True).start()
+        robots.append(robot)
+
+    apps = [SimulatedApp("127.0.0.1", port, stats, args.rate) for _ in range(args.apps)]
+    time.sleep(0.5)  # 등록 대기
+
+    start = time.time()
+    stop_at = start + args.duration
+    print(f"[부하 테스트] 앱 {args.apps}개 × {args.rate}req/s, 로봇 {args.robots}대, {args.duration}초")
+    threads = [app.start(stop_at) for app in apps]
+
+    last_report = start
+    while time.time() < stop_at + args.timeout:
+        time.sleep(0.2)
+        stats.expire(args.timeout)
+        if time.time() >= stop_at and not stats.pending:
+            break
+        if time.time() - last_report >= args.report_interval:
+            last_report = time.time()
+            with stats.lock:
+                done = len(stats.latencies["IN"]) + len(stats.latencies["OUT"])
+                print(f"  {last_report - start:5.0f}s 전송 {sum(stats.sent.values())}, 완료 {done}, 대기 {len(stats.pending)}")
+    for thread in threads:
+        thread.join(timeout=1)
+    stats.expire(0)
+    elapsed = time.time() - start
+
+    if monitor:
+        monitor.stop()
+    for app in apps:
+        app.close()
+    for robot in robots:
+        robot.connected = False
+        robot.socket.close()
+    if proc:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+    report(stats, monitor, elapsed)
+    total_dropped = sum(stats.dropped.values())
+    return 1 if total_dropped or stats.misparsed else 0
+
+
+def report(stats, monitor, elapsed):
+    print("\n=== 부하 테스트 결과 ===")
+    for cmd in ("IN", "OUT"):
+        values = sorted(stats.latencies[cmd])
+        print(f"{cmd:>3}: 전송 {stats.sent[cmd]}, 완료 {len(values)}, dropped {stats.dropped[cmd]} | "
+              f"p50 {format_ms(percentile(values, 50))}, p90 {format_ms(percentile(values, 90))}, "
+              f"p99 {format_ms(percentile(values, 99))}, max {format_ms(values[-1] if values else None)}")
+    done = len(stats.latencies["IN"]) + len(stats.latencies["OUT"])
+    print(f"처리량: {done / elapsed:.2f} 요청/초 ({elapsed:.1f}초)")
+    print(f"앱 수신 메시지 {stats.received}개, misparsed {len(stats.misparsed)}개, 요청 없는 알림 {stats.unexpected}개")
+    for line in stats.misparsed[:5]:
+        print(f"  misparsed: {line!r}")
+    if monitor:
+        summary = monitor.summary()
+        if summary:
+            print(f"서버 CPU 평균 {summary['cpu_avg']:.1f}%, 최대 {summary['cpu_max']:.1f}% | "
+                  f"RSS {summary['rss_last_kb'] / 1024:.1f}MB, 최대 {summary['rss_peak_kb'] / 1024:.1f}MB")
+    else:
+        print("서버 CPU/메모리: 측정 안 함 (--server-pid 지정 또는 서버 자동 실행 시 측정)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주차 서버 부하 테스트")
+    parser.add_argument("--apps", type=int, default=2, help="가짜 앱 수")
+    parser.add_argument("--robots", type=int, default=2, help="가짜 로봇 수")
+    parser.add_argument("--rate", type=float, default=1.0, help="앱 1개당 초당 요청 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="요청 전송 시간(초)")
+    parser.add_argument("--delay-scale", type=float, default=0.05,
+                        help="로봇 단계별 대기 시간 배율 (1.0 = TestRobotClient 기본 2초/1초)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="이 시간 안에 알림이 없으면 dropped")
+    parser.add_argument("--capacity", type=int, default=16, help="주차장 칸 수")
+    parser.add_argument("--port", type=int, default=None, help="이미 실행 중인 서버 포트 (없으면 서버 자동 실행)")
+    parser.add_argument("--server-pid", type=int, default=None, help="이미 실행 중인 서버 pid (CPU/메모리 측정용)")
+    parser.add_argument("--server-log", default=None, help="자동 실행한 서버의 출력을 저장할 파일")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="중간 보고 주기(초)")
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,41 @@
 메시지 처리 모듈
 외부 클라이언트(앱, 로봇)로부터 받은 메시지를 처리하는 함수들
 """
+import select
+import threading
+
 import find_destination
+import robot_dispatcher
+import telemetry
+
+# 로봇/앱 번호 할당이 여러 스레드에서 겹치지 않도록
+_register_lock = threading.Lock()
+
+RECV_SIZE = 4096
+# 줄바꿈 없이 끝난 조각을 이 시간(초) 동안 뒤따르는 데이터가 없으면 메시지 하나로 처리
+# (줄바꿈 없이 보내는 앱도 기존처럼 동작 - 줄바꿈을 보내면 기다리지 않음)
+FRAGMENT_WAIT = 0.2
+
+# 상태 변경 이벤트 구독자 (GUI 등)
+# 콜백은 서버 스레드에서 바로 호출되므로 큐에 넣는 정도로 가볍게 유지해야 한다.
+_listeners = []
+
+def add_listener(callback):
+    """callback(event, data) 등록
+    event: "space"(주차칸 변경), "client"(연결/해제), "message"(수신 메시지)"""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def emit(event, **data):
+    for callback in list(_listeners):
+        try:
+            callback(event, data)
+        except Exception as e:
+            print(f"[서버] 이벤트 전달 오류({event}): {e}")
 
 def handle_server_command(msg, clients, app_clients, robot_clients, save_parking_status, export_parking_status, reset_all_parking):
     """서버에서 직접 입력한 명령 처리 (command_mode용)"""
@@ -13,6 +47,11 @@ def handle_server_command(msg, clients, app_clients, robot_clients, save_parking
         print("[서버] 주차장 상태가 초기화되었습니다.")
         return
     
+    # BATCH 명령 처리 (BATCH,IN:1234,IN:5678,OUT:1111)
+    if msg.strip().upper().startswith("BATCH"):
+        handle_batch_request(msg, clients, robot_clients, save_parking_status, export_parking_status)
+        return
+
     # 기존 IN/OUT 처리
     try:
         cmd, car_number = msg.split(",")
@@ -22,37 +61,28 @@ def handle_server_command(msg, clients, app_clients, robot_clients, save_parking
         print("[서버] 잘못된 메시지 형식")
         return
 
-    if cmd == "IN":
-        result = find_destination.DFS(find_destination.parking_lot)
-        if result:
-            sector, side, subzone, direction = result
-            find_destination.park_car_at(find_destination.parking_lot, sector, side, subzone, direction, car_number)
-            print(f"[서버] 차량 {car_number}를 {sector},{side},{subzone},{direction}에 주차")
-            if 1 in robot_clients:
-                robot_addr = robot_clients[1]
-                robot_sock = clients[robot_addr][0]
-                robot_sock.sendall(f"PARK,{sector},{side},{subzone},{direction},{car_number}\n".encode())
-            # 앱에는 로봇의 DONE 메시지를 받은 후에 parked 메시지 전송
-            save_parking_status(export_parking_status())
-        else:
-            print("[서버] 빈자리가 없습니다.")
-    elif cmd == "OUT":
-        result = find_destination.find_car(find_destination.parking_lot, car_number)
-        if result:
-            sector, side, subzone, direction = result
-            # 자리는 로봇이 OUT_DONE을 보낼 때까지 비우지 않음
-            print(f"[서버] 차량 {car_number} 출차 요청: {sector},{side},{subzone},{direction}")
-            if 1 in robot_clients:
-                robot_addr = robot_clients[1]
-                robot_sock = clients[robot_addr][0]
-                robot_sock.sendall(f"OUT,{sector},{side},{subzone},{direction},{car_number}\n".encode())
-        else:
-            print(f"[서버] 차량 {car_number}의 위치를 찾을 수 없습니다.")
+    if cmd in ("IN", "OUT"):
+        handle_job_request(cmd, car_number, clients, robot_clients, save_parking_status, export_parking_status)
     else:
         print("[서버] 알 수 없는 명령")
 
-def handle_app_message(msg, clients, app_clients, robot_clients, save_parking_status, export_parking_status):
+def handle_app_message(msg, clients, app_clients, robot_clients, save_parking_status, export_parking_status, addr=None):
     """앱에서 온 메시지 처리"""
+    # 로봇 텔레메트리 구독 (SUB,TLM / UNSUB,TLM)
+    if msg.strip().upper() in ("SUB,TLM", "UNSUB,TLM"):
+        if addr is None or addr not in clients:
+            print("[서버] 텔레메트리 구독 불가: 앱 주소 없음")
+        elif msg.strip().upper() == "SUB,TLM":
+            telemetry.hub.subscribe(addr, clients[addr][0])
+        else:
+            telemetry.hub.unsubscribe(addr)
+        return
+
+    # BATCH 명령 처리 (BATCH,IN:1234,IN:5678,OUT:1111)
+    if msg.strip().upper().startswith("BATCH"):
+        handle_batch_request(msg, clients, robot_clients, save_parking_status, export_parking_status)
+        return
+
     try:
         cmd, car_number = msg.split(",")
         cmd = cmd.strip().upper()
@@ -61,6 +91,13 @@ def handle_app_message(msg, clients, app_clients, robot_clients, save_parking_st
         print("[서버] 잘못된 메시지 형식")
         return
 
+    if cmd in ("IN", "OUT"):
+        handle_job_request(cmd, car_number, clients, robot_clients, save_parking_status, export_parking_status)
+    else:
+        print("[서버] 알 수 없는 명령")
+
+def handle_job_request(cmd, car_number, clients, robot_clients, save_parking_status, export_parking_status):
+    """IN/OUT 요청을 배차 큐에 넣고, 놀고 있는 로봇이 있으면 바로 배정"""
     if cmd == "IN":
         # 빈자리 탐색
         result = find_destination.DFS(find_destination.parking_lot)
@@ -68,17 +105,16 @@ def handle_app_message(msg, clients, app_clients, robot_clients, save_parking_st
             sector, side, subzone, direction = result
             # 자리 배정
             find_destination.park_car_at(find_destination.parking_lot, sector, side, subzone, direction, car_number)
+            emit("space", sector=sector, side=side, subzone=subzone, direction=direction, car_number=car_number)
             print(f"[서버] 차량 {car_number}를 {sector},{side},{subzone},{direction}에 주차")
-            # 로봇에게 목적지 정보 포함 명령 전송
-            if 1 in robot_clients:
-                robot_addr = robot_clients[1]
-                robot_sock = clients[robot_addr][0]
-                robot_sock.sendall(f"PARK,{sector},{side},{subzone},{direction},{car_number}\n".encode())
+            # 로봇이 없거나 모두 작업 중이면 큐에서 대기
+            robot_dispatcher.dispatcher.submit("PARK", sector, side, subzone, direction, car_number)
+            robot_dispatcher.dispatcher.dispatch(clients, robot_clients)
             # 앱에는 로봇의 DONE 메시지를 받은 후에 parked 메시지 전송
             save_parking_status(export_parking_status())
         else:
             print("[서버] 빈자리가 없습니다.")
-            
+
     elif cmd == "OUT":
         # 차량 위치 찾기
         result = find_destination.find_car(find_destination.parking_lot, car_number)
@@ -86,18 +122,87 @@ def handle_app_message(msg, clients, app_clients, robot_clients, save_parking_st
             sector, side, subzone, direction = result
             # 자리는 로봇이 OUT_DONE을 보낼 때까지 비우지 않음
             print(f"[서버] 차량 {car_number} 출차 요청: {sector},{side},{subzone},{direction}")
-            # 로봇에게 명령 전달 예시
-            if 1 in robot_clients:
-                robot_addr = robot_clients[1]
-                robot_sock = clients[robot_addr][0]
-                robot_sock.sendall(f"OUT,{sector},{side},{subzone},{direction},{car_number}\n".encode())
+            robot_dispatcher.dispatcher.submit("OUT", sector, side, subzone, direction, car_number)
+            robot_dispatcher.dispatcher.dispatch(clients, robot_clients)
         else:
             print(f"[서버] 차량 {car_number}의 위치를 찾을 수 없습니다.")
-    else:
-        print("[서버] 알 수 없는 명령")
 
-def handle_robot_message(msg, clients, app_clients, save_parking_status, export_parking_status):
+def handle_robot_message(msg, clients, app_clients, save_parking_status, export_parking_status, robot_num=None, robot_clients=None):
     """로봇에서 온 메시지 처리"""
+    # 텔레메트리는 구독한 앱에게 바로 전달 (배차/앱 알림과 무관)
+    if msg.startswith("TLM"):
+        telemetry.hub.publish(robot_num, msg)
+        return
+
+    _handle_robot_progress(msg, clients, app_clients, save_parking_status, export_parking_status)
+
+    # 로봇 상태 갱신 - 작업을 마친 로봇에게 대기 중인 다음 작업 배정
+    if robot_num is not None and robot_dispatcher.dispatcher.on_robot_message(robot_num, msg):
+        if robot_clients is not None:
+            robot_dispatcher.dispatcher.dispatch(clients, robot_clients)
+
+def parse_batch(msg):
+    """BATCH,IN:1234,IN:5678,OUT:1111 → [("IN", "1234"), ("IN", "5678"), ("OUT", "1111")]"""
+    items = []
+    for token in msg.split(",")[1:]:
+        token = token.strip()
+        if not token:
+            continue
+        cmd, _, car_number = token.partition(":")
+        cmd = cmd.strip().upper()
+        car_number = car_number.strip()
+        if cmd not in ("IN", "OUT") or not car_number:
+            raise ValueError(f"잘못된 BATCH 항목: {token}")
+        items.append((cmd, car_number))
+    return items
+
+def handle_batch_request(msg, clients, robot_clients, save_parking_status, export_parking_status):
+    """여러 IN/OUT 요청을 한 번에 처리
+    빈자리/차량 위치는 주차장을 한 번만 순회해서 찾고, 배차와 상태 저장도 한 번만 수행"""
+    try:
+        items = parse_batch(msg)
+    except ValueError as e:
+        print(f"[서버] {e}")
+        return
+    if not items:
+        print("[서버] 빈 BATCH 명령")
+        return
+
+    # 같은 배치 안의 중복 요청 제거 (순서 유지)
+    in_cars = list(dict.fromkeys(car for cmd, car in items if cmd == "IN"))
+    out_cars = list(dict.fromkeys(car for cmd, car in items if cmd == "OUT"))
+    dispatcher = robot_dispatcher.dispatcher
+
+    # 입차: 빈자리를 한 번에 배정
+    spaces = find_destination.find_empty_spaces(find_destination.parking_lot, len(in_cars))
+    for car_number, (sector, side, subzone, direction) in zip(in_cars, spaces):
+        find_destination.park_car_at(find_destination.parking_lot, sector, side, subzone, direction, car_number)
+        emit("space", sector=sector, side=side, subzone=subzone, direction=direction, car_number=car_number)
+        dispatcher.submit("PARK", sector, side, subzone, direction, car_number)
+    if len(spaces) < len(in_cars):
+        print(f"[서버] 빈자리가 부족합니다: {', '.join(in_cars[len(spaces):])} 입차 불가")
+
+    # 출차: 차량 위치를 한 번에 조회 (자리는 로봇이 OUT_DONE을 보낼 때까지 비우지 않음)
+    locations = find_destination.find_cars(find_destination.parking_lot, out_cars)
+    for car_number in out_cars:
+        if car_number in locations:
+            sector, side, subzone, direction = locations[car_number]
+            dispatcher.submit("OUT", sector, side, subzone, direction, car_number)
+        else:
+            print(f"[서버] 차량 {car_number}의 위치를 찾을 수 없습니다.")
+
+    print(f"[서버] BATCH 처리: 입차 {len(spaces)}/{len(in_cars)}대, 출차 {len(locations)}/{len(out_cars)}대")
+    dispatcher.dispatch(clients, robot_clients)
+    if spaces:
+        save_parking_status(export_parking_status())
+
+def send_lines(client_socket, lines):
+    """여러 줄의 메시지를 한 번의 sendall로 전송"""
+    if lines:
+        client_socket.sendall("".join(f"{line}\n" for line in lines).encode())
+
+def _handle_robot_progress(msg, clients, app_clients, save_parking_status, export_parking_status):
+    """로봇 진행 메시지를 앱 메시지로 변환해 전송"""
     if msg.startswith("DONE"):
         try:
             _, sector, side, subzone, direction, car_number = msg.split(",")
@@ -121,7 +226,8 @@ def handle_robot_message(msg, clients, app_clients, save_parking_status, export_
             sector = int(sector_str)
             subzone = int(subzone_str)
             # 실제로 자리 비우기 (로봇이 출차 완료했으므로)
-            find_destination.park_car_at(find_destination.parking_lot, sector, side, subzone, direction, None)
+            find_destination.remove_car_at(find_destination.parking_lot, sector, side, subzone, direction)
+            emit("space", sector=sector, side=side, subzone=subzone, direction=direction, car_number=None)
             print(f"[서버] 차량 {car_number}를 {sector},{side},{subzone},{direction}에서 출차 완료")
             
             android_format = find_destination.convert_to_android_format_full(sector_str, side, subzone_str, direction)
@@ -170,61 +276,116 @@ def handle_robot_message(msg, clients, app_clients, save_parking_status, export_
             print(f"[서버] 위치 업데이트 메시지 파싱 오류: {e}")
 
 def send_parking_status_to_app(client_socket, export_parking_status):
-    """앱에 현재 주차 상태를 전송"""
+    """앱에 현재 주차 상태를 전송 - 차량별 parked 메시지를 모아서 한 번에 전송"""
     try:
         parking_status = export_parking_status()
+        lines = []
         for car_number, info in parking_status.items():
             android_format = find_destination.convert_to_android_format_full(
                 info["sector"], info["side"], info["subzone"], info["direction"]
             )
-            message = f"parked,{android_format},{car_number}\n"
-            client_socket.sendall(message.encode())
-            print(f"[서버] 기존 주차 상태 전송: {message.strip()}")
+            lines.append(f"parked,{android_format},{car_number}")
+        send_lines(client_socket, lines)
+        print(f"[서버] 기존 주차 상태 전송: {len(lines)}대")
     except Exception as e:
         print(f"[서버] 주차 상태 전송 오류: {e}")
 
+def _fragment_complete(client_socket, partial):
+    """
+    줄바꿈 없이 끝난 조각이 메시지 하나인지 - FRAGMENT_WAIT 동안 뒤따르는 데이터가 없고 글자가 잘리지 않았으면 True
+    (앱 프로토콜은 줄 단위지만 줄바꿈 없이 보내는 앱도 기존처럼 처리)
+    """
+    if not partial or select.select([client_socket], [], [], FRAGMENT_WAIT)[0]:
+        return False
+    try:
+        partial.decode()
+    except UnicodeDecodeError:
+        return False
+    return True
+
 def handle_client(client_socket, addr, clients, app_clients, robot_clients, save_parking_status, export_parking_status):
     """클라이언트 연결 및 메시지 처리"""
     print(f"[+] Connected by {addr}")
+    robot_num = None
     try:
-        device_type = client_socket.recv(1024).decode().strip()
+        # 첫 줄은 디바이스 타입, 같은 패킷에 붙어 온 나머지는 첫 메시지로 처리
+        device_type, _, pending = client_socket.recv(1024).decode().partition("\n")
+        device_type = device_type.strip()
         print(f"[{addr}] Device type: {device_type}")
+        # 앱 소켓에는 여러 스레드(요청 처리, 배차, 텔레메트리 구독)가 쓰므로 sendall을 한 락으로 묶음
+        client_socket = telemetry.LockedSocket(client_socket)
         clients[addr] = (client_socket, device_type)
         
         # 클라이언트 등록
         if device_type == "app":
             # 1번부터 비어있는 번호를 찾아 할당
-            app_num = 1
-            while app_num in app_clients:
-                app_num += 1
-            app_clients[app_num] = addr
+            with _register_lock:
+                app_num = 1
+                while app_num in app_clients:
+                    app_num += 1
+                app_clients[app_num] = addr
             print(f"[서버] app #{app_num} 등록: {addr}")
+            emit("client", action="connected", device_type=device_type, num=app_num, addr=addr)
             
             # 새로운 app에 현재 주차 상태 전송
             send_parking_status_to_app(client_socket, export_parking_status)
         elif device_type == "robot":
-            robot_num = 1
-            while robot_num in robot_clients:
-                robot_num += 1
-            robot_clients[robot_num] = addr
+            with _register_lock:
+                robot_num = 1
+                while robot_num in robot_clients:
+                    robot_num += 1
+                robot_clients[robot_num] = addr
             print(f"[서버] robot #{robot_num} 등록: {addr}")
+            emit("client", action="connected", device_type=device_type, num=robot_num, addr=addr)
+            robot_dispatcher.dispatcher.register_robot(robot_num)
+            # 큐에서 대기하던 작업이 있으면 새 로봇에게 배정
+            robot_dispatcher.dispatcher.dispatch(clients, robot_clients)
         else:
             print(f"[서버] 알 수 없는 타입: {device_type}")
             return
 
-        # 메시지 수신 루프
+        # 메시지 수신 루프 - 한 번의 recv에 여러 줄이 붙어 올 수 있으므로 줄 단위로 처리
+        partial = b""
+        if not pending.endswith("\n"):
+            pending, _, rest = pending.rpartition("\n")
+            partial = rest.encode()
+            if _fragment_complete(client_socket, partial):
+                pending += "\n" + rest
+                partial = b""
         while True:
-            data = client_socket.recv(1024)
+            for line in pending.splitlines():
+                msg = line.strip()
+                if not msg:
+                    continue
+                # 텔레메트리(초당 최대 10회)는 로그에 남기지 않음
+                if not msg.startswith("TLM"):
+                    print(f"[{device_type}][{addr}] Received: {msg}")
+                    emit("message", device_type=device_type, addr=addr, msg=msg)
+
+                # 메시지 타입별 처리
+                if device_type == "app":
+                    handle_app_message(msg, clients, app_clients, robot_clients, save_parking_status, export_parking_status, addr)
+                elif device_type == "robot":
+                    handle_robot_message(msg, clients, app_clients, save_parking_status, export_parking_status, robot_num, robot_clients)
+
+            data = client_socket.recv(RECV_SIZE)
             if not data:
+                if partial:
+                    # 연결이 끊기기 전 마지막 조각 (줄바꿈 없음)
+                    pending = partial.decode(errors="ignore")
+                    partial = b""
+                    continue
                 break
-            msg = data.decode().strip()
-            print(f"[{device_type}][{addr}] Received: {msg}")
-
-            # 메시지 타입별 처리
-            if device_type == "app":
-                handle_app_message(msg, clients, app_clients, robot_clients, save_parking_status, export_parking_status)
-            elif device_type == "robot":
-                handle_robot_message(msg, clients, app_clients, save_parking_status, export_parking_status)
+            # 줄이 끝나지 않은 마지막 조각은 recv 크기와 상관없이 다음 recv와 이어 붙임
+            # (TCP는 어디서든 끊길 수 있음 - 바이트로 자르므로 한글 글자가 중간에 잘려도 안전)
+            data = partial + data
+            partial = b""
+            if not data.endswith(b"\n"):
+                data, _, partial = data.rpartition(b"\n")
+            pending = data.decode()
+            if _fragment_complete(client_socket, partial):
+                pending += "\n" + partial.decode()
+                partial = b""
 
     except Exception as e:
         print(f"[{addr}] Error: {e}")
@@ -237,6 +398,11 @@ def handle_client(client_socket, addr, clients, app_clients, robot_clients, save
         for num, a in list(robot_clients.items()):
             if a == addr:
                 del robot_clients[num]
+        telemetry.hub.unsubscribe(addr)
+        if robot_num is not None:
+            robot_dispatcher.dispatcher.unregister_robot(robot_num)
+            telemetry.hub.remove_robot(robot_num)
         if addr in clients:
             del clients[addr]
         client_socket.close()
+        emit("client", action="disconnected", addr=addr)
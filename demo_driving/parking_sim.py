@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+주차장 시뮬레이터 - 실제 로봇 없이 driving.py 제어 함수를 그대로 실행해서 수렴 속도/정확도 측정
+- 로봇: robot_hal.simulator.SimulatedBackend (메카넘 2D, 가속도 제한, 바퀴 미끄러짐 slip)
+- 시리얼: SimulatedStm32Serial (1/2/5/6/9 이동, 'v' 속도 프레임, 3/4 회전 → 's', 7 들어올리기 → 'a')
+- 카메라: SimulatedCamera - 주차장 마커 배치와 보정된 카메라 행렬/왜곡 계수로 합성 프레임 생성
+  (DICT_5X5_250 마커를 projectPoints로 투영 → warpPerspective) → 실제와 같이 undistort + detectMarkers
+- 시간: SimClock - driving.time을 시계로 바꿔서 time.sleep / cap.read 만큼만 시뮬레이션 진행
+  (실제 시간을 기다리지 않으므로 프레임 처리 속도만큼 빠르게 실행)
+
+시나리오
+- initialize: 섹터 마커 앞에서 좌우로 어긋난 위치 → initialize_robot (중앙 정렬)
+- aisle:      대기 위치에서 '1' + driving_with_marker10_alignment로 섹터 2 마커까지 (slip 포함)
+- slide:      섹터 마커 옆에서 slide_until_marker_detected
+- route:      '7' 들어올리기 → 섹터 → 회전 → subzone 도착 (csi_control_final PARK 순서, 주차 칸 후진은 제외)
+- *_combined: 같은 시나리오를 combined_motion=True ('v' 속도 프레임 - 전진 + 편차 비례 평행이동)로
+              시드가 같으면 시작 위치/slip도 같으므로 기존 방식과 바로 비교
+
+주차장 배치 (실측 값 아님 - 실측해서 조정)
+- 대기 위치 (0, 0)에서 +y 방향이 중앙 통로, 통로 끝 (0, MAIN_AISLE_LENGTH)에 10번 마커
+- 섹터 s 마커는 중앙 통로 위 (0, SECTOR_MARKER_Y[s]), 섹터 통로는 마커 앞 정지 위치에서 좌/우(±x)
+- subzone z 마커는 섹터 통로 위 SUBZONE_SPACING * z 위치, 통로 끝에 10번 마커 (중앙 통로 쪽을 바라봄)
+- 마커는 장애물이 아님 (카메라 뒤로 지나가면 안 보임), 10번 마커는 크고 카메라보다 높게 붙어 있음
+
+사용법: python parking_sim.py                         # 시나리오별 5회
+       python parking_sim.py --runs 200 --jobs 4      # 여러 프로세스로 반복
+       python parking_sim.py -k aisle --verbose       # driving.py 출력 보기
+"""
+
+import argparse
+import contextlib
+import functools
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+import cv2.aruco as aruco
+import numpy as np
+
+import driving
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from robot_hal.simulator import SimClock, SimulatedBackend, SimulatedStm32Serial
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_DIR = os.path.join(BASE_DIR, "camera_test", "calibration_result")
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+CAMERA_FPS = 30
+PROCESSING_TIME = 0.02          # 프레임당 처리 시간 (Jetson 기준 추정, 초)
+CAMERA_LATENCY = 0.05           # 노출 ~ 프레임 수신 지연 (초)
+CAMERA_HEIGHT = 0.15            # 바닥에서 카메라 높이 (m)
+CAMERA_OFFSET = 0.12            # 로봇 중심 → 전방/후방 카메라 거리 (m)
+MAX_VIEW_ANGLE = np.radians(75) # 마커 정면에서 이 각도보다 비스듬하면 안 보임
+
+# 주차장 배치 (m)
+TARGET_DISTANCE = 0.145         # csi_control_final DEFAULT_ARUCO_DISTANCE
+MAIN_AISLE_LENGTH = 2.6
+SECTOR_MARKER_Y = {1: 0.9, 2: 1.8}
+SUBZONE_SPACING = 0.8
+SECTOR_AISLE_LENGTH = 2.4
+AISLE_HALF_WIDTH = 0.35         # 통로 밖(주차 칸/다른 통로)에서는 통로 안 마커가 안 보임
+MARKER10_SIZE = 0.20
+MARKER10_HEIGHT = 0.35          # 카메라보다 높게 (가까운 마커에 가리지 않도록)
+
+# 시뮬레이션 변동 범위 (실행마다 무작위)
+START_OFFSET = 0.05             # 시작 좌우 위치 (m)
+START_HEADING = np.radians(2)   # 시작 방향 오차
+SLIP_LATERAL = 0.05             # 전진 1m당 옆으로 밀림 (m)
+SLIP_YAW = 0.02                 # 전진 1m당 돌아감 (rad)
+slip_scale = 1.0               # --slip 배율 (바닥 상태가 나쁠 때)
+SCENARIO_TIMEOUT = 60.0         # 시뮬레이션 시간 기준 (초) - 넘으면 SimulationTimeout
+
+
+class SimulationTimeout(Exception):
+    """driving.py 함수 대부분은 마커를 못 찾으면 계속 기다리므로 카메라 read()에서 중단"""
+
+
+class Marker:
+    def __init__(self, marker_id, x, y, facing, size=driving.marker_length, height=CAMERA_HEIGHT, area=None):
+        """
+        :param facing: 마커 정면(바라보는) 방향 (rad, 월드 기준)
+        :param area: 이 범위 안의 카메라에서만 보임 (x_min, x_max, y_min, y_max) - 통로 사이 주차 차량/벽
+        """
+        self.marker_id = marker_id
+        self.center = np.array([x, y, height])
+        self.normal = np.array([np.cos(facing), np.sin(facing), 0.0])
+        self.size = size
+        self.area = area
+
+    def visible_from(self, position):
+        if self.area is None:
+            return True
+        x_min, x_max, y_min, y_max = self.area
+        return x_min <= position[0] <= x_max and y_min <= position[1] <= y_max
+
+    def corners(self):
+        """월드 좌표 네 꼭짓점 (좌상, 우상, 우하, 좌하 - 마커를 바라볼 때 기준)"""
+        right = np.array([-self.normal[1], self.normal[0], 0.0])
+        up = np.array([0.0, 0.0, 1.0])
+        half = self.size / 2
+        return np.array([self.center + half * (-right + up), self.center + half * (right + up),
+                         self.center + half * (right - up), self.center + half * (-right - up)])
+
+
+def sector_aisle_y(sector):
+    """섹터 마커 앞 TARGET_DISTANCE에서 멈춘 로봇 중심 = 섹터 통로 중심선"""
+    return SECTOR_MARKER_Y[sector] - TARGET_DISTANCE - CAMERA_OFFSET
+
+
+def parking_lot_markers():
+    main_area = (-AISLE_HALF_WIDTH, AISLE_HALF_WIDTH, -1.0, MAIN_AISLE_LENGTH)
+    markers = [Marker(10, 0.0, MAIN_AISLE_LENGTH, -np.pi / 2, MARKER10_SIZE, CAMERA_HEIGHT + MARKER10_HEIGHT,
+                      main_area)]
+    for sector, marker_y in SECTOR_MARKER_Y.items():
+        markers.append(Marker(sector, 0.0, marker_y, -np.pi / 2, area=main_area))
+        aisle_y = sector_aisle_y(sector)
+        for sign, facing in ((-1, 0.0), (1, np.pi)):     # 왼쪽 통로(-x) 마커는 +x를 바라봄
+            area = (min(sign * SECTOR_AISLE_LENGTH, sign * -AISLE_HALF_WIDTH),
+                    max(sign * SECTOR_AISLE_LENGTH, sign * -AISLE_HALF_WIDTH),
+                    aisle_y - AISLE_HALF_WIDTH, aisle_y + AISLE_HALF_WIDTH)
+            markers.append(Marker(10, sign * SECTOR_AISLE_LENGTH, aisle_y, facing,
+                                  MARKER10_SIZE, CAMERA_HEIGHT + MARKER10_HEIGHT, area))
+            for subzone in (1, 2):
+                markers.append(Marker(subzone, sign * SUBZONE_SPACING * subzone, aisle_y, facing, area=area))
+    return markers
+
+
+def marker_tile(marker_id, cell=20):
+    """마커 이미지 + 흰 여백 1칸, (이미지, 검은 사각형 꼭짓점)"""
+    dictionary = aruco.getPredefinedDictionary(aruco.DICT_5X5_250)
+    if hasattr(aruco, "generateImageMarker"):
+        image = aruco.generateImageMarker(dictionary, marker_id, 7 * cell)
+    else:
+        image = aruco.drawMarker(dictionary, marker_id, 7 * cell)
+    tile = cv2.copyMakeBorder(image, cell, cell, cell, cell, cv2.BORDER_CONSTANT, value=255)
+    inner = np.float32([[cell, cell], [8 * cell, cell], [8 * cell, 8 * cell], [cell, 8 * cell]])
+    return tile, inner
+
+
+class SimulatedCamera:
+    """cv2.VideoCapture 대신 - read()할 때 시계를 다음 프레임까지 진행하고 로봇 위치에서 본 장면을 그림"""
+    def __init__(self, sim, clock, markers, camera_matrix, dist_coeffs, back=False,
+                 fps=CAMERA_FPS, latency=CAMERA_LATENCY, processing_time=PROCESSING_TIME, timeout=SCENARIO_TIMEOUT):
+        self.sim = sim
+        self.clock = clock
+        self.markers = markers
+        self.camera_matrix = np.asarray(camera_matrix, np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, np.float64).reshape(-1)
+        self.back = back
+        self.period = 1.0 / fps
+        self.latency = latency
+        self.processing_time = processing_time
+        self.timeout = timeout
+        self.tiles = {}
+        # 완만한 밝기 변화만 있는 바닥/벽 (픽셀 잡음은 후보 윤곽선이 많아져 검출만 느려짐)
+        yy, xx = np.mgrid[0:FRAME_HEIGHT, 0:FRAME_WIDTH]
+        self.background = (110 + 20 * np.sin(xx / 90.0) + 10 * np.cos(yy / 70.0)).astype(np.uint8)
+        self.frames = 0
+
+    # cv2.VideoCapture와 같은 함수 ----------------------------------------
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.clock.time() > self.timeout:
+            raise SimulationTimeout(f"{self.timeout:.0f}초 초과")
+        self.clock.sleep(self.processing_time)
+        now = self.clock.time()
+        frame_time = np.ceil(now / self.period - 1e-9) * self.period
+        self.clock.sleep(frame_time - now)
+        self.frames += 1
+        return True, self.render(self.sim.pose_at(frame_time - self.latency))
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT: FRAME_HEIGHT,
+                cv2.CAP_PROP_FPS: 1.0 / self.period}.get(prop, 0.0)
+
+    def release(self):
+        pass
+
+    # 렌더링 -------------------------------------------------------------
+    def camera_pose(self, pose):
+        x, y, theta = pose
+        if self.back:
+            theta += np.pi
+        forward = np.array([np.cos(theta), np.sin(theta), 0.0])
+        position = np.array([x, y, CAMERA_HEIGHT]) + CAMERA_OFFSET * forward
+        right = np.array([np.sin(theta), -np.cos(theta), 0.0])
+        return position, np.array([right, [0.0, 0.0, -1.0], forward])    # 월드 → 카메라 (x 오른쪽, y 아래, z 정면)
+
+    def project(self, marker, position, rotation):
+        """보이면 왜곡 포함 이미지 꼭짓점 (4, 2), 아니면 None"""
+        if not marker.visible_from(position):
+            return None
+        to_camera = position - marker.center
+        if marker.normal @ to_camera < np.cos(MAX_VIEW_ANGLE) * np.linalg.norm(to_camera):
+            return None     # 마커 뒷면이거나 너무 비스듬함
+        points = (marker.corners() - position) @ rotation.T
+        if np.any(points[:, 2] < 0.05):
+            return None
+        normalized = points[:, :2] / points[:, 2:]
+        if np.any(np.abs(normalized[:, 0]) > 1.0) or np.any(np.abs(normalized[:, 1]) > 0.7):
+            return None     # 시야 밖 (왜곡 다항식이 뒤집히는 영역 전에 자름)
+        image_points, _ = cv2.projectPoints(points, np.zeros(3), np.zeros(3), self.camera_matrix, self.dist_coeffs)
+        return image_points.reshape(4, 2).astype(np.float32)
+
+    def render(self, pose):
+        position, rotation = self.camera_pose(pose)
+        frame = self.background.copy()
+        visible = []
+        for marker in self.markers:
+            corners = self.project(marker, position, rotation)
+            if corners is not None:
+                visible.append((np.linalg.norm(marker.center - position), marker.marker_id, corners))
+        for _, marker_id, corners in sorted(visible, key=lambda v: -v[0]):     # 먼 마커부터 (가까운 마커가 가림)
+            if marker_id not in self.tiles:
+                self.tiles[marker_id] = marker_tile(marker_id)
+            tile, inner = self.tiles[marker_id]
+            # 흰 여백까지 포함한 영역만 그림 (화면 전체 warp 대신)
+            homography = cv2.getPerspectiveTransform(inner, corners)
+            outline = cv2.perspectiveTransform(np.float32([[[0, 0], [tile.shape[1], 0], [tile.shape[1], tile.shape[0]],
+                                                            [0, tile.shape[0]]]]), homography)[0]
+            x0, y0 = np.maximum(np.floor(outline.min(axis=0)).astype(int), 0)
+            x1, y1 = np.minimum(np.ceil(outline.max(axis=0)).astype(int) + 1, (FRAME_WIDTH, FRAME_HEIGHT))
+            if x1 <= x0 or y1 <= y0:
+                continue
+            shifted = np.array([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]]) @ homography
+            warped = cv2.warpPerspective(tile, shifted, (x1 - x0, y1 - y0), flags=cv2.INTER_LINEAR)
+            mask = cv2.warpPerspective(np.full_like(tile, 255), shifted, (x1 - x0, y1 - y0))
+            roi = frame[y0:y1, x0:x1]
+            np.copyto(roi, warped, where=mask > 127)
+        return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+class PoseRecorder:
+    """시계에 붙여서 시뮬레이션 스텝마다 로봇 위치 기록"""
+    def __init__(self, sim, every=4):
+        self.sim = sim
+        self.every = every
+        self.count = 0
+        self.track = []         # (시각, x, y, theta)
+
+    def step(self, dt):
+        self.count += 1
+        if self.count % self.every == 0:
+            self.track.append((self.sim.now(), *self.sim.pose))
+
+
+class ParkingLot:
+    """시뮬레이션 1회 - 시계/로봇/시리얼/전후방 카메라를 만들고 driving.time을 시계로 바꿈"""
+    current = None      # 마지막으로 만든 시뮬레이션 (SimulationTimeout 때 결과 정리용)
+
+    def __init__(self, x, y, theta, slip=(0.0, 0.0), timeout=SCENARIO_TIMEOUT):
+        self.clock = SimClock()
+        self.sim = SimulatedBackend(x, y, theta, clock=self.clock, slip=slip)
+        self.recorder = PoseRecorder(self.sim)
+        self.clock.attach(self.recorder)
+        self.serial = SimulatedStm32Serial(self.sim)
+        markers = parking_lot_markers()
+        self.front_matrix = np.load(os.path.join(CALIBRATION_DIR, "camera_front_matrix.npy"))
+        self.front_dist = np.load(os.path.join(CALIBRATION_DIR, "dist_front_coeffs.npy"))
+        self.back_matrix = np.load(os.path.join(CALIBRATION_DIR, "camera_back_matrix.npy"))
+        self.back_dist = np.load(os.path.join(CALIBRATION_DIR, "dist_back_coeffs.npy"))
+        self.cap_front = SimulatedCamera(self.sim, self.clock, markers, self.front_matrix, self.front_dist,
+                                         timeout=timeout)
+        self.cap_back = SimulatedCamera(self.sim, self.clock, markers, self.back_matrix, self.back_dist, back=True,
+                                        timeout=timeout)
+        driving.time = self.clock
+        ParkingLot.current = self
+
+    def close(self):
+        driving.time = time
+        self.sim.close()
+
+    def wait_ack(self, expected, timeout=20.0):
+        """csi_control_final과 같은 완료 신호 대기 (0.1초 간격)"""
+        deadline = self.clock.time() + timeout
+        while self.clock.time() < deadline:
+            if self.serial.in_waiting:
+                if self.serial.read().decode() == expected:
+                    return True
+            self.clock.sleep(0.1)
+        return False
+
+    def lateral_error(self, axis, center):
+        """기록된 위치의 통로 중심선 기준 좌우 오차 (m) 배열 - axis 0: x 방향 오차, 1: y 방향 오차"""
+        track = np.array(self.recorder.track)
+        return track[:, 1 + axis] - center
+
+
+def random_start(rng, x, y, theta):
+    return (x + rng.uniform(-START_OFFSET, START_OFFSET), y,
+            theta + rng.uniform(-START_HEADING, START_HEADING))
+
+
+def random_slip(rng):
+    return (rng.uniform(-SLIP_LATERAL, SLIP_LATERAL) * slip_scale, rng.uniform(-SLIP_YAW, SLIP_YAW) * slip_scale)
+
+
+def scenario_initialize(rng):
+    """섹터 1 마커 앞 30cm, 좌우 5~15cm 어긋난 위치에서 initialize_robot"""
+    offset = rng.choice([-1, 1]) * rng.uniform(0.05, 0.15)
+    lot = ParkingLot(offset, SECTOR_MARKER_Y[1] - 0.3 - CAMERA_OFFSET, np.pi / 2)
+    driving.initialize_robot(lot.cap_front, driving.marker_dict, driving.param_markers, 1, lot.serial,
+                             lot.front_matrix, lot.front_dist)
+    lot.clock.sleep(0.5)
+    final = abs(lot.sim.pose[0])
+    errors = np.abs(lot.lateral_error(0, 0.0))
+    return lot, {"success": final < 0.03, "final": final, "peak": errors.max()}
+
+
+def scenario_aisle(rng, combined_motion=False):
+    """대기 위치 → 섹터 2 마커까지 10번 마커 중앙 정렬 직진 (slip 포함)"""
+    lot = ParkingLot(*random_start(rng, 0.0, 0.0, np.pi / 2), slip=random_slip(rng))
+    lot.serial.write(b"1")
+    result = driving.driving_with_marker10_alignment(
+        lot.cap_front, lot.cap_back, driving.marker_dict, driving.param_markers, target_marker_id=2,
+        camera_front_matrix=lot.front_matrix, dist_front_coeffs=lot.front_dist,
+        camera_back_matrix=lot.back_matrix, dist_back_coeffs=lot.back_dist,
+        target_distance=TARGET_DISTANCE, serial_server=lot.serial, direction="forward",
+        combined_motion=combined_motion)
+    lot.serial.write(b"9")
+    lot.clock.sleep(0.5)
+    errors = np.abs(lot.lateral_error(0, 0.0))
+    return lot, {"success": bool(result), "final": errors[-1], "peak": errors.max()}
+
+
+def scenario_slide(rng):
+    """섹터 1 마커 옆 40~60cm에서 마커 쪽으로 평행이동, 보이면 정지"""
+    side = rng.choice([-1, 1])
+    lot = ParkingLot(side * rng.uniform(0.4, 0.6), SECTOR_MARKER_Y[1] - 0.4 - CAMERA_OFFSET, np.pi / 2)
+    result = driving.slide_until_marker_detected(lot.cap_front, driving.marker_dict, driving.param_markers,
+                                                 lot.front_matrix, lot.front_dist, lot.serial, target_marker_id=1,
+                                                 slide_direction="right" if side < 0 else "left")
+    lot.clock.sleep(0.5)
+    final = abs(lot.sim.pose[0])
+    return lot, {"success": bool(result), "final": final, "peak": final}
+
+
+def scenario_route(rng, combined_motion=False):
+    """csi_control_final PARK 순서로 섹터 1/2, 통로 좌/우, subzone 1/2 중 하나까지"""
+    sector, side, subzone = int(rng.integers(1, 3)), str(rng.choice(["left", "right"])), int(rng.integers(1, 3))
+    lot = ParkingLot(*random_start(rng, 0.0, 0.0, np.pi / 2), slip=random_slip(rng), timeout=2 * SCENARIO_TIMEOUT)
+    common = dict(camera_front_matrix=lot.front_matrix, dist_front_coeffs=lot.front_dist,
+                  camera_back_matrix=lot.back_matrix, dist_back_coeffs=lot.back_dist,
+                  target_distance=TARGET_DISTANCE, serial_server=lot.serial, direction="forward",
+                  combined_motion=combined_motion)
+    lot.serial.reset_input_buffer()
+    lot.serial.write(b"7")
+    success = lot.wait_ack("a")
+    lot.serial.write(b"1")
+    success &= driving.driving_with_marker10_alignment(lot.cap_front, lot.cap_back, driving.marker_dict,
+                                                       driving.param_markers, target_marker_id=sector, **common)
+    lot.serial.write(b"9")
+    driving.initialize_robot(lot.cap_front, driving.marker_dict, driving.param_markers, sector, lot.serial,
+                             lot.front_matrix, lot.front_dist)
+    lot.serial.reset_input_buffer()
+    lot.serial.write(b"3" if side == "left" else b"4")
+    success &= lot.wait_ack("s")
+    driving.flush_camera(lot.cap_front, 5)
+    lot.serial.write(b"1")
+    success &= driving.driving_with_marker10_alignment(lot.cap_front, lot.cap_back, driving.marker_dict,
+                                                       driving.param_markers, target_marker_id=subzone, **common)
+    lot.serial.write(b"9")
+    driving.initialize_robot(lot.cap_front, driving.marker_dict, driving.param_markers, subzone, lot.serial,
+                             lot.front_matrix, lot.front_dist)
+    lot.clock.sleep(0.5)
+    # 섹터 통로 중심선(y) 기준 오차 - 회전 후 구간만
+    track = np.array(lot.recorder.track)
+    turned = np.abs(np.cos(track[:, 3])) > 0.9
+    errors = np.abs(track[turned, 2] - sector_aisle_y(sector)) if turned.any() else np.array([np.inf])
+    goal_x = (-1 if side == "left" else 1) * (SUBZONE_SPACING * subzone - TARGET_DISTANCE - CAMERA_OFFSET)
+    along = abs(lot.sim.pose[0] - goal_x)
+    return lot, {"success": bool(success) and along < 0.05 and errors[-1] < 0.05, "final": errors[-1],
+                 "peak": errors.max()}
+
+
+SCENARIOS = {
+    "initialize": scenario_initialize,
+    "aisle": scenario_aisle,
+    "aisle_combined": functools.partial(scenario_aisle, combined_motion=True),
+    "slide": scenario_slide,
+    "route": scenario_route,
+    "route_combined": functools.partial(scenario_route, combined_motion=True),
+}
+
+
+def run(name, seed, verbose=False):
+    """(시나리오, 시드) 1회 → 결과 dict (sim_time, wall_time, frames 포함)"""
+    rng = np.random.default_rng(seed)
+    start_time = time.time()
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(open(os.devnull, "w")))
+        try:
+            lot, result = SCENARIOS[name](rng)
+        except SimulationTimeout:
+            lot = ParkingLot.current
+            result = {"success": False, "final": np.nan, "peak": np.nan}
+    lot.close()
+    result.update(sim_time=lot.clock.time(), wall_time=time.time() - start_time,
+                  frames=lot.cap_front.frames + lot.cap_back.frames, commands=len(lot.serial.written))
+    return result
+
+
+def _run_job(job):
+    global slip_scale
+    name, seed, verbose, slip_scale = job
+    return name, run(name, seed, verbose)
+
+
+def summarize(name, rows):
+    """시간은 전체 평균, 오차는 성공한 실행만 (시간 초과는 nan)"""
+    success = sum(r["success"] for r in rows)
+    sim_time = sum(r["sim_time"] for r in rows)
+    wall_time = sum(r["wall_time"] for r in rows)
+    done = [r for r in rows if r["success"]] or [{"final": np.nan, "peak": np.nan}]
+    print(f"{name:<16}{success:>4}/{len(rows):<4}"
+          f"{np.mean([r['sim_time'] for r in rows]):8.2f}초"
+          f"{np.mean([r['final'] for r in done]) * 100:9.1f}cm"
+          f"{np.mean([r['peak'] for r in done]) * 100:9.1f}cm"
+          f"{np.max([r['peak'] for r in done]) * 100:9.1f}cm"
+          f"{np.mean([r['commands'] for r in rows]):9.0f}"
+          f"{sim_time / max(wall_time, 1e-9):8.1f}배")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주차장 시뮬레이터 - driving.py 제어 함수 수렴 측정")
+    parser.add_argument("--runs", type=int, default=5, help="시나리오별 실행 횟수 (시드 0..runs-1)")
+    parser.add_argument("--jobs", type=int, default=1, help="병렬 프로세스 수")
+    parser.add_argument("-k", dest="keyword", default="", help="이름에 이 문자열이 들어간 시나리오만")
+    parser.add_argument("--slip", type=float, default=1.0, help="바퀴 미끄러짐 범위 배율")
+    parser.add_argument("--verbose", action="store_true", help="driving.py 출력 표시 (--jobs 1일 때)")
+    args = parser.parse_args()
+
+    names = [name for name in SCENARIOS if args.keyword in name]
+    jobs = [(name, seed, args.verbose, args.slip) for name in names for seed in range(args.runs)]
+    start_time = time.time()
+    if args.jobs > 1:
+        with multiprocessing.Pool(args.jobs) as pool:
+            results = pool.map(_run_job, jobs)
+    else:
+        results = [_run_job(job) for job in jobs]
+
+    print(f"{'시나리오':<14}{'성공':>7}{'평균 시간':>9}{'최종 오차':>8}{'최대 편차':>8}{'(최악)':>8}{'명령 수':>7}{'배속':>6}")
+    for name in names:
+        summarize(name, [result for job_name, result in results if job_name == name])
+    print(f"\n전체 {len(jobs)}회, 실제 {time.time() - start_time:.1f}초 "
+          f"(시뮬레이션 {sum(r['sim_time'] for _, r in results):.1f}초)")
@@ -0,0 +1,268 @@
+"""
+로봇 작업 배차(dispatcher) 모듈
+앱/서버에서 들어온 입차(PARK)/출차(OUT) 작업을 큐에 쌓아두고,
+로봇이 보내는 sector_arrived/DONE/OUT_DONE/COMPLETE 메시지로 로봇 상태를 추적하면서
+놀고 있는 로봇에게 예상 완료 시간이 가장 빠른 순서로 작업을 배정한다.
+  (작업 × 로봇 조합마다 "접수 시각 + 예상 소요 시간"이 가장 이른 것부터 - 짧은 작업이 먼저 나가되
+   오래 기다린 작업은 그만큼 앞당겨져서 긴 작업이 계속 밀리지 않음)
+
+- 작업은 로봇이 없거나 모두 바쁠 때 버려지지 않고 큐에서 대기한다.
+- 로봇이 작업 중인 sector 통로(aisle)는 예약되어, 두 로봇이 같은 통로에 동시에 들어가지 않는다.
+"""
+import threading
+import time
+from collections import deque
+
+# 작업 시간 추정용 기본값 (초) - 실제 측정값으로 로봇별 보정됨
+BASE_TRAVEL_TIME = 10.0     # 대기 위치 → sector 1 입구
+SECTOR_TRAVEL_TIME = 6.0    # sector 한 칸 이동
+SUBZONE_TRAVEL_TIME = 4.0   # sector 통로 → subzone 한 칸 이동
+LIFT_TIME = 8.0             # 리프트 올리기/내리기 + 차량 넣고 빼기
+
+# 로봇별 속도 보정 계수 (실제 소요 시간 / 추정 시간) 지수 이동 평균 가중치
+SPEED_FACTOR_ALPHA = 0.3
+
+# 로봇 상태
+IDLE = "idle"               # 대기 위치에서 작업 대기
+DISPATCHED = "dispatched"   # 작업을 받고 sector로 이동 중
+WORKING = "working"         # sector 도착 후 입차/출차 작업 중
+RETURNING = "returning"     # DONE/OUT_DONE 이후 대기 위치로 복귀 중
+
+
+def estimate_job_time(sector, subzone):
+    """작업 1건(출발 → 주차칸 → 대기 위치 복귀)의 예상 소요 시간(초)"""
+    one_way = BASE_TRAVEL_TIME + SECTOR_TRAVEL_TIME * (int(sector) - 1) + SUBZONE_TRAVEL_TIME * int(subzone)
+    return 2 * one_way + LIFT_TIME
+
+
+class Job:
+    def __init__(self, cmd, sector, side, subzone, direction, car_number):
+        self.cmd = cmd                  # "PARK" 또는 "OUT"
+        self.sector = int(sector)
+        self.side = side
+        self.subzone = int(subzone)
+        self.direction = direction
+        self.car_number = car_number
+        self.created_at = time.time()
+        self.dispatched_at = None
+
+    @property
+    def aisle(self):
+        """작업이 점유하는 통로 - sector 단위"""
+        return self.sector
+
+    def estimated_time(self):
+        return estimate_job_time(self.sector, self.subzone)
+
+    def to_message(self):
+        """로봇에 보낼 명령 문자열"""
+        return f"{self.cmd},{self.sector},{self.side},{self.subzone},{self.direction},{self.car_number}"
+
+    def __repr__(self):
+        return f"Job({self.to_message()})"
+
+
+class RobotState:
+    def __init__(self, robot_num):
+        self.robot_num = robot_num
+        self.state = IDLE
+        self.job = None
+        self.speed_factor = 1.0         # 1.0보다 크면 추정보다 느린 로봇
+        self.current_sector = 0         # 0 = 대기 위치
+        self.completed_jobs = 0
+
+    def estimated_completion(self, job, now):
+        """이 로봇이 지금 job을 받았을 때 예상 완료 시각"""
+        return now + job.estimated_time() * self.speed_factor
+
+    def dispatch_priority(self, job, now):
+        """배정 우선순위 (작을수록 먼저) - 예상 완료 시각에서 대기한 시간만큼 앞당김 (= 접수 시각 + 예상 소요 시간)"""
+        return self.estimated_completion(job, now) - (now - job.created_at)
+
+
+class RobotDispatcher:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.queue = deque()            # 대기 중인 Job
+        self.robots = {}                # {로봇 번호: RobotState}
+        self.reserved_aisles = {}       # {sector: 로봇 번호}
+        self.history = []               # (시각, 이벤트, 로봇 번호, Job) - 시뮬레이션 검증용
+
+    # ------------------------------------------------------------------
+    # 로봇 등록/해제
+    # ------------------------------------------------------------------
+    def register_robot(self, robot_num):
+        with self.lock:
+            self.robots[robot_num] = RobotState(robot_num)
+            print(f"[배차] robot #{robot_num} 등록 (대기 중)")
+
+    def unregister_robot(self, robot_num):
+        with self.lock:
+            robot = self.robots.pop(robot_num, None)
+            if robot is None:
+                return
+            if robot.job is not None:
+                # 로봇이 작업 도중 끊기면 차량 위치가 불확실하므로 작업을 재배정하지 않는다.
+                print(f"[배차] robot #{robot_num} 작업 도중 연결 끊김: {robot.job} - 수동 확인 필요")
+            self._release_aisle(robot_num)
+            print(f"[배차] robot #{robot_num} 해제")
+
+    # ------------------------------------------------------------------
+    # 작업 큐
+    # ------------------------------------------------------------------
+    def submit(self, cmd, sector, side, subzone, direction, car_number):
+        """작업을 큐에 추가. 같은 차량의 같은 작업이 이미 대기/진행 중이면 무시"""
+        job = Job(cmd, sector, side, subzone, direction, car_number)
+        with self.lock:
+            if self._has_job(cmd, car_number):
+                print(f"[배차] 이미 처리 중인 작업: {job}")
+                return None
+            self.queue.append(job)
+            self.history.append((time.time(), "submit", None, job))
+            print(f"[배차] 작업 추가: {job} (대기 {len(self.queue)}건)")
+        return job
+
+    def _has_job(self, cmd, car_number):
+        for job in self.queue:
+            if job.cmd == cmd and job.car_number == car_number:
+                return True
+        for robot in self.robots.values():
+            if robot.job is not None and robot.job.cmd == cmd and robot.job.car_number == car_number:
+                return True
+        return False
+
+    def dispatch(self, clients, robot_clients):
+        """놀고 있는 로봇에게 대기 중인 작업을 배정하고 명령을 전송"""
+        assignments = []
+        with self.lock:
+            now = time.time()
+            while True:
+                idle = [r for num, r in self.robots.items() if r.state == IDLE and num in robot_clients]
+                if not idle or not self.queue:
+                    break
+                # 통로가 비어 있는 작업 (막힌 작업은 건너뜀, 같은 차량의 앞선 작업이 대기 중이면 순서 유지)
+                ready = [j for i, j in enumerate(self.queue)
+                         if j.aisle not in self.reserved_aisles
+                         and not any(earlier.car_number == j.car_number for earlier in list(self.queue)[:i])]
+                if not ready:
+                    break
+                # 예상 완료 시각(대기 시간 반영)이 가장 빠른 작업 × 로봇 조합
+                job, robot = min(((j, r) for j in ready for r in idle),
+                                 key=lambda pair: (pair[1].dispatch_priority(pair[0], now),
+                                                   pair[0].created_at, pair[1].robot_num))
+                self.queue.remove(job)
+                job.dispatched_at = now
+                robot.job = job
+                robot.state = DISPATCHED
+                self.reserved_aisles[job.aisle] = robot.robot_num
+                self.history.append((now, "dispatch", robot.robot_num, job))
+                assignments.append((robot.robot_num, job))
+
+        # 소켓 전송은 락 밖에서
+        for robot_num, job in assignments:
+            try:
+                robot_sock = clients[robot_clients[robot_num]][0]
+                robot_sock.sendall(f"{job.to_message()}\n".encode())
+                print(f"[배차] robot #{robot_num} ← {job.to_message()} (대기 {len(self.queue)}건)")
+            except Exception as e:
+                print(f"[배차] robot #{robot_num} 명령 전송 실패: {e}")
+                with self.lock:
+                    self._finish_job(robot_num, failed=True)
+                    self.queue.appendleft(job)
+        return assignments
+
+    # ------------------------------------------------------------------
+    # 로봇 메시지 → 상태 갱신
+    # ------------------------------------------------------------------
+    def on_robot_message(self, robot_num, msg):
+        """로봇 메시지로 상태를 갱신. 로봇이 다시 놀게 되면 True 반환"""
+        with self.lock:
+            robot = self.robots.get(robot_num)
+            if robot is None:
+                return False
+
+            if msg.startswith("sector_arrived"):
+                try:
+                    robot.current_sector = int(msg.split(",")[1])
+                except (IndexError, ValueError):
+                    pass
+                if robot.state == DISPATCHED:
+                    robot.state = WORKING
+            elif msg.startswith("starting_point"):
+                robot.current_sector = 0
+            elif msg.startswith("DONE") or msg.startswith("OUT_DONE"):
+                if robot.job is not None:
+                    robot.state = RETURNING
+            elif msg.startswith("COMPLETE") or msg.startswith("done"):
+                self._finish_job(robot_num)
+                return True
+            elif msg.startswith("ERROR"):
+                # 로봇이 명령을 처리하지 못함 - 로봇은 대기 위치에 그대로 있음
+                print(f"[배차] robot #{robot_num} 작업 실패: {msg}")
+                self._finish_job(robot_num, failed=True)
+                return True
+        return False
+
+    def _finish_job(self, robot_num, failed=False):
+        robot = self.robots.get(robot_num)
+        if robot is None:
+            return
+        job = robot.job
+        if job is not None and not failed and job.dispatched_at is not None:
+            # 실제 소요 시간으로 로봇 속도 보정
+            actual = time.time() - job.dispatched_at
+            ratio = actual / job.estimated_time()
+            robot.speed_factor = (1 - SPEED_FACTOR_ALPHA) * robot.speed_factor + SPEED_FACTOR_ALPHA * ratio
+            robot.completed_jobs += 1
+            print(f"[배차] robot #{robot_num} 작업 완료: {job} ({actual:.1f}초, 보정 계수 {robot.speed_factor:.2f})")
+        if job is not None:
+            self.history.append((time.time(), "fail" if failed else "complete", robot_num, job))
+        robot.job = None
+        robot.state = IDLE
+        robot.current_sector = 0
+        self._release_aisle(robot_num)
+
+    def _release_aisle(self, robot_num):
+        for aisle, owner in list(self.reserved_aisles.items()):
+            if owner == robot_num:
+                del self.reserved_aisles[aisle]
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def pending_jobs(self):
+        with self.lock:
+            return list(self.queue)
+
+    def is_idle(self):
+        """대기 작업도, 진행 중인 작업도 없으면 True"""
+        with self.lock:
+            return not self.queue and all(r.job is None for r in self.robots.values())
+
+    def status(self):
+        with self.lock:
+            return {
+                "queue": [job.to_message() for job in self.queue],
+                "robots": {
+                    num: {
+                        "state": r.state,
+                        "job": r.job.to_message() if r.job else None,
+                        "sector": r.current_sector,
+                        "speed_factor": round(r.speed_factor, 2),
+                        "completed": r.completed_jobs,
+                    }
+                    for num, r in self.robots.items()
+                },
+                "reserved_aisles": dict(self.reserved_aisles),
+            }
+
+    def reset(self):
+        with self.lock:
+            self.queue.clear()
+            self.robots.clear()
+            self.reserved_aisles.clear()
+            self.history.clear()
+
+
+# 서버 전체에서 공유하는 배차기 (find_destination.parking_lot과 같은 방식)
+dispatcher = RobotDispatcher()
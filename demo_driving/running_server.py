@@ -83,6 +83,7 @@ def command_mode():
     print("  - [app|robot|server] 번호 메시지")
     print("  - exit: 종료")
     print("예시: app 1 test_message, robot 1 PARK,1,left,1,left,1234, server 1 IN,1234")
+    print("      server 1 BATCH,IN:1234,IN:5678,OUT:1111 (여러 요청 일괄 처리)")
     
     while True:
         cmd = input("[서버] 명령 입력: ").strip()
@@ -5,12 +5,22 @@ import socket
 import json
 import os
 from datetime import datetime
-import queue
+from collections import deque
 
 # 개인적으로 만든 모듈 불러오기
 import find_destination
 import message_handler
 
+FRAME_INTERVAL_MS = 100       # 화면 갱신 주기 (10fps) - 이벤트는 모아서 프레임마다 한 번에 반영
+MAX_EVENTS_PER_FRAME = 5000   # 한 프레임에서 처리할 최대 이벤트 수 (나머지는 다음 프레임)
+LOG_RING_SIZE = 5000          # 메모리에 보관할 로그 줄 수 (로그 저장용)
+LOG_VIEW_LINES = 500          # 로그 창에 표시할 최대 줄 수
+
+# 주차칸 그리드 크기/색상
+CELL_W, CELL_H = 90, 24
+CELL_EMPTY_COLOR = "#e8f5e9"
+CELL_PARKED_COLOR = "#ffcdd2"
+
 class ServerGUI:
     def __init__(self, root):
         self.root = root
@@ -27,17 +37,26 @@ class ServerGUI:
         self.clients = {}  # {addr: (client_socket, device_type)}
         self.app_clients = {}  # {번호: addr}
         self.robot_clients = {}  # {번호: addr}
-        self.app_counter = 1
-        self.robot_counter = 1
         
-        # 로그 메시지 큐
-        self.log_queue = queue.Queue()
+        # 서버 스레드 → GUI 이벤트 (deque.append/popleft는 스레드 안전)
+        self.events = deque()
+        self.pending_logs = deque()
+        self.log_ring = deque(maxlen=LOG_RING_SIZE)
+        self.log_view_count = 0
+        
+        # 주차칸 그리드 상태 - 바뀐 칸만 다시 그림
+        self.cell_items = {}  # {(sector, side, subzone, direction): (rect_id, text_id)}
+        self.cell_state = {}  # {(sector, side, subzone, direction): car_number}
+        self.dirty_cells = set()
+        self.clients_dirty = False
         
         # GUI 구성
         self.setup_gui()
         
-        # 로그 업데이트 스레드 시작
-        self.root.after(100, self.update_logs)
+        # 서버 핵심 모듈의 상태 변경 이벤트 구독 후 프레임 루프 시작
+        message_handler.add_listener(self.on_server_event)
+        self.update_parking_status()
+        self.root.after(FRAME_INTERVAL_MS, self.on_frame)
         
         # 서버 자동 시작 여부 묻기
         if messagebox.askyesno("서버 시작", "서버를 자동으로 시작하시겠습니까?"):
@@ -123,9 +142,13 @@ class ServerGUI:
         parking_frame.columnconfigure(0, weight=1)
         parking_frame.rowconfigure(1, weight=1)
         
-        # 주차 현황 텍스트
-        self.parking_text = scrolledtext.ScrolledText(parking_frame, height=8, width=40)
-        self.parking_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # 주차 현황 그리드 (sector별로 subzone 행, 좌/우 side의 left/right 칸)
+        self.parking_canvas = tk.Canvas(parking_frame, height=8 * CELL_H, background="white")
+        parking_scrollbar = ttk.Scrollbar(parking_frame, orient="vertical", command=self.parking_canvas.yview)
+        self.parking_canvas.configure(yscrollcommand=parking_scrollbar.set)
+        self.parking_canvas.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        parking_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.build_parking_grid()
         
         # 주차 상태 새로고침 버튼
         refresh_frame = ttk.Frame(parking_frame)
@@ -133,6 +156,28 @@ class ServerGUI:
         
         ttk.Button(refresh_frame, text="새로고침", command=self.update_parking_status).grid(row=0, column=0, padx=(0, 5))
         ttk.Button(refresh_frame, text="모든 주차 초기화", command=self.reset_all_parking).grid(row=0, column=1, padx=5)
+        self.parking_summary = ttk.Label(refresh_frame, text="")
+        self.parking_summary.grid(row=0, column=2, padx=(10, 0))
+
+    def build_parking_grid(self):
+        """주차칸마다 사각형/텍스트를 한 번만 만들어 두고, 이후에는 바뀐 칸의 속성만 수정"""
+        subzones_per_side = len(find_destination.parking_lot[0].left) if find_destination.parking_lot else 0
+        rows_per_sector = subzones_per_side + 1  # sector 사이 한 줄 띄움
+        for sector, side, subzone, direction, space in find_destination.iter_spaces(find_destination.parking_lot):
+            row = (sector - 1) * rows_per_sector + (subzone - 1)
+            # 열: left side [left, right] | 통로 | right side [left, right]
+            col = (0 if side == "left" else 3) + (0 if direction == "left" else 1)
+            x, y = col * CELL_W + 4, row * CELL_H + 4
+            rect = self.parking_canvas.create_rectangle(x, y, x + CELL_W - 4, y + CELL_H - 4,
+                                                        fill=CELL_EMPTY_COLOR, outline="#9e9e9e")
+            text = self.parking_canvas.create_text(x + (CELL_W - 4) / 2, y + (CELL_H - 4) / 2, text="")
+            key = (sector, side, subzone, direction)
+            self.cell_items[key] = (rect, text)
+            self.cell_state[key] = None
+            if subzone == 1 and side == "left" and direction == "left":
+                self.parking_canvas.create_text(2 * CELL_W + CELL_W / 2, y + (CELL_H - 4) / 2,
+                                                text=f"Sector {sector}", fill="#616161")
+        self.parking_canvas.configure(scrollregion=self.parking_canvas.bbox("all") or (0, 0, 0, 0))
 
     def setup_command_panel(self, parent):
         # 명령어 패널 프레임
@@ -197,25 +242,81 @@ class ServerGUI:
         self.log_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
     def add_log(self, message):
-        """로그 메시지 추가"""
+        """로그 메시지 추가 (어느 스레드에서나 호출 가능, 화면 반영은 다음 프레임)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        self.log_queue.put(log_entry)
+        self.pending_logs.append(f"[{timestamp}] {message}\n")
+
+    def on_server_event(self, event, data):
+        """message_handler 이벤트 콜백 - 서버 스레드에서 호출되므로 큐에만 넣음"""
+        self.events.append((event, data))
 
-    def update_logs(self):
-        """로그 텍스트 업데이트"""
+    def on_frame(self):
+        """고정 주기 화면 갱신: 쌓인 이벤트를 반영하고 바뀐 부분만 다시 그림"""
         try:
-            while True:
-                log_entry = self.log_queue.get_nowait()
-                self.log_text.config(state="normal")
-                self.log_text.insert(tk.END, log_entry)
-                self.log_text.see(tk.END)
-                self.log_text.config(state="disabled")
-        except queue.Empty:
-            pass
-        
-        # 다음 업데이트 예약
-        self.root.after(100, self.update_logs)
+            self.process_events()
+            self.flush_logs()
+            self.redraw_parking_cells()
+            if self.clients_dirty:
+                self.clients_dirty = False
+                self.update_client_list()
+        except Exception as e:
+            print(f"[GUI] 화면 갱신 오류: {e}")
+        
+        # 다음 프레임 예약
+        self.root.after(FRAME_INTERVAL_MS, self.on_frame)
+
+    def process_events(self):
+        for _ in range(MAX_EVENTS_PER_FRAME):
+            try:
+                event, data = self.events.popleft()
+            except IndexError:
+                break
+            if event == "space":
+                key = (int(data["sector"]), data["side"], int(data["subzone"]), data["direction"])
+                self.set_cell(key, data["car_number"])
+            elif event == "client":
+                self.clients_dirty = True
+                self.add_log(f"클라이언트 {data['addr']} {'연결됨' if data['action'] == 'connected' else '연결 해제'}")
+            elif event == "message":
+                self.add_log(f"{data['device_type']} {data['addr']} -> {data['msg']}")
+
+    def flush_logs(self):
+        """이번 프레임에 쌓인 로그를 한 번에 추가하고, 화면에는 최근 LOG_VIEW_LINES줄만 유지"""
+        if not self.pending_logs:
+            return
+        new_lines = []
+        while self.pending_logs:
+            new_lines.append(self.pending_logs.popleft())
+        self.log_ring.extend(new_lines)
+        if len(new_lines) > LOG_VIEW_LINES:
+            new_lines = new_lines[-LOG_VIEW_LINES:]
+        
+        self.log_text.config(state="normal")
+        self.log_text.insert(tk.END, "".join(new_lines))
+        self.log_view_count += len(new_lines)
+        excess = self.log_view_count - LOG_VIEW_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_view_count -= excess
+        self.log_text.see(tk.END)
+        self.log_text.config(state="disabled")
+
+    def set_cell(self, key, car_number):
+        if key in self.cell_state and self.cell_state[key] != car_number:
+            self.cell_state[key] = car_number
+            self.dirty_cells.add(key)
+
+    def redraw_parking_cells(self):
+        if not self.dirty_cells:
+            return
+        for key in self.dirty_cells:
+            rect, text = self.cell_items[key]
+            car_number = self.cell_state[key]
+            self.parking_canvas.itemconfigure(rect, fill=CELL_PARKED_COLOR if car_number else CELL_EMPTY_COLOR)
+            self.parking_canvas.itemconfigure(text, text=car_number or "")
+        self.dirty_cells.clear()
+        parked = sum(1 for car_number in self.cell_state.values() if car_number)
+        self.parking_summary.config(text=f"총 {parked}/{len(self.cell_state)}칸 주차")
 
     def start_server(self):
         """서버 시작"""
@@ -276,76 +377,22 @@ class ServerGUI:
                 client_socket, addr = self.server_socket.accept()
                 self.add_log(f"새 연결: {addr}")
                 
-                # 클라이언트 처리 스레드 시작
-                threading.Thread(target=self.handle_client, args=(client_socket, addr), daemon=True).start()
+                # 클라이언트 처리 스레드 시작 (running_server와 같은 message_handler 사용)
+                threading.Thread(
+                    target=message_handler.handle_client,
+                    args=(client_socket, addr, self.clients, self.app_clients, self.robot_clients,
+                          self.save_parking_status, self.export_parking_status),
+                    daemon=True
+                ).start()
                 
             except Exception as e:
                 if self.is_running:
                     self.add_log(f"클라이언트 수락 오류: {e}")
                 break
 
-    def handle_client(self, client_socket, addr):
-        """클라이언트 메시지 처리"""
-        try:
-            # 첫 번째 메시지로 디바이스 타입 확인
-            data = client_socket.recv(1024).decode().strip()
-            device_type = data
-            
-            if device_type == "app":
-                client_number = self.app_counter
-                self.app_clients[client_number] = addr
-                self.app_counter += 1
-            elif device_type == "robot":
-                client_number = self.robot_counter
-                self.robot_clients[client_number] = addr
-                self.robot_counter += 1
-            else:
-                device_type = "unknown"
-                client_number = 0
-            
-            self.clients[addr] = (client_socket, device_type)
-            self.add_log(f"{device_type} #{client_number} 연결됨: {addr}")
-            
-            # GUI 업데이트
-            self.root.after(0, self.update_client_list)
-            
-            # 메시지 처리 루프
-            while self.is_running:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
-                
-                message = data.decode().strip()
-                self.add_log(f"{device_type} #{client_number} -> {message}")
-                
-                # 메시지 처리 (기존 message_handler 사용)
-                # TODO: message_handler와 연동
-                
-        except Exception as e:
-            self.add_log(f"클라이언트 {addr} 오류: {e}")
-        finally:
-            # 연결 정리
-            if addr in self.clients:
-                del self.clients[addr]
-            
-            # app/robot 클라이언트 목록에서 제거
-            for num, client_addr in list(self.app_clients.items()):
-                if client_addr == addr:
-                    del self.app_clients[num]
-                    break
-            
-            for num, client_addr in list(self.robot_clients.items()):
-                if client_addr == addr:
-                    del self.robot_clients[num]
-                    break
-            
-            try:
-                client_socket.close()
-            except:
-                pass
-            
-            self.add_log(f"클라이언트 {addr} 연결 해제")
-            self.root.after(0, self.update_client_list)
+    def save_parking_status(self, parking_status):
+        """running_server.save_parking_status와 동일 - 현재 비활성화"""
+        pass
 
     def update_client_list(self):
         """클라이언트 목록 업데이트"""
@@ -364,23 +411,13 @@ class ServerGUI:
                 self.client_tree.insert("", "end", values=(num, "Robot", f"{addr[0]}:{addr[1]}", "연결됨"))
 
     def update_parking_status(self):
-        """주차 상태 업데이트"""
-        self.parking_text.delete(1.0, tk.END)
-        
+        """주차 상태 전체 동기화 (새로고침/초기화 시) - 실제로 바뀐 칸만 다시 그림"""
         try:
-            status = self.export_parking_status()
-            
-            if not status:
-                self.parking_text.insert(tk.END, "현재 주차된 차량이 없습니다.\n")
-            else:
-                self.parking_text.insert(tk.END, f"총 {len(status)}대 차량이 주차되어 있습니다.\n\n")
-                
-                for car_number, info in status.items():
-                    location = f"Sector {info['sector']} - {info['side']} - Subzone {info['subzone']} - {info['direction']}"
-                    self.parking_text.insert(tk.END, f"🚗 {car_number}: {location}\n")
-                    
+            for sector, side, subzone, direction, space in find_destination.iter_spaces(find_destination.parking_lot):
+                self.set_cell((sector, side, subzone, direction), space.car_number)
+            self.redraw_parking_cells()
         except Exception as e:
-            self.parking_text.insert(tk.END, f"주차 상태 조회 오류: {e}\n")
+            self.add_log(f"주차 상태 조회 오류: {e}")
 
     def export_parking_status(self):
         """현재 주차 상태를 딕셔너리 형태로 추출"""
@@ -408,14 +445,7 @@ class ServerGUI:
         """모든 주차공간 초기화"""
         if messagebox.askyesno("확인", "모든 주차공간을 초기화하시겠습니까?"):
             try:
-                for sector in find_destination.parking_lot:
-                    for side in ["left", "right"]:
-                        subzones = getattr(sector, side)
-                        for subzone in subzones:
-                            for direction in ["left", "right"]:
-                                space = getattr(subzone, direction)
-                                space.car_number = None
-                
+                self.reset_parking_spaces()
                 self.add_log("모든 주차공간이 초기화되었습니다.")
                 self.update_parking_status()
                 
@@ -423,6 +453,11 @@ class ServerGUI:
                 self.add_log(f"주차공간 초기화 오류: {e}")
                 messagebox.showerror("오류", f"주차공간 초기화 실패: {e}")
 
+    def reset_parking_spaces(self):
+        """모든 공간을 비움 (확인 없이)"""
+        for sector, side, subzone, direction, space in find_destination.iter_spaces(find_destination.parking_lot):
+            space.car_number = None
+
     def send_command(self):
         """명령어 전송"""
         try:
@@ -482,10 +517,16 @@ class ServerGUI:
         elif command == "RESET":
             self.reset_all_parking()
         else:
-            self.add_log(f"알 수 없는 서버 명령어: {command}")
+            # IN/OUT/BATCH 등은 running_server와 같은 처리
+            message_handler.handle_server_command(command, self.clients, self.app_clients, self.robot_clients,
+                                                  self.save_parking_status, self.export_parking_status,
+                                                  self.reset_parking_spaces)
+            self.update_parking_status()
 
     def clear_logs(self):
         """로그 지우기"""
+        self.log_ring.clear()
+        self.log_view_count = 0
         self.log_text.config(state="normal")
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state="disabled")
@@ -497,7 +538,7 @@ class ServerGUI:
             filename = f"server_log_{timestamp}.txt"
             
             with open(filename, "w", encoding="utf-8") as f:
-                f.write(self.log_text.get(1.0, tk.END))
+                f.writelines(self.log_ring)
             
             messagebox.showinfo("완료", f"로그가 저장되었습니다: {filename}")
             self.add_log(f"로그 저장 완료: {filename}")
@@ -0,0 +1,287 @@
+"""
+로봇 위치/상태 텔레메트리 모듈
+로봇 → 서버 → 앱으로 현재 상태(마커 거리, 10번 마커 편차, 현재 명령, 미션 단계)를
+기존 소켓으로 계속 보낸다. sector_arrived 같은 웨이포인트 메시지는 그대로 두고 추가로 전송한다.
+
+전송 형식 (한 줄)
+- 로봇 → 서버: TLM,<seq>,<k=v>...   바뀐 값만 보내는 델타
+              TLMK,<seq>,<k=v>...  모든 값을 보내는 키프레임 (주기적으로, 유실/늦은 구독 대비)
+- 서버 → 앱:   TLM,<robot>,<seq>,<k=v>... / TLMK,<robot>,<seq>,<k=v>...
+- 앱 → 서버:   SUB,TLM / UNSUB,TLM
+
+키: m=마커 ID, d=마커 거리(m), x=10번 마커 편차(px), c=현재 시리얼 명령, s=미션 단계,
+    g=차량-로봇 간격(mm, 리프트 중 비전 추정/시리얼 값) ("-"는 값 없음)
+
+로봇 쪽(TelemetryPublisher)은 제어 루프에서 update()로 값만 바꾸고,
+전송은 별도 스레드가 최대 RATE_HZ로 값이 바뀐 경우에만 하므로 제어 루프를 막지 않는다.
+서버 쪽(TelemetryHub)은 구독한 앱마다 전송 스레드를 두어 느린 앱이 로봇 수신 스레드를 막지 않게 한다.
+"""
+import queue
+import threading
+import time
+
+RATE_HZ = 10                # 최대 전송 주기
+KEYFRAME_INTERVAL = 5.0     # 키프레임 주기(초)
+DISTANCE_STEP = 0.005       # 거리 변화 기준 (m) - 이보다 작은 변화는 보내지 않음
+DEVIATION_STEP = 2          # 편차 변화 기준 (px)
+SUBSCRIBER_QUEUE_SIZE = 200 # 앱별 대기 메시지 수 - 넘치면 비우고 키프레임부터 다시 보냄
+
+FIELDS = ("m", "d", "x", "c", "s", "g")
+
+# 미션 단계로 기록할 진행 메시지 (로봇이 서버로 보내는 메시지의 첫 단어)
+PROGRESS_MESSAGES = ("starting_point", "sector_arrived", "subzone_arrived", "DONE", "OUT_DONE", "COMPLETE")
+
+
+def quantize(key, value):
+    """변화 판단/전송용 값 정규화 (작은 떨림은 같은 값으로 취급)"""
+    if value is None:
+        return None
+    if key == "d":
+        return round(round(float(value) / DISTANCE_STEP) * DISTANCE_STEP, 3)
+    if key == "x":
+        return int(round(float(value) / DEVIATION_STEP) * DEVIATION_STEP)
+    if key == "g":
+        return int(round(float(value)))
+    return value
+
+
+def encode_fields(fields):
+    return ",".join(f"{k}={'-' if fields[k] is None else fields[k]}" for k in FIELDS if k in fields)
+
+
+def decode_fields(parts):
+    fields = {}
+    for part in parts:
+        key, sep, value = part.partition("=")
+        if not sep or key not in FIELDS:
+            continue
+        fields[key] = None if value == "-" else value
+    return fields
+
+
+class TelemetryPublisher:
+    """로봇 쪽 텔레메트리 전송기"""
+    def __init__(self, rate_hz=RATE_HZ, keyframe_interval=KEYFRAME_INTERVAL):
+        self.interval = 1.0 / rate_hz
+        self.keyframe_interval = keyframe_interval
+        self.lock = threading.Lock()
+        self.state = {k: None for k in FIELDS}
+        self.sent = {}
+        self.seq = 0
+        self.sock = None
+        self.running = False
+
+    def update(self, marker=None, distance=None, deviation=None, command=None, step=None, gap=None):
+        """제어 루프에서 호출 - 값만 바꾸고 바로 반환 (None인 인자는 변경 안 함)"""
+        with self.lock:
+            if marker is not None:
+                self.state["m"] = int(marker)
+            if distance is not None:
+                self.state["d"] = quantize("d", distance)
+            if deviation is not None:
+                self.state["x"] = quantize("x", deviation)
+            if command is not None:
+                self.state["c"] = command
+            if step is not None:
+                self.state["s"] = step
+            if gap is not None:
+                self.state["g"] = quantize("g", gap)
+
+    def attach(self, sock):
+        """서버 소켓을 감싸서 반환 - 기존 sendall과 텔레메트리 전송이 한 락으로 직렬화되고
+        진행 메시지(sector_arrived 등)는 미션 단계로 기록됨"""
+        self.sock = TelemetrySocket(sock, self)
+        return self.sock
+
+    def start(self):
+        if self.running or self.sock is None:
+            return
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def next_message(self, keyframe):
+        """보낼 메시지 생성 (바뀐 값이 없으면 None)"""
+        with self.lock:
+            if keyframe:
+                changed = dict(self.state)
+            else:
+                changed = {k: v for k, v in self.state.items() if self.sent.get(k, "unsent") != v}
+            if not changed:
+                return None
+            self.sent.update(changed)
+            self.seq += 1
+            kind = "TLMK" if keyframe else "TLM"
+            return f"{kind},{self.seq},{encode_fields(changed)}"
+
+    def run(self):
+        next_keyframe = 0.0
+        while self.running:
+            start = time.time()
+            keyframe = start >= next_keyframe
+            if keyframe:
+                next_keyframe = start + self.keyframe_interval
+            message = self.next_message(keyframe)
+            if message is not None:
+                try:
+                    self.sock.sendall(f"{message}\n".encode())
+                except OSError as e:
+                    print(f"[텔레메트리] 전송 실패: {e}")
+                    self.running = False
+                    break
+            time.sleep(max(0.0, self.interval - (time.time() - start)))
+
+
+class LockedSocket:
+    """소켓 래퍼: 여러 스레드의 sendall을 한 락으로 직렬화 (줄이 섞이지 않게). 나머지는 원래 소켓으로 위임"""
+    def __init__(self, sock):
+        self._sock = sock
+        self._send_lock = threading.Lock()
+
+    def sendall(self, data):
+        with self._send_lock:
+            return self._sock.sendall(data)
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+class TelemetrySocket(LockedSocket):
+    """서버 소켓 래퍼: sendall 직렬화 + 진행 메시지로 미션 단계 기록"""
+    def __init__(self, sock, publisher):
+        super().__init__(sock)
+        self._publisher = publisher
+
+    def sendall(self, data):
+        text = data.decode(errors="ignore") if isinstance(data, (bytes, bytearray)) else str(data)
+        for line in text.splitlines():
+            word = line.split(",", 1)[0]
+            if word in PROGRESS_MESSAGES:
+                self._publisher.update(step=word)
+        return super().sendall(data)
+
+
+class SerialCommandTap:
+    """시리얼 포트 래퍼: write로 보낸 명령 바이트를 현재 명령으로 기록"""
+    def __init__(self, serial_port, publisher):
+        self._serial = serial_port
+        self._publisher = publisher
+
+    def write(self, data):
+        if data:
+            # 1바이트 명령은 그대로, 속도 프레임은 머리 바이트('v')로 기록
+            self._publisher.update(command=bytes(data[:1]).decode(errors="ignore"))
+        return self._serial.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._serial, name)
+
+
+class TelemetryHub:
+    """서버 쪽: 로봇별 최신 상태 유지 + 구독한 앱들에게 전달"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.robot_state = {}   # {로봇 번호: {k: v}}
+        self.subscribers = {}   # {addr: _Subscriber}
+
+    def publish(self, robot_num, line):
+        """로봇에서 온 TLM/TLMK 한 줄 처리 - 상태 갱신 후 구독자 큐에 넣기만 함"""
+        parts = line.strip().split(",")
+        kind = parts[0]
+        if kind not in ("TLM", "TLMK") or len(parts) < 2:
+            return False
+        fields = decode_fields(parts[2:])
+        with self.lock:
+            state = self.robot_state.setdefault(robot_num, {})
+            if kind == "TLMK":
+                state.clear()
+            state.update(fields)
+            subscribers = list(self.subscribers.values())
+        out = f"{kind},{robot_num},{','.join(parts[1:])}\n".encode()
+        for subscriber in subscribers:
+            subscriber.push(out)
+        return True
+
+    def snapshot_lines(self):
+        """현재 모든 로봇 상태를 키프레임으로"""
+        with self.lock:
+            return [f"TLMK,{robot_num},0,{encode_fields(state)}"
+                    for robot_num, state in self.robot_state.items()]
+
+    def subscribe(self, addr, sock):
+        with self.lock:
+            if addr in self.subscribers:
+                return
+            subscriber = _Subscriber(sock, self)
+            self.subscribers[addr] = subscriber
+        subscriber.resync()
+        print(f"[텔레메트리] {addr} 구독 시작")
+
+    def unsubscribe(self, addr):
+        with self.lock:
+            subscriber = self.subscribers.pop(addr, None)
+        if subscriber is not None:
+            subscriber.close()
+            print(f"[텔레메트리] {addr} 구독 해제")
+
+    def remove_robot(self, robot_num):
+        with self.lock:
+            self.robot_state.pop(robot_num, None)
+
+
+class _Subscriber:
+    """앱 1개에 대한 전송 큐/스레드 - sock은 message_handler가 등록한 LockedSocket (parked/MOVE 등과 같은 락)"""
+    def __init__(self, sock, hub):
+        self.sock = sock
+        self.hub = hub
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def push(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            # 앱이 느려서 밀림 - 델타를 버리고 최신 키프레임부터 다시
+            self.resync()
+
+    def resync(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        lines = self.hub.snapshot_lines()
+        if lines:
+            try:
+                self.queue.put_nowait("".join(f"{line}\n" for line in lines).encode())
+            except queue.Full:
+                pass
+
+    def run(self):
+        while self.running:
+            try:
+                data = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            # 밀린 메시지는 한 번의 sendall로 묶어서 전송
+            chunks = [data]
+            while True:
+                try:
+                    chunks.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.sock.sendall(b"".join(chunks))
+            except OSError:
+                break
+
+    def close(self):
+        self.running = False
+
+
+# 로봇 프로세스에서 공유하는 전송기 / 서버에서 공유하는 허브
+publisher = TelemetryPublisher()
+hub = TelemetryHub()
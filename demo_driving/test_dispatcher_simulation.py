@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+다중 로봇 배차 시뮬레이션 테스트
+로컬 서버(message_handler.handle_client)에 TestRobotClient 여러 대와 가짜 앱을 붙여
+입차/출차 요청을 한꺼번에 보내고 다음을 확인한다.
+- 모든 요청이 처리되는지 (parked/lifted 메시지 수신)
+- 두 로봇이 같은 sector 통로를 동시에 예약하지 않았는지
+- 로봇 수에 따라 전체 처리 시간이 얼마나 줄어드는지
+- BATCH 명령으로 보낸 요청도 같은 결과로 처리되는지
+
+사용법: python test_dispatcher_simulation.py [로봇 수 ...]   (기본: 1 2 3)
+"""
+
+import socket
+import sys
+import threading
+import time
+
+import find_destination
+import message_handler
+import robot_dispatcher
+from test_robot_client import TestRobotClient
+
+DELAY_SCALE = 0.05  # TestRobotClient 단계 대기 시간 배율 (2초 → 0.1초)
+TIMEOUT = 60.0
+
+
+def export_parking_status():
+    """running_server.export_parking_status와 같은 형식 (파일 로드 없이 사용하기 위해 복사)"""
+    status = {}
+    for sector_idx, sector in enumerate(find_destination.parking_lot):
+        for side in ["left", "right"]:
+            for subzone_idx, subzone in enumerate(getattr(sector, side)):
+                for direction in ["left", "right"]:
+                    space = getattr(subzone, direction)
+                    if space.car_number:
+                        status[space.car_number] = {
+                            "sector": sector_idx + 1,
+                            "side": side,
+                            "subzone": subzone_idx + 1,
+                            "direction": direction
+                        }
+    return status
+
+
+def reset_parking_lot():
+    for sector in find_destination.parking_lot:
+        for side in ["left", "right"]:
+            for subzone in getattr(sector, side):
+                subzone.left.car_number = None
+                subzone.right.car_number = None
+
+
+class LocalServer:
+    """running_server.start_server와 같은 구조의 테스트용 서버 (임의 포트)"""
+    def __init__(self):
+        self.clients = {}
+        self.app_clients = {}
+        self.robot_clients = {}
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(16)
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+
+    def accept_loop(self):
+        while True:
+            try:
+                client_socket, addr = self.server.accept()
+            except OSError:
+                break
+            threading.Thread(
+                target=message_handler.handle_client,
+                args=(client_socket, addr, self.clients, self.app_clients, self.robot_clients,
+                      lambda status: None, export_parking_status),
+                daemon=True
+            ).start()
+
+    def close(self):
+        self.server.close()
+
+
+class FakeApp:
+    """앱 역할: 요청 전송 및 parked/lifted 메시지 수집"""
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.sock.sendall(b"app\n")
+        self.messages = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.listen, daemon=True).start()
+
+    def listen(self):
+        buffer = ""
+        while True:
+            try:
+                data = self.sock.recv(4096)
+            except OSError:
+                break
+            if not data:
+                break
+            buffer += data.decode()
+            while "\n" in buffer:
+                line, buffer = buffer.split("\n", 1)
+                with self.lock:
+                    self.messages.append(line.strip())
+
+    def count(self, prefix):
+        with self.lock:
+            return sum(1 for m in self.messages if m.startswith(prefix))
+
+    def send_burst(self, cmd, car_numbers, batch=False):
+        if batch:
+            # BATCH 명령 한 줄로 전송
+            items = ",".join(f"{cmd}:{car_number}" for car_number in car_numbers)
+            self.sock.sendall(f"BATCH,{items}\n".encode())
+            return
+        for car_number in car_numbers:
+            self.sock.sendall(f"{cmd},{car_number}\n".encode())
+
+    def close(self):
+        self.sock.close()
+
+
+def wait_until(condition, timeout=TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def check_aisle_exclusive(history):
+    """배차 기록에서 같은 통로를 두 로봇이 동시에 점유한 적이 있는지 검사"""
+    owner = {}
+    for _, event, robot_num, job in history:
+        if event == "dispatch":
+            if job.aisle in owner:
+                return f"sector {job.aisle}: robot #{owner[job.aisle]} 작업 중에 robot #{robot_num} 배정"
+            owner[job.aisle] = robot_num
+        elif event in ("complete", "fail"):
+            owner.pop(job.aisle, None)
+    return None
+
+
+def run_simulation(num_robots, batch=False):
+    reset_parking_lot()
+    robot_dispatcher.dispatcher.reset()
+    server = LocalServer()
+    app = FakeApp(server.port)
+
+    robots = []
+    for _ in range(num_robots):
+        robot = TestRobotClient("127.0.0.1", server.port, delay_scale=DELAY_SCALE)
+        robot.connect_to_server()
+        threading.Thread(target=robot.listen_for_commands, daemon=True).start()
+        robots.append(robot)
+    wait_until(lambda: len(server.robot_clients) == num_robots and len(server.app_clients) == 1, 5.0)
+
+    total_spaces = len(find_destination.parking_lot) * 2 * 2 * 2
+    cars = [f"{1000 + i}" for i in range(total_spaces)]
+
+    start = time.time()
+    app.send_burst("IN", cars, batch)
+    parked_ok = wait_until(lambda: app.count("parked") == len(cars))
+    parked_time = time.time() - start
+    # 마지막 로봇의 COMPLETE까지 기다린 뒤 출차 요청
+    wait_until(robot_dispatcher.dispatcher.is_idle)
+
+    app.send_burst("OUT", cars, batch)
+    lifted_ok = wait_until(lambda: app.count("lifted") == len(cars))
+    wait_until(robot_dispatcher.dispatcher.is_idle)
+    total_time = time.time() - start
+
+    conflict = check_aisle_exclusive(robot_dispatcher.dispatcher.history)
+    status = robot_dispatcher.dispatcher.status()
+
+    for robot in robots:
+        robot.connected = False
+        robot.socket.close()
+    app.close()
+    server.close()
+
+    return {
+        "robots": num_robots,
+        "batch": batch,
+        "parked_ok": parked_ok,
+        "lifted_ok": lifted_ok,
+        "parked_time": parked_time,
+        "total_time": total_time,
+        "conflict": conflict,
+        "completed": {num: r["completed"] for num, r in status["robots"].items()},
+    }
+
+
+def main():
+    robot_counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 3]
+    results = [run_simulation(n) for n in robot_counts]
+    # 같은 요청을 BATCH 명령으로 보냈을 때도 동일하게 처리되는지 확인
+    results.append(run_simulation(max(robot_counts), batch=True))
+
+    print("\n=== 다중 로봇 배차 시뮬레이션 결과 ===")
+    failed = False
+    for r in results:
+        ok = r["parked_ok"] and r["lifted_ok"] and r["conflict"] is None
+        failed |= not ok
+        mode = "BATCH" if r["batch"] else "개별"
+        print(f"[{mode}] 로봇 {r['robots']}대: 입차 완료 {r['parked_time']:.2f}초, 전체 {r['total_time']:.2f}초, "
+              f"로봇별 처리 {r['completed']} → {'통과' if ok else '실패'}")
+        if r["conflict"]:
+            print(f"  통로 충돌: {r['conflict']}")
+        if not r["parked_ok"] or not r["lifted_ok"]:
+            print("  시간 안에 모든 요청이 처리되지 않았습니다.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,11 @@ import time
 import threading
 
 class TestRobotClient:
-    def __init__(self, host='127.0.0.1', port=12345):
+    def __init__(self, host='127.0.0.1', port=12345, delay_scale=1.0, verbose=True):
         self.host = host
         self.port = port
+        self.delay_scale = delay_scale  # 단계별 대기 시간 배율 (시뮬레이션 가속용)
+        self.verbose = verbose          # False면 로그 출력 안 함 (부하 테스트용)
         self.socket = None
         self.connected = False
         
@@ -23,10 +25,10 @@ class TestRobotClient:
             self.socket.connect((self.host, self.port))
             self.socket.sendall(b"robot\n")  # 로봇으로 식별
             self.connected = True
-            print(f"[테스트 로봇] 서버 연결 성공: {self.host}:{self.port}")
+            self.log(f"[테스트 로봇] 서버 연결 성공: {self.host}:{self.port}")
             return True
         except Exception as e:
-            print(f"[테스트 로봇] 서버 연결 실패: {e}")
+            self.log(f"[테스트 로봇] 서버 연결 실패: {e}")
             return False
     
     def send_message(self, message):
@@ -34,92 +36,100 @@ class TestRobotClient:
         if self.connected and self.socket:
             try:
                 self.socket.sendall(f"{message}\n".encode())
-                print(f"[테스트 로봇] 전송: {message}")
+                self.log(f"[테스트 로봇] 전송: {message}")
             except Exception as e:
-                print(f"[테스트 로봇] 메시지 전송 실패: {e}")
+                self.log(f"[테스트 로봇] 메시지 전송 실패: {e}")
                 self.connected = False
     
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def sleep(self, seconds):
+        """delay_scale을 반영한 대기"""
+        time.sleep(seconds * self.delay_scale)
+
     def simulate_parking_process(self, sector, side, subzone, direction, car_number):
         """입차 과정 시뮬레이션"""
-        print(f"\n=== 입차 시뮬레이션 시작: {car_number} ===")
+        self.log(f"\n=== 입차 시뮬레이션 시작: {car_number} ===")
         
         # 1. 대기 위치에서 시작
-        print("[1단계] 대기 위치 출발")
+        self.log("[1단계] 대기 위치 출발")
         self.send_message("starting_point,0,None,None")
-        time.sleep(2)
+        self.sleep(2)
         
         # 2. sector 도착
-        print(f"[2단계] Sector {sector} 도착")
+        self.log(f"[2단계] Sector {sector} 도착")
         self.send_message(f"sector_arrived,{sector},None,None")
-        time.sleep(2)
+        self.sleep(2)
         
         # 3. subzone 도착
-        print(f"[3단계] Subzone {side}-{subzone} 도착")
+        self.log(f"[3단계] Subzone {side}-{subzone} 도착")
         self.send_message(f"subzone_arrived,{sector},{side},{subzone}")
-        time.sleep(2)
+        self.sleep(2)
         
         # 4. 주차 완료
-        print("[4단계] 주차 완료")
+        self.log("[4단계] 주차 완료")
         self.send_message(f"DONE,{sector},{side},{subzone},{direction},{car_number}")
-        time.sleep(2)
+        self.sleep(2)
         
         # 5. 복귀 과정 시뮬레이션
-        print("[5단계] 복귀 시작")
+        self.log("[5단계] 복귀 시작")
         self.send_message(f"subzone_arrived,{sector},{side},{subzone}")
-        time.sleep(1)
+        self.sleep(1)
         
         self.send_message(f"sector_arrived,{sector},None,None")
-        time.sleep(1)
+        self.sleep(1)
         
         self.send_message("starting_point,0,None,None")
-        time.sleep(1)
+        self.sleep(1)
         
         # 6. 전체 작업 완료
-        print("[6단계] 작업 완료")
+        self.log("[6단계] 작업 완료")
         self.send_message("COMPLETE")
         
-        print(f"=== 입차 시뮬레이션 완료: {car_number} ===\n")
+        self.log(f"=== 입차 시뮬레이션 완료: {car_number} ===\n")
     
     def simulate_exit_process(self, sector, side, subzone, direction, car_number):
         """출차 과정 시뮬레이션"""
-        print(f"\n=== 출차 시뮬레이션 시작: {car_number} ===")
+        self.log(f"\n=== 출차 시뮬레이션 시작: {car_number} ===")
         
         # 1. 대기 위치에서 시작
-        print("[1단계] 대기 위치 출발")
+        self.log("[1단계] 대기 위치 출발")
         self.send_message("starting_point,0,None,None")
-        time.sleep(2)
+        self.sleep(2)
         
         # 2. sector 도착
-        print(f"[2단계] Sector {sector} 도착")
+        self.log(f"[2단계] Sector {sector} 도착")
         self.send_message(f"sector_arrived,{sector},None,None")
-        time.sleep(2)
+        self.sleep(2)
         
         # 3. subzone 도착
-        print(f"[3단계] Subzone {side}-{subzone} 도착")
+        self.log(f"[3단계] Subzone {side}-{subzone} 도착")
         self.send_message(f"subzone_arrived,{sector},{side},{subzone}")
-        time.sleep(2)
+        self.sleep(2)
         
         # 4. 출차 완료
-        print("[4단계] 출차 완료")
+        self.log("[4단계] 출차 완료")
         self.send_message(f"OUT_DONE,{sector},{side},{subzone},{direction},{car_number}")
-        time.sleep(2)
+        self.sleep(2)
         
         # 5. 복귀 과정 시뮬레이션
-        print("[5단계] 복귀 시작")
+        self.log("[5단계] 복귀 시작")
         self.send_message(f"subzone_arrived,{sector},{side},{subzone}")
-        time.sleep(1)
+        self.sleep(1)
         
         self.send_message(f"sector_arrived,{sector},None,None")
-        time.sleep(1)
+        self.sleep(1)
         
         self.send_message("starting_point,0,None,None")
-        time.sleep(1)
+        self.sleep(1)
         
         # 6. 전체 작업 완료
-        print("[6단계] 작업 완료")
+        self.log("[6단계] 작업 완료")
         self.send_message("COMPLETE")
         
-        print(f"=== 출차 시뮬레이션 완료: {car_number} ===\n")
+        self.log(f"=== 출차 시뮬레이션 완료: {car_number} ===\n")
     
     def listen_for_commands(self):
         """서버로부터 명령 수신"""
@@ -128,39 +138,45 @@ class TestRobotClient:
                 data = self.socket.recv(1024)
                 if not data:
                     break
-                command = data.decode().strip()
-                print(f"[테스트 로봇] 수신: {command}")
-                
-                # 명령 처리
-                if command.startswith("PARK"):
-                    # PARK,1,left,1,left,1234
-                    parts = command.split(",")
-                    if len(parts) >= 6:
-                        _, sector, side, subzone, direction, car_number = parts
-                        print(f"[테스트 로봇] 입차 명령 받음: {car_number}")
-                        # 별도 스레드에서 시뮬레이션 실행
-                        threading.Thread(
-                            target=self.simulate_parking_process,
-                            args=(sector, side, subzone, direction, car_number),
-                            daemon=True
-                        ).start()
-                
-                elif command.startswith("OUT"):
-                    # OUT,1,left,1,left,1234
-                    parts = command.split(",")
-                    if len(parts) >= 6:
-                        _, sector, side, subzone, direction, car_number = parts
-                        print(f"[테스트 로봇] 출차 명령 받음: {car_number}")
-                        # 별도 스레드에서 시뮬레이션 실행
-                        threading.Thread(
-                            target=self.simulate_exit_process,
-                            args=(sector, side, subzone, direction, car_number),
-                            daemon=True
-                        ).start()
+                # 한 번에 여러 명령이 붙어 올 수 있으므로 줄 단위로 처리
+                for line in data.decode().splitlines():
+                    if line.strip():
+                        self.handle_command(line.strip())
                 
             except Exception as e:
-                print(f"[테스트 로봇] 명령 수신 오류: {e}")
+                self.log(f"[테스트 로봇] 명령 수신 오류: {e}")
                 break
+
+    def handle_command(self, command):
+        """서버 명령 1줄 처리"""
+        self.log(f"[테스트 로봇] 수신: {command}")
+        
+        # 명령 처리
+        if command.startswith("PARK"):
+            # PARK,1,left,1,left,1234
+            parts = command.split(",")
+            if len(parts) >= 6:
+                _, sector, side, subzone, direction, car_number = parts
+                self.log(f"[테스트 로봇] 입차 명령 받음: {car_number}")
+                # 별도 스레드에서 시뮬레이션 실행
+                threading.Thread(
+                    target=self.simulate_parking_process,
+                    args=(sector, side, subzone, direction, car_number),
+                    daemon=True
+                ).start()
+        
+        elif command.startswith("OUT"):
+            # OUT,1,left,1,left,1234
+            parts = command.split(",")
+            if len(parts) >= 6:
+                _, sector, side, subzone, direction, car_number = parts
+                self.log(f"[테스트 로봇] 출차 명령 받음: {car_number}")
+                # 별도 스레드에서 시뮬레이션 실행
+                threading.Thread(
+                    target=self.simulate_exit_process,
+                    args=(sector, side, subzone, direction, car_number),
+                    daemon=True
+                ).start()
     
     def start(self):
         """테스트 로봇 시작"""
@@ -169,21 +185,21 @@ class TestRobotClient:
             listen_thread = threading.Thread(target=self.listen_for_commands, daemon=True)
             listen_thread.start()
             
-            print("\n테스트 로봇이 시작되었습니다!")
-            print("서버에서 입차/출차 명령을 보내면 자동으로 시뮬레이션됩니다.")
-            print("종료하려면 Ctrl+C를 누르세요.\n")
+            self.log("\n테스트 로봇이 시작되었습니다!")
+            self.log("서버에서 입차/출차 명령을 보내면 자동으로 시뮬레이션됩니다.")
+            self.log("종료하려면 Ctrl+C를 누르세요.\n")
             
             try:
                 while True:
                     time.sleep(1)
             except KeyboardInterrupt:
-                print("\n[테스트 로봇] 종료 중...")
+                self.log("\n[테스트 로봇] 종료 중...")
                 self.connected = False
                 if self.socket:
                     self.socket.close()
-                print("[테스트 로봇] 종료 완료")
+                self.log("[테스트 로봇] 종료 완료")
         else:
-            print("[테스트 로봇] 서버 연결 실패로 종료합니다.")
+            self.log("[테스트 로봇] 서버 연결 실패로 종료합니다.")
 
 def main():
     print("=== 테스트용 로봇 클라이언트 ===")
@@ -0,0 +1,246 @@
+"""
+비전 기반 차량-로봇 간격 추정
+차량을 들어올리는 동안(7번 명령 ~ 'a' 수신) 전방 카메라로 타이어를 검출해서
+타이어 폭(픽셀)과 캘리브레이션된 카메라 행렬로 간격(mm)을 계속 추정한다.
+
+- 추정값이 안정되면(최근 STABLE_SAMPLES개가 STABLE_TOLERANCE_MM 이내) 바로 텔레메트리(g)로 알리고,
+  receive_gap()은 시리얼 거리 값을 5초까지 기다리지 않고 짧은 유예(SERIAL_GRACE)만 기다린 뒤 반환한다.
+- 유예 안에 STM32 거리 값이 오면 비전 추정과 비교(cross-check)해서 시리얼 값을 쓰고,
+  차이는 보정값(bias)으로 누적해서 다음 추정에 반영한다.
+- 타이어 검출은 inference_scheduler가 정한 프레임 간격/입력 크기로, 제어 프레임 사이 빈 시간에만 실행한다.
+- YOLO 모델을 못 불러오면 create_estimator()가 None을 반환하고 기존 시리얼 대기 방식으로 동작한다.
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+import inference_scheduler
+import telemetry
+
+# 타이어 검출 클래스 이름 (data/obj.names)
+TIRE_CLASS = "tire"
+
+# 모형 차량 타이어 실제 지름 (mm) - 실측값으로 조정
+TIRE_DIAMETER_MM = 65.0
+
+# 카메라 광심 → 간격 센서 기준면까지 거리 (mm) - 비전 거리에서 빼서 센서와 같은 기준으로 맞춤
+CAMERA_GAP_OFFSET_MM = 0.0
+
+STABLE_SAMPLES = 5              # 안정 판정에 쓰는 최근 추정 개수
+STABLE_TOLERANCE_MM = 5.0       # 최근 추정값 범위가 이 안이면 안정
+CROSS_CHECK_TOLERANCE_MM = 15.0 # 시리얼 값과 이 이상 차이 나면 경고
+BIAS_ALPHA = 0.3                # 시리얼 값과의 차이를 보정값에 반영하는 비율
+SERIAL_TIMEOUT = 5.0            # 비전 추정이 없을 때 시리얼 대기 시간 (기존과 동일)
+SERIAL_GRACE = 0.3              # 비전 추정이 안정된 뒤 시리얼 값을 더 기다리는 시간 (cross-check용)
+MAX_RUN_TIME = 20.0             # receive_gap이 호출되지 않아도 이 시간이 지나면 카메라 사용 중지
+
+
+def tire_distance_mm(boxes, camera_matrix, dist_coeffs, tire_diameter_mm=TIRE_DIAMETER_MM):
+    """
+    타이어 박스들 → 카메라에서 타이어까지 거리 (mm)
+    박스 좌우 끝점을 왜곡 보정된 정규화 좌표로 바꿔서 폭을 구하고, 핀홀 모델로 거리 계산
+
+    Args:
+        boxes: (N, 4) x1, y1, x2, y2 (원본 프레임 좌표)
+    """
+    if len(boxes) == 0:
+        return np.zeros(0)
+    boxes = np.asarray(boxes, np.float64)
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    points = np.stack([np.stack([boxes[:, 0], cy], axis=1), np.stack([boxes[:, 2], cy], axis=1)], axis=1)
+    normalized = cv2.undistortPoints(points.reshape(-1, 1, 2), camera_matrix, dist_coeffs).reshape(-1, 2, 2)
+    width = np.abs(normalized[:, 1, 0] - normalized[:, 0, 0])
+    return tire_diameter_mm / np.maximum(width, 1e-6)
+
+
+class VehicleGapEstimator:
+    def __init__(self, cap, camera_matrix, dist_coeffs, engine, tire_class=TIRE_CLASS):
+        self.cap = cap
+        self.camera_matrix = camera_matrix
+        self.dist_coeffs = dist_coeffs
+        self.engine = engine
+        self.tire_ids = [i for i, name in enumerate(engine.names) if name == tire_class] or [0]
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=STABLE_SAMPLES)
+        self.bias_mm = 0.0      # 시리얼 값 - 비전 값 (cross-check로 누적)
+        self.published = False
+        self.running = False
+        self.thread = None
+        self.frames = 0
+
+    def start(self):
+        """리프트 시작 시 호출 - 백그라운드에서 추정 시작"""
+        if self.running:
+            return
+        with self.lock:
+            self.samples.clear()
+            self.published = False
+            self.frames = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """카메라를 메인 루프에 돌려주기 전에 호출"""
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+
+    def run(self):
+        scheduler = self.engine.scheduler
+        started = time.time()
+        since_last = 0
+        while self.running and time.time() - started < MAX_RUN_TIME:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self.frames += 1
+            since_last += 1
+            input_size = None
+            if scheduler is not None:
+                # 제어 루프(후진 정렬 등)가 같이 돌 때는 스케줄러가 허용한 프레임만 검출
+                if not scheduler.due(since_last) or not scheduler.acquire():
+                    continue
+                input_size = scheduler.input_size
+            since_last = 0
+            inference_start = time.time()
+            try:
+                gap = self.measure(frame, input_size)
+            finally:
+                if scheduler is not None:
+                    scheduler.record_inference(time.time() - inference_start, input_size)
+            if gap is not None:
+                self.add_sample(gap)
+        self.running = False
+
+    def measure(self, frame, input_size=None):
+        """프레임 1장 → 가장 가까운(가장 큰) 타이어 기준 간격 (mm), 타이어가 없으면 None"""
+        boxes, scores, class_ids = self.engine.detect_arrays(frame, input_size)
+        tires = boxes[np.isin(class_ids, self.tire_ids)]
+        if len(tires) == 0:
+            return None
+        distances = tire_distance_mm(tires, self.camera_matrix, self.dist_coeffs)
+        return float(distances.min()) - CAMERA_GAP_OFFSET_MM
+
+    def add_sample(self, gap_mm):
+        with self.lock:
+            self.samples.append(gap_mm)
+            stable = self._stable_gap()
+            first = stable is not None and not self.published
+            if first:
+                self.published = True
+        if first:
+            # 리프트가 끝나기 전이라도 안정된 값을 바로 알림
+            telemetry.publisher.update(gap=stable)
+            print(f"[간격 추정] 비전 간격 안정: {stable:.0f}mm")
+
+    def _stable_gap(self):
+        if len(self.samples) < STABLE_SAMPLES:
+            return None
+        values = np.asarray(self.samples)
+        if values.max() - values.min() > STABLE_TOLERANCE_MM:
+            return None
+        return float(np.median(values)) + self.bias_mm
+
+    def stable_gap(self):
+        """안정된 비전 간격 (mm, 보정값 반영) - 아직 안정되지 않았으면 None"""
+        with self.lock:
+            return self._stable_gap()
+
+    def latest_gap(self):
+        """안정 여부와 상관없이 최근 추정 중앙값 (mm) - 없으면 None"""
+        with self.lock:
+            if not self.samples:
+                return None
+            return float(np.median(self.samples)) + self.bias_mm
+
+    def cross_check(self, serial_mm):
+        """시리얼 간격 값과 비교해서 차이를 로그로 남기고 보정값 갱신"""
+        vision = self.latest_gap()
+        if vision is None:
+            return None
+        diff = serial_mm - vision
+        if abs(diff) > CROSS_CHECK_TOLERANCE_MM:
+            print(f"[간격 추정] ⚠️ 시리얼 {serial_mm}mm / 비전 {vision:.0f}mm 차이 {diff:+.0f}mm")
+        else:
+            print(f"[간격 추정] 시리얼 {serial_mm}mm / 비전 {vision:.0f}mm 일치 ({diff:+.0f}mm)")
+        with self.lock:
+            self.bias_mm += BIAS_ALPHA * diff
+        return diff
+
+
+def create_estimator(cap, camera_matrix, dist_coeffs):
+    """YOLO 엔진을 불러와 추정기 생성 - 모델/카메라가 없으면 None (기존 시리얼 방식 사용)"""
+    if cap is None:
+        return None
+    try:
+        from yolo_engine import YoloEngine
+        engine = YoloEngine(scheduler=inference_scheduler.scheduler)
+    except (RuntimeError, cv2.error, OSError, ImportError) as e:
+        print(f"[간격 추정] YOLO 엔진을 불러오지 못해 시리얼 간격만 사용: {e}")
+        return None
+    return VehicleGapEstimator(cap, camera_matrix, dist_coeffs, engine)
+
+
+def read_serial_gap(serial_server, buffer):
+    """
+    시리얼에 도착한 문자만 읽어서 (기다리지 않음) 간격 줄을 찾음
+
+    Returns:
+        (간격 mm 또는 None, 남은 버퍼)
+    """
+    while serial_server.in_waiting > 0:
+        char = serial_server.read().decode(errors="ignore")
+        if char in ("\n", "\r"):
+            message = buffer.strip()
+            buffer = ""
+            if message.isdigit():
+                return int(message), buffer
+            if message:
+                print(f"간격 데이터 형식 오류: '{message}' (숫자가 아님)")
+        else:
+            buffer += char
+    return None, buffer
+
+
+def receive_gap(serial_server, estimator, timeout=SERIAL_TIMEOUT, grace=SERIAL_GRACE):
+    """
+    시리얼 간격 값과 비전 추정 중 먼저 준비되는 값을 반환 (mm)
+    - 시리얼 값이 오면 그대로 사용 (비전 추정과 cross-check)
+    - 비전 추정이 안정되면 grace초만 시리얼을 더 기다린 뒤 비전 값 사용
+    - timeout까지 둘 다 없으면 안정되지 않은 비전 값이라도 사용, 그것도 없으면 None
+    """
+    serial_ok = serial_server is not None and serial_server.is_open
+    start = time.time()
+    stable_since = None
+    buffer = ""
+    try:
+        while time.time() - start < timeout:
+            if serial_ok:
+                serial_mm, buffer = read_serial_gap(serial_server, buffer)
+                if serial_mm is not None:
+                    print(f"차량 간격 데이터 수신: {serial_mm}mm ({serial_mm / 10.0}cm)")
+                    estimator.cross_check(serial_mm)
+                    telemetry.publisher.update(gap=serial_mm)
+                    return serial_mm
+            vision = estimator.stable_gap()
+            if vision is not None:
+                if stable_since is None:
+                    stable_since = time.time()
+                if not serial_ok or time.time() - stable_since >= grace:
+                    print(f"차량 간격 비전 추정 사용: {vision:.0f}mm ({time.time() - start:.2f}초)")
+                    return int(round(vision))
+            time.sleep(0.01)
+        vision = estimator.latest_gap()
+        if vision is not None:
+            print(f"차량 간격 시리얼 타임아웃 - 비전 추정 사용: {vision:.0f}mm")
+            return int(round(vision))
+        print(f"차량 간격 데이터 수신 타임아웃 ({timeout:.0f}초)")
+        return None
+    finally:
+        estimator.stop()
@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+비전 스택 벤치마크
+라이브 카메라 없이 저장된 fixture로 비전 처리 단계별 시간을 재고, 결과를 기록 파일에 쌓아서
+같은 PC/같은 OpenCV/같은 fixture의 이전 실행과 비교해 느려진 항목(regression)을 표시한다.
+
+측정 항목
+- gray:       BGR → 그레이 변환 (shot_0_000.bmp)
+- undistort:  매 프레임 cv2.undistort vs 미리 만든 remap 테이블 (전방 카메라 캘리브레이션)
+- aruco:      detectMarkers - 파라미터 프리셋별 (생성한 마커 장면, 검출 개수도 기록)
+- pose:       마커 포즈 추정 (estimatePoseSingleMarkers, 없으면 solvePnP IPPE_SQUARE)
+- chessboard: 캘리브레이션 JPG에서 체커보드 검출 (기존 원본 해상도 방식 vs find_chessboard_fast)
+- yolo:       YoloEngine 추론 (slow_traffic_small.mp4 프레임) - 모델/darknet 로더가 없으면 건너뜀
+
+fixture
+- 저장소에 있는 파일: shot_0_000.bmp, slow_traffic_small.mp4, camera_test/checkerboard_images/*.jpg
+- 마커 장면: benchmark_fixtures/marker_scene_*.png (--make-fixtures로 생성, 시드 고정)
+- benchmark_fixtures/manifest.json의 sha256과 다르면 경고하고, 기록은 fixture 해시별로 따로 비교한다
+
+각 항목은 pytest-benchmark처럼 워밍업 후 최소 MIN_TIME초 동안 반복 실행해서 중앙값을 기준으로 삼는다.
+기록: .benchmark/history.jsonl (PC별 로컬 파일, 저장소에는 올리지 않음)
+
+사용법: python vision_benchmark.py                 # 전체 실행 + 기록 저장 + 이전 기록과 비교
+       python vision_benchmark.py -k aruco        # 이름에 aruco가 들어간 항목만
+       python vision_benchmark.py --list          # 항목 목록
+       python vision_benchmark.py --history       # 이전 기록 추이
+       python vision_benchmark.py --make-fixtures # 마커 장면 fixture 다시 생성
+       python vision_benchmark.py --yolo-dir ~/darknet  # YOLO 모델 폴더 (cfg/, backup/, data/)
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "camera_test"))
+
+from chessboard_detection import SUBPIX_CRITERIA, find_chessboard_fast  # noqa: E402
+
+FIXTURE_DIR = os.path.join(SCRIPT_DIR, "benchmark_fixtures")
+MANIFEST_PATH = os.path.join(FIXTURE_DIR, "manifest.json")
+HISTORY_PATH = os.path.join(SCRIPT_DIR, ".benchmark", "history.jsonl")
+
+SHOT_PATH = os.path.join(REPO_DIR, "shot_0_000.bmp")
+VIDEO_PATH = os.path.join(REPO_DIR, "slow_traffic_small.mp4")
+CALIBRATION_IMAGES = os.path.join(SCRIPT_DIR, "camera_test", "checkerboard_images", "*.jpg")
+CAMERA_MATRIX_PATH = os.path.join(SCRIPT_DIR, "camera_test", "calibration_result", "camera_front_matrix.npy")
+DIST_COEFFS_PATH = os.path.join(SCRIPT_DIR, "camera_test", "calibration_result", "dist_front_coeffs.npy")
+
+CALIBRATION_IMAGE_COUNT = 8     # 체커보드 항목에 쓰는 이미지 수 (정렬 후 앞에서부터)
+CHECKERBOARD_SIZE = (6, 5)      # calibrate_from_images.py와 동일
+VIDEO_FRAMES = 30               # YOLO 항목에 쓰는 영상 프레임 수
+MARKER_LENGTH = 0.05            # driving.py와 동일 (m)
+
+MIN_TIME = 0.5                  # 항목별 최소 측정 시간 (초)
+MIN_ROUNDS = 5
+MAX_ROUNDS = 1000
+WARMUP_ROUNDS = 2
+REGRESSION_THRESHOLD = 0.15     # 기준보다 15% 이상 느려지면 regression
+NOISE_FLOOR_MS = 0.02           # 이보다 작은 차이는 무시
+BASELINE_RUNS = 5               # 기준 = 이전 실행 최대 5개의 중앙값
+
+# 마커 장면: (파일 이름, 시드, 마커 ID, 마커 크기 범위(px), 원근 왜곡 정도, 밝기 배율)
+MARKER_SCENES = [
+    ("marker_scene_near.png", 1, [0, 1, 2, 10], (110, 150), 0.05, 1.0),
+    ("marker_scene_far.png", 2, [3, 4, 5, 6, 10, 17], (40, 60), 0.05, 1.0),
+    ("marker_scene_oblique_dim.png", 3, [2, 10, 17], (80, 120), 0.25, 0.45),
+]
+
+
+# ----------------------------------------------------------------------
+# ArUco 프리셋 (csi_control_final.py / driving.py와 같은 값)
+# ----------------------------------------------------------------------
+def make_aruco_parameters(preset):
+    if hasattr(cv2.aruco, "DetectorParameters_create"):
+        params = cv2.aruco.DetectorParameters_create()
+    else:
+        params = cv2.aruco.DetectorParameters()
+    if preset in ("jetson", "driving"):
+        params.adaptiveThreshWinSizeMin = 3
+        params.adaptiveThreshWinSizeMax = 23
+        params.adaptiveThreshWinSizeStep = 10
+        params.adaptiveThreshConstant = 7
+        params.minMarkerPerimeterRate = 0.03
+        params.maxMarkerPerimeterRate = 4.0
+        params.polygonalApproxAccuracyRate = 0.03
+        params.minCornerDistanceRate = 0.05
+    if preset == "driving":
+        params.minDistanceToBorder = 3
+        params.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_SUBPIX
+        params.cornerRefinementWinSize = 5
+        params.cornerRefinementMaxIterations = 30
+        params.cornerRefinementMinAccuracy = 0.1
+        if hasattr(params, "minMarkerLengthRatioOriginalImg"):
+            params.minMarkerLengthRatioOriginalImg = 0.02
+    return params
+
+
+ARUCO_PRESETS = ("default", "jetson", "driving")
+
+
+def make_marker_detector(preset):
+    """gray → (corners, ids) 함수 (OpenCV 4.7+는 ArucoDetector, 이전 버전은 detectMarkers)"""
+    dictionary = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_250)
+    params = make_aruco_parameters(preset)
+    if hasattr(cv2.aruco, "ArucoDetector"):
+        detector = cv2.aruco.ArucoDetector(dictionary, params)
+        return lambda gray: detector.detectMarkers(gray)[:2]
+    return lambda gray: cv2.aruco.detectMarkers(gray, dictionary, parameters=params)[:2]
+
+
+def marker_image(marker_id, size):
+    dictionary = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_250)
+    if hasattr(cv2.aruco, "generateImageMarker"):
+        return cv2.aruco.generateImageMarker(dictionary, marker_id, size)
+    return cv2.aruco.drawMarker(dictionary, marker_id, size)
+
+
+# ----------------------------------------------------------------------
+# fixture
+# ----------------------------------------------------------------------
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def calibration_image_paths():
+    return sorted(glob.glob(CALIBRATION_IMAGES))[:CALIBRATION_IMAGE_COUNT]
+
+
+def fixture_paths():
+    paths = [SHOT_PATH, VIDEO_PATH, CAMERA_MATRIX_PATH, DIST_COEFFS_PATH] + calibration_image_paths()
+    return paths + [os.path.join(FIXTURE_DIR, scene[0]) for scene in MARKER_SCENES]
+
+
+def render_marker_scene(background, seed, ids, size_range, perspective, brightness):
+    """배경 이미지에 마커를 겹치지 않게 원근 변환해서 붙인 그레이 장면 (시드 고정)"""
+    rng = np.random.default_rng(seed)
+    scene = background.copy()
+    height, width = scene.shape[:2]
+    # 가로로 칸을 나눠서 칸마다 마커 1개 (겹침 방지)
+    columns = (len(ids) + 1) // 2 if len(ids) > 3 else len(ids)
+    rows = 2 if len(ids) > 3 else 1
+    cell_w, cell_h = width / columns, height / rows
+    for k, marker_id in enumerate(ids):
+        size = int(rng.integers(*size_range))
+        quiet = size // 5       # 흰색 여백
+        tile = cv2.copyMakeBorder(marker_image(marker_id, size), quiet, quiet, quiet, quiet,
+                                  cv2.BORDER_CONSTANT, value=255)
+        full = tile.shape[0]
+        cx = (k % columns + 0.5) * cell_w + rng.uniform(-0.15, 0.15) * cell_w
+        cy = (k // columns + 0.5) * cell_h + rng.uniform(-0.15, 0.15) * cell_h
+        angle = rng.uniform(-np.pi / 6, np.pi / 6)
+        rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        half = full / 2.0
+        square = np.array([[-half, -half], [half, -half], [half, half], [-half, half]])
+        jitter = rng.uniform(-perspective, perspective, (4, 2)) * full
+        dst = (square @ rotation.T + jitter + [cx, cy]).astype(np.float32)
+        src = np.array([[0, 0], [full, 0], [full, full], [0, full]], np.float32)
+        homography = cv2.getPerspectiveTransform(src, dst)
+        warped = cv2.warpPerspective(tile, homography, (width, height), flags=cv2.INTER_LINEAR)
+        mask = cv2.warpPerspective(np.full_like(tile, 255), homography, (width, height), flags=cv2.INTER_LINEAR)
+        alpha = (mask.astype(np.float32) / 255.0)[..., None]
+        scene = (scene * (1 - alpha) + cv2.cvtColor(warped, cv2.COLOR_GRAY2BGR) * alpha).astype(np.uint8)
+    scene = cv2.GaussianBlur(scene, (3, 3), 0.8)
+    noise = rng.normal(0, 4, scene.shape[:2])
+    # 검출은 그레이 이미지로 하므로 그레이로 저장 (fixture 크기 절약)
+    gray = cv2.cvtColor(scene, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    return np.clip(gray * brightness + noise, 0, 255).astype(np.uint8)
+
+
+def make_fixtures():
+    """마커 장면 생성 + manifest 갱신"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    background = cv2.imread(SHOT_PATH)
+    scenes = []
+    for name, seed, ids, size_range, perspective, brightness in MARKER_SCENES:
+        scene = render_marker_scene(background, seed, ids, size_range, perspective, brightness)
+        cv2.imwrite(os.path.join(FIXTURE_DIR, name), scene)
+        scenes.append({"file": name, "ids": ids})
+        print(f"생성: {name} (마커 {ids})")
+    manifest = {
+        "files": {os.path.relpath(path, REPO_DIR): sha256_file(path) for path in fixture_paths()},
+        "marker_scenes": scenes,
+    }
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"manifest 저장: {MANIFEST_PATH}")
+
+
+class Fixtures:
+    """fixture를 처음 쓸 때 한 번만 읽음"""
+    def __init__(self):
+        self._cache = {}
+
+    def _get(self, key, loader):
+        if key not in self._cache:
+            self._cache[key] = loader()
+        return self._cache[key]
+
+    @property
+    def shot(self):
+        return self._get("shot", lambda: cv2.imread(SHOT_PATH))
+
+    @property
+    def camera(self):
+        return self._get("camera", lambda: (np.load(CAMERA_MATRIX_PATH), np.load(DIST_COEFFS_PATH)))
+
+    @property
+    def video_frames(self):
+        def load():
+            cap = cv2.VideoCapture(VIDEO_PATH)
+            frames = []
+            while len(frames) < VIDEO_FRAMES:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+            return frames
+        return self._get("video", load)
+
+    @property
+    def calibration_grays(self):
+        return self._get("calibration", lambda: [cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+                                                 for path in calibration_image_paths()])
+
+    @property
+    def marker_scenes(self):
+        """[(장면 그레이 이미지, 정답 ID 목록)]"""
+        def load():
+            scenes = []
+            for name, _, ids, _, _, _ in MARKER_SCENES:
+                image = cv2.imread(os.path.join(FIXTURE_DIR, name), cv2.IMREAD_GRAYSCALE)
+                if image is None:
+                    raise FileNotFoundError(f"{name} 없음 - --make-fixtures로 먼저 생성하세요")
+                scenes.append((image, ids))
+            return scenes
+        return self._get("markers", load)
+
+
+def verify_fixtures():
+    """
+    manifest와 실제 fixture 비교
+
+    Returns:
+        fixture 전체 해시 (기록 비교 키), 다른 파일 목록
+    """
+    manifest = {}
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f).get("files", {})
+    digest = hashlib.sha256()
+    mismatched = []
+    for path in fixture_paths():
+        rel = os.path.relpath(path, REPO_DIR)
+        actual = sha256_file(path) if os.path.exists(path) else "missing"
+        digest.update(f"{rel}:{actual}".encode())
+        if manifest.get(rel) != actual:
+            mismatched.append(rel)
+    return digest.hexdigest()[:12], mismatched
+
+
+# ----------------------------------------------------------------------
+# 벤치마크 항목 - setup(fixtures)이 (한 번 실행할 함수, 1회당 처리 개수, 부가 정보) 반환
+# ----------------------------------------------------------------------
+BENCHMARKS = []
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+@benchmark("gray/bgr2gray")
+def bench_gray(fx):
+    frame = fx.shot
+    return lambda: cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), 1, {}
+
+
+@benchmark("gray/bgr2gray_dst")
+def bench_gray_dst(fx):
+    frame = fx.shot
+    gray = np.empty(frame.shape[:2], np.uint8)
+    return lambda: cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray), 1, {}
+
+
+@benchmark("undistort/undistort")
+def bench_undistort(fx):
+    frame = fx.shot
+    camera_matrix, dist_coeffs = fx.camera
+    return lambda: cv2.undistort(frame, camera_matrix, dist_coeffs), 1, {}
+
+
+@benchmark("undistort/init_maps")
+def bench_init_maps(fx):
+    height, width = fx.shot.shape[:2]
+    camera_matrix, dist_coeffs = fx.camera
+    return (lambda: cv2.initUndistortRectifyMap(camera_matrix, dist_coeffs, None, camera_matrix,
+                                                (width, height), cv2.CV_16SC2)), 1, {}
+
+
+@benchmark("undistort/remap")
+def bench_remap(fx):
+    frame = fx.shot
+    height, width = frame.shape[:2]
+    camera_matrix, dist_coeffs = fx.camera
+    map1, map2 = cv2.initUndistortRectifyMap(camera_matrix, dist_coeffs, None, camera_matrix,
+                                             (width, height), cv2.CV_16SC2)
+    out = np.empty_like(frame)
+    return lambda: cv2.remap(frame, map1, map2, cv2.INTER_LINEAR, dst=out), 1, {}
+
+
+def make_aruco_benchmark(preset):
+    def setup(fx):
+        scenes = fx.marker_scenes
+        detect = make_marker_detector(preset)
+        found = expected = 0
+        for gray, ids in scenes:
+            _, detected = detect(gray)
+            detected = set() if detected is None else set(detected.ravel().tolist())
+            found += len(detected & set(ids))
+            expected += len(ids)
+
+        def run():
+            for gray, _ in scenes:
+                detect(gray)
+        return run, len(scenes), {"found": f"{found}/{expected}"}
+    return setup
+
+
+for _preset in ARUCO_PRESETS:
+    benchmark(f"aruco/detect_{_preset}")(make_aruco_benchmark(_preset))
+
+
+@benchmark("pose/estimate")
+def bench_pose(fx):
+    camera_matrix, dist_coeffs = fx.camera
+    detect = make_marker_detector("driving")
+    corners = []
+    for gray, _ in fx.marker_scenes:
+        found, _ = detect(gray)
+        corners.extend(found)
+    if not corners:
+        raise SkipBenchmark("검출된 마커 없음")
+    if hasattr(cv2.aruco, "estimatePoseSingleMarkers"):
+        def run():
+            for c in corners:
+                cv2.aruco.estimatePoseSingleMarkers(np.array([c]), MARKER_LENGTH, camera_matrix, dist_coeffs)
+        method = "estimatePoseSingleMarkers"
+    else:
+        half = MARKER_LENGTH / 2
+        object_points = np.array([[-half, half, 0], [half, half, 0], [half, -half, 0], [-half, -half, 0]],
+                                 np.float32)
+
+        def run():
+            for c in corners:
+                cv2.solvePnP(object_points, c.reshape(4, 2), camera_matrix, dist_coeffs,
+                             flags=cv2.SOLVEPNP_IPPE_SQUARE)
+        method = "solvePnP(IPPE_SQUARE)"
+    return run, len(corners), {"method": method}
+
+
+@benchmark("chessboard/full_resolution")
+def bench_chessboard_full(fx):
+    grays = fx.calibration_grays
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE
+    found = sum(cv2.findChessboardCorners(gray, CHECKERBOARD_SIZE, flags)[0] for gray in grays)
+
+    def run():
+        for gray in grays:
+            ok, corners = cv2.findChessboardCorners(gray, CHECKERBOARD_SIZE, flags)
+            if ok:
+                cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), SUBPIX_CRITERIA)
+    return run, len(grays), {"found": f"{found}/{len(grays)}"}
+
+
+@benchmark("chessboard/fast")
+def bench_chessboard_fast(fx):
+    grays = fx.calibration_grays
+    found = sum(find_chessboard_fast(gray, CHECKERBOARD_SIZE)[0] for gray in grays)
+
+    def run():
+        for gray in grays:
+            find_chessboard_fast(gray, CHECKERBOARD_SIZE)
+    return run, len(grays), {"found": f"{found}/{len(grays)}"}
+
+
+def make_yolo_benchmark(input_size):
+    def setup(fx):
+        yolo_dir = fx.yolo_dir
+        if yolo_dir is None:
+            raise SkipBenchmark("--yolo-dir 없음")
+        from yolo_engine import CONFIG_PATH, DATA_PATH, WEIGHTS_PATH, YoloEngine
+        paths = [os.path.join(yolo_dir, p) for p in (CONFIG_PATH, WEIGHTS_PATH, DATA_PATH)]
+        missing = [p for p in paths if not os.path.exists(p)]
+        if missing:
+            raise SkipBenchmark(f"모델 파일 없음: {missing[0]}")
+        try:
+            engine = YoloEngine(*paths, input_size=input_size)
+        except RuntimeError as e:
+            raise SkipBenchmark(str(e))
+        frames = fx.video_frames
+        state = {"i": 0}
+
+        def run():
+            engine.detect(frames[state["i"] % len(frames)])
+            state["i"] += 1
+        return run, 1, {"frames": len(frames)}
+    return setup
+
+
+for _size in (320, 416):
+    benchmark(f"yolo/detect_{_size}")(make_yolo_benchmark(_size))
+
+
+# ----------------------------------------------------------------------
+# 측정 / 기록
+# ----------------------------------------------------------------------
+def measure(run, items, min_time=MIN_TIME):
+    """워밍업 후 min_time초 이상 반복 - 1개 처리당 시간(ms) 통계"""
+    for _ in range(WARMUP_ROUNDS):
+        run()
+    start = time.perf_counter()
+    run()
+    once = max(time.perf_counter() - start, 1e-6)
+    rounds = int(min(MAX_ROUNDS, max(MIN_ROUNDS, min_time / once)))
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000 / items)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "min_ms": samples[0],
+        "max_ms": samples[-1],
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": rounds,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_key():
+    return {
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def save_record(record, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def comparable(record, env, fixtures):
+    """같은 PC / OpenCV / fixture에서 잰 기록만 비교"""
+    old = record.get("env", {})
+    return (record.get("fixtures") == fixtures and old.get("host") == env["host"]
+            and old.get("opencv") == env["opencv"] and old.get("machine") == env["machine"])
+
+
+def baselines(history, env, fixtures, runs=BASELINE_RUNS):
+    """항목별 기준값 - 비교 가능한 최근 runs번 실행의 중앙값(ms) 중앙값"""
+    values = {}
+    for record in reversed(history):
+        if not comparable(record, env, fixtures):
+            continue
+        for name, result in record.get("results", {}).items():
+            bucket = values.setdefault(name, [])
+            if len(bucket) < runs:
+                bucket.append(result["median_ms"])
+    return {name: statistics.median(bucket) for name, bucket in values.items()}
+
+
+def classify(current, baseline, threshold=REGRESSION_THRESHOLD):
+    if baseline is None:
+        return "new"
+    if current - baseline > max(NOISE_FLOOR_MS, baseline * threshold):
+        return "REGRESSION"
+    if baseline - current > max(NOISE_FLOOR_MS, baseline * threshold):
+        return "faster"
+    return "ok"
+
+
+def print_history(history, env, fixtures, keyword=None, last=10):
+    records = [r for r in history if comparable(r, env, fixtures)][-last:]
+    if not records:
+        print("이 PC/OpenCV/fixture 조합의 기록이 없습니다.")
+        return
+    names = sorted({name for r in records for name in r["results"] if not keyword or keyword in name})
+    print(f"{'항목':<28}" + "".join(f"{(r.get('commit') or '-')[:8]:>10}" for r in records))
+    for name in names:
+        row = "".join(f"{r['results'][name]['median_ms']:>10.3f}" if name in r["results"] else f"{'-':>10}"
+                      for r in records)
+        print(f"{name:<28}{row}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비전 스택 벤치마크")
+    parser.add_argument("-k", "--keyword", default=None, help="이름에 이 문자열이 들어간 항목만 실행")
+    parser.add_argument("--list", action="store_true", help="항목 목록만 출력")
+    parser.add_argument("--history", action="store_true", help="이전 기록 추이 출력")
+    parser.add_argument("--make-fixtures", action="store_true", help="마커 장면 fixture 생성 + manifest 갱신")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="항목별 최소 측정 시간(초)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="regression 판정 비율")
+    parser.add_argument("--yolo-dir", default=None, help="YOLO 모델 폴더 (cfg/, backup/, data/가 있는 darknet 폴더)")
+    parser.add_argument("--history-file", default=HISTORY_PATH, help="기록 파일")
+    parser.add_argument("--no-save", action="store_true", help="결과를 기록에 저장하지 않음")
+    parser.add_argument("--fail-on-regression", action="store_true", help="regression이 있으면 종료 코드 1")
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures()
+        return 0
+
+    selected = [(name, setup) for name, setup in BENCHMARKS if not args.keyword or args.keyword in name]
+    if args.list:
+        for name, _ in selected:
+            print(name)
+        return 0
+
+    env = environment_key()
+    fixtures_hash, mismatched = verify_fixtures()
+    history = load_history(args.history_file)
+    if args.history:
+        print_history(history, env, fixtures_hash, args.keyword)
+        return 0
+
+    print(f"OpenCV {env['opencv']} / Python {env['python']} / {env['machine']} x{env['cpus']} / "
+          f"fixture {fixtures_hash}")
+    for rel in mismatched:
+        print(f"⚠️ fixture가 manifest와 다름: {rel} (이전 기록과 따로 비교됨)")
+
+    fx = Fixtures()
+    fx.yolo_dir = args.yolo_dir
+    base = baselines(history, env, fixtures_hash)
+    results = {}
+    regressions = 0
+    print(f"\n{'항목':<28}{'중앙값(ms)':>12}{'최소(ms)':>10}{'반복':>7}{'기준(ms)':>10}{'변화':>9}  판정")
+    for name, setup in selected:
+        try:
+            run, items, info = setup(fx)
+        except SkipBenchmark as e:
+            print(f"{name:<28}{'건너뜀':>12}  ({e})")
+            continue
+        except (FileNotFoundError, cv2.error) as e:
+            print(f"{name:<28}{'실패':>12}  ({e})")
+            continue
+        result = measure(run, items, args.min_time)
+        result["info"] = info
+        results[name] = result
+        baseline = base.get(name)
+        status = classify(result["median_ms"], baseline, args.threshold)
+        regressions += status == "REGRESSION"
+        change = "" if baseline is None else f"{(result['median_ms'] / baseline - 1) * 100:+.1f}%"
+        extra = " ".join(f"{k}={v}" for k, v in info.items())
+        print(f"{name:<28}{result['median_ms']:>12.3f}{result['min_ms']:>10.3f}{result['rounds']:>7}"
+              f"{'-' if baseline is None else f'{baseline:.3f}':>10}{change:>9}  {status} {extra}")
+
+    if results and not args.no_save:
+        save_record({
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": git_commit(),
+            "env": env,
+            "fixtures": fixtures_hash,
+            "results": results,
+        }, args.history_file)
+        print(f"\n기록 저장: {args.history_file}")
+    if regressions:
+        print(f"⚠️ regression {regressions}개")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+YOLO 추론 엔진 (OpenCV DNN)
+yolov4-tiny cfg/weights를 한 번만 로드해서 메모리에 유지하고,
+프레임(numpy 배열)을 바로 받아 박스 목록을 반환한다. (darknet 프로세스 실행/임시 파일 없음)
+
+- detect(frame): 동기 추론 1장
+- detect_arrays(frame): 박스/점수/클래스를 NumPy 배열로 (제어 로직용)
+- detect_batch(frames): 여러 장을 한 번의 forward로 추론
+전처리(letterbox)/후처리(디코딩, 클래스별 NMS, 원본 좌표 변환)는 yolo_postprocess.py
+- submit(frame, frame_id) / latest(): 카메라 루프용 비동기 추론
+  프레임은 공유 메모리 링(frame_ring.FrameRing)으로 넘기고, 워커는 아직 처리 안 한 프레임 중
+  최신 max_batch개를 한 번에 추론한다 (밀린 오래된 프레임은 건너뜀)
+- open_ring(shape): 카메라가 링 슬롯에 직접 캡처하도록 링을 미리 생성 (프레임 복사도 없음)
+- scheduler: inference_scheduler.InferenceScheduler를 주면 제어 루프 여유 시간에 맞춰
+  비동기 추론의 프레임 간격(stride)/입력 크기를 조절하고, 제어 프레임 사이에만 추론을 시작한다
+"""
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_ring import FrameRing
+from yolo_postprocess import Letterbox, postprocess
+
+# 설정 (yolo_fast.py / yolo_test.py와 같은 darknet 폴더 기준 경로)
+CONFIG_PATH = "cfg/yolov4-tiny-custom.cfg"
+WEIGHTS_PATH = "backup/yolov4-tiny-custom_best.weights"
+DATA_PATH = "data/obj.data"
+
+INPUT_SIZE = 320            # 네트워크 입력 크기 (정사각형)
+CONF_THRESHOLD = 0.25       # darknet detector test 기본값과 동일
+NMS_THRESHOLD = 0.45
+MAX_BATCH = 1               # 비동기 추론 시 한 번에 묶는 최대 프레임 수 (1 = 항상 최신 프레임만)
+RING_SPARE_SLOTS = 2        # 링 슬롯 수 = max_batch + 여유 (카메라가 쓰는 슬롯 + 최신 슬롯)
+
+
+def load_names(data_path=DATA_PATH):
+    """obj.data의 names 항목에서 클래스 이름 목록 로드 (없으면 빈 목록)"""
+    if not os.path.exists(data_path):
+        return []
+    names_path = None
+    with open(data_path, encoding="utf-8") as f:
+        for line in f:
+            key, sep, value = line.partition("=")
+            if sep and key.strip() == "names":
+                names_path = value.strip()
+    if names_path is None:
+        return []
+    if not os.path.exists(names_path):
+        # obj.data 기준 상대 경로도 확인
+        names_path = os.path.join(os.path.dirname(data_path), os.path.basename(names_path))
+        if not os.path.exists(names_path):
+            return []
+    with open(names_path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class Detection:
+    def __init__(self, class_id, score, x, y, w, h, name=None):
+        self.class_id = int(class_id)
+        self.score = float(score)
+        self.x, self.y, self.w, self.h = int(x), int(y), int(w), int(h)   # 원본 프레임 좌표 (좌상단, 크기)
+        self.name = name if name is not None else str(self.class_id)
+
+    @property
+    def center(self):
+        return (self.x + self.w // 2, self.y + self.h // 2)
+
+    def __repr__(self):
+        return f"Detection({self.name}, {self.score:.2f}, x={self.x}, y={self.y}, w={self.w}, h={self.h})"
+
+
+def draw_detections(frame, detections, color=(0, 255, 0)):
+    """박스/이름 그리기 (frame을 직접 수정)"""
+    for det in detections:
+        cv2.rectangle(frame, (det.x, det.y), (det.x + det.w, det.y + det.h), color, 2)
+        cv2.putText(frame, f"{det.name} {det.score:.2f}", (det.x, max(15, det.y - 5)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
+
+
+class YoloEngine:
+    """네트워크를 한 번만 로드해서 계속 사용하는 추론 엔진"""
+    def __init__(self, config_path=CONFIG_PATH, weights_path=WEIGHTS_PATH, data_path=DATA_PATH,
+                 input_size=INPUT_SIZE, conf_threshold=CONF_THRESHOLD, nms_threshold=NMS_THRESHOLD,
+                 max_batch=MAX_BATCH, scheduler=None):
+        """
+        Args:
+            scheduler: inference_scheduler.InferenceScheduler - 주면 비동기 추론의 프레임 간격/입력 크기를
+                       제어 루프 여유 시간에 맞춰 조절 (input_size는 최대 입력 크기가 됨)
+        """
+        start = time.time()
+        if not hasattr(cv2.dnn, "readNetFromDarknet"):
+            # OpenCV 5부터 darknet 모델 로더가 빠짐 - 로봇(JetPack)의 OpenCV 4.x 사용
+            raise RuntimeError(f"OpenCV {cv2.__version__}에는 darknet 로더가 없습니다 (OpenCV 4.x 필요)")
+        self.net = cv2.dnn.readNetFromDarknet(config_path, weights_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.output_names = self.net.getUnconnectedOutLayersNames()
+        self.names = load_names(data_path)
+        self.input_size = input_size
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.letterboxes = {}       # {(프레임 크기, 배치 위치, 입력 크기): Letterbox} - 캔버스 재사용
+        print(f"[YOLO] 모델 로드 완료: {weights_path} ({time.time() - start:.2f}초, 클래스 {len(self.names)}개)")
+
+        # 비동기 추론 상태
+        self.lock = threading.Lock()
+        self.max_batch = max_batch
+        self.ring = None            # 첫 프레임 크기로 생성
+        self.last_seq = 0           # 워커가 마지막으로 처리한 링 시퀀스 번호
+        self.result = None          # 최신 추론 결과
+        self.running = False
+        self.worker = None
+        self.dropped = 0            # 추론하지 않고 건너뛴 프레임 수 (스케줄러 stride로 건너뛴 프레임 포함)
+        self.scheduler = scheduler
+        if scheduler is not None:
+            scheduler.set_max_input_size(input_size)
+
+    # ------------------------------------------------------------------
+    # 동기 추론
+    # ------------------------------------------------------------------
+    def letterbox(self, frame, position=0, input_size=None):
+        input_size = self.input_size if input_size is None else input_size
+        key = (frame.shape, position, input_size)
+        letterbox = self.letterboxes.get(key)
+        if letterbox is None:
+            letterbox = self.letterboxes[key] = Letterbox(frame.shape, input_size)
+        return letterbox
+
+    def forward(self, frames, input_size=None):
+        """
+        letterbox 전처리 + forward
+
+        Returns:
+            출력 배열 목록 (batch, 박스 수, 5 + 클래스 수), 프레임별 Letterbox
+        """
+        input_size = self.input_size if input_size is None else input_size
+        letterboxes = [self.letterbox(frame, i, input_size) for i, frame in enumerate(frames)]
+        canvases = [letterbox.apply(frame) for letterbox, frame in zip(letterboxes, frames)]
+        # 캔버스가 이미 입력 크기라서 blobFromImages는 정규화/채널 변환만 함
+        blob = cv2.dnn.blobFromImages(canvases, 1 / 255.0, (input_size, input_size),
+                                      swapRB=True, crop=False)
+        self.net.setInput(blob)
+        outputs = self.net.forward(self.output_names)
+        batch = len(frames)
+        return [np.asarray(out).reshape(batch, -1, np.asarray(out).shape[-1]) for out in outputs], letterboxes
+
+    def decode(self, outputs, index, letterbox):
+        """한 장의 출력 → (boxes x1y1x2y2, scores, class_ids) 원본 프레임 좌표"""
+        rows = np.concatenate([out[index] for out in outputs], axis=0)
+        return postprocess(rows, letterbox, self.conf_threshold, self.nms_threshold)
+
+    def make_detections(self, boxes, scores, class_ids):
+        detections = []
+        for (x1, y1, x2, y2), score, class_id in zip(boxes, scores, class_ids):
+            name = self.names[class_id] if class_id < len(self.names) else None
+            detections.append(Detection(class_id, score, x1, y1, x2 - x1, y2 - y1, name))
+        return detections
+
+    def detect_arrays(self, frame, input_size=None):
+        """추론 1장 - (boxes (N, 4) x1y1x2y2, scores (N,), class_ids (N,)) 원본 프레임 좌표"""
+        outputs, letterboxes = self.forward([frame], input_size)
+        return self.decode(outputs, 0, letterboxes[0])
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames, input_size=None):
+        """여러 프레임을 한 번의 forward로 추론"""
+        if not frames:
+            return []
+        outputs, letterboxes = self.forward(frames, input_size)
+        return [self.make_detections(*self.decode(outputs, i, letterbox)) for i, letterbox in enumerate(letterboxes)]
+
+    # ------------------------------------------------------------------
+    # 비동기 추론 (카메라 스레드는 submit만 하고 바로 돌아감)
+    # ------------------------------------------------------------------
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        self.running = False
+        if self.worker is not None:
+            self.worker.join(timeout=2.0)
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def open_ring(self, shape):
+        """프레임 링 생성 (이미 있으면 그대로 반환) - 카메라 루프가 write_slot()에 직접 캡처할 때 사용"""
+        if self.ring is None:
+            self.ring = FrameRing(shape, slots=self.max_batch + RING_SPARE_SLOTS)
+        elif self.ring.shape != tuple(shape):
+            raise ValueError(f"프레임 크기 변경 불가: {self.ring.shape} → {tuple(shape)}")
+        return self.ring
+
+    def submit(self, frame, frame_id):
+        """추론할 프레임 등록 - 링 슬롯에 복사만 하고 바로 반환 (새 메모리 할당 없음)"""
+        if self.ring is None:
+            self.open_ring(frame.shape)
+        if self.ring.write(frame, frame_id) is None:
+            self.dropped += 1
+
+    def busy(self):
+        """워커가 아직 처리하지 않은 프레임이 있으면 True"""
+        return self.ring is not None and self.ring.latest_seq() > self.last_seq
+
+    def latest(self):
+        """최신 추론 결과 {'frame_id', 'detections', 'inference_time', 'batch', 'input_size'} (아직 없으면 None)"""
+        with self.lock:
+            return self.result
+
+    def run(self):
+        while self.running:
+            ring = self.ring
+            scheduler = self.scheduler
+            # 스케줄러가 정한 stride만큼 새 프레임이 쌓일 때까지 대기
+            stride = scheduler.stride if scheduler is not None else 1
+            if ring is None or not ring.wait(self.last_seq + stride - 1, timeout=0.5):
+                if ring is None:
+                    time.sleep(0.05)
+                continue
+            # 제어 프레임 사이 빈 시간에만 추론 시작 (시간이 안 나면 다음 프레임에서 다시 시도)
+            if scheduler is not None and not scheduler.acquire():
+                continue
+            items = ring.read_new(self.last_seq, limit=self.max_batch)
+            if not items:
+                if scheduler is not None:
+                    scheduler.cancel()
+                continue
+            input_size = scheduler.input_size if scheduler is not None else self.input_size
+            start = time.time()
+            try:
+                batch = self.detect_batch([frame for _, _, frame, _ in items], input_size)
+            except cv2.error as e:
+                print(f"[YOLO] 프레임 {items[-1][3]} 추론 실패: {e}")
+                batch = None
+            finally:
+                for _, index, _, _ in items:
+                    ring.release(index)
+                if scheduler is not None:
+                    scheduler.record_inference(time.time() - start, input_size)
+            self.dropped += items[-1][0] - self.last_seq - len(items)
+            self.last_seq = items[-1][0]
+            if batch is None:
+                continue
+            # 묶음의 마지막(가장 최신) 프레임 결과를 최신 결과로 사용, 묶음 전체 결과도 함께 보관
+            result = {
+                'frame_id': items[-1][3],
+                'detections': batch[-1],
+                'inference_time': time.time() - start,
+                'batch': [(tag, detections) for (_, _, _, tag), detections in zip(items, batch)],
+                'input_size': input_size,
+            }
+            with self.lock:
+                self.result = result
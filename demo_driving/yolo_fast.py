@@ -1,80 +1,30 @@
 import cv2
-import subprocess
+import numpy as np
 import time
-import threading
-import os
-from queue import Queue
+
+from inference_scheduler import CaptureTap, InferenceScheduler
+from yolo_engine import YoloEngine, draw_detections
 
 # 설정 - 극도로 최적화된 버전
-DARKNET_PATH = "./darknet"
 CONFIG_PATH = "cfg/yolov4-tiny-custom.cfg"
 WEIGHTS_PATH = "backup/yolov4-tiny-custom_best.weights"
 DATA_PATH = "data/obj.data"
 
-# 단일 임시 파일 사용 (파일 생성 오버헤드 최소화)
-TEMP_FILENAME = "temp_frame.jpg"
-
-# darknet 프로세스를 백그라운드로 실행하기 위한 큐
-frame_queue = Queue(maxsize=1)
-result_queue = Queue(maxsize=1)
-
-def darknet_worker():
-    """극도로 최적화된 darknet 워커"""
-    while True:
-        try:
-            frame_data = frame_queue.get(timeout=1)
-            if frame_data is None:
-                break
-        except:
-            continue
-            
-        frame, frame_id = frame_data
-        
-        # 더욱 작은 해상도로 리사이즈 (속도 최우선)
-        tiny_frame = cv2.resize(frame, (320, 320))  # 더 작게 변경
-        cv2.imwrite(TEMP_FILENAME, tiny_frame, [cv2.IMWRITE_JPEG_QUALITY, 40])  # 품질도 더 낮춤
-        
-        # darknet 실행 (최소한의 옵션)
-        cmd = [DARKNET_PATH, "detector", "test", DATA_PATH, CONFIG_PATH, WEIGHTS_PATH, TEMP_FILENAME, "-dont_show"]
-        
-        start_time = time.time()
-        try:
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)  # 타임아웃 제거
-            inference_time = time.time() - start_time
-            
-            print(f"[빠른모드] 프레임 {frame_id} 추론: {inference_time:.2f}초")
-            
-            # 결과 이미지 로드 (있는 경우만)
-            result_img = None
-            if os.path.exists("predictions.jpg"):
-                result_img = cv2.imread("predictions.jpg")
-            
-            # 이전 결과 제거
-            while not result_queue.empty():
-                try:
-                    result_queue.get_nowait()
-                except:
-                    break
-            
-            # 새 결과 저장
-            result_queue.put({
-                'frame_id': frame_id,
-                'result_img': result_img,
-                'inference_time': inference_time,
-                'output': result.stdout.decode() if result.stdout else ""
-            })
-            
-        except Exception as e:
-            print(f"[빠른모드] 오류: {e}")
+# 네트워크 입력 크기 (속도 최우선)
+INPUT_SIZE = 320
+
+# 모델은 한 번만 로드해서 계속 사용 (프레임마다 darknet 실행/임시 파일 없음)
+# 추론 간격/입력 크기는 고정하지 않고 스케줄러가 카메라 루프 여유 시간에 맞춰 조절 (INPUT_SIZE는 최대값)
+scheduler = InferenceScheduler()
+engine = YoloEngine(CONFIG_PATH, WEIGHTS_PATH, DATA_PATH, input_size=INPUT_SIZE, scheduler=scheduler)
+engine.start()
 
 # 카메라 설정 (해상도도 줄임)
 cap = cv2.VideoCapture(0)
 cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
 cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
-# 워커 스레드 시작
-worker_thread = threading.Thread(target=darknet_worker, daemon=True)
-worker_thread.start()
+cap = CaptureTap(cap, scheduler)   # 카메라 루프 한 바퀴를 제어 프레임으로 측정
 
 # 변수 초기화
 fps_start_time = time.time()
@@ -82,36 +32,52 @@ fps_counter = 0
 frame_id = 0
 latest_result = None
 
+# 첫 프레임으로 크기를 정해서 프레임 링/화면 버퍼를 미리 할당 (이후 프레임마다 메모리 할당 없음)
+ret, first_frame = cap.read()
+if not ret:
+    raise SystemExit("카메라 프레임 캡처 실패!")
+ring = engine.open_ring(first_frame.shape)
+display_frame = np.empty_like(first_frame)
+spare_frame = np.empty_like(first_frame)   # 링 슬롯이 모두 읽히는 중일 때 캡처할 버퍼
+
 print("극도 최적화 YOLO (ESC로 종료)")
 print("품질보다 속도를 우선합니다!")
 
 while True:
-    ret, frame = cap.read()
+    # 링 슬롯에 바로 캡처 → 등록 (워커는 항상 최신 프레임만 가져가고 밀린 프레임은 건너뜀)
+    slot, frame = ring.write_slot()
+    if slot is None:
+        # 모든 슬롯을 워커가 읽는 중 - 이번 프레임은 화면에만 쓰고 추론에는 넘기지 않음
+        frame = spare_frame
+    ret, captured = cap.read(frame)
     if not ret:
+        if slot is not None:
+            ring.cancel(slot)
         break
-    
+    if captured is not frame:
+        np.copyto(frame, captured)
+
     frame_id += 1
-    
-    # 15프레임마다만 추론 (더 빈도 줄임)
-    if frame_id % 15 == 0 and frame_queue.empty():
-        frame_queue.put((frame.copy(), frame_id))
-    
+    if slot is not None:
+        ring.publish(slot, frame_id)
+
     # 결과 업데이트
-    while not result_queue.empty():
-        latest_result = result_queue.get()
-    
+    result = engine.latest()
+    if result is not None and result is not latest_result:
+        latest_result = result
+        print(f"[빠른모드] 프레임 {latest_result['frame_id']} 추론: {latest_result['inference_time']*1000:.0f}ms, "
+              f"검출 {len(latest_result['detections'])}개")
+
     # 화면 표시
-    display_frame = frame.copy()
-    if latest_result and latest_result['result_img'] is not None:
-        result_resized = cv2.resize(latest_result['result_img'], 
-                                  (display_frame.shape[1], display_frame.shape[0]))
-        display_frame = result_resized
-        
-        cv2.putText(display_frame, f"Fast Mode: {latest_result['inference_time']:.1f}s", 
+    np.copyto(display_frame, frame)
+    if latest_result:
+        draw_detections(display_frame, latest_result['detections'])
+
+        cv2.putText(display_frame, f"Fast Mode: {latest_result['inference_time']*1000:.0f}ms",
                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(display_frame, f"Frame: {latest_result['frame_id']}", 
+        cv2.putText(display_frame, f"Frame: {latest_result['frame_id']}",
                    (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    
+
     # FPS 표시
     fps_counter += 1
     if fps_counter % 30 == 0:
@@ -119,25 +85,22 @@ while True:
         fps = 30 / (fps_end_time - fps_start_time)
         fps_start_time = fps_end_time
         print(f"Display FPS: {fps:.1f}")
-    
-    cv2.putText(display_frame, f"FPS: {fps_counter/(time.time()-fps_start_time+0.001):.1f}", 
+        print(f"[스케줄러] {scheduler.metrics_text()}")
+
+    cv2.putText(display_frame, f"FPS: {fps_counter/(time.time()-fps_start_time+0.001):.1f}",
                 (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    
+
+    cv2.putText(display_frame, f"Stride: {scheduler.stride}  Input: {scheduler.input_size}",
+                (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
     cv2.imshow("YOLO Fast Mode", display_frame)
-    
+
     if cv2.waitKey(1) & 0xFF == 27:
         break
 
 # 정리
-frame_queue.put(None)
+engine.stop()
 cap.release()
 cv2.destroyAllWindows()
 
-# 임시 파일 정리
-try:
-    os.remove(TEMP_FILENAME)
-    os.remove("predictions.jpg")
-except:
-    pass
-
 print("고속 모드 종료")
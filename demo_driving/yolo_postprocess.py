@@ -0,0 +1,112 @@
+"""
+YOLO 전처리/후처리
+- letterbox: 비율을 유지해서 정사각형 입력(320x320)에 넣고 남는 부분은 회색으로 채움 (미리 할당한 캔버스 재사용)
+- decode: 네트워크 출력 배열 → 박스/점수/클래스 (NumPy 일괄 계산)
+- nms: 클래스별 NMS (IoU 행렬을 한 번에 계산)
+- scale_boxes: letterbox 입력 좌표 → 원본 프레임(640x480) 좌표 (이미지 리사이즈 없이 좌표만 변환)
+
+yolo_engine.YoloEngine에서 사용
+"""
+import cv2
+import numpy as np
+
+PAD_VALUE = 114     # letterbox 여백 색 (darknet/YOLO 관례)
+MAX_CANDIDATES = 200  # NMS에 넣을 최대 박스 수 (점수 상위) - 최악의 경우 처리 시간 제한
+
+
+class Letterbox:
+    """프레임 크기별 letterbox 변환 정보 + 재사용 캔버스"""
+    def __init__(self, frame_shape, input_size):
+        height, width = frame_shape[:2]
+        self.input_size = input_size
+        self.scale = min(input_size / width, input_size / height)
+        self.new_w = int(round(width * self.scale))
+        self.new_h = int(round(height * self.scale))
+        self.pad_x = (input_size - self.new_w) // 2
+        self.pad_y = (input_size - self.new_h) // 2
+        self.frame_w, self.frame_h = width, height
+        self.canvas = np.full((input_size, input_size, 3), PAD_VALUE, np.uint8)
+        self.resized = np.empty((self.new_h, self.new_w, 3), np.uint8)
+
+    def apply(self, frame):
+        """BGR frame을 캔버스에 넣어서 반환 (캔버스는 다음 호출 때 덮어써짐)"""
+        cv2.resize(frame, (self.new_w, self.new_h), dst=self.resized, interpolation=cv2.INTER_LINEAR)
+        self.canvas[self.pad_y:self.pad_y + self.new_h, self.pad_x:self.pad_x + self.new_w] = self.resized
+        return self.canvas
+
+
+def decode(rows, conf_threshold, input_size):
+    """
+    YOLO 출력 행 (박스 수, 5 + 클래스 수) → 입력 이미지 좌표 박스
+
+    Returns:
+        boxes: (N, 4) x1, y1, x2, y2 (입력 픽셀 좌표)
+        scores: (N,)
+        class_ids: (N,)
+    """
+    scores_all = rows[:, 5:]
+    class_ids = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(len(rows)), class_ids]
+    keep = np.flatnonzero(scores >= conf_threshold)
+    if len(keep) > MAX_CANDIDATES:
+        keep = keep[np.argpartition(-scores[keep], MAX_CANDIDATES)[:MAX_CANDIDATES]]
+    rows, class_ids, scores = rows[keep], class_ids[keep], scores[keep]
+    centers = rows[:, :2] * input_size
+    half = rows[:, 2:4] * (input_size / 2.0)
+    boxes = np.concatenate([centers - half, centers + half], axis=1)
+    return boxes, scores, class_ids
+
+
+def iou_matrix(boxes):
+    """모든 박스 쌍의 IoU (N, N)"""
+    x1, y1, x2, y2 = boxes.T
+    area = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    iw = np.clip(np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]), 0, None)
+    ih = np.clip(np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]), 0, None)
+    inter = iw * ih
+    return inter / np.maximum(area[:, None] + area[None, :] - inter, 1e-9)
+
+
+def nms(boxes, scores, class_ids, iou_threshold):
+    """
+    클래스별 NMS - 다른 클래스끼리는 서로 지우지 않음
+
+    Returns:
+        남길 박스 인덱스 (점수 내림차순)
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, np.int64)
+    order = np.argsort(-scores, kind="stable")
+    # 클래스마다 박스를 멀리 옮겨서 다른 클래스끼리는 IoU가 0이 되게 함
+    offset = (class_ids[order] * (boxes.max() + 1.0))[:, None]
+    iou = iou_matrix(boxes[order] + offset)
+    # 점수가 더 높은 박스와 많이 겹치는 쌍 (i < j 이면 i가 j를 지움)
+    suppress = np.triu(iou > iou_threshold, k=1)
+    keep = np.ones(len(order), bool)
+    # 남아 있는 박스만 차례로 자기보다 낮은 박스를 지움 (겹치는 박스가 있는 행만 순회)
+    for i in np.flatnonzero(suppress.any(axis=1)):
+        if keep[i]:
+            keep &= ~suppress[i]
+    return order[keep]
+
+
+def scale_boxes(boxes, letterbox):
+    """letterbox 입력 좌표 박스 → 원본 프레임 좌표 (프레임 밖은 잘라냄)"""
+    scaled = boxes.copy()
+    scaled[:, [0, 2]] = (scaled[:, [0, 2]] - letterbox.pad_x) / letterbox.scale
+    scaled[:, [1, 3]] = (scaled[:, [1, 3]] - letterbox.pad_y) / letterbox.scale
+    scaled[:, [0, 2]] = np.clip(scaled[:, [0, 2]], 0, letterbox.frame_w - 1)
+    scaled[:, [1, 3]] = np.clip(scaled[:, [1, 3]], 0, letterbox.frame_h - 1)
+    return scaled
+
+
+def postprocess(rows, letterbox, conf_threshold, iou_threshold):
+    """
+    한 장의 출력 → 원본 프레임 좌표 박스/점수/클래스 (NMS 후, 점수 내림차순)
+    """
+    boxes, scores, class_ids = decode(rows, conf_threshold, letterbox.input_size)
+    keep = nms(boxes, scores, class_ids, iou_threshold)
+    boxes, scores, class_ids = scale_boxes(boxes[keep], letterbox), scores[keep], class_ids[keep]
+    # letterbox 여백에만 걸친 박스는 잘라내면 크기가 0이 되므로 제외
+    visible = (boxes[:, 2] - boxes[:, 0] >= 1) & (boxes[:, 3] - boxes[:, 1] >= 1)
+    return boxes[visible], scores[visible], class_ids[visible]
@@ -1,20 +1,12 @@
-import RPi.GPIO as GPIO
-import time
-from setting import GPIO_DIR_PIN, GPIO_STEP_PIN
+from stepper_lift import StepperLift
 
-GPIO.setwarnings(False)
-GPIO.cleanup()
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(GPIO_DIR_PIN, GPIO.OUT)
-GPIO.setup(GPIO_STEP_PIN, GPIO.OUT)
+# 스텝 펄스는 stepper_lift 백엔드가 만듦 (pigpio DMA → 없으면 RPi.GPIO 소프트웨어 타이밍)
+lifter = StepperLift()
 
 def lift(direction, duration):
-    GPIO.output(GPIO_DIR_PIN, GPIO.HIGH if direction == "UP" else GPIO.LOW)
-    print(f"Lifting {direction} for {duration} seconds...")
-    start_time = time.time()
-    while time.time() - start_time < duration:
-        GPIO.output(GPIO_STEP_PIN, GPIO.HIGH)
-        time.sleep(0.001)
-        GPIO.output(GPIO_STEP_PIN, GPIO.LOW)
-        time.sleep(0.001)
-    print(f"Lifting {direction} completed.")
+    """기존 호출 호환 - duration(초)은 기존 루프 속도 기준 스텝 수로 환산해서 가감속으로 이동"""
+    lifter.lift(direction, duration)
+
+def lift_steps(direction, steps):
+    """스텝 수로 리프트 이동 (반복 가능한 높이)"""
+    lifter.move(direction, steps)
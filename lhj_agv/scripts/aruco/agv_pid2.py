@@ -1,167 +1,301 @@
-import cv2
-import numpy as np
-from pymycobot.myagv import MyAgv
+"""
+라인 추종 (PID)
+- 인식 스레드: 카메라 속도로 ROI 색 분할 → 라인 오프셋/기울기
+- 구동 스레드: CONTROL_HZ로 최신 인식 결과에 PID(실제 dt)를 적용해서 전진 + 회전 속도 명령을 계속 갱신
+  (막히는 rotation/go_ahead + sleep 대신 SET_MOTION_CONTROL 속도 명령)
+- 라인을 놓치면: 잠깐은 마지막 명령 유지(LOST) → 마지막으로 본 쪽으로 제자리 회전(SEARCH) → 정지(STOPPED)
+
+사용법: python3 agv_pid2.py [--record 폴더]   ('q'로 종료, --record를 주면 프레임을 저장 → line_follow_replay.py)
+"""
+import argparse
+import os
+import sys
 import threading
 import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from line_segmentation import LineSegmenter
+
+# 속도 명령 전송은 robot_hal.myagv와 같은 코드 (pymycobot 버전별 차이 처리)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from robot_hal.myagv import motion_control_sender
+
+# 라인 색 범위 (HSV, 빨간색)
+LOWER_COLOR = np.array([0, 50, 50], dtype=np.uint8)
+UPPER_COLOR = np.array([10, 255, 255], dtype=np.uint8)
+ROI_RATIO = 0.5             # 아래쪽 1/2 영역만 사용
+MIN_LINE_AREA = 50          # 이보다 작은 윤곽선은 잡음으로 봄 (process_frame_contour)
+
+# 속도 명령 (MyAgv SET_MOTION_CONTROL: 128 = 정지, 128 ± 속도)
+CONTROL_HZ = 20
+MAX_FORWARD_SPEED = 40      # 직선에서 전진 속도 값
+MIN_FORWARD_RATIO = 0.3     # 오차가 커도 이 비율 이상으로 전진
+SLOWDOWN = 0.8              # 오차(0~1)에 비례해서 전진 속도 줄임
+MAX_ROTATION_SPEED = 70
+
+# PID (오차: 화면 폭 기준 -1 ~ 1 오프셋 + 기울기 → 출력 -1 ~ 1)
+Kp = 1.2
+Ki = 0.3
+Kd = 0.15
+HEADING_WEIGHT = 0.8        # 라인 기울기(rad)를 오차에 더하는 비율 (커브를 미리 봄)
+
+# 라인을 놓쳤을 때
+LOST_GRACE = 0.3            # 이 시간(초)까지는 마지막 명령을 유지하며 천천히 진행
+SEARCH_ROTATION_SPEED = 25
+SEARCH_TIMEOUT = 4.0        # 이 시간 동안 회전해도 못 찾으면 정지
+CAMERA_TIMEOUT = 0.5        # 이 시간 동안 새 프레임이 없으면 정지
+
+FOLLOW, LOST, SEARCH, STOPPED = "FOLLOW", "LOST", "SEARCH", "STOPPED"
+
+# 인식 결과 - offset: 라인 중심의 화면 중앙 대비 위치 (-1 왼쪽 ~ 1 오른쪽, 라인 없음 None)
+#            heading: 라인이 세로축에서 기운 각도 (rad, 위쪽이 오른쪽으로 기울면 +)
+LineObservation = namedtuple("LineObservation", "time offset heading")
+
+
+# LUT + 가로줄 분할 (조회표는 여기서 한 번만 만듦)
+segmenter = LineSegmenter(LOWER_COLOR, UPPER_COLOR, roi_ratio=ROI_RATIO)
 
-# AGV의 동작 상태를 저장하는 변수 (중복 실행 방지)
-state = threading.Lock()
-
-# MyAgv 객체 생성 (시리얼 포트와 보드레이트 설정)
-agv =  ("/dev/ttyAMA2", 115200)
-
-# PID 제어를 위한 변수 설정
-Kp = 0.5
-Ki = 0.1
-Kd = 0.05
-integral = 0
-previous_error = 0
-initial_speed = 10  # 초기 속도 설정
-max_speed = 50  # 최대 속도 설정
-speed_increment = 2  # 속도 증가량
-
-# PID 제어 함수
-def pid_control(error, dt):
-    global integral, previous_error
-    integral += error * dt
-    derivative = (error - previous_error) / dt
-    output = Kp * error + Ki * integral + Kd * derivative
-    previous_error = error
-    return output
 
 # 카메라에서 받아온 프레임을 처리하는 함수
 def process_frame(frame):
+    """
+    :return: (offset 픽셀 - 화면 중앙 기준 오른쪽 +, angle 도 - 세로축 기준 오른쪽 기울기 +) / 라인이 없으면 (None, None)
+    """
+    return segmenter.process(frame)
+
+
+def process_frame_contour(frame):
+    """기존 방식 (ROI 전체 HSV 변환 + inRange + 블러 + findContours + fitLine) - 비교/벤치마크용"""
     # 프레임의 높이와 너비를 구함
-    height, width, _ = frame.shape
-    
-    # 관심 영역(ROI)의 높이 설정 (아래쪽 1/2 영역)
-    roi_height = int(height / 2)
-    roi_top = height - roi_height
-    roi = frame[roi_top:, :]  # ROI 설정
-    
-    # 화면에 중앙선(흰색) 그리기
-    center_line = width // 2
-    cv2.line(roi, (center_line, 0), (center_line, roi_height), (255, 255, 255), 2)
-    
-    # ROI 영역을 HSV 색상 공간으로 변환
+    height, width = frame.shape[:2]
+
+    # 관심 영역(ROI) 설정 (아래쪽 영역)
+    roi_top = height - int(height * ROI_RATIO)
+    roi = frame[roi_top:, :]
+
+    # ROI 영역을 HSV 색상 공간으로 변환해서 라인 색 마스크 생성
     hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-    
-    # 특정 색상 범위를 설정 (예: 빨간색)
-    lower_color = np.array([0, 50, 50], dtype=np.uint8)
-    upper_color = np.array([10, 255, 255], dtype=np.uint8)
-    
-    # 색상에 해당하는 마스크 생성
-    color_mask = cv2.inRange(hsv, lower_color, upper_color)
-    
+    color_mask = cv2.inRange(hsv, LOWER_COLOR, UPPER_COLOR)
+
     # 블러 처리 추가하여 노이즈 제거
     blurred = cv2.GaussianBlur(color_mask, (5, 5), 0)
-    
+
     # 윤곽선을 찾기 위해 Contour 검출
     contours, _ = cv2.findContours(blurred, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    if contours:
-        largest_contour = max(contours, key=cv2.contourArea)
-        [vx, vy, x, y] = cv2.fitLine(largest_contour, cv2.DIST_L2, 0, 0.01, 0.01)
-        
-        # 각도 계산 (기울기 기반)
-        angle = np.arctan2(vy, vx) * 180 / np.pi
-        
-        # 윤곽선의 중심 좌표 계산
-        M = cv2.moments(largest_contour)
-        if M["m00"] != 0:
-            cx = int(M["m10"] / M["m00"])
-        else:
-            cx = width // 2
-        
-        offset = cx - center_line  # 중심에서 벗어난 거리
-        return offset, angle
-    return None, None
-
-# AGV 명령 실행 함수 (급커브와 약한 커브 대응)
-def execute_command(offset, angle, MA, frame, cap):
-    global initial_speed, max_speed
-    global initial_speed
-    with state:
-        if offset is None:
-            print("라인을 찾을 수 없음, 라인 재탐색 중")
-            MA.counterclockwise_rotation(50, 0.3)
-            time.sleep(0.5)
-            ret, frame = cap.read()
+    if not contours:
+        return None, None
+    largest_contour = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(largest_contour) < MIN_LINE_AREA:
+        return None, None
+
+    # 기울기 (위쪽을 향하는 방향 벡터 기준)
+    vx, vy, _, _ = cv2.fitLine(largest_contour, cv2.DIST_L2, 0, 0.01, 0.01).flatten()
+    if vy > 0:
+        vx, vy = -vx, -vy
+    angle = float(np.degrees(np.arctan2(vx, -vy)))
+
+    # 윤곽선의 중심 좌표 계산
+    M = cv2.moments(largest_contour)
+    cx = M["m10"] / M["m00"] if M["m00"] != 0 else width / 2
+    offset = cx - width / 2  # 중심에서 벗어난 거리
+    return offset, angle
+
+
+def observe_line(frame, timestamp=None):
+    """프레임 → LineObservation (오프셋을 화면 폭 기준으로 정규화)"""
+    offset, angle = process_frame(frame)
+    timestamp = time.time() if timestamp is None else timestamp
+    if offset is None:
+        return LineObservation(timestamp, None, None)
+    return LineObservation(timestamp, offset / (frame.shape[1] / 2), np.radians(angle))
+
+
+class PID:
+    def __init__(self, kp, ki, kd, limit=1.0):
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.previous = None
+
+    def update(self, error, dt):
+        derivative = 0.0 if self.previous is None or dt <= 0 else (error - self.previous) / dt
+        self.previous = error
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        # 출력이 포화되면 적분하지 않음 (windup 방지)
+        if abs(output) < self.limit:
+            self.integral += error * dt
+        return float(np.clip(output, -self.limit, self.limit))
+
+
+class LineFollower:
+    """
+    최신 인식 결과 → (전진, 회전) 속도 값 (회전은 반시계 +)
+    PID는 새 인식 결과가 들어올 때만, 인식 시각 차이(실제 dt)로 갱신
+    """
+    def __init__(self, max_forward_speed=MAX_FORWARD_SPEED, max_rotation_speed=MAX_ROTATION_SPEED):
+        self.max_forward_speed = max_forward_speed
+        self.max_rotation_speed = max_rotation_speed
+        self.pid = PID(Kp, Ki, Kd)
+        self.reset()
+
+    def reset(self, now=None):
+        self.pid.reset()
+        self.state = SEARCH
+        self.last_seen = time.time() if now is None else now
+        self.last_side = -1             # 마지막으로 라인을 본 쪽 (-1 왼쪽, 1 오른쪽) - 기본은 반시계로 탐색
+        self.last_observation_time = None
+        self.command = (0.0, 0.0)
+
+    def set_state(self, state):
+        if state != self.state:
+            print(f"[라인] {self.state} → {state}")
+            self.state = state
+
+    def update(self, observation, now=None):
+        now = time.time() if now is None else now
+        if observation is None or now - observation.time > CAMERA_TIMEOUT:
+            # 카메라가 멈춤 - 상태는 유지하고 정지
+            return 0.0, 0.0
+
+        if observation.offset is not None:
+            if observation.time == self.last_observation_time:
+                return self.command     # 새 프레임이 아직 없음 - 이전 명령 유지
+            if self.state != FOLLOW:
+                self.pid.reset()
+                self.set_state(FOLLOW)
+                dt = 0.0
+            else:
+                dt = observation.time - self.last_observation_time
+            self.last_observation_time = observation.time
+            self.last_seen = observation.time
+            if observation.offset != 0:
+                self.last_side = 1 if observation.offset > 0 else -1
+
+            error = observation.offset + HEADING_WEIGHT * observation.heading
+            turn = self.pid.update(error, dt)
+            ratio = max(MIN_FORWARD_RATIO, 1.0 - SLOWDOWN * min(1.0, abs(error)))
+            # 라인이 오른쪽(+)에 있으면 시계 방향(-)으로 회전
+            self.command = (self.max_forward_speed * ratio, -turn * self.max_rotation_speed)
+            return self.command
+
+        lost_time = now - self.last_seen
+        if self.state in (FOLLOW, LOST) and lost_time < LOST_GRACE:
+            # 잠깐 놓친 경우 (교차/반사) - 마지막 회전을 유지하며 천천히
+            self.set_state(LOST)
+            return self.command[0] * 0.5, self.command[1]
+        if lost_time < LOST_GRACE + SEARCH_TIMEOUT:
+            self.set_state(SEARCH)
+            self.pid.reset()
+            return 0.0, -self.last_side * SEARCH_ROTATION_SPEED
+        self.set_state(STOPPED)
+        return 0.0, 0.0
+
+
+def send_velocity(motion_control, forward, rotation):
+    """속도 명령 1번 전송 (막히지 않음) - motion_control: robot_hal.myagv.motion_control_sender(agv)"""
+    motion_control(128 + int(round(forward)), 128, 128 + int(round(rotation)))
+
+
+class LineFollowingRunner:
+    """인식 스레드(카메라 속도) + 구동 스레드(CONTROL_HZ)"""
+    def __init__(self, agv, cap, follower=None, record_dir=None, show=True):
+        self.agv = agv
+        self.motion_control = motion_control_sender(agv)
+        self.cap = cap
+        self.follower = follower or LineFollower()
+        self.record_dir = record_dir
+        self.show = show
+        self.lock = threading.Lock()
+        self.latest = None
+        self.frames = 0
+        self.running = False
+
+    def perception_loop(self):
+        while self.running:
+            ret, frame = self.cap.read()
             if not ret:
                 print("Camera error")
-                return
-            offset, angle = process_frame(frame)
-            if offset is None:
-                return
-        
-        # 중앙선 기준으로 방향 조절
-        dt = 0.1  # PID 제어에서 사용할 시간 간격
-        error = offset
-        control_signal = pid_control(error, dt)
-        
-        # 약한 커브와 급커브에 대한 속도 및 회전 반응 차별화
-        # 각도에 따라 회전 속도 및 방향 조절
-        angle_abs = abs(angle)
-        if angle_abs < 10:  # 각도가 작으면 약한 커브
-            print("약한 커브, 부드럽게 회전 중")
-            if initial_speed < max_speed:
-                initial_speed += speed_increment  # 점진적으로 속도 증가
-            speed = initial_speed
-            rotation_speed = 30 + int(angle_abs * 2)  # 각도에 비례하여 회전 속도 설정
-            if control_signal < 0:
-                MA.counterclockwise_rotation(rotation_speed, 0.3)
-            else:
-                MA.clockwise_rotation(rotation_speed, 0.3)
-            time.sleep(0.1)
-        else:  # 급커브
-            print("급커브, 속도 조절 중")
-            speed = 20  # 급커브일 때 속도를 낮춤
-            rotation_speed = 50 + int(angle_abs * 1.5)  # 각도에 비례하여 회전 속도 설정
-            if control_signal < 0:
-                print("왼쪽으로 급커브 회전 중")
-                MA.counterclockwise_rotation(rotation_speed, 0.4)
-            else:
-                print("오른쪽으로 급커브 회전 중")
-                MA.clockwise_rotation(rotation_speed, 0.4)
-            time.sleep(0.5)
-        
-        # 직진 명령
-        print("직진 중")
-        MA.go_ahead(speed, 0.3)  # 직진 시에는 속도 증가
-
-# 카메라 스레드 함수
-def camera_thread():
-    cap = cv2.VideoCapture(0)
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Camera error")
-            break
-        
-        offset, angle = process_frame(frame)
-        global last_offset, last_angle
-        if offset is not None and angle is not None:
-            last_offset, last_angle = offset, angle
-        
-        if offset is not None:
-            print(f"Offset: {offset}, Angle: {angle}")
-            execute_command(offset, angle, agv, frame, cap)
-        
-        cv2.imshow("Frame", frame)
-        if cv2.waitKey(150) & 0xFF == ord('q'):
-            stop(agv)
-            break
-    
-    cap.release()
-    cv2.destroyAllWindows()
-
-# AGV 정지 함수
-def stop(MA):
-    with state:
-        MA.stop()
-    print("stop")
-
-# 카메라 스레드 실행
-camera_thread = threading.Thread(target=camera_thread)
-camera_thread.start()
-camera_thread.join()
+                self.running = False
+                break
+            timestamp = time.time()
+            observation = observe_line(frame, timestamp)
+            with self.lock:
+                self.latest = observation
+                self.frames += 1
+            if self.record_dir:
+                cv2.imwrite(os.path.join(self.record_dir, f"{self.frames:06d}.jpg"), frame)
+            if self.show:
+                self.draw(frame, observation)
+                cv2.imshow("Frame", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.running = False
+
+    def draw(self, frame, observation):
+        height, width = frame.shape[:2]
+        roi_top = height - int(height * ROI_RATIO)
+        cv2.line(frame, (width // 2, roi_top), (width // 2, height), (255, 255, 255), 2)
+        if observation.offset is not None:
+            segmenter.draw(frame)
+        cv2.putText(frame, self.follower.state, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+    def actuation_loop(self):
+        period = 1.0 / CONTROL_HZ
+        next_time = time.time()
+        try:
+            while self.running:
+                with self.lock:
+                    observation = self.latest
+                forward, rotation = self.follower.update(observation)
+                send_velocity(self.motion_control, forward, rotation)
+                if self.follower.state == STOPPED:
+                    print("라인을 찾을 수 없음, 정지")
+                    break
+                next_time += period
+                time.sleep(max(0.0, next_time - time.time()))
+        except Exception as e:
+            print(f"속도 명령 오류, 정지: {e}")
+        finally:
+            # 예외로 끝나도 인식 루프를 멈추고 AGV 정지
+            self.running = False
+            self.agv.stop()
+
+    def run(self):
+        self.running = True
+        self.follower.reset()
+        start_time = time.time()
+        actuation = threading.Thread(target=self.actuation_loop, daemon=True)
+        actuation.start()
+        try:
+            self.perception_loop()
+        finally:
+            self.running = False
+            actuation.join(timeout=1.0)
+            elapsed = time.time() - start_time
+            print(f"stop (인식 {self.frames}프레임, {self.frames / max(elapsed, 1e-6):.1f}fps)")
+
+
+if __name__ == "__main__":
+    from pymycobot.myagv import MyAgv
+
+    parser = argparse.ArgumentParser(description="PID 라인 추종")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--record", help="프레임 저장 폴더 (line_follow_replay.py 입력)")
+    args = parser.parse_args()
 
+    # MyAgv 객체 생성 (시리얼 포트와 보드레이트 설정)
+    agv = MyAgv("/dev/ttyAMA2", 115200)
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    cap = cv2.VideoCapture(args.camera)
+    try:
+        LineFollowingRunner(agv, cap, record_dir=args.record).run()
+    finally:
+        agv.stop()
+        cap.release()
+        cv2.destroyAllWindows()
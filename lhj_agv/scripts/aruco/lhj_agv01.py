@@ -6,6 +6,8 @@ import threading
 import time
 import os
 
+from line_segmentation import LineSegmenter
+
 # AGV 제어를 위한 객체 생성
 state = threading.Lock()
 agv = MyAgv("/dev/ttyAMA2", 115200)
@@ -30,41 +32,23 @@ cap = cv2.VideoCapture(0)
 # 마커의 실제 크기를 정확히 설정합니다 (예: 0.04미터 = 4cm).
 marker_length = 0.055  # 마커의 실제 크기 (미터 단위)
 
-# 성능 최적화를 위한 파라미터
-MIN_CONTOUR_AREA = 500  # 최소 윤곽선 면적 설정
-SMALL_KERNEL = np.ones((3, 3), np.uint8)
-LARGE_KERNEL = np.ones((5, 5), np.uint8)
-
 # 디스플레이 설정 확인
 def setup_display():
     if os.environ.get('DISPLAY', '') == '':
         print('No display found. Using :0.0')
         os.environ['DISPLAY'] = ':0.0'
 
+# 라인 색 분할 - HSV 범위로 만든 BGR 조회표(LUT)로 ROI의 가로줄만 검사 (line_segmentation.py)
+segmenter = LineSegmenter(np.array([0, 50, 50], dtype=np.uint8), np.array([10, 255, 255], dtype=np.uint8))
+
 # 프레임에서 라인을 검출하고 오프셋과 각도를 계산
 def process_frame(frame):
-    height, width, _ = frame.shape
-    roi = frame[height // 2:, :]
-    hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-    lower_red = np.array([0, 50, 50], dtype=np.uint8)
-    upper_red = np.array([10, 255, 255], dtype=np.uint8)
-    red_mask = cv2.inRange(hsv, lower_red, upper_red)
-    morphed = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, LARGE_KERNEL)
-
-    contours, _ = cv2.findContours(morphed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    if contours:
-        largest_contour = max(contours, key=cv2.contourArea)
-        if cv2.contourArea(largest_contour) > MIN_CONTOUR_AREA:
-            x, y, w, h = cv2.boundingRect(largest_contour)
-            line_center = x + w // 2
-            offset = line_center - (width // 2)
-            angle = 0
-
-            # 라인 인식 시각화
-            cv2.rectangle(roi, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.line(roi, (line_center, y), (line_center, y + h), (255, 0, 0), 2)
-            return offset, angle
-    return None, None
+    offset, angle = segmenter.process(frame)
+    if offset is None:
+        return None, None
+    # 라인 인식 시각화 (검사한 줄의 라인 중심)
+    segmenter.draw(frame)
+    return offset, angle
 
 # AGV 이동 명령 실행
 def execute_command(offset, angle):
@@ -0,0 +1,376 @@
+"""
+라인 추종 오프라인 재생 테스트 (agv_pid2.py)
+
+1) 녹화 프레임 재생: agv_pid2.py --record 로 저장한 폴더(또는 동영상)를 process_frame에 넣어
+   기존 contour 분할과 LUT 가로줄 분할(line_segmentation.py)의 프레임당 시간, 라인 검출률, 결과 차이와
+   인식 루프가 낼 수 있는 속도(Hz)를 기존 루프(waitKey(150) + 막히는 명령)와 비교
+   python3 line_follow_replay.py --frames recorded/
+
+2) 합성 트랙 폐루프 시뮬레이션 (녹화 없이 실행 가능, 시뮬레이션 시간으로 빠르게 진행):
+   바닥에 그린 빨간 트랙을 로봇 위치에서 본 프레임으로 만들어 실제 process_frame으로 인식하고,
+   - 기존 execute_command 방식 (막히는 회전/직진 + sleep)
+   - 같은 PID를 6Hz 인식으로 (waitKey(150) 루프)
+   - 카메라 속도 인식 + CONTROL_HZ 속도 명령 (agv_pid2.LineFollower)
+   을 최대 전진 속도별로 한 바퀴 돌려서 이탈 없이 돌 수 있는 최고 속도를 비교
+   python3 line_follow_replay.py [--save-frames 폴더]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+
+import cv2
+import numpy as np
+
+import agv_pid2
+from agv_pid2 import LineFollower, observe_line, process_frame, process_frame_contour
+
+# MyAgv 속도 값 → 실제 속도 (sim_agv.py와 같은 값)
+FORWARD_MPS_PER_UNIT = 0.01
+ROTATION_RADPS_PER_UNIT = 0.026
+MAX_ACCELERATION = 1.0
+MAX_ANGULAR_ACCELERATION = 4.0
+PHYSICS_DT = 0.005
+
+# 합성 트랙 (스타디움 모양, 반시계 방향)
+STRAIGHT_LENGTH = 1.6       # m
+CURVE_RADIUS = 0.5          # m
+LINE_WIDTH = 0.02           # m
+MAP_RESOLUTION = 0.002      # m/pixel
+LINE_COLOR = (30, 30, 200)  # BGR (빨간 테이프)
+
+# 카메라 (바닥을 내려다본 영역으로 근사)
+FRAME_WIDTH, FRAME_HEIGHT = 640, 480
+VIEW_NEAR, VIEW_FAR = 0.10, 0.40    # 로봇 중심에서 화면 아래/위 끝까지 거리 (m)
+CAMERA_FPS = 30
+LEGACY_WAIT = 0.15                  # 기존 루프의 cv2.waitKey(150)
+
+LAP_TIMEOUT = 60.0
+MAX_LATERAL_ERROR = 0.08    # 이보다 벗어나면 이탈로 봄 (m)
+
+
+def build_track():
+    """트랙 중심선 점들 (간격 약 5mm)"""
+    half = STRAIGHT_LENGTH / 2
+    step = 0.005
+    points = []
+    for x in np.arange(-half, half, step):
+        points.append((x, -CURVE_RADIUS))
+    for a in np.arange(-np.pi / 2, np.pi / 2, step / CURVE_RADIUS):
+        points.append((half + CURVE_RADIUS * np.cos(a), CURVE_RADIUS * np.sin(a)))
+    for x in np.arange(half, -half, -step):
+        points.append((x, CURVE_RADIUS))
+    for a in np.arange(np.pi / 2, 3 * np.pi / 2, step / CURVE_RADIUS):
+        points.append((-half + CURVE_RADIUS * np.cos(a), CURVE_RADIUS * np.sin(a)))
+    return np.array(points)
+
+
+class TrackWorld:
+    def __init__(self, seed=0):
+        self.track = build_track()
+        self.segment_lengths = np.linalg.norm(np.diff(self.track, axis=0, append=self.track[:1]), axis=1)
+        self.lap_length = float(self.segment_lengths.sum())
+        self.arc = np.concatenate([[0.0], np.cumsum(self.segment_lengths)[:-1]])
+        margin = 0.5
+        self.x_min = self.track[:, 0].min() - margin
+        self.y_max = self.track[:, 1].max() + margin
+        width = int((self.track[:, 0].max() + margin - self.x_min) / MAP_RESOLUTION)
+        height = int((self.y_max - self.track[:, 1].min() + margin) / MAP_RESOLUTION)
+        # 회색 바닥 + 약간의 무늬
+        rng = np.random.default_rng(seed)
+        floor = rng.normal(110, 8, (height, width)).clip(0, 255).astype(np.uint8)
+        self.map = cv2.cvtColor(cv2.GaussianBlur(floor, (5, 5), 0), cv2.COLOR_GRAY2BGR)
+        pixels = np.round(self.to_map(self.track)).astype(np.int32)
+        cv2.polylines(self.map, [pixels], True, LINE_COLOR, int(round(LINE_WIDTH / MAP_RESOLUTION)), cv2.LINE_AA)
+
+    def to_map(self, points):
+        points = np.asarray(points, np.float64)
+        return np.stack([(points[..., 0] - self.x_min) / MAP_RESOLUTION,
+                         (self.y_max - points[..., 1]) / MAP_RESOLUTION], axis=-1)
+
+    def render(self, pose):
+        """로봇 위치 (x, y, theta)에서 본 카메라 프레임"""
+        x, y, theta = pose
+        forward = np.array([np.cos(theta), np.sin(theta)])
+        right = np.array([np.sin(theta), -np.cos(theta)])
+        scale_v = (VIEW_FAR - VIEW_NEAR) / FRAME_HEIGHT
+        scale_u = scale_v
+
+        def world(u, v):
+            return np.array([x, y]) + (VIEW_FAR - v * scale_v) * forward + (u - FRAME_WIDTH / 2) * scale_u * right
+
+        frame_points = np.float32([[0, 0], [FRAME_WIDTH, 0], [0, FRAME_HEIGHT]])
+        map_points = np.float32([self.to_map(world(u, v)) for u, v in frame_points])
+        matrix = cv2.getAffineTransform(frame_points, map_points)
+        return cv2.warpAffine(self.map, matrix, (FRAME_WIDTH, FRAME_HEIGHT),
+                              flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderValue=(110, 110, 110))
+
+    def locate(self, position):
+        """(트랙 중심선까지 거리, 가장 가까운 점의 진행 거리)"""
+        distances = np.linalg.norm(self.track - position, axis=1)
+        index = int(np.argmin(distances))
+        return float(distances[index]), float(self.arc[index])
+
+    def start_pose(self):
+        return np.array([self.track[0, 0], self.track[0, 1], 0.0])
+
+
+class SimRobot:
+    """MyAgv 속도 명령(전진, 회전 값) → 가속 제한 → 위치 적분"""
+    def __init__(self, pose):
+        self.pose = np.array(pose, np.float64)
+        self.velocity = np.zeros(2)
+        self.target = np.zeros(2)
+
+    def command(self, forward, rotation):
+        forward = float(np.clip(forward, -127, 127))
+        rotation = float(np.clip(rotation, -127, 127))
+        self.target = np.array([forward * FORWARD_MPS_PER_UNIT, rotation * ROTATION_RADPS_PER_UNIT])
+
+    def step(self, dt):
+        limits = np.array([MAX_ACCELERATION, MAX_ANGULAR_ACCELERATION]) * dt
+        self.velocity += np.clip(self.target - self.velocity, -limits, limits)
+        speed, turn = self.velocity
+        theta = self.pose[2]
+        self.pose += [speed * np.cos(theta) * dt, speed * np.sin(theta) * dt, turn * dt]
+
+
+class LegacyController:
+    """기존 agv_pid2 execute_command: PID 부호로만 회전 방향 결정, 고정 시간 회전/직진 + sleep"""
+    def __init__(self):
+        self.integral = 0.0
+        self.previous_error = 0.0
+        self.initial_speed = 10
+
+    def plan(self, offset_pixels, angle):
+        """인식 결과 → [(시간, 전진, 회전), ...] (막히는 동작 순서)"""
+        if offset_pixels is None:
+            # 라인 재탐색: 반시계 회전 0.3초 + sleep 0.5초
+            return [(0.3, 0, 50), (0.5, 0, 0)]
+        dt = 0.1
+        self.integral += offset_pixels * dt
+        derivative = (offset_pixels - self.previous_error) / dt
+        control_signal = 0.5 * offset_pixels + 0.1 * self.integral + 0.05 * derivative
+        self.previous_error = offset_pixels
+        direction = 1 if control_signal < 0 else -1
+        # 기존 코드의 각도는 fitLine의 x축 기준 각도 (세로 라인이면 약 90도)
+        angle_abs = 90 - abs(angle)
+        if angle_abs < 10:
+            if self.initial_speed < 50:
+                self.initial_speed += 2
+            speed = self.initial_speed
+            segments = [(0.3, 0, direction * (30 + int(angle_abs * 2))), (0.1, 0, 0)]
+        else:
+            speed = 20
+            segments = [(0.4, 0, direction * (50 + int(angle_abs * 1.5))), (0.5, 0, 0)]
+        return segments + [(0.3, speed, 0), (LEGACY_WAIT, 0, 0)]
+
+
+class LapResult:
+    def __init__(self):
+        self.completed = False
+        self.time = 0.0
+        self.distance = 0.0
+        self.max_error = 0.0
+        self.errors = []
+        self.frames = 0
+        self.processing = []
+
+    @property
+    def ok(self):
+        return self.completed and self.max_error <= MAX_LATERAL_ERROR
+
+    def summary(self):
+        mean_error = np.mean(self.errors) if self.errors else 0.0
+        status = "완주" if self.ok else ("이탈" if self.max_error > MAX_LATERAL_ERROR else "시간 초과")
+        return (f"{status:4s} {self.time:6.2f}초 | 평균 {self.distance / max(self.time, 1e-6):.2f}m/s | "
+                f"최대 오차 {self.max_error * 100:5.1f}cm, 평균 {mean_error * 100:4.1f}cm | 인식 {self.frames}프레임")
+
+
+def run_lap(world, mode, max_forward_speed=agv_pid2.MAX_FORWARD_SPEED,
+            max_rotation_speed=agv_pid2.MAX_ROTATION_SPEED, save_dir=None):
+    """
+    한 바퀴 시뮬레이션 (시뮬레이션 시간) - mode: "legacy" / "pid_6hz" / "pid_camera"
+    인식 지연은 process_frame의 실제 처리 시간
+    """
+    robot = SimRobot(world.start_pose())
+    result = LapResult()
+    follower = LineFollower(max_forward_speed, max_rotation_speed)
+    legacy = LegacyController()
+    follower.reset(now=0.0)
+
+    now = 0.0
+    next_capture = 0.0
+    next_control = 0.0
+    pending = []            # (사용 가능 시각, 관측)
+    latest = None
+    segments = []           # legacy: 남은 막히는 동작
+    segment_end = 0.0
+    progress = 0.0
+    _, last_arc = world.locate(robot.pose[:2])
+    track_every = 10
+
+    step = 0
+    while now < LAP_TIMEOUT:
+        if mode == "legacy":
+            if now >= segment_end:
+                if segments:
+                    duration, forward, rotation = segments.pop(0)
+                    robot.command(forward, rotation)
+                    segment_end = now + duration
+                else:
+                    frame = world.render(robot.pose)
+                    start = time.perf_counter()
+                    offset, angle = process_frame(frame)
+                    processing = time.perf_counter() - start
+                    result.frames += 1
+                    result.processing.append(processing)
+                    robot.command(0, 0)
+                    segments = legacy.plan(offset, angle)
+                    segment_end = now + processing
+        else:
+            if now >= next_capture:
+                frame = world.render(robot.pose)
+                if save_dir is not None:
+                    cv2.imwrite(os.path.join(save_dir, f"{result.frames:06d}.jpg"), frame)
+                start = time.perf_counter()
+                observation = observe_line(frame, timestamp=now)
+                processing = time.perf_counter() - start
+                result.frames += 1
+                result.processing.append(processing)
+                pending.append((now + processing, observation))
+                if mode == "pid_6hz":
+                    # 인식 → waitKey(150) 을 한 스레드에서 순서대로
+                    next_capture = now + processing + LEGACY_WAIT
+                else:
+                    next_capture = max(next_capture + 1.0 / CAMERA_FPS, now + processing)
+            while pending and pending[0][0] <= now:
+                latest = pending.pop(0)[1]
+            if now >= next_control:
+                robot.command(*follower.update(latest, now))
+                next_control += 1.0 / agv_pid2.CONTROL_HZ
+
+        robot.step(PHYSICS_DT)
+        now += PHYSICS_DT
+        step += 1
+        if step % track_every == 0:
+            error, arc = world.locate(robot.pose[:2])
+            delta = (arc - last_arc + world.lap_length / 2) % world.lap_length - world.lap_length / 2
+            progress += delta
+            result.distance += abs(delta)
+            last_arc = arc
+            result.errors.append(error)
+            result.max_error = max(result.max_error, error)
+            if error > MAX_LATERAL_ERROR * 2:
+                break   # 완전히 벗어남
+            if progress >= world.lap_length:
+                result.completed = True
+                break
+    result.time = now
+    return result
+
+
+def replay_recorded(path):
+    """녹화 프레임(폴더 또는 동영상) 재생 - 분할 방식별 인식 시간/검출률/결과 차이"""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "*.jpg")) + glob.glob(os.path.join(path, "*.png")))
+        frames = (cv2.imread(f) for f in files)
+    else:
+        cap = cv2.VideoCapture(path)
+
+        def read_video():
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        frames = read_video()
+
+    # 기존 contour 방식과 LUT 가로줄 방식을 같은 프레임에서 비교
+    methods = (("contour", process_frame_contour), ("LUT", process_frame))
+    times = {name: [] for name, _ in methods}
+    found = {name: 0 for name, _ in methods}
+    offset_diff, angle_diff = [], []
+    count = 0
+    for frame in frames:
+        if frame is None:
+            continue
+        count += 1
+        results = {}
+        for name, method in methods:
+            start = time.perf_counter()
+            results[name] = method(frame)
+            times[name].append(time.perf_counter() - start)
+            found[name] += results[name][0] is not None
+        (contour_offset, contour_angle), (lut_offset, lut_angle) = results["contour"], results["LUT"]
+        if contour_offset is not None and lut_offset is not None:
+            offset_diff.append(abs(contour_offset - lut_offset))
+            angle_diff.append(abs(contour_angle - lut_angle))
+    if not count:
+        print(f"프레임이 없습니다: {path}")
+        return
+    print(f"[재생] {count}프레임 ({frame.shape[1]}x{frame.shape[0]})")
+    for name, _ in methods:
+        mean = float(np.mean(times[name]))
+        p95 = float(np.percentile(times[name], 95))
+        print(f"[재생] {name:7s} 평균 {mean * 1000:.3f}ms, p95 {p95 * 1000:.3f}ms → 최대 {1 / mean:.0f}Hz, "
+              f"라인 검출 {found[name] / count * 100:.0f}%")
+    speedup = np.mean(times["contour"]) / np.mean(times["LUT"])
+    if offset_diff:
+        print(f"[재생] LUT {speedup:.1f}배 빠름, contour 대비 오프셋 차이 평균 {np.mean(offset_diff):.1f}px "
+              f"(최대 {np.max(offset_diff):.1f}px), 각도 차이 평균 {np.mean(angle_diff):.1f}°")
+    mean = float(np.mean(times["LUT"]))
+    # 기존 루프: 인식 + waitKey(150) + 막히는 회전(0.3~0.4초) + sleep(0.1~0.5초) + 직진 0.3초
+    legacy_period = float(np.mean(times["contour"])) + LEGACY_WAIT + 0.4 + 0.5 + 0.3
+    print(f"[재생] 보정 주기: 기존 루프 약 {legacy_period:.2f}초 ({1 / legacy_period:.1f}Hz) → "
+          f"인식 {min(CAMERA_FPS, 1 / mean):.0f}Hz / 명령 {agv_pid2.CONTROL_HZ}Hz")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="agv_pid2 라인 추종 재생 테스트")
+    parser.add_argument("--frames", help="녹화 프레임 폴더 또는 동영상 (agv_pid2.py --record)")
+    parser.add_argument("--save-frames", help="합성 트랙 한 바퀴 프레임을 이 폴더에 저장 (--frames 입력용)")
+    parser.add_argument("--speeds", default="40,60,80,100,120", help="비교할 최대 전진 속도 값")
+    args = parser.parse_args()
+
+    if args.frames:
+        replay_recorded(args.frames)
+        return
+
+    world = TrackWorld()
+    print(f"합성 트랙 한 바퀴 {world.lap_length:.2f}m (곡선 반지름 {CURVE_RADIUS}m), 이탈 기준 {MAX_LATERAL_ERROR * 100:.0f}cm")
+    if args.save_frames:
+        os.makedirs(args.save_frames, exist_ok=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_lap(world, "pid_camera", save_dir=args.save_frames)
+        print(f"프레임 저장: {args.save_frames}")
+        replay_recorded(args.save_frames)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = run_lap(world, "legacy")
+    print(f"\n[기존 execute_command] {legacy.summary()}")
+
+    speeds = [int(s) for s in args.speeds.split(",")]
+    best = {}
+    for mode, label in (("pid_6hz", "PID, 인식 6Hz (waitKey 150)"), ("pid_camera", f"PID, 인식 {CAMERA_FPS}Hz + 명령 {agv_pid2.CONTROL_HZ}Hz")):
+        print(f"\n[{label}]")
+        for speed in speeds:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_lap(world, mode, max_forward_speed=speed)
+            print(f"  최대 속도 {speed:3d}: {result.summary()}")
+            if result.ok:
+                best[mode] = (speed, result)
+
+    print()
+    for mode, label in (("pid_6hz", "인식 6Hz"), ("pid_camera", "카메라 속도")):
+        if mode in best:
+            speed, result = best[mode]
+            print(f"{label}: 이탈 없이 최대 속도 {speed} ({result.distance / result.time:.2f}m/s, 한 바퀴 {result.time:.1f}초)")
+        else:
+            print(f"{label}: 완주한 속도 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+빠른 라인 색 분할 (agv_pid2 / lhj_agv01 process_frame용)
+- HSV 범위로 BGR → 마스크 3D 조회표(LUT)를 처음 한 번만 만들어 둠 (프레임마다 cvtColor/inRange 하지 않음)
+- ROI 전체 대신 몇 개 가로줄(scanline)만, 가로로 건너뛰며 읽어서 LUT 조회
+- 줄마다 가장 긴 라인 구간의 중심 → 평균이 오프셋, 줄 중심들의 직선 기울기가 각도
+  (findContours + fitLine 대신)
+"""
+import cv2
+import numpy as np
+
+LUT_BITS = 6                # 채널당 비트 수 (64 x 64 x 64 = 256KB 조회표)
+SCAN_ROWS = 8               # ROI에서 읽을 가로줄 수
+COLUMN_STEP = 4             # 가로로 건너뛰는 픽셀 수 (640 → 160)
+MIN_RUN = 2                 # 줄에서 라인으로 볼 최소 연속 픽셀 수 (건너뛴 픽셀 기준)
+MIN_ROWS = 2                # 라인이 보인 줄이 이보다 적으면 라인 없음
+
+
+def build_color_lut(lower, upper, bits=LUT_BITS):
+    """HSV 범위 → BGR 조회표 (lut[b >> s, g >> s, r >> s] = 0 또는 255, s = 8 - bits)"""
+    levels = 1 << bits
+    step = 256 // levels
+    centers = (np.arange(levels) * step + step // 2).astype(np.uint8)
+    b, g, r = np.meshgrid(centers, centers, centers, indexing="ij")
+    colors = np.stack([b, g, r], axis=-1).reshape(-1, 1, 3)
+    hsv = cv2.cvtColor(colors, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.asarray(lower, np.uint8), np.asarray(upper, np.uint8))
+    return mask.reshape(levels, levels, levels)
+
+
+class LineSegmenter:
+    def __init__(self, lower, upper, roi_ratio=0.5, rows=SCAN_ROWS, column_step=COLUMN_STEP,
+                 min_run=MIN_RUN, min_rows=MIN_ROWS, bits=LUT_BITS):
+        self.lut = build_color_lut(lower, upper, bits)
+        self.shift = 8 - bits
+        self.roi_ratio = roi_ratio
+        self.rows = rows
+        self.column_step = column_step
+        self.min_run = min_run
+        self.min_rows = min_rows
+        self.points = []        # 마지막 프레임에서 찾은 (x, y) 줄 중심 (화면 좌표, 그리기용)
+
+    def scan_rows(self, height):
+        roi_top = height - int(height * self.roi_ratio)
+        return np.linspace(roi_top, height - 1, self.rows).astype(np.intp)
+
+    def mask_rows(self, frame, rows):
+        """선택한 줄만 LUT로 마스크 (줄 수 x 가로/COLUMN_STEP)"""
+        pixels = frame[rows, ::self.column_step] >> self.shift
+        return self.lut[pixels[..., 0], pixels[..., 1], pixels[..., 2]]
+
+    def process(self, frame):
+        """
+        :return: (offset 픽셀 - 화면 중앙 기준 오른쪽 +, angle 도 - 세로축 기준 오른쪽 기울기 +) / 라인이 없으면 (None, None)
+        """
+        height, width = frame.shape[:2]
+        rows = self.scan_rows(height)
+        mask = self.mask_rows(frame, rows) > 0
+
+        # 줄마다 가장 긴 연속 구간 - 각 픽셀에서 끝나는 연속 길이 = 누적합 - 마지막 빈 픽셀까지의 누적합
+        counts = np.cumsum(mask, axis=1, dtype=np.int32)
+        run = counts - np.maximum.accumulate(np.where(mask, 0, counts), axis=1)
+        ends = np.argmax(run, axis=1)
+        lengths = run[np.arange(len(rows)), ends]
+        valid = lengths >= self.min_run
+        if np.count_nonzero(valid) < self.min_rows:
+            self.points = []
+            return None, None
+
+        xs = (ends[valid] - (lengths[valid] - 1) / 2) * self.column_step + (self.column_step - 1) / 2
+        ys = rows[valid].astype(np.float64)
+        self.points = list(zip(xs, ys))
+        offset = float(xs.mean() - width / 2)
+        # x = a*y + b (최소제곱) - 아래로 갈수록 x가 줄면(a < 0) 위쪽이 오른쪽으로 기운 것
+        dy = ys - ys.mean()
+        slope = float(dy @ (xs - xs.mean()) / (dy @ dy))
+        angle = float(np.degrees(np.arctan(-slope)))
+        return offset, angle
+
+    def draw(self, frame):
+        for x, y in self.points:
+            cv2.circle(frame, (int(x), int(y)), 4, (0, 255, 0), -1)
@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+import threading
+import time
+from setting import CAMERA_INDEX, CAMERA_WIDTH, CAMERA_HEIGHT
+
+# 카메라를 열 때 자동 노출이 안정될 때까지 버리는 시간 (처음 한 번만)
+WARMUP_TIMEOUT = 2.0
+WARMUP_MIN_FRAMES = 5
+WARMUP_BRIGHTNESS_TOLERANCE = 2.0  # 연속 프레임 평균 밝기 차이가 이 안이면 안정
+
+
+class CameraService:
+    """
+    프로그램 동안 카메라를 한 번만 열어 두고 백그라운드 스레드가 계속 최신 프레임을 받아 둡니다.
+    도킹/검출 함수는 cv2.VideoCapture 대신 이 객체의 read()를 사용합니다. (release 하지 않음)
+    """
+    def __init__(self, index=CAMERA_INDEX, width=CAMERA_WIDTH, height=CAMERA_HEIGHT):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.cap = None
+        self.frame = None       # 최신 프레임 (백그라운드 스레드만 씀)
+        self.seq = 0            # 최신 프레임 번호
+        self.delivered = 0      # read()로 마지막에 넘겨준 프레임 번호
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """카메라 열기 + 노출 안정화 + 백그라운드 수신 시작 (이미 열려 있으면 바로 반환)"""
+        if self.running:
+            return True
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            print("카메라를 열 수 없습니다. 연결 상태를 확인하세요.")
+            self.cap = None
+            return False
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.warm_up()
+        self.running = True
+        self.thread = threading.Thread(target=self.capture_loop, daemon=True)
+        self.thread.start()
+        print(f"카메라 서비스 시작 (카메라 {self.index}, {self.width}x{self.height})")
+        return True
+
+    def warm_up(self):
+        """자동 노출이 안정될 때까지 프레임을 읽고 버림"""
+        start_time = time.time()
+        previous = None
+        frames = 0
+        while time.time() - start_time < WARMUP_TIMEOUT:
+            ret, frame = self.cap.read()
+            if not ret:
+                continue
+            frames += 1
+            brightness = float(np.mean(frame))
+            if (frames >= WARMUP_MIN_FRAMES and previous is not None
+                    and abs(brightness - previous) < WARMUP_BRIGHTNESS_TOLERANCE):
+                break
+            previous = brightness
+        print(f"카메라 노출 안정화 {time.time() - start_time:.2f}초 ({frames}프레임)")
+
+    def capture_loop(self):
+        """백그라운드: 계속 프레임을 읽어 최신 프레임만 보관 (버퍼에 오래된 프레임이 쌓이지 않음)"""
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self.condition:
+                self.frame = frame
+                self.seq += 1
+                self.condition.notify_all()
+
+    def read(self, timeout=1.0):
+        """
+        cv2.VideoCapture.read()와 같은 형식으로 이전에 넘겨준 것보다 새 프레임을 반환합니다.
+        (AGV가 움직이는 동안 찍힌 오래된 프레임을 다시 처리하지 않음)
+        반환된 프레임은 복사본이라 그 위에 그려도 됩니다.
+        :return: (성공 여부, 프레임)
+        """
+        if not self.running and not self.start():
+            return False, None
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > self.delivered, timeout=timeout)
+            if self.frame is None or self.seq <= self.delivered:
+                return False, None
+            self.delivered = self.seq
+            return True, self.frame.copy()
+
+    def latest(self):
+        """기다리지 않고 최신 프레임 복사본 반환 (없으면 None)"""
+        with self.condition:
+            return None if self.frame is None else self.frame.copy()
+
+    def isOpened(self):
+        return self.running
+
+    def stop(self):
+        """프로그램 종료 시 한 번만 호출"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        print("카메라 서비스 종료")
+
+
+# 모든 도킹/검출 함수가 같이 쓰는 카메라 (처음 read() 할 때 자동으로 열림)
+camera = CameraService()
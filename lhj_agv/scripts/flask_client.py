@@ -1,12 +1,26 @@
+import queue
 import requests
 import socketio
-from setting import server_url
 import threading
+import time
+from requests.adapters import HTTPAdapter
+from setting import server_url, socket_url, HTTP_TIMEOUT, OUTBOX_SIZE, OUTBOX_RETRIES, OUTBOX_RETRY_DELAY
 
-sio = socketio.Client()
+# 서버와의 HTTP 연결은 세션 하나로 재사용 (매 요청마다 TCP 연결을 새로 열지 않음)
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# socket.io 연결도 프로그램 동안 하나만 사용 (같은 세션으로 polling)
+sio = socketio.Client(http_session=session, reconnection=True)
 response_value = None  # 서버 응답 값을 저장하는 전역 변수
 signal_condition = threading.Condition()  # 동기화를 위한 조건 객체
 
+# 상태 전송 대기열 - 이동 중에 send_to_flask를 불러도 막히지 않고 백그라운드 스레드가 순서대로 전송
+outbox = queue.Queue(maxsize=OUTBOX_SIZE)
+outbox_thread = None
+outbox_lock = threading.Lock()
+
 @sio.on('connect')
 def on_connect():
     print("Connected to the server.")
@@ -38,9 +52,10 @@ def wait_for_signal(target_value, timeout=30):
             return True
         return False  # 타임아웃 발생
 
-def send_to_flask(agv_status):
+def post_status(agv_status):
     """
-    AGV 데이터를 Flask 서버로 전송
+    AGV 상태를 Flask 서버로 바로 전송 (막힘, 타임아웃 있음)
+    :return: True(전송 성공) / False
     """
     data_to_send = {
         "agv": {
@@ -48,21 +63,79 @@ def send_to_flask(agv_status):
         }
     }
     try:
-        response = requests.post(server_url, json=data_to_send)
+        response = session.post(server_url, json=data_to_send, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
             print(f"Response from server: {response.json()}")
-        else:
-            print(f"Error: Received status code {response.status_code}")
-    except requests.exceptions.RequestException as e:
+            return True
+        print(f"Error: Received status code {response.status_code}")
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error sending data to Flask: {e}")
+    return False
+
+def outbox_loop():
+    """백그라운드: 대기열의 상태를 순서대로 전송, 실패하면 잠시 후 다시 시도"""
+    while True:
+        agv_status = outbox.get()
+        try:
+            for attempt in range(OUTBOX_RETRIES + 1):
+                if post_status(agv_status):
+                    break
+                if attempt < OUTBOX_RETRIES:
+                    time.sleep(OUTBOX_RETRY_DELAY * (attempt + 1))
+            else:
+                print(f"Dropped status after {OUTBOX_RETRIES + 1} attempts: {agv_status}")
+        finally:
+            outbox.task_done()
+
+def start_outbox():
+    global outbox_thread
+    with outbox_lock:
+        if outbox_thread is None or not outbox_thread.is_alive():
+            outbox_thread = threading.Thread(target=outbox_loop, daemon=True)
+            outbox_thread.start()
+
+def send_to_flask(agv_status):
+    """
+    AGV 데이터를 Flask 서버로 전송 (대기열에 넣고 바로 반환 - 이동을 멈추지 않음)
+    대기열이 가득 차면 가장 오래된 상태를 버림
+    """
+    start_outbox()
+    while True:
+        try:
+            outbox.put_nowait(agv_status)
+            return
+        except queue.Full:
+            try:
+                dropped = outbox.get_nowait()
+                outbox.task_done()
+                print(f"Outbox full, dropped oldest status: {dropped}")
+            except queue.Empty:
+                pass
+
+def flush_outbox(timeout=5.0):
+    """
+    대기열이 빌 때까지 기다림 (종료 전)
+    :return: True(모두 처리) / False(타임아웃)
+    """
+    deadline = time.time() + timeout
+    with outbox.all_tasks_done:
+        while outbox.unfinished_tasks:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            outbox.all_tasks_done.wait(remaining)
+    return True
 
-def start_client():
+def start_client(url=None):
     """
-    WebSocket 클라이언트를 시작하여 데이터를 지속적으로 수신합니다.
+    WebSocket 클라이언트를 시작하여 데이터를 지속적으로 수신합니다. (이미 연결되어 있으면 그 연결을 사용)
     """
+    start_outbox()
+    if sio.connected:
+        return
     try:
-        print(f"Attempting to connect to {server_url}...")
-        sio.connect("http://172.30.1.71:5000")
+        print(f"Attempting to connect to {url or socket_url}...")
+        sio.connect(url or socket_url, wait_timeout=HTTP_TIMEOUT[0] + HTTP_TIMEOUT[1])
         sio.wait()
     except Exception as e:
         print(f"WebSocket error: {e}")
@@ -71,7 +144,9 @@ def start_client():
 
 def stop_client():
     """
-    WebSocket 클라이언트를 안전하게 종료합니다.
+    WebSocket 클라이언트를 안전하게 종료합니다. (남은 상태 전송을 잠시 기다림)
     """
+    if not flush_outbox():
+        print(f"Outbox not empty at shutdown ({outbox.qsize()} pending).")
     sio.disconnect()
     print("Stopping WebSocket client.")
@@ -0,0 +1,169 @@
+"""
+로컬 대체 서버 (flask_client 테스트용) - 실제 Flask 서버 없이 상태 전송/신호 수신을 확인
+- HTTP: POST /agv_data 를 기록하고 delay 초 뒤에 응답 (HTTP/1.1 keep-alive, 요청별 클라이언트 포트 기록)
+- socket.io: python-socketio가 있으면 별도 포트에서 'agv_response' 이벤트를 보냄
+
+실행하면 flask_client를 이 서버에 연결해서
+  1) 서버가 느려도 send_to_flask가 막히지 않는지
+  2) 상태가 순서대로 모두 도착하는지, TCP 연결을 재사용하는지
+  3) 서버가 꺼져 있어도 이동 쪽이 막히지 않는지 (타임아웃)
+  4) 하나의 socket.io 연결로 wait_for_signal이 동작하는지
+를 확인합니다.
+사용법: python3 flask_stub_server.py [--delay 1.0]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+
+class StubServer:
+    def __init__(self, delay=0.0, fail=0):
+        self.delay = delay
+        self.fail = fail            # 처음 fail개 요청은 500 응답
+        self.received = []          # (시각, 상태, 클라이언트 포트)
+        self.lock = threading.Lock()
+        self.http = None
+        self.sio = None
+        self.sio_server = None
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status = json.loads(body or b"{}").get("agv", {}).get("status")
+                time.sleep(stub.delay)
+                with stub.lock:
+                    failing = stub.fail > 0
+                    if failing:
+                        stub.fail -= 1
+                    else:
+                        stub.received.append((time.time(), status, self.client_address[1]))
+                payload = json.dumps({"ok": not failing}).encode()
+                self.send_response(500 if failing else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.http.server_address[1]}/agv_data"
+
+    def start_socketio(self):
+        """python-socketio가 없으면 None"""
+        try:
+            import socketio
+        except ImportError:
+            return None
+
+        class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.sio = socketio.Server(async_mode="threading")
+        self.sio_server = make_server("127.0.0.1", 0, socketio.WSGIApp(self.sio),
+                                      server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+        threading.Thread(target=self.sio_server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.sio_server.server_address[1]}"
+
+    def emit(self, response):
+        self.sio.emit("agv_response", {"response": response})
+
+    def stop(self):
+        if self.http is not None:
+            self.http.shutdown()
+            self.http.server_close()
+        if self.sio_server is not None:
+            self.sio_server.shutdown()
+
+
+def check(name, ok, detail=""):
+    print(f"[{'PASS' if ok else 'FAIL'}] {name} {detail}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="flask_client 로컬 대체 서버 테스트")
+    parser.add_argument("--delay", type=float, default=1.0, help="서버 응답 지연 (초)")
+    args = parser.parse_args()
+
+    import flask_client
+
+    stub = StubServer(delay=args.delay)
+    flask_client.server_url = stub.start()
+    results = []
+
+    # 1) 느린 서버 - 이동 중 호출이 막히지 않아야 함
+    statuses = [f"step {i}" for i in range(5)]
+    start = time.perf_counter()
+    for status in statuses:
+        flask_client.send_to_flask(status)
+    call_time = time.perf_counter() - start
+    results.append(check("send_to_flask 비동기", call_time < 0.05,
+                         f"(5회 호출 {call_time * 1000:.1f}ms, 서버 지연 {args.delay}초)"))
+
+    # 2) 순서대로 모두 도착 + 연결 재사용
+    flask_client.flush_outbox(timeout=len(statuses) * (args.delay + 1) + 5)
+    received = [status for _, status, _ in stub.received]
+    ports = {port for _, _, port in stub.received}
+    results.append(check("순서대로 전송", received == statuses, f"{received}"))
+    results.append(check("TCP 연결 재사용", len(ports) == 1, f"(클라이언트 포트 {len(ports)}개)"))
+
+    # 실패 후 다시 시도
+    stub.fail, stub.delay = 1, 0.0
+    flask_client.send_to_flask("retry")
+    flask_client.flush_outbox(timeout=10)
+    results.append(check("실패 후 재전송", stub.received[-1][1] == "retry"))
+
+    # 3) 서버가 응답하지 않거나 꺼져 있음 - 호출은 바로 반환, 직접 전송은 타임아웃 안에 실패
+    stub.delay = sum(flask_client.HTTP_TIMEOUT) + 2
+    start = time.perf_counter()
+    flask_client.send_to_flask("server hung")
+    results.append(check("서버 무응답 - send_to_flask", time.perf_counter() - start < 0.05))
+    start = time.perf_counter()
+    ok = flask_client.post_status("server hung (direct)")
+    elapsed = time.perf_counter() - start
+    results.append(check("서버 무응답 - post_status 타임아웃", not ok and elapsed < sum(flask_client.HTTP_TIMEOUT) + 1,
+                         f"({elapsed:.2f}초)"))
+    stub.stop()
+    down = StubServer()
+    flask_client.server_url = down.start()
+    down.stop()
+    start = time.perf_counter()
+    ok = flask_client.post_status("server down (direct)")
+    results.append(check("서버 꺼짐 - post_status", not ok, f"({time.perf_counter() - start:.2f}초)"))
+
+    # 4) socket.io 신호
+    socket_url = stub.start_socketio()
+    if socket_url is None:
+        print("[SKIP] socket.io 신호 (python-socketio 없음)")
+    else:
+        client_thread = threading.Thread(target=flask_client.start_client, args=(socket_url,), daemon=True)
+        client_thread.start()
+        for _ in range(50):
+            if flask_client.sio.connected:
+                break
+            time.sleep(0.1)
+        threading.Timer(0.2, stub.emit, args=("A",)).start()
+        results.append(check("socket.io wait_for_signal", flask_client.wait_for_signal("A", timeout=5)))
+        flask_client.sio.disconnect()
+        stub.sio_server.shutdown()
+
+    print(f"\n{sum(results)}/{len(results)} 통과")
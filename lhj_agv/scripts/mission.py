@@ -0,0 +1,287 @@
+"""
+미션 파일 실행기 - main.py의 동작 순서를 코드 대신 JSON 파일로 정의
+
+미션 파일 형식 (missions/hospital_delivery.json):
+{
+  "name": "...",
+  "sequences": {
+    "sequence1": [
+      {"action": "forward", "args": [3]},
+      {"id": "dock_2", "action": "dock", "label": "ID 2 도킹"},
+      {"action": "send_status", "args": ["식당 도착"], "parallel": true},
+      ...
+    ]
+  }
+}
+- 각 단계는 기본으로 바로 앞 단계(parallel이 아닌 단계)가 끝난 뒤 시작
+- "parallel": true  → 다음 단계가 이 단계를 기다리지 않음 (다음 단계와 동시에 진행)
+- "after": ["id", ...] → 이 단계들이 끝난 뒤 시작 (빈 목록이면 바로 시작)
+- "required": true → 실패(False 반환)하면 남은 단계를 건너뜀
+- "label": 결과 출력 ("ID 2 도킹 성공" / "ID 2 도킹 실패")
+- 같은 장치(AGV 바퀴/카메라/리프트)를 쓰는 단계가 동시에 실행될 수 있으면 불러올 때 오류 (안전)
+
+실행하면 단계별 실제 시작/끝/소요 시간, 여유 시간과 전체 시간을 결정한 임계 경로를 출력합니다.
+사용법: python3 mission.py missions/hospital_delivery.json sequence1 [--dry-run] [--scale 0.1] [--profile out.json]
+       (--dry-run: 로봇 없이 단계 시간만 흉내 내서 병렬/임계 경로 확인)
+"""
+import argparse
+import json
+import threading
+import time
+
+# 장치 - 같은 장치를 쓰는 단계는 순서가 정해져 있어야 함
+BASE, CAMERA, LIFT = "base", "camera", "lift"
+
+# 액션 이름 → 사용하는 장치
+ACTION_RESOURCES = {
+    "forward": {BASE},
+    "retreat": {BASE},
+    "rotate": {BASE},
+    "pan_left": {BASE},
+    "pan_right": {BASE},
+    "stop": {BASE},
+    "dock": {BASE, CAMERA},
+    "dock_distance": {BASE, CAMERA},
+    "lift": {LIFT, BASE},       # 리프트는 AGV가 멈춘 상태에서만
+    "camera_start": {CAMERA},
+    "send_status": set(),
+    "wait_signal": set(),
+    "sleep": set(),
+    "log": set(),
+}
+
+# --dry-run에서 시간 인자가 없는 액션의 예상 시간 (초)
+DRY_RUN_TIMES = {"dock": 6.0, "dock_distance": 4.0, "camera_start": 1.5, "stop": 0.05}
+
+
+class MissionError(Exception):
+    pass
+
+
+def robot_actions():
+    """실제 로봇 함수 (불러오면 AGV/카메라가 초기화되므로 필요할 때만)"""
+    from robot_action import detect_and_dock, forward, rotate, agv_stop, retreat, pan_left, pan_right, \
+        detect_and_dock_with_distance
+    from flask_client import wait_for_signal, send_to_flask
+    from agv_lift import lift
+    from camera_service import camera
+
+    return {
+        "forward": forward,
+        "retreat": retreat,
+        "rotate": rotate,
+        "pan_left": pan_left,
+        "pan_right": pan_right,
+        "stop": agv_stop,
+        "dock": detect_and_dock,
+        "dock_distance": detect_and_dock_with_distance,
+        "lift": lift,
+        "camera_start": camera.start,
+        "send_status": send_to_flask,
+        "wait_signal": wait_for_signal,
+        "sleep": time.sleep,
+        "log": print,
+    }
+
+
+def dry_run_actions(scale=1.0):
+    """로봇 없이 시간만 흉내 (이동/리프트는 시간 인자, 도킹 등은 DRY_RUN_TIMES)"""
+    def make(name):
+        def action(*args, **kwargs):
+            if name in DRY_RUN_TIMES:
+                seconds = DRY_RUN_TIMES[name]
+            elif name in ("sleep", "forward", "retreat", "pan_left", "pan_right"):
+                seconds = args[0] if args else kwargs.get("duration", 0)
+            elif name in ("rotate", "lift"):
+                seconds = args[1] if len(args) > 1 else kwargs.get("duration", 0)
+            else:
+                seconds = 0
+            time.sleep(seconds * scale)
+            return True
+        return action
+    return {name: make(name) for name in ACTION_RESOURCES}
+
+
+class Step:
+    def __init__(self, index, spec):
+        self.index = index
+        self.action = spec["action"]
+        self.id = spec.get("id", f"{index + 1:02d}_{self.action}")
+        self.args = spec.get("args", [])
+        self.kwargs = spec.get("kwargs", {})
+        self.parallel = spec.get("parallel", False)
+        self.required = spec.get("required", False)
+        self.label = spec.get("label")
+        self.after = spec.get("after")
+        self.resources = ACTION_RESOURCES.get(self.action)
+        # 실행 결과
+        self.start = None
+        self.end = None
+        self.result = None
+        self.skipped = False
+        self.done = threading.Event()
+
+    @property
+    def duration(self):
+        return 0.0 if self.start is None else self.end - self.start
+
+    def describe(self):
+        args = ", ".join([repr(a) for a in self.args] + [f"{k}={v!r}" for k, v in self.kwargs.items()])
+        return f"{self.action}({args})"
+
+
+def load_mission(path, sequence):
+    """미션 파일 → 검사된 단계 목록"""
+    with open(path, "r", encoding="utf-8") as f:
+        mission = json.load(f)
+    if sequence not in mission.get("sequences", {}):
+        raise MissionError(f"{path}에 '{sequence}' 시퀀스가 없습니다 ({', '.join(mission.get('sequences', {}))})")
+    steps = [Step(i, spec) for i, spec in enumerate(mission["sequences"][sequence])]
+
+    ids = {}
+    previous = None
+    for step in steps:
+        if step.resources is None:
+            raise MissionError(f"{step.id}: 알 수 없는 액션 '{step.action}'")
+        if step.id in ids:
+            raise MissionError(f"{step.id}: 같은 id가 두 번 있습니다")
+        if step.after is None:
+            step.after = [] if previous is None else [previous.id]
+        for dependency in step.after:
+            if dependency not in ids:
+                raise MissionError(f"{step.id}: after '{dependency}'는 앞에 정의된 단계가 아닙니다")
+        ids[step.id] = step
+        if not step.parallel:
+            previous = step
+
+    # 같은 장치를 쓰는 두 단계는 한쪽이 다른 쪽의 선행 단계여야 함 (동시에 실행될 수 없음)
+    ancestors = {}
+    for step in steps:
+        ancestors[step.id] = set(step.after)
+        for dependency in step.after:
+            ancestors[step.id] |= ancestors[dependency]
+    for i, step in enumerate(steps):
+        for other in steps[:i]:
+            shared = step.resources & other.resources
+            if shared and other.id not in ancestors[step.id]:
+                raise MissionError(f"{other.id}와 {step.id}가 동시에 {', '.join(sorted(shared))}을(를) "
+                                   f"사용할 수 있습니다 (after로 순서를 지정하세요)")
+    return steps
+
+
+def run_steps(steps, actions):
+    """의존 관계대로 단계 실행 (준비된 단계는 동시에) - 단계별 시각 기록"""
+    by_id = {step.id: step for step in steps}
+    abort = threading.Event()
+    origin = time.time()
+
+    def run(step):
+        for dependency in step.after:
+            by_id[dependency].done.wait()
+        if abort.is_set() or any(by_id[d].skipped for d in step.after):
+            step.skipped = True
+            step.done.set()
+            return
+        step.start = time.time() - origin
+        try:
+            step.result = actions[step.action](*step.args, **step.kwargs)
+        except Exception as e:
+            print(f"[미션] {step.id} 오류: {e}")
+            step.result = False
+        step.end = time.time() - origin
+        if step.label is not None:
+            print(f"{step.label} {'성공' if step.result else '실패'}")
+        if step.required and step.result is False:
+            print(f"[미션] 필수 단계 {step.id} 실패 - 남은 단계 건너뜀")
+            abort.set()
+        step.done.set()
+
+    threads = [threading.Thread(target=run, args=(step,), daemon=True) for step in steps]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - origin
+
+
+def critical_path(steps):
+    """
+    실제 시간 기준 임계 경로 - 가장 늦게 끝난 단계에서 시작해서, 가장 늦게 끝난 선행 단계를 따라 거슬러 올라감
+    :return: 단계 목록 (처음 → 끝)
+    """
+    by_id = {step.id: step for step in steps}
+    finished = [step for step in steps if step.start is not None]
+    if not finished:
+        return []
+    step = max(finished, key=lambda s: s.end)
+    path = [step]
+    while step.after:
+        candidates = [by_id[d] for d in step.after if by_id[d].start is not None]
+        if not candidates:
+            break
+        step = max(candidates, key=lambda s: s.end)
+        path.append(step)
+    return path[::-1]
+
+
+def report(steps, total, profile_path=None):
+    path = critical_path(steps)
+    on_path = {step.id for step in path}
+    # 여유 시간: 이 단계가 늦어져도 뒤 단계 시작이 늦어지지 않는 시간
+    successors = {step.id: [] for step in steps}
+    for step in steps:
+        for dependency in step.after:
+            successors[dependency].append(step)
+    print(f"\n{'단계':<22}{'액션':<34}{'시작':>7}{'끝':>7}{'소요':>7}{'여유':>7}")
+    for step in steps:
+        if step.start is None:
+            print(f"{step.id:<22}{step.describe():<34}{'건너뜀':>7}")
+            continue
+        starts = [s.start for s in successors[step.id] if s.start is not None]
+        slack = (min(starts) if starts else total) - step.end
+        mark = " *" if step.id in on_path else ""
+        print(f"{step.id:<22}{step.describe():<34}{step.start:7.2f}{step.end:7.2f}{step.duration:7.2f}"
+              f"{max(0.0, slack):7.2f}{mark}")
+    serial = sum(step.duration for step in steps)
+    print(f"\n전체 {total:.2f}초 (단계 시간 합 {serial:.2f}초, 병렬로 {max(0.0, serial - total):.2f}초 절약)")
+    print(f"임계 경로 ({sum(s.duration for s in path):.2f}초, * 표시): " + " → ".join(s.id for s in path))
+    longest = sorted(path, key=lambda s: s.duration, reverse=True)[:3]
+    print("줄이면 효과가 큰 단계: " + ", ".join(f"{s.id} {s.duration:.2f}초" for s in longest))
+    if profile_path:
+        profile = {
+            "total": total,
+            "critical_path": [s.id for s in path],
+            "steps": [{"id": s.id, "action": s.describe(), "start": s.start, "end": s.end,
+                       "duration": s.duration if s.start is not None else None, "result": s.result,
+                       "skipped": s.skipped, "after": s.after} for s in steps],
+        }
+        with open(profile_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2, default=str)
+        print(f"프로파일 저장: {profile_path}")
+
+
+def run_mission(path, sequence, actions=None, profile_path=None):
+    """
+    미션 파일의 시퀀스 실행 + 시간 프로파일 출력
+    :return: 모든 필수 단계가 성공했으면 True
+    """
+    steps = load_mission(path, sequence)
+    if actions is None:
+        actions = robot_actions()
+    print(f"Starting {sequence} ({len(steps)} steps) from {path}...")
+    total = run_steps(steps, actions)
+    report(steps, total, profile_path)
+    return not any(step.skipped for step in steps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="미션 파일 실행 / 시간 프로파일")
+    parser.add_argument("mission", help="미션 파일 (JSON)")
+    parser.add_argument("sequence", help="실행할 시퀀스 이름")
+    parser.add_argument("--dry-run", action="store_true", help="로봇 없이 단계 시간만 흉내")
+    parser.add_argument("--scale", type=float, default=1.0, help="--dry-run 시간 배율")
+    parser.add_argument("--profile", help="단계별 시간을 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    actions = dry_run_actions(args.scale) if args.dry_run else None
+    run_mission(args.mission, args.sequence, actions, args.profile)
@@ -1,11 +1,20 @@
 import cv2
 import cv2.aruco as aruco
 import numpy as np
+import os
+import sys
 import time
 from pymycobot.myagv import MyAgv
+from camera_service import camera
+
+# 공용 이동 인터페이스/도킹 제어기 (저장소 최상위 robot_hal - demo_driving과 같은 코드)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from robot_hal.docking import DockingController, MarkerObserver
+from robot_hal.myagv import MyAgvBackend
 
 # AGV 초기화
 agv = MyAgv("/dev/ttyAMA2", 115200)
+hal = MyAgvBackend(agv)
 
 # ArUco 설정
 ARUCO_DICT = aruco.getPredefinedDictionary(aruco.DICT_6X6_250)
@@ -22,6 +31,11 @@ CENTER_THRESHOLD_PIXELS = 10  # X축 정렬을 위한 픽셀 허용 오차
 ANGLE_THRESHOLD_DEGREES = 1  # 각도 정렬 허용 오차 (도 단위)
 BRIGHTNESS_THRESHOLD = 1  # 도킹 완료를 판단할 밝기 임계값 (0~255)
 APPROACH_STEP = 0.5  # AGV 전진 단계 크기 (미터)
+MARKER_LENGTH = 0.05  # 마커 한 변 길이 (미터)
+
+# 연속 도킹 제어기 (robot_hal.docking) - 멈춤-이동 대신 움직이면서 계속 보정
+docking_controller = DockingController(
+    hal, MarkerObserver(camera, camera_matrix, dist_coeffs, ARUCO_DICT, ARUCO_PARAMETERS, MARKER_LENGTH, show=True))
 
 def forward(duration, speed=20):
     """AGV 전진"""
@@ -119,85 +133,20 @@ def approach_marker(z_distance):
 def detect_and_dock():
     """
     ArUco 마커를 탐지하고, 정렬 및 도킹을 수행합니다.
+    관측(카메라 속도)과 속도 명령(CONTROL_HZ)을 따로 돌리는 연속 제어 - 화면이 어두워지면 도킹 완료
     """
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("카메라를 열 수 없습니다. 연결 상태를 확인하세요.")
-        return
-
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    # 프로그램 동안 열어 둔 공용 카메라 사용 (매번 열기/노출 안정화 없음)
+    if not camera.start():
+        return False
 
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("카메라에서 프레임을 가져오지 못했습니다.")
-                break
-
-            # 현재 프레임 밝기 계산
-            brightness = calculate_brightness(frame)
-            print(f"현재 프레임 밝기: {brightness:.2f}")
-
-            # 밝기가 임계값 이하라면 도킹 완료
-            if brightness < BRIGHTNESS_THRESHOLD:
-                print("화면이 어두워졌습니다. 도킹 완료.")
-                agv.stop()
-                break
-
-            # 화면 중심 계산
-            frame_height, frame_width = frame.shape[:2]
-            frame_center = (frame_width // 2, frame_height // 2)
-
-            # 그레이스케일로 변환하고 ArUco 마커 탐지
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            corners, ids, _ = aruco.detectMarkers(gray, ARUCO_DICT, parameters=ARUCO_PARAMETERS)
-
-            if ids is not None:
-                aruco.drawDetectedMarkers(frame, corners, ids)
-
-                # 탐지된 모든 마커의 정보를 수집
-                detected_markers = [{'id': ids[i][0], 'corners': corners[i][0]} for i in range(len(ids))]
-
-                # 가장 가까운 마커 탐지
-                closest_marker = detected_markers[0]
-                marker_center, marker_angle = calculate_marker_properties(frame, closest_marker['corners'])
-                rvec, tvec, _ = aruco.estimatePoseSingleMarkers([closest_marker['corners']], 0.05, camera_matrix, dist_coeffs)
-                z_distance = tvec[0, 0, 2]  # Z축 거리 (미터 단위)
-
-                cv2.circle(frame, marker_center, 5, (0, 255, 0), -1)  # 마커 중심 (녹색)
-                print(f"마커 중심: {marker_center}, 화면 중심: {frame_center}")
-                print(f"마커 각도: {marker_angle:.2f}°, Z 거리: {z_distance:.2f}m")
-
-                # 마커에 정렬
-                align_to_marker(marker_center, frame_center, marker_angle)
-
-                # 마커로 접근
-                approach_marker(z_distance)
-
-            else:
-                print("마커를 찾는 중...")
-                cv2.putText(
-                    frame, "Searching for marker...", (20, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2
-                )
-                #miss detecting
-                print("little forward")
-                agv.go_ahead(10, APPROACH_STEP)
-
-            # 프레임 디스플레이
-            cv2.imshow("ArUco Detection", frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):  # 'q'를 눌러 종료
-                agv.stop()
-                break
-
+        return docking_controller.dock(stop_distance=0.0, brightness_threshold=BRIGHTNESS_THRESHOLD)
     finally:
-        cap.release()
+        # 카메라는 닫지 않음 (다음 도킹에서 바로 사용)
+        agv.stop()
         cv2.destroyAllWindows()
 
 
-
-
 def detect_and_dock_with_distance(stop_distance=0.8):
     """
     ArUco 마커를 탐지하고, 설정된 거리에서 멈추도록 정렬 및 도킹을 수행합니다.
@@ -205,68 +154,13 @@ def detect_and_dock_with_distance(stop_distance=0.8):
     Args:
         stop_distance (float): AGV가 멈출 Z축 거리 (미터 단위)
     """
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("카메라를 열 수 없습니다. 연결 상태를 확인하세요.")
+    # 프로그램 동안 열어 둔 공용 카메라 사용 (매번 열기/노출 안정화 없음)
+    if not camera.start():
         return False
 
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("카메라에서 프레임을 가져오지 못했습니다.")
-                break
-
-            # 화면 중심 계산
-            frame_height, frame_width = frame.shape[:2]
-            frame_center = (frame_width // 2, frame_height // 2)
-
-            # 그레이스케일로 변환 및 ArUco 마커 탐지
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            corners, ids, _ = aruco.detectMarkers(gray, ARUCO_DICT, parameters=ARUCO_PARAMETERS)
-
-            if ids is not None:
-                aruco.drawDetectedMarkers(frame, corners, ids)
-                detected_markers = [{'id': ids[i][0], 'corners': corners[i][0]} for i in range(len(ids))]
-
-                # 가장 가까운 마커 탐지
-                closest_marker = detected_markers[0]
-                rvec, tvec, _ = aruco.estimatePoseSingleMarkers([closest_marker['corners']], 0.05, camera_matrix, dist_coeffs)
-                z_distance = tvec[0, 0, 2]  # Z축 거리 (미터 단위)
-
-                print(f"마커 Z 거리: {z_distance:.2f}m")
-
-                # ArUco 마커가 설정된 거리 이내에 있을 경우 AGV 정지
-                if z_distance <= stop_distance:
-                    print(f"목표 거리 {stop_distance:.2f}m에 도달했습니다. 도킹 중지.")
-                    agv.stop()
-                    return True
-
-                # 마커 중심 정렬 및 접근
-                marker_center, marker_angle = calculate_marker_properties(frame, closest_marker['corners'])
-                align_to_marker(marker_center, frame_center, marker_angle)
-                approach_marker(z_distance)
-
-            else:
-                print("마커를 찾는 중...")
-                cv2.putText(frame, "Searching for marker...", (20, 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-
-                # 탐지 실패 시 약간 전진
-                agv.go_ahead(10, 0.1)
-
-            # 프레임 디스플레이
-            cv2.imshow("ArUco Detection", frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):  # 'q'를 눌러 종료
-                agv.stop()
-                break
-
+        return docking_controller.dock(stop_distance=stop_distance)
     finally:
-        cap.release()
+        # 카메라는 닫지 않음 (다음 도킹에서 바로 사용)
+        agv.stop()
         cv2.destroyAllWindows()
-
-    return False
-
@@ -1,8 +1,27 @@
 
 # Server Configuration
 server_url = "http://172.30.1.71:5000/agv_data"
+socket_url = "http://172.30.1.71:5000"
+
+# Server Link (flask_client.py)
+HTTP_TIMEOUT = (2, 5)       # (연결, 응답) 타임아웃 초
+OUTBOX_SIZE = 32            # 보내지 못한 상태를 쌓아 두는 최대 개수
+OUTBOX_RETRIES = 2          # 전송 실패 시 다시 시도하는 횟수
+OUTBOX_RETRY_DELAY = 1.0    # 다시 시도 간격 (초, 시도마다 늘어남)
 
 # GPIO Pin Configuration
 GPIO_DIR_PIN = 11
 GPIO_STEP_PIN = 7
 
+# Lift Calibration (stepper_lift.py)
+# 기존 lift(direction, 초) 루프(1ms HIGH + 1ms LOW)가 실제로 낸 스텝 속도 - sleep 오차 때문에 500보다 느림
+# 측정: python3 stepper_lift.py --measure-legacy 2.5 (개발 PC 2.5초 1150스텝 ≈ 460/s, Pi는 더 느림 → 보수적으로)
+LIFT_LEGACY_STEP_RATE = 440
+# 가장 낮은 위치에서 올라갈 수 있는 최대 스텝 수 (리밋 스위치 대신 소프트 한계) - 기존 2.5초 이동량
+LIFT_TRAVEL_STEPS = 1100
+
+
+# Camera Configuration (camera_service.py)
+CAMERA_INDEX = 0
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
@@ -0,0 +1,78 @@
+"""
+MyAgv 도킹 비교 (시뮬레이터)
+- 시뮬레이터/관측기는 robot_hal.simulator (SimulatedMyAgv: MyAgv와 같은 이동 함수, SimulatedMarkerObserver)
+- 도킹 제어기는 robot_hal.docking.DockingController를 MyAgvBackend로 실행 (robot_action과 같은 경로)
+
+실행하면 기존 멈춤-이동 방식(robot_action의 align_to_marker + approach_marker)과
+연속 도킹 제어기의 도킹 시간을 같은 시작 위치에서 비교한다.
+다른 백엔드(STM32 등)와의 비교: 저장소 최상위에서 python3 -m robot_hal.benchmark
+사용법: python3 sim_agv.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from robot_hal.docking import DockingController, pose_to_observation
+from robot_hal.myagv import MyAgvBackend
+from robot_hal.simulator import CAMERA_MATRIX, SimulatedMarkerObserver, SimulatedMyAgv, marker_pose
+
+
+def legacy_dock_with_distance(agv, observer, stop_distance, timeout=60.0):
+    """기존 robot_action.detect_and_dock_with_distance의 멈춤-이동 방식 (비교용)"""
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        ok, observation = observer.observe()
+        if observation.distance is None:
+            agv.go_ahead(10, 0.1)
+            continue
+        if observation.distance <= stop_distance:
+            agv.stop()
+            return True
+        # 마커 중심 픽셀 → align_to_marker (회전) + approach_marker (0.5초 전진)
+        x_diff_pixels = CAMERA_MATRIX[0, 0] * np.tan(observation.bearing)
+        if abs(x_diff_pixels) > 10:
+            if x_diff_pixels > 0:
+                agv.clockwise_rotation(40, abs(x_diff_pixels) / 500)
+            else:
+                agv.counterclockwise_rotation(40, abs(x_diff_pixels) / 500)
+        agv.go_ahead(10, 0.5)
+        # 움직이는 동안 찍힌 프레임은 건너뜀 (공용 카메라의 read()와 같음)
+        observer.next_frame = time.time()
+    return False
+
+
+def run_scenario(name, start, stop_distance, continuous):
+    agv = SimulatedMyAgv(*start)
+    observer = SimulatedMarkerObserver(agv)
+    backend = MyAgvBackend(agv)
+    start_time = time.time()
+    if continuous:
+        result = DockingController(backend, observer).dock(stop_distance=stop_distance, timeout=30.0)
+    else:
+        result = legacy_dock_with_distance(agv, observer, stop_distance, timeout=30.0)
+    elapsed = time.time() - start_time
+    time.sleep(0.3)     # 정지할 때까지
+    rvec, tvec = marker_pose(agv.pose)
+    final = pose_to_observation(rvec, tvec)
+    backend.close()
+    agv.close()
+    method = "연속 제어" if continuous else "기존 방식"
+    print(f"[{name}] {method}: {'성공' if result else '실패'} {elapsed:.2f}초 | 거리 {final.distance:.3f}m "
+          f"(목표 {stop_distance}), 좌우 {final.lateral * 100:+.1f}cm, 방향 {np.degrees(final.bearing):+.1f}°")
+    return elapsed
+
+
+if __name__ == "__main__":
+    # (이름, (x, y, theta), 목표 거리)
+    scenarios = [
+        ("정면 1m", (0.0, 1.0, -np.pi / 2), 0.3),
+        ("옆 10cm", (0.10, 1.0, -np.pi / 2), 0.3),
+        ("비스듬히", (-0.15, 0.9, -np.pi / 2 + np.radians(12)), 0.5),
+    ]
+    for name, start, stop_distance in scenarios:
+        legacy = run_scenario(name, start, stop_distance, continuous=False)
+        continuous = run_scenario(name, start, stop_distance, continuous=True)
+        print(f"[{name}] 도킹 시간 {legacy:.2f}초 → {continuous:.2f}초 ({(1 - continuous / legacy) * 100:.0f}% 단축)\n")
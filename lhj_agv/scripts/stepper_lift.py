@@ -0,0 +1,361 @@
+"""
+리프트 스텝 모터 드라이버 (DIR/STEP 드라이버)
+- 이동량은 시간 대신 스텝 수로 지정, 가속/감속 구간(사다리꼴 속도)을 포함한 스텝 간격을 미리 계산
+- pigpio 백엔드: 스텝 펄스를 pigpio 데몬이 DMA로 만듦 (wave + wave_chain) → 파이썬 루프/스케줄러 지연 없음,
+  기다리는 동안 CPU를 쓰지 않음 (sudo pigpiod 필요)
+- RPi.GPIO 백엔드: pigpio가 없을 때 같은 속도 계획을 소프트웨어 타이밍으로 실행 (기존 방식)
+- 시뮬레이션 백엔드: GPIO 없이 펄스 시각/위치만 기록 (테스트용)
+
+사용법: python3 stepper_lift.py [--backend sim|pigpio|rpi] [--steps 1100] [--direction UP]
+       python3 stepper_lift.py --measure-legacy 2.5   (기존 시간 루프의 실제 스텝 수 측정 - 핀은 건드리지 않음)
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from setting import GPIO_DIR_PIN, GPIO_STEP_PIN, LIFT_LEGACY_STEP_RATE, LIFT_TRAVEL_STEPS
+
+# 속도 계획 (스텝/초) - 모터/부하에 맞게 조정
+START_STEP_RATE = 400       # 정지 상태에서 바로 낼 수 있는 속도
+MAX_STEP_RATE = 1500        # 최고 속도
+ACCELERATION = 4000         # 스텝/초^2
+PULSE_WIDTH_US = 10         # STEP HIGH 시간 (드라이버 최소 펄스 폭 이상)
+DIR_SETUP_US = 50           # 방향 바꾼 뒤 첫 펄스까지 대기
+
+# 기존 lift(direction, duration) 호출 → 스텝 수
+# 기존 루프는 1ms HIGH + 1ms LOW(이론상 500스텝/초)지만 sleep 오차로 더 느렸음 → 실측값 (setting.py)
+LEGACY_STEP_RATE = LIFT_LEGACY_STEP_RATE
+
+# pigpio wave_chain 반복 횟수 한도 (loop 카운트는 16비트)
+MAX_CHAIN_REPEAT = 65535
+MIN_CHAIN_RUN = 64          # 같은 간격이 이만큼 이어지면 1스텝 wave를 반복 (짧으면 가감속 wave에 포함)
+
+
+def step_intervals(steps, max_rate=MAX_STEP_RATE, start_rate=START_STEP_RATE, acceleration=ACCELERATION):
+    """
+    스텝 수 → 각 스텝의 간격(마이크로초) 배열 (가속 → 등속 → 감속, 짧으면 삼각형)
+    v(n) = sqrt(start^2 + 2 * a * n)
+    """
+    if steps <= 0:
+        return np.zeros(0, np.int64)
+    start_rate = min(start_rate, max_rate)
+    ramp_steps = int((max_rate ** 2 - start_rate ** 2) / (2 * acceleration))
+    ramp_steps = min(ramp_steps, steps // 2)
+    n = np.arange(ramp_steps)
+    ramp = np.minimum(np.sqrt(start_rate ** 2 + 2 * acceleration * n), max_rate)
+    cruise_rate = min(np.sqrt(start_rate ** 2 + 2 * acceleration * ramp_steps), max_rate)
+    cruise = np.full(steps - 2 * ramp_steps, cruise_rate)
+    rates = np.concatenate([ramp, cruise, ramp[::-1]])
+    return np.round(1e6 / rates).astype(np.int64)
+
+
+def run_length(intervals):
+    """간격 배열 → [(간격, 반복 수), ...] (등속 구간을 한 덩어리로)"""
+    runs = []
+    for interval in intervals:
+        interval = int(interval)
+        if runs and runs[-1][0] == interval:
+            runs[-1][1] += 1
+        else:
+            runs.append([interval, 1])
+    return [tuple(run) for run in runs]
+
+
+class SimulatedBackend:
+    """GPIO 없이 펄스만 기록 - realtime=True면 실제 시간만큼 기다림"""
+    name = "sim"
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.direction = None
+        self.pulses = []            # 마지막 이동의 펄스 시각 (초, 이동 시작 기준)
+        self.busy_until = 0.0
+
+    def set_direction(self, up):
+        self.direction = up
+
+    def start(self, intervals):
+        self.pulses = list(np.cumsum(intervals) / 1e6 - intervals[0] / 1e6) if len(intervals) else []
+        duration = float(np.sum(intervals)) / 1e6
+        self.busy_until = time.time() + (duration if self.realtime else 0.0)
+
+    def busy(self):
+        return time.time() < self.busy_until
+
+    def stop(self):
+        self.busy_until = 0.0
+
+    def close(self):
+        pass
+
+
+class PigpioBackend:
+    """pigpio 데몬이 DMA로 펄스 생성 (파이썬은 wave만 만들고 끝날 때까지 잠자며 기다림)"""
+    name = "pigpio"
+
+    def __init__(self, dir_pin=GPIO_DIR_PIN, step_pin=GPIO_STEP_PIN):
+        import pigpio
+
+        self.pigpio = pigpio
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpio 데몬에 연결할 수 없습니다 (sudo pigpiod)")
+        self.dir_pin = dir_pin
+        self.step_pin = step_pin
+        self.pi.set_mode(dir_pin, pigpio.OUTPUT)
+        self.pi.set_mode(step_pin, pigpio.OUTPUT)
+        self.pi.write(step_pin, 0)
+        self.waves = []
+
+    def set_direction(self, up):
+        self.pi.write(self.dir_pin, 1 if up else 0)
+        time.sleep(DIR_SETUP_US / 1e6)
+
+    def make_wave(self, interval, count=1):
+        """같은 간격 펄스 count개짜리 wave"""
+        mask = 1 << self.step_pin
+        pulses = []
+        for _ in range(count):
+            pulses.append(self.pigpio.pulse(mask, 0, PULSE_WIDTH_US))
+            pulses.append(self.pigpio.pulse(0, mask, interval - PULSE_WIDTH_US))
+        self.pi.wave_add_generic(pulses)
+        wave_id = self.pi.wave_create()
+        self.waves.append(wave_id)
+        return wave_id
+
+    def start(self, intervals):
+        """
+        가속/감속 구간은 간격이 계속 바뀌므로 스텝마다 펄스, 등속 구간은 1스텝 wave를 wave_chain 반복
+        """
+        self.clear()
+        chain = []
+        ramp = []
+        for interval, count in run_length(intervals):
+            if count < MIN_CHAIN_RUN:
+                ramp.extend([interval] * count)
+                continue
+            if ramp:
+                chain += self.chain_ramp(ramp)
+                ramp = []
+            wave_id = self.make_wave(interval)
+            while count > 0:
+                repeat = min(count, MAX_CHAIN_REPEAT)
+                # 255 0 = loop 시작, 255 1 x y = x + 256*y 번 반복
+                chain += [255, 0, wave_id, 255, 1, repeat & 0xFF, repeat >> 8]
+                count -= repeat
+        if ramp:
+            chain += self.chain_ramp(ramp)
+        self.pi.wave_chain(chain)
+
+    def chain_ramp(self, intervals):
+        # wave 하나에 넣을 수 있는 펄스 수가 제한되어 있어서 나눠서 만듦
+        chunk = max(1, self.pi.wave_get_max_pulses() // 4)
+        chain = []
+        for i in range(0, len(intervals), chunk):
+            mask = 1 << self.step_pin
+            pulses = []
+            for interval in intervals[i:i + chunk]:
+                pulses.append(self.pigpio.pulse(mask, 0, PULSE_WIDTH_US))
+                pulses.append(self.pigpio.pulse(0, mask, interval - PULSE_WIDTH_US))
+            self.pi.wave_add_generic(pulses)
+            wave_id = self.pi.wave_create()
+            self.waves.append(wave_id)
+            chain.append(wave_id)
+        return chain
+
+    def busy(self):
+        return bool(self.pi.wave_tx_busy())
+
+    def stop(self):
+        self.pi.wave_tx_stop()
+        self.pi.write(self.step_pin, 0)
+
+    def clear(self):
+        for wave_id in self.waves:
+            self.pi.wave_delete(wave_id)
+        self.waves = []
+
+    def close(self):
+        self.stop()
+        self.clear()
+        self.pi.stop()
+
+
+class RPiGpioBackend:
+    """pigpio가 없을 때 - 같은 속도 계획을 별도 스레드에서 소프트웨어 타이밍으로 (지터 있음)"""
+    name = "rpi"
+
+    def __init__(self, dir_pin=GPIO_DIR_PIN, step_pin=GPIO_STEP_PIN):
+        import RPi.GPIO as GPIO
+
+        self.GPIO = GPIO
+        self.dir_pin = dir_pin
+        self.step_pin = step_pin
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(dir_pin, GPIO.OUT)
+        GPIO.setup(step_pin, GPIO.OUT)
+        self.thread = None
+        self.cancel = threading.Event()
+
+    def set_direction(self, up):
+        self.GPIO.output(self.dir_pin, self.GPIO.HIGH if up else self.GPIO.LOW)
+        time.sleep(DIR_SETUP_US / 1e6)
+
+    def run(self, intervals):
+        # 다음 펄스 시각을 절대 시간으로 맞춤 (sleep 오차가 누적되지 않음)
+        next_time = time.perf_counter()
+        for interval in intervals:
+            if self.cancel.is_set():
+                break
+            self.GPIO.output(self.step_pin, self.GPIO.HIGH)
+            time.sleep(PULSE_WIDTH_US / 1e6)
+            self.GPIO.output(self.step_pin, self.GPIO.LOW)
+            next_time += interval / 1e6
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def start(self, intervals):
+        self.cancel.clear()
+        self.thread = threading.Thread(target=self.run, args=(intervals,), daemon=True)
+        self.thread.start()
+
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        self.cancel.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def close(self):
+        self.stop()
+        self.GPIO.cleanup((self.dir_pin, self.step_pin))
+
+
+def create_backend(name=None, dir_pin=GPIO_DIR_PIN, step_pin=GPIO_STEP_PIN):
+    """name이 없으면 pigpio → RPi.GPIO → 시뮬레이션 순서로 사용 가능한 것"""
+    if name == "sim":
+        return SimulatedBackend()
+    if name in (None, "pigpio"):
+        try:
+            return PigpioBackend(dir_pin, step_pin)
+        except (ImportError, RuntimeError, OSError) as e:
+            if name == "pigpio":
+                raise
+            print(f"pigpio 사용 불가 ({e}), RPi.GPIO 소프트웨어 타이밍 사용")
+    if name in (None, "rpi"):
+        try:
+            return RPiGpioBackend(dir_pin, step_pin)
+        except (ImportError, RuntimeError) as e:
+            if name == "rpi":
+                raise
+            print(f"RPi.GPIO 사용 불가 ({e}), 시뮬레이션 백엔드 사용")
+    return SimulatedBackend()
+
+
+def measure_legacy_steps(duration, pulse=None):
+    """
+    기존 lift 루프(time.time() 기준 1ms HIGH + 1ms LOW)를 그대로 돌려서 duration초 동안 낸 스텝 수
+    pulse: 스텝마다 부를 함수 (없으면 타이밍만 - 리프트는 움직이지 않음)
+    """
+    steps = 0
+    start_time = time.time()
+    while time.time() - start_time < duration:
+        if pulse is not None:
+            pulse()
+        time.sleep(0.001)
+        time.sleep(0.001)
+        steps += 1
+    return steps
+
+
+class StepperLift:
+    def __init__(self, backend=None, max_rate=MAX_STEP_RATE, start_rate=START_STEP_RATE, acceleration=ACCELERATION,
+                 travel_steps=LIFT_TRAVEL_STEPS):
+        self.backend = backend or create_backend()
+        self.max_rate = max_rate
+        self.start_rate = start_rate
+        self.acceleration = acceleration
+        self.travel_steps = travel_steps    # 가장 낮은 위치 기준 UP 한계 (None이면 제한 없음)
+        self.position = 0           # 스텝 (UP +, 시작 위치 기준)
+        self.bottom = 0             # 지금까지 가장 낮았던 위치 (리밋 스위치가 없어서 소프트 한계 기준)
+        self.lock = threading.Lock()
+
+    def move(self, direction, steps, wait=True):
+        """
+        스텝 수만큼 이동 (wait=False면 펄스 생성만 시작하고 바로 반환 → wait_done())
+        :return: 예상 이동 시간 (초)
+        """
+        up = direction == "UP"
+        steps = int(steps)
+        with self.lock:
+            self.wait_done()
+            if up and self.travel_steps is not None:
+                limit = self.bottom + self.travel_steps - self.position
+                if steps > limit:
+                    print(f"Lifting UP {steps} steps → {max(limit, 0)} steps (소프트 한계 {self.travel_steps}스텝)")
+                    steps = max(limit, 0)
+            intervals = step_intervals(steps, self.max_rate, self.start_rate, self.acceleration)
+            duration = float(intervals.sum()) / 1e6
+            self.backend.set_direction(up)
+            self.backend.start(intervals)
+            self.position += len(intervals) if up else -len(intervals)
+            self.bottom = min(self.bottom, self.position)
+        print(f"Lifting {direction} {len(intervals)} steps ({duration:.2f}s, {self.backend.name})...")
+        if wait:
+            self.wait_done()
+            print(f"Lifting {direction} completed.")
+        return duration
+
+    def wait_done(self, poll=0.01):
+        # 펄스는 백엔드가 만들고 여기서는 잠자며 확인만 함
+        while self.backend.busy():
+            time.sleep(poll)
+
+    def lift(self, direction, duration):
+        """기존 lift(direction, duration) 호환 - 기존 루프의 실측 스텝 속도로 스텝 수 환산"""
+        return self.move(direction, round(duration * LEGACY_STEP_RATE))
+
+    def stop(self):
+        self.backend.stop()
+
+    def close(self):
+        self.backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="리프트 스텝 모터 테스트")
+    parser.add_argument("--backend", choices=["sim", "pigpio", "rpi"], default="sim")
+    parser.add_argument("--steps", type=int, default=round(2.5 * LEGACY_STEP_RATE))
+    parser.add_argument("--direction", choices=["UP", "DOWN"], default="UP")
+    parser.add_argument("--measure-legacy", type=float, metavar="SECONDS",
+                        help="기존 시간 루프가 이 시간 동안 내는 스텝 수 측정 → setting.LIFT_LEGACY_STEP_RATE")
+    args = parser.parse_args()
+
+    if args.measure_legacy:
+        counts = [measure_legacy_steps(args.measure_legacy) for _ in range(3)]
+        rate = min(counts) / args.measure_legacy
+        print(f"기존 루프 {args.measure_legacy:.2f}초: {counts}스텝 → {rate:.0f}스텝/초 "
+              f"(현재 LIFT_LEGACY_STEP_RATE = {LEGACY_STEP_RATE})")
+        raise SystemExit(0)
+
+    backend = create_backend(args.backend)
+    lifter = StepperLift(backend)
+    intervals = step_intervals(args.steps)
+    legacy_time = args.steps / LEGACY_STEP_RATE
+    print(f"{args.steps}스텝: 기존 {legacy_time:.2f}초 (시간 기준, 실측 {LEGACY_STEP_RATE}스텝/초) → "
+          f"가감속 {intervals.sum() / 1e6:.2f}초 (최고 {1e6 / intervals.min():.0f}스텝/초)")
+    start = time.process_time()
+    wall = time.time()
+    try:
+        lifter.move(args.direction, args.steps)
+    finally:
+        lifter.close()
+    print(f"실제 {time.time() - wall:.2f}초, CPU {time.process_time() - start:.3f}초, 위치 {lifter.position}스텝")
+    if isinstance(backend, SimulatedBackend) and backend.pulses:
+        pulses = np.array(backend.pulses)
+        print(f"시뮬레이션 펄스 {len(pulses)}개, 마지막 펄스 {pulses[-1]:.3f}초")
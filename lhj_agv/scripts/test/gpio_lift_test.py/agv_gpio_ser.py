@@ -1,6 +1,7 @@
 import requests
 import RPi.GPIO as GPIO
 import time
+from stepper_lift import StepperLift, create_backend
 
 # Flask 서버의 URL 설정
 server_url = "http://172.30.1.50:5000/data"  # 변경 금지
@@ -13,26 +14,18 @@ GPIO.setwarnings(False)
 DIR_PIN = 11       # 방향 제어 핀
 STEP_PIN = 7       # 스텝 제어 핀
 
-# GPIO 초기화
-GPIO.setup(DIR_PIN, GPIO.OUT)
-GPIO.setup(STEP_PIN, GPIO.OUT)
+# 리프트 스텝 모터 (stepper_lift.py)
+lifter = StepperLift(create_backend(dir_pin=DIR_PIN, step_pin=STEP_PIN))
 
 def lift(direction, duration):
     """
     스텝 모터를 지정된 방향으로 지정된 시간 동안 제어합니다.
+    (stepper_lift - 시간은 기존 루프 속도 기준 스텝 수로 환산, 펄스는 pigpio DMA로 생성)
     :param direction: "UP" 또는 "DOWN"
     :param duration: 동작 시간 (초 단위)
     """
-    GPIO.output(DIR_PIN, GPIO.HIGH if direction == "UP" else GPIO.LOW)
     print(f"리프트 {direction} 시작...")
-
-    start_time = time.time()
-    while time.time() - start_time < duration:
-        GPIO.output(STEP_PIN, GPIO.HIGH)
-        time.sleep(0.001)  # STEP 신호 ON 시간 (1ms)
-        GPIO.output(STEP_PIN, GPIO.LOW)
-        time.sleep(0.001)  # STEP 신호 OFF 시간 (1ms)
-
+    lifter.lift(direction, duration)
     print(f"리프트 {direction} 완료.")
 
 def read_from_AGV():
@@ -113,4 +106,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n프로그램 중단")
     finally:
+        lifter.close()
         GPIO.cleanup()
@@ -0,0 +1,18 @@
+"""
+로봇 하드웨어 추상화 (HAL) - demo_driving(STM32 시리얼)과 lhj_agv(MyAgv)가 같은 이동 인터페이스를 사용
+
+    backend.set_velocity(forward, left, turn)   # m/s, m/s, rad/s (전진 +, 왼쪽 +, 반시계 +) - 바로 반환
+    backend.drive(speed) / backend.slide(speed) / backend.stop()
+    motion = backend.rotate(90)                 # 도 (반시계 +) - Motion 반환
+    motion = backend.lift(up=True)
+    motion.wait(timeout)                        # True(성공) / False(실패) / None(아직 진행 중)
+
+백엔드: Stm32SerialBackend(serial_port), MyAgvBackend(agv, lifter), SimulatedBackend()
+도킹 알고리즘(docking.DockingController)은 백엔드만 바꿔서 같은 코드로 실행
+벤치마크: python3 -m robot_hal.benchmark (저장소 최상위에서)
+
+스크립트 폴더(demo_driving, lhj_agv/scripts)에서 쓸 때는 저장소 최상위를 sys.path에 추가
+"""
+from robot_hal.motion import Motion, MotionBackend
+from robot_hal.myagv import MyAgvBackend
+from robot_hal.stm32 import Stm32SerialBackend
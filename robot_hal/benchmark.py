@@ -0,0 +1,111 @@
+"""
+도킹 벤치마크 - 같은 도킹 알고리즘(DockingController)을 백엔드별로 시뮬레이터에서 실행해서 비교
+
+- sim:   SimulatedBackend (이상적인 속도 제어 - 알고리즘 자체의 한계)
+- myagv: MyAgvBackend → SimulatedMyAgv (move_control 값 변환 + 명령 끊기면 정지)
+- stm32: Stm32SerialBackend → SimulatedStm32Serial (고정 속도 방향 명령 1개씩)
+- stm32_v: Stm32SerialBackend(velocity_frames=True) - 'v' 속도 프레임 (전진 + 평행이동 동시)
+- stm32 기존: demo_driving initialize_robot + driving 방식 (좌우 정렬 후 직진, 0.1초 간격 명령)
+
+사용법: python3 -m robot_hal.benchmark [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from robot_hal.docking import DockingController, pose_to_observation
+from robot_hal.myagv import MyAgvBackend
+from robot_hal.simulator import (SimulatedBackend, SimulatedMarkerObserver, SimulatedMyAgv, SimulatedStm32Serial,
+                                 marker_pose)
+from robot_hal.stm32 import Stm32SerialBackend
+
+CENTER_TOLERANCE_PX = 25    # initialize_robot 중앙 허용 오차
+TIMEOUT = 30.0
+
+# (이름, (x, y, theta), 목표 거리) - STM32는 연속 회전이 없으므로 방향은 마커를 정면으로
+SCENARIOS = [
+    ("정면 1m", (0.0, 1.0, -np.pi / 2), 0.3),
+    ("옆 10cm", (0.10, 1.0, -np.pi / 2), 0.3),
+    ("옆 -15cm 0.8m", (-0.15, 0.8, -np.pi / 2), 0.4),
+]
+
+
+def legacy_stm32_dock(backend, observer, stop_distance, timeout=TIMEOUT):
+    """initialize_robot(중앙 정렬) + driving(거리까지 직진)과 같은 방식"""
+    start_time = time.time()
+    focal = 600.0
+    while time.time() - start_time < timeout:
+        ok, observation = observer.observe()
+        if observation.distance is None:
+            backend.stop()
+            continue
+        dx = focal * np.tan(observation.bearing)
+        if abs(dx) > CENTER_TOLERANCE_PX:
+            backend.slide(-backend.max_lateral if dx > 0 else backend.max_lateral)
+            time.sleep(0.1)     # 명령 간 딜레이
+            continue
+        backend.stop()
+        break
+    while time.time() - start_time < timeout:
+        ok, observation = observer.observe()
+        if observation.distance is None:
+            continue
+        if observation.distance <= stop_distance:
+            backend.stop()
+            return True
+        backend.drive(backend.max_forward)
+    backend.stop()
+    return False
+
+
+def make_backend(kind, start):
+    if kind == "sim":
+        sim = SimulatedBackend(*start)
+        return sim, sim
+    if kind == "myagv":
+        sim = SimulatedMyAgv(*start)
+        return sim, MyAgvBackend(sim)
+    sim = SimulatedBackend(*start)
+    return sim, Stm32SerialBackend(SimulatedStm32Serial(sim), velocity_frames=kind == "stm32_v")
+
+
+def run(kind, start, stop_distance, seed=0):
+    sim, backend = make_backend(kind, start)
+    observer = SimulatedMarkerObserver(sim, seed=seed)
+    start_time = time.time()
+    if kind == "stm32_legacy":
+        result = legacy_stm32_dock(backend, observer, stop_distance)
+    else:
+        result = DockingController(backend, observer).dock(stop_distance=stop_distance, timeout=TIMEOUT)
+    elapsed = time.time() - start_time
+    time.sleep(0.3)     # 정지할 때까지
+    final = pose_to_observation(*marker_pose(sim.pose))
+    if backend is not sim:
+        backend.close()
+    sim.close()
+    return result, elapsed, final
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HAL 백엔드별 도킹 벤치마크 (시뮬레이터)")
+    parser.add_argument("--repeat", type=int, default=1, help="시나리오별 반복 횟수 (잡음 시드만 다름)")
+    parser.add_argument("--backends", default="sim,myagv,stm32,stm32_v,stm32_legacy")
+    args = parser.parse_args()
+
+    kinds = args.backends.split(",")
+    summary = {kind: [] for kind in kinds}
+    for name, start, stop_distance in SCENARIOS:
+        for kind in kinds:
+            for seed in range(args.repeat):
+                result, elapsed, final = run(kind, start, stop_distance, seed)
+                summary[kind].append((result, elapsed, abs(final.distance - stop_distance), abs(final.lateral)))
+                print(f"[{name}] {kind:<13} {'성공' if result else '실패'} {elapsed:6.2f}초 | 거리 {final.distance:.3f}m "
+                      f"(목표 {stop_distance}), 좌우 {final.lateral * 100:+.1f}cm")
+        print()
+
+    print(f"{'백엔드':<14}{'성공':>6}{'평균 시간':>10}{'거리 오차':>10}{'좌우 오차':>10}")
+    for kind, rows in summary.items():
+        rows = np.array(rows, dtype=float)
+        print(f"{kind:<14}{int(rows[:, 0].sum()):>4}/{len(rows):<2}{rows[:, 1].mean():9.2f}초"
+              f"{rows[:, 2].mean() * 100:8.1f}cm{rows[:, 3].mean() * 100:8.1f}cm")
@@ -0,0 +1,274 @@
+"""
+ArUco 마커 연속 도킹 제어 - 백엔드(MotionBackend)와 관측기(observe())만 바꿔서
+STM32 / MyAgv / 시뮬레이터에서 같은 알고리즘을 실행
+"""
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import cv2.aruco as aruco
+import numpy as np
+
+# 속도 명령 (MotionBackend.set_velocity 단위: m/s, rad/s)
+CONTROL_HZ = 20             # 속도 명령 주기 - 짧은 명령을 계속 갱신 (막히는 go_ahead/rotation 대신)
+MAX_FORWARD_SPEED = 0.25    # 전진 최대 속도 (MyAgv 속도 값 25)
+MAX_PAN_SPEED = 0.20        # 좌우 이동 최대 속도 (속도 값 20)
+MAX_ROTATION_SPEED = 0.52   # 회전 최대 속도 (속도 값 20)
+SEARCH_SPEED = 0.08         # 마커를 놓쳤을 때 천천히 전진하는 속도 (속도 값 8)
+
+# PID 게인 (오차 단위: m / rad → 출력 -1 ~ 1)
+DISTANCE_GAINS = (2.5, 0.2, 0.3)    # 목표 거리까지 남은 거리 → 전진
+LATERAL_GAINS = (6.0, 0.5, 0.4)     # 마커 정면 축에서 벗어난 거리 → 좌우 이동
+HEADING_GAINS = (1.5, 0.0, 0.1)     # 마커 방향 각도 → 회전
+
+# 도킹 완료 조건
+DISTANCE_TOLERANCE = 0.02   # m
+LATERAL_TOLERANCE = 0.015   # m
+HEADING_TOLERANCE = np.radians(3)
+SETTLE_FRAMES = 3           # 조건을 연속으로 만족해야 하는 관측 수
+LOST_TIMEOUT = 0.3          # 이 시간(초) 동안 관측이 없으면 마커를 놓친 것으로 봄
+DOCK_TIMEOUT = 60.0
+DONE_MARGIN = 2.0           # 명령 스레드가 timeout 후에도 끝나지 않을 때 dock()이 더 기다리는 시간 (초)
+DISPLAY_PERIOD = 1.0 / 30   # 도킹 중 호출 스레드에서 관측 화면을 갱신하는 주기 (초)
+
+# 관측값 - distance: 카메라 → 마커 Z 거리(m), lateral: 마커 정면 축에서 카메라의 좌우 거리(m, 오른쪽 +),
+#          bearing: 카메라 정면에서 마커 중심까지 각도(rad, 오른쪽 +), brightness: 프레임 평균 밝기
+Observation = namedtuple("Observation", "time distance lateral bearing brightness")
+
+
+class PID:
+    def __init__(self, kp, ki, kd, limit=1.0):
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.previous = None
+
+    def update(self, error, dt):
+        if dt <= 0:
+            dt = 1.0 / CONTROL_HZ
+        derivative = 0.0 if self.previous is None else (error - self.previous) / dt
+        self.previous = error
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        # 출력이 포화되면 적분하지 않음 (windup 방지)
+        if abs(output) < self.limit:
+            self.integral += error * dt
+        return float(np.clip(output, -self.limit, self.limit))
+
+
+def pose_to_observation(rvec, tvec, brightness=None, timestamp=None):
+    """마커 포즈(rvec, tvec) → 관측값"""
+    tvec = np.asarray(tvec, np.float64).reshape(3)
+    rotation, _ = cv2.Rodrigues(np.asarray(rvec, np.float64).reshape(3))
+    # 마커 좌표계에서 본 카메라 위치 - x가 마커 정면 축에서 벗어난 거리
+    camera_in_marker = -rotation.T @ tvec
+    return Observation(
+        time=time.time() if timestamp is None else timestamp,
+        distance=float(tvec[2]),
+        lateral=float(camera_in_marker[0]),
+        bearing=float(np.arctan2(tvec[0], tvec[2])),
+        brightness=brightness,
+    )
+
+
+class MarkerObserver:
+    """
+    공용 카메라 프레임에서 ArUco 마커 관측 (카메라 속도로 호출)
+    show=True면 마지막 프레임(마커 표시)을 보관만 하고, 화면 출력은 호출 스레드에서 display()로
+    (OpenCV 창 함수는 destroyAllWindows와 같은 스레드에서 불러야 함)
+    """
+    def __init__(self, camera, camera_matrix, dist_coeffs, dictionary, parameters, marker_length=0.05,
+                 marker_id=None, show=False):
+        self.camera = camera
+        self.camera_matrix = camera_matrix
+        self.dist_coeffs = dist_coeffs
+        self.dictionary = dictionary
+        self.parameters = parameters
+        self.marker_length = marker_length
+        self.marker_id = marker_id
+        self.show = show
+        self.lock = threading.Lock()
+        self.display_frame = None
+
+    def observe(self):
+        """
+        :return: (프레임을 읽었는지, Observation 또는 None(마커 없음))
+        """
+        ret, frame = self.camera.read()
+        if not ret:
+            return False, None
+        timestamp = time.time()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        brightness = float(np.mean(gray))
+        corners, ids, _ = aruco.detectMarkers(gray, self.dictionary, parameters=self.parameters)
+        observation = None
+        if ids is not None:
+            candidates = [i for i in range(len(ids)) if self.marker_id is None or ids[i][0] == self.marker_id]
+            if candidates:
+                # 가장 크게 보이는(가장 가까운) 마커
+                best = max(candidates, key=lambda i: cv2.contourArea(corners[i][0]))
+                rvec, tvec, _ = aruco.estimatePoseSingleMarkers([corners[best][0]], self.marker_length,
+                                                                self.camera_matrix, self.dist_coeffs)
+                observation = pose_to_observation(rvec[0], tvec[0], brightness, timestamp)
+            if self.show:
+                aruco.drawDetectedMarkers(frame, corners, ids)
+        if observation is None:
+            observation = Observation(timestamp, None, None, None, brightness)
+        if self.show:
+            with self.lock:
+                self.display_frame = frame
+        return True, observation
+
+    def display(self):
+        """마지막 관측 프레임을 화면에 출력 - 창을 만든 스레드(dock 호출 스레드)에서 호출"""
+        with self.lock:
+            frame, self.display_frame = self.display_frame, None
+        if frame is not None:
+            cv2.imshow("ArUco Detection", frame)
+        cv2.waitKey(1)
+
+
+class DockingController:
+    """
+    연속 도킹 제어기
+    - 관측 스레드: 카메라 속도로 마커를 계속 관측 (AGV가 움직이는 동안에도)
+    - 명령 스레드: CONTROL_HZ로 최신 관측에 PID를 적용해서 백엔드 속도 명령을 갱신
+    """
+    def __init__(self, backend, observer):
+        self.backend = backend
+        self.observer = observer
+        self.distance_pid = PID(*DISTANCE_GAINS)
+        self.lateral_pid = PID(*LATERAL_GAINS)
+        self.heading_pid = PID(*HEADING_GAINS)
+        self.lock = threading.Lock()
+        self.latest = None          # 최신 관측 (마커가 보인 경우)
+        self.latest_frame = None    # 최신 프레임 관측 (밝기 판단용)
+        self.frames = 0
+        self.running = False
+        self.done = threading.Event()
+        self.result = None
+
+    def perception_loop(self):
+        while self.running:
+            ok, observation = self.observer.observe()
+            if not ok:
+                time.sleep(0.01)
+                continue
+            with self.lock:
+                self.frames += 1
+                self.latest_frame = observation
+                if observation.distance is not None:
+                    self.latest = observation
+
+    def command(self, stop_distance, brightness_threshold):
+        """최신 관측으로 속도 계산 - 도킹이 끝났으면 None"""
+        with self.lock:
+            observation = self.latest
+            frame = self.latest_frame
+        now = time.time()
+        if (brightness_threshold is not None and frame is not None
+                and frame.brightness is not None and frame.brightness < brightness_threshold):
+            print("화면이 어두워졌습니다. 도킹 완료.")
+            return None
+        if observation is None or now - observation.time > LOST_TIMEOUT:
+            # 마커를 못 찾으면 천천히 전진하며 탐색 (기존 동작과 같음)
+            self.distance_pid.reset()
+            self.lateral_pid.reset()
+            self.heading_pid.reset()
+            return SEARCH_SPEED, 0, 0
+
+        dt = now - self.last_command if self.last_command else 1.0 / CONTROL_HZ
+        self.last_command = now
+        distance_error = observation.distance - stop_distance
+        if (abs(distance_error) < DISTANCE_TOLERANCE and abs(observation.lateral) < LATERAL_TOLERANCE
+                and abs(observation.bearing) < HEADING_TOLERANCE):
+            if observation.time != self.settled_time:
+                self.settled_time = observation.time
+                self.settled += 1
+            if self.settled >= SETTLE_FRAMES:
+                print(f"목표 거리 {stop_distance:.2f}m에 도달했습니다. 도킹 중지.")
+                return None
+        else:
+            self.settled = 0
+        if brightness_threshold is None and distance_error <= 0:
+            # 거리 도킹은 목표 거리보다 가까워지면 바로 정지 (후진하지 않음)
+            print(f"목표 거리 {stop_distance:.2f}m에 도달했습니다. 도킹 중지.")
+            return None
+
+        forward = self.distance_pid.update(distance_error, dt) * MAX_FORWARD_SPEED
+        # 카메라가 마커 축 오른쪽(+)에 있으면 왼쪽으로 이동
+        pan = self.lateral_pid.update(observation.lateral, dt) * MAX_PAN_SPEED
+        # 마커가 화면 오른쪽(+)에 있으면 시계 방향(-)으로 회전
+        rotation = -self.heading_pid.update(observation.bearing, dt) * MAX_ROTATION_SPEED
+        return forward, pan, rotation
+
+    def command_loop(self, stop_distance, brightness_threshold, timeout):
+        period = 1.0 / CONTROL_HZ
+        start_time = time.time()
+        next_time = start_time
+        try:
+            while self.running:
+                if time.time() - start_time > timeout:
+                    print("도킹 시간 초과")
+                    self.result = False
+                    break
+                velocity = self.command(stop_distance, brightness_threshold)
+                if velocity is None:
+                    self.result = True
+                    break
+                self.backend.set_velocity(*velocity)
+                next_time += period
+                time.sleep(max(0.0, next_time - time.time()))
+        except Exception as e:
+            # 명령 전송 실패 등 - 스레드가 죽어도 로봇은 멈추고 dock()은 반환되게
+            print(f"도킹 명령 오류: {e}")
+            self.result = False
+        finally:
+            try:
+                self.backend.stop()
+            finally:
+                self.done.set()
+
+    def dock(self, stop_distance=0.0, brightness_threshold=None, timeout=DOCK_TIMEOUT):
+        """
+        마커 앞 stop_distance(m)까지 연속 제어로 도킹
+        brightness_threshold를 주면 화면이 그보다 어두워질 때(마커에 완전히 붙었을 때) 완료
+        :return: True(도킹 완료) / False(시간 초과 또는 명령 오류)
+        """
+        for pid in (self.distance_pid, self.lateral_pid, self.heading_pid):
+            pid.reset()
+        self.latest = self.latest_frame = None
+        self.last_command = None
+        self.settled = 0
+        self.settled_time = None
+        self.result = None
+        self.done.clear()
+        self.running = True
+        start_time = time.time()
+        perception = threading.Thread(target=self.perception_loop, daemon=True)
+        commander = threading.Thread(target=self.command_loop,
+                                     args=(stop_distance, brightness_threshold, timeout), daemon=True)
+        perception.start()
+        commander.start()
+        # 화면 출력은 관측 스레드가 아니라 이 (호출) 스레드에서
+        display = getattr(self.observer, "display", None) if getattr(self.observer, "show", False) else None
+        try:
+            deadline = start_time + timeout + DONE_MARGIN
+            while not self.done.wait(DISPLAY_PERIOD):
+                if time.time() > deadline:
+                    print("도킹 명령 스레드 응답 없음 - 정지")
+                    self.result = False
+                    break
+                if display is not None:
+                    display()
+        finally:
+            self.running = False
+            commander.join(timeout=1.0)
+            perception.join(timeout=1.0)
+            if not self.done.is_set():
+                self.backend.stop()
+        print(f"도킹 {'완료' if self.result else '실패'} ({time.time() - start_time:.2f}초, 관측 {self.frames}프레임)")
+        return bool(self.result)
@@ -0,0 +1,108 @@
+"""
+공통 이동 인터페이스 - 모든 백엔드(STM32 시리얼 / MyAgv / 시뮬레이터)가 같은 함수를 제공
+
+- 모든 함수는 막히지 않음: 속도 명령은 바로 반환, 회전/리프트는 Motion을 반환 (wait()로 완료 대기)
+- 단위: forward/left m/s (전진 +, 왼쪽 +), turn rad/s (반시계 +), 회전 각도는 도 (반시계 +)
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class Motion:
+    """진행 중인 동작 (회전/리프트) - 백그라운드 스레드가 끝나면 finish() 호출"""
+    def __init__(self, name):
+        self.name = name
+        self.event = threading.Event()
+        self.result = None
+        self.started = time.time()
+        self.finished = None
+
+    def finish(self, result=True):
+        self.result = result
+        self.finished = time.time()
+        self.event.set()
+
+    def done(self):
+        return self.event.is_set()
+
+    def wait(self, timeout=None):
+        """
+        :return: True(성공) / False(실패) / None(timeout 동안 끝나지 않음)
+        """
+        if not self.event.wait(timeout):
+            return None
+        return self.result
+
+    @property
+    def duration(self):
+        return None if self.finished is None else self.finished - self.started
+
+    @classmethod
+    def run(cls, name, target, *args):
+        """target(*args)를 스레드에서 실행 - 반환값이 동작 결과"""
+        motion = cls(name)
+
+        def worker():
+            try:
+                result = target(*args)
+            except Exception as e:
+                print(f"[HAL] {name} 오류: {e}")
+                result = False
+            motion.finish(bool(result))
+
+        threading.Thread(target=worker, daemon=True).start()
+        return motion
+
+    @classmethod
+    def failed(cls, name, reason):
+        print(f"[HAL] {name} 실패: {reason}")
+        motion = cls(name)
+        motion.finish(False)
+        return motion
+
+
+class MotionBackend:
+    """이동 백엔드 기본 클래스 - set_velocity / rotate / lift만 구현하면 나머지는 공통"""
+    name = "base"
+    max_forward = 0.2   # m/s
+    max_lateral = 0.2   # m/s
+    max_turn = 0.5      # rad/s
+
+    def clip(self, forward, left, turn):
+        return (float(np.clip(forward, -self.max_forward, self.max_forward)),
+                float(np.clip(left, -self.max_lateral, self.max_lateral)),
+                float(np.clip(turn, -self.max_turn, self.max_turn)))
+
+    def set_velocity(self, forward=0.0, left=0.0, turn=0.0):
+        """속도 명령 (stop()이나 다음 명령까지 유지)"""
+        raise NotImplementedError
+
+    def drive(self, speed):
+        """전진(+) / 후진(-)"""
+        self.set_velocity(forward=speed)
+
+    def slide(self, speed):
+        """왼쪽(+) / 오른쪽(-) 평행이동"""
+        self.set_velocity(left=speed)
+
+    def stop(self):
+        self.set_velocity(0.0, 0.0, 0.0)
+
+    def rotate(self, angle, speed=None):
+        """
+        제자리 회전 (도, 반시계 +)
+        :return: Motion
+        """
+        raise NotImplementedError
+
+    def lift(self, up=True):
+        """
+        리프트 올리기/내리기
+        :return: Motion
+        """
+        return Motion.failed("lift", f"{self.name} 백엔드에 리프트가 없습니다")
+
+    def close(self):
+        self.stop()
@@ -0,0 +1,123 @@
+"""
+MyAgv 백엔드 (lhj_agv) - 속도 값(128 ± 속도)을 SET_MOTION_CONTROL 명령으로 전송 (motion_control_sender)
+
+펌웨어는 명령이 끊기면 멈추므로 0이 아닌 속도는 백그라운드 스레드가 CONTROL_HZ로 계속 갱신
+(go_ahead/pan_left 같은 막히는 함수 대신 짧은 명령만 사용)
+회전은 시간 기준 (IMU 없음), 리프트는 stepper_lift.StepperLift 같은 lift(direction, 초) / move(direction, steps) 객체
+"""
+import threading
+import time
+
+import numpy as np
+
+from robot_hal.motion import Motion, MotionBackend
+
+# 속도 값 1당 실제 속도 (시뮬레이터와 같은 값)
+FORWARD_MPS_PER_UNIT = 0.01     # m/s
+ROTATION_RADPS_PER_UNIT = 0.026  # rad/s - 속도 20으로 3초에 약 90도
+MAX_UNIT = 100                  # 128 ± 이 값까지만 보냄
+ROTATE_SPEED = 20 * ROTATION_RADPS_PER_UNIT
+CONTROL_HZ = 20
+LIFT_DURATION = 2.5             # 리프트 한 번 이동 (agv_lift 기존 2.5초 - 스텝 수 환산은 lifter의 실측 속도로)
+
+
+def velocity_to_units(forward, left, turn):
+    """m/s, rad/s → 속도 값 (128 = 정지)"""
+    units = np.array([forward / FORWARD_MPS_PER_UNIT, left / FORWARD_MPS_PER_UNIT, turn / ROTATION_RADPS_PER_UNIT])
+    units = np.clip(np.round(units), -MAX_UNIT, MAX_UNIT).astype(int)
+    return tuple(int(v) + 128 for v in units)
+
+
+def motion_control_sender(agv):
+    """
+    agv → 속도 값 1번 전송 함수 send(x, y, z) (막히지 않음)
+    - move_control이 있으면 그대로 사용 (시뮬레이터)
+    - pymycobot 4.x: move_control/_mesg가 없음 → _merge(ProtocolCode.SET_MOTION_CONTROL, x, y, z)
+    - pymycobot 3.x: _mesg(x, y, z)
+    """
+    if hasattr(agv, "move_control"):
+        return agv.move_control
+    if hasattr(agv, "_merge"):
+        from pymycobot.myagv import ProtocolCode
+        return lambda x, y, z: agv._merge(ProtocolCode.SET_MOTION_CONTROL, x, y, z)
+    if hasattr(agv, "_mesg"):
+        return agv._mesg
+    raise TypeError(f"속도 명령을 보낼 수 없는 MyAgv 객체: {type(agv).__name__}")
+
+
+class MyAgvBackend(MotionBackend):
+    name = "myagv"
+    max_forward = MAX_UNIT * FORWARD_MPS_PER_UNIT
+    max_lateral = MAX_UNIT * FORWARD_MPS_PER_UNIT
+    max_turn = MAX_UNIT * ROTATION_RADPS_PER_UNIT
+
+    def __init__(self, agv, lifter=None, lift_steps=None):
+        self.agv = agv
+        self.motion_control = motion_control_sender(agv)
+        self.lifter = lifter
+        self.lift_steps = lift_steps
+        self.lock = threading.Lock()
+        self.values = (128, 128, 128)
+        self.sent_at = 0.0
+        self.running = True
+        self.thread = threading.Thread(target=self.keepalive_loop, daemon=True)
+        self.thread.start()
+
+    def send(self, values):
+        self.motion_control(*values)
+        self.sent_at = time.time()
+
+    def set_velocity(self, forward=0.0, left=0.0, turn=0.0):
+        values = velocity_to_units(*self.clip(forward, left, turn))
+        with self.lock:
+            changed = values != self.values
+            self.values = values
+            if values == (128, 128, 128):
+                if changed:
+                    self.agv.stop()
+            else:
+                self.send(values)
+
+    def keepalive_loop(self):
+        period = 1.0 / CONTROL_HZ
+        while self.running:
+            try:
+                with self.lock:
+                    if self.values != (128, 128, 128) and time.time() - self.sent_at >= period:
+                        self.send(self.values)
+            except Exception as e:
+                # 전송 실패 - 스레드가 조용히 죽지 않도록 기록하고, 이전 명령이 남지 않게 정지 시도
+                print(f"[MyAgv] 속도 명령 갱신 실패, 정지: {e}")
+                with self.lock:
+                    self.values = (128, 128, 128)
+                try:
+                    self.agv.stop()
+                except Exception as stop_error:
+                    print(f"[MyAgv] 정지 명령 실패: {stop_error}")
+            time.sleep(period / 2)
+
+    def rotate(self, angle, speed=None):
+        """시간 기준 회전 (속도 기본 20)"""
+        speed = abs(speed or ROTATE_SPEED)
+
+        def run():
+            self.set_velocity(turn=np.sign(angle) * speed)
+            time.sleep(abs(np.radians(angle)) / speed)
+            self.stop()
+            return True
+
+        return Motion.run(f"rotate {angle:+.0f}", run)
+
+    def lift(self, up=True):
+        if self.lifter is None:
+            return super().lift(up)
+        direction = "UP" if up else "DOWN"
+        if self.lift_steps is None:
+            # 기존 시간 호출과 같은 이동량 (StepperLift가 실측 스텝 속도로 환산, 소프트 한계 적용)
+            return Motion.run(f"lift {direction}", lambda: self.lifter.lift(direction, LIFT_DURATION) > 0)
+        return Motion.run(f"lift {direction}", lambda: self.lifter.move(direction, self.lift_steps, wait=True) > 0)
+
+    def close(self):
+        self.stop()
+        self.running = False
+        self.thread.join(timeout=1.0)
@@ -0,0 +1,380 @@
+"""
+시뮬레이터 백엔드 - 메카넘 로봇 2D 위치 적분 (가속도 제한 포함)
+
+- SimulatedBackend: MotionBackend를 바로 구현 (이상적인 속도 제어)
+- SimulatedMyAgv: MyAgv와 같은 함수 (move_control / go_ahead / ...) - 명령이 끊기면 멈춤 (펌웨어와 같음)
+  → MyAgvBackend(SimulatedMyAgv())로 lhj_agv 경로를 그대로 실행
+- SimulatedStm32Serial: STM32와 같은 1바이트 명령/완료 신호를 주고받는 가짜 시리얼 포트
+  → Stm32SerialBackend(SimulatedStm32Serial(sim))로 demo_driving 경로를 그대로 실행
+- SimulatedMarkerObserver: 로봇 위치에서 본 마커 포즈를 카메라 속도로 관측값으로 반환 (지연/잡음/시야각 포함)
+- SimClock: 실제 시간 스레드 대신 시계가 진행할 때만 움직이게 해서 실제 시간보다 빠르게 실행
+
+월드 좌표: (x, y, 방향 theta), 기본 마커는 원점에서 +y 방향을 바라봄
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from robot_hal import myagv, stm32
+from robot_hal.docking import Observation, pose_to_observation
+from robot_hal.motion import Motion, MotionBackend
+
+MAX_ACCELERATION = 1.0          # m/s^2
+MAX_ANGULAR_ACCELERATION = 4.0  # rad/s^2
+PHYSICS_HZ = 200
+HISTORY_SECONDS = 5.0           # pose_at으로 되돌아볼 수 있는 시간
+LIFT_TIME = 4.0                 # 리프트 올리기/내리기 시간 (초)
+MYAGV_COMMAND_TIMEOUT = 0.3     # MyAgv 펌웨어: 이 시간 동안 명령이 없으면 정지
+
+CAMERA_FPS = 30
+CAMERA_LATENCY = 0.05           # 노출 ~ 관측까지 지연 (초)
+CAMERA_FOV = np.radians(60)     # 가로 시야각
+DISTANCE_NOISE = 0.003          # m
+LATERAL_NOISE = 0.003           # m
+CAMERA_MATRIX = np.array([[600.0, 0, 320], [0, 600.0, 240], [0, 0, 1]])
+MARKER_ORIGIN = (0.0, 0.0, np.pi / 2)   # (x, y, 마커 정면 방향)
+
+
+class SimClock:
+    """
+    시뮬레이션 시계 (실제 시간보다 빠르게 실행) - time()/sleep()이 time 모듈과 같음
+    sleep(dt)하면 붙어 있는 시뮬레이터를 dt만큼 진행 → 제어 코드의 time을 이 시계로 바꿔서 실행
+    """
+    def __init__(self, dt=1.0 / PHYSICS_HZ):
+        self.dt = dt
+        self.now = 0.0
+        self.simulators = []
+
+    def attach(self, simulator):
+        self.simulators.append(simulator)
+
+    def time(self):
+        return self.now
+
+    perf_counter = monotonic = time
+
+    def sleep(self, seconds):
+        end = self.now + max(0.0, seconds)
+        while self.now < end - 1e-9:
+            dt = min(self.dt, end - self.now)
+            for simulator in self.simulators:
+                simulator.step(dt)
+            self.now += dt
+
+
+class SimulatedBackend(MotionBackend):
+    name = "sim"
+    max_forward = 0.5
+    max_lateral = 0.5
+    max_turn = 2.0
+
+    def __init__(self, x=0.0, y=1.0, theta=-np.pi / 2, command_timeout=None, lift_time=LIFT_TIME,
+                 clock=None, slip=(0.0, 0.0)):
+        """
+        :param command_timeout: 이 시간(초) 동안 set_velocity가 없으면 정지 (None: 다음 명령까지 유지)
+        :param clock: SimClock이면 시계가 진행할 때만 움직임 (없으면 실제 시간 스레드)
+        :param slip: 전진 1m당 (왼쪽으로 밀리는 거리 m, 반시계로 돌아가는 각도 rad) - 바퀴 미끄러짐
+        """
+        self.lock = threading.Lock()
+        self.pose = np.array([x, y, theta], np.float64)
+        self.target = np.zeros(3)       # 명령 속도 (전진 m/s, 왼쪽 m/s, 반시계 rad/s)
+        self.velocity = np.zeros(3)
+        self.command_timeout = command_timeout
+        self.lift_time = lift_time
+        self.slip = np.array(slip, np.float64)
+        self.clock = clock
+        self.last_command = self.now()
+        self.commands = 0
+        self.lifted = False
+        self.rotation = None            # (목표 방향, 최대 속도, Motion)
+        self.lifting = None             # (끝나는 시각, 올림 여부, Motion)
+        self.history = deque(maxlen=int(HISTORY_SECONDS * PHYSICS_HZ))  # (시각, x, y, theta)
+        self.running = True
+        if clock is None:
+            self.thread = threading.Thread(target=self.physics_loop, daemon=True)
+            self.thread.start()
+        else:
+            self.thread = None
+            clock.attach(self)
+
+    def now(self):
+        return time.time() if self.clock is None else self.clock.time()
+
+    def set_velocity(self, forward=0.0, left=0.0, turn=0.0):
+        with self.lock:
+            self.target = np.array(self.clip(forward, left, turn))
+            self.last_command = self.now()
+            self.commands += 1
+
+    def rotate(self, angle, speed=None):
+        """시뮬레이터는 실제 방향을 알고 있으므로 목표 각도까지 회전 (감속 포함)"""
+        motion = Motion(f"rotate {angle:+.0f}")
+        with self.lock:
+            self.rotation = (self.pose[2] + np.radians(angle), abs(speed or myagv.ROTATE_SPEED), motion)
+        return motion
+
+    def lift(self, up=True):
+        motion = Motion("lift " + ("UP" if up else "DOWN"))
+        with self.lock:
+            self.lifting = (self.now() + self.lift_time, up, motion)
+        return motion
+
+    def step(self, dt):
+        """dt초 진행 - 회전/리프트 동작 + 가속도 제한 + 위치 적분"""
+        finished = []
+        with self.lock:
+            now = self.now() + (dt if self.clock is not None else 0.0)
+            if self.rotation is not None:
+                goal, speed, motion = self.rotation
+                error = goal - self.pose[2]
+                if abs(error) < np.radians(0.5):
+                    self.target = np.zeros(3)
+                    self.rotation = None
+                    finished.append(motion)
+                else:
+                    self.target = np.array([0.0, 0.0, np.clip(3.0 * error, -speed, speed)])
+                    self.last_command = now
+            if self.lifting is not None and now >= self.lifting[0]:
+                _, self.lifted, motion = self.lifting
+                self.lifting = None
+                finished.append(motion)
+            target = self.target
+            if self.command_timeout is not None and now - self.last_command > self.command_timeout:
+                target = np.zeros(3)
+            limits = np.array([MAX_ACCELERATION, MAX_ACCELERATION, MAX_ANGULAR_ACCELERATION]) * dt
+            self.velocity += np.clip(target - self.velocity, -limits, limits)
+            forward, left, turn = self.velocity
+            left += self.slip[0] * forward
+            turn += self.slip[1] * forward
+            theta = self.pose[2]
+            self.pose += [(forward * np.cos(theta) - left * np.sin(theta)) * dt,
+                          (forward * np.sin(theta) + left * np.cos(theta)) * dt,
+                          turn * dt]
+            self.history.append((now, *self.pose))
+        for motion in finished:
+            motion.finish(True)
+
+    def physics_loop(self):
+        dt = 1.0 / PHYSICS_HZ
+        while self.running:
+            self.step(dt)
+            time.sleep(dt)
+
+    def pose_at(self, timestamp):
+        """timestamp 시각의 위치 (카메라 지연 재현용)"""
+        with self.lock:
+            for entry in reversed(self.history):
+                if entry[0] <= timestamp:
+                    return np.array(entry[1:])
+            return self.pose.copy()
+
+    def close(self):
+        self.stop()
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+
+class SimulatedMyAgv(SimulatedBackend):
+    """MyAgv 대신 쓰는 시뮬레이터 - 속도 값(128 ± 속도)을 받고, 명령이 끊기면 멈춤"""
+    def __init__(self, x=0.0, y=1.0, theta=-np.pi / 2, clock=None):
+        super().__init__(x, y, theta, command_timeout=MYAGV_COMMAND_TIMEOUT, clock=clock)
+
+    # MyAgv와 같은 함수 ---------------------------------------------------
+    def move_control(self, direction_1, direction_2, direction_3):
+        SimulatedBackend.set_velocity(self, (direction_1 - 128) * myagv.FORWARD_MPS_PER_UNIT,
+                                      (direction_2 - 128) * myagv.FORWARD_MPS_PER_UNIT,
+                                      (direction_3 - 128) * myagv.ROTATION_RADPS_PER_UNIT)
+
+    _mesg = move_control
+
+    def stop(self):
+        self.move_control(128, 128, 128)
+
+    def _basic_move(self, values, timeout):
+        # pymycobot과 같이 0.1초마다 명령을 보내며 timeout 동안 막힘
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            self.move_control(*values)
+            time.sleep(min(0.1, max(0.0, timeout - (time.time() - start_time))))
+        self.stop()
+
+    def go_ahead(self, speed, timeout=5):
+        self._basic_move((128 + speed, 128, 128), timeout)
+
+    def retreat(self, speed, timeout=5):
+        self._basic_move((128 - speed, 128, 128), timeout)
+
+    def pan_left(self, speed, timeout=5):
+        self._basic_move((128, 128 + speed, 128), timeout)
+
+    def pan_right(self, speed, timeout=5):
+        self._basic_move((128, 128 - speed, 128), timeout)
+
+    def clockwise_rotation(self, speed, timeout=5):
+        self._basic_move((128, 128, 128 - speed), timeout)
+
+    def counterclockwise_rotation(self, speed, timeout=5):
+        self._basic_move((128, 128, 128 + speed), timeout)
+
+
+class SimulatedStm32Serial:
+    """
+    STM32 펌웨어 흉내 - 1바이트 명령을 받아 sim을 움직이고 완료 신호를 읽기 버퍼에 넣음
+      1/2 직진/후진, 5/6 좌/우 평행이동, 9 정지 (다음 명령까지 유지)
+      3/4 좌/우 90도 회전 → 's',  7 들어올리기 → 'l', 'a',  8 내려놓기 → 'c'
+      'v' 속도 프레임 (전진 + 평행이동, stm32.velocity_frame) - 바퀴 속도가 stm32.WHEEL_SPEED_LIMIT를 넘으면 줄임
+      '?' 기능 확인 → 'V' (velocity_frames=False면 구형 펌웨어처럼 응답 없이 'v'/0x80 이상 바이트 무시)
+    회전/리프트 중에는 다른 명령을 무시 (펌웨어 루틴과 같음)
+    """
+    def __init__(self, sim, turn_time=stm32.TURN_TIME, velocity_frames=True):
+        self.sim = sim
+        self.velocity_frames = velocity_frames
+        self.turn_time = turn_time
+        self.lock = threading.Lock()
+        self.incoming = deque()     # 로봇 → PC 신호
+        self.written = []           # (시각, 명령) 기록
+        self.pending = None         # (진행 중인 Motion, 끝나면 보낼 신호)
+        self.frame = None           # 받는 중인 속도 프레임
+        self.is_open = True
+
+    # serial.Serial과 같은 함수 -----------------------------------------
+    def write(self, data):
+        for byte in bytes(data):
+            if self.frame is not None and byte >= stm32.PAYLOAD_FLAG:
+                self.frame += bytes([byte])
+                if len(self.frame) == stm32.VELOCITY_FRAME_SIZE:
+                    self.handle(bytes(self.frame))
+                    self.frame = None
+                continue
+            # 프레임 중간에 명령 바이트가 오면 프레임을 버리고 명령으로 처리 (재동기화)
+            self.frame = None
+            if bytes([byte]) == stm32.VELOCITY_FRAME and self.velocity_frames:
+                self.frame = bytearray(stm32.VELOCITY_FRAME)
+            else:
+                self.handle(bytes([byte]))
+        return len(data)
+
+    @property
+    def in_waiting(self):
+        self.poll()
+        with self.lock:
+            return len(self.incoming)
+
+    def read(self, size=1):
+        self.poll()
+        with self.lock:
+            out = bytearray()
+            while self.incoming and len(out) < size:
+                out += self.incoming.popleft()
+            return bytes(out)
+
+    def reset_input_buffer(self):
+        with self.lock:
+            self.incoming.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+    # 펌웨어 -------------------------------------------------------------
+    def reply(self, signal):
+        with self.lock:
+            self.incoming.append(signal.encode())
+
+    def poll(self):
+        """진행 중인 루틴이 끝났으면 완료 신호"""
+        if self.pending is not None and self.pending[0].done():
+            _, signal = self.pending
+            self.pending = None
+            self.reply(signal)
+
+    def handle(self, command):
+        self.written.append((self.sim.now(), command))
+        self.poll()
+        if command == stm32.CAPABILITY_QUERY:
+            if self.velocity_frames:
+                self.reply(stm32.VELOCITY_CAPABLE)
+            return
+        if self.pending is not None:
+            return      # 회전/리프트 루틴 중에는 다른 명령 무시
+        speeds = {
+            stm32.COMMANDS["forward"]: (stm32.FORWARD_SPEED, 0.0),
+            stm32.COMMANDS["backward"]: (-stm32.FORWARD_SPEED, 0.0),
+            stm32.COMMANDS["left_slide"]: (0.0, stm32.SLIDE_SPEED),
+            stm32.COMMANDS["right_slide"]: (0.0, -stm32.SLIDE_SPEED),
+            stm32.COMMANDS["stop"]: (0.0, 0.0),
+        }
+        if command in speeds:
+            self.sim.set_velocity(*speeds[command])
+        elif command[:1] == stm32.VELOCITY_FRAME:
+            ratios = stm32.parse_velocity_frame(command)
+            if ratios is None:
+                return      # 체크섬 오류 - 무시
+            forward, left = ratios[0] * stm32.FORWARD_SPEED, ratios[1] * stm32.SLIDE_SPEED
+            scale = max(1.0, (abs(forward) + abs(left)) / stm32.WHEEL_SPEED_LIMIT)
+            self.sim.set_velocity(forward / scale, left / scale)
+        elif command in (stm32.COMMANDS["left_turn"], stm32.COMMANDS["right_turn"]):
+            angle = 90.0 if command == stm32.COMMANDS["left_turn"] else -90.0
+            self.sim.stop()
+            self.pending = (self.sim.rotate(angle, np.radians(90) / self.turn_time * 1.2), stm32.TURN_ACK)
+        elif command in (stm32.COMMANDS["lift_up"], stm32.COMMANDS["lift_down"]):
+            up = command == stm32.COMMANDS["lift_up"]
+            self.sim.stop()
+            if up:
+                self.reply("l")     # 바퀴 감지 (시뮬레이터는 바로)
+            self.pending = (self.sim.lift(up), stm32.LIFT_UP_ACK if up else stm32.LIFT_DOWN_ACK)
+
+
+def marker_pose(pose, marker=MARKER_ORIGIN):
+    """
+    로봇 위치 → 카메라 좌표계의 마커 포즈 (rvec, tvec) - 카메라는 로봇 중심에서 정면을 봄
+    :param marker: (x, y, 마커 정면 방향 rad)
+    """
+    x, y, theta = pose
+    marker_x, marker_y, facing = marker
+    forward = np.array([np.cos(theta), np.sin(theta)])
+    right = np.array([np.sin(theta), -np.cos(theta)])
+    offset = np.array([marker_x - x, marker_y - y])     # 카메라 → 마커 (월드)
+
+    def to_camera(vector, up=0.0):
+        return np.array([vector @ right, -up, vector @ forward])
+
+    tvec = to_camera(offset)
+    # 마커 축 (월드): x = 마커를 바라볼 때 오른쪽, y = 위, z = 마커 정면
+    normal = np.array([np.cos(facing), np.sin(facing)])
+    rotation = np.column_stack([to_camera(np.array([-normal[1], normal[0]])),
+                                to_camera(np.zeros(2), up=1.0),
+                                to_camera(normal)])
+    rvec, _ = cv2.Rodrigues(rotation)
+    return rvec.reshape(3), tvec
+
+
+class SimulatedMarkerObserver:
+    """카메라 속도로 마커 관측값 생성 (docking.MarkerObserver와 같은 observe())"""
+    def __init__(self, sim, marker=MARKER_ORIGIN, fps=CAMERA_FPS, latency=CAMERA_LATENCY, seed=0):
+        self.sim = sim
+        self.marker = marker
+        self.period = 1.0 / fps
+        self.latency = latency
+        self.rng = np.random.default_rng(seed)
+        self.next_frame = time.time()
+
+    def observe(self):
+        self.next_frame = max(self.next_frame + self.period, time.time() - self.period)
+        time.sleep(max(0.0, self.next_frame - time.time()))
+        now = time.time()
+        rvec, tvec = marker_pose(self.sim.pose_at(now - self.latency), self.marker)
+        bearing = np.arctan2(tvec[0], tvec[2])
+        if 0 < tvec[2] < 0.03:
+            # 마커에 붙으면 화면이 어두워짐
+            return True, Observation(now, None, None, None, 0.0)
+        if tvec[2] <= 0 or abs(bearing) > CAMERA_FOV / 2:
+            return True, Observation(now, None, None, None, 100.0)
+        tvec = tvec + self.rng.normal(0, [LATERAL_NOISE, 0, DISTANCE_NOISE])
+        return True, pose_to_observation(rvec, tvec, 100.0, now)
@@ -0,0 +1,213 @@
+"""
+STM32 시리얼 백엔드 (demo_driving) - 1바이트 명령 프로토콜
+
+  '1' 직진  '2' 후진  '5' 좌측 평행이동  '6' 우측 평행이동  '9' 정지   (보낸 명령이 다음 명령까지 유지)
+  '3' 좌회전 90도 / '4' 우회전 90도  → 끝나면 's'
+  '7' 차량 들어올리기 → 바퀴 감지 'l', 끝나면 'a'
+  '8' 차량 내려놓기   → 끝나면 'c'
+
+속도 프레임 (펌웨어 추가 필요) - 전진과 평행이동을 한 번에, 다음 명령까지 유지
+  'v' + 전진 + 왼쪽 + 체크섬   (4바이트, 전진/왼쪽은 최대 속도 대비 -63~63 → 0x80 | (값 + 64),
+                                체크섬 = 0x80 | ((전진 + 왼쪽) & 0x7F), 틀리면 무시)
+  'v' 뒤 바이트는 모두 0x80 이상 → 1바이트 명령/신호(ASCII)와 겹치지 않음
+  - 구형 펌웨어는 'v'와 0x80 이상 바이트를 모르는 명령으로 무시 (이동 명령으로 잘못 읽지 않음)
+  - 프레임 중간에 0x80 미만 바이트가 오면 프레임을 버리고 그 바이트를 명령으로 처리 (재동기화)
+  펌웨어는 메카넘 바퀴 속도 (|전진| + |왼쪽|, m/s)가 WHEEL_SPEED_LIMIT를 넘으면 비율을 유지하며 줄임
+  '?' 기능 확인 → 속도 프레임을 지원하는 펌웨어만 'V' 응답 (supports_velocity_frames)
+
+기본은 방향별 고정 속도 명령이므로 set_velocity는 가장 큰 성분(최대 속도 대비) 하나의 방향 명령으로 바뀜
+velocity_frames=True면 '?' 확인에 응답한 펌웨어에만 속도 프레임으로 보냄 (연속 회전 명령은 없음 - 회전은 rotate()로 90도 단위)
+"""
+import threading
+import time
+import weakref
+
+from robot_hal.motion import Motion, MotionBackend
+
+COMMANDS = {
+    "forward": b"1",
+    "backward": b"2",
+    "left_turn": b"3",
+    "right_turn": b"4",
+    "left_slide": b"5",
+    "right_slide": b"6",
+    "lift_up": b"7",
+    "lift_down": b"8",
+    "stop": b"9",
+}
+TURN_ACK = "s"
+LIFT_UP_ACK = "a"
+LIFT_DOWN_ACK = "c"
+VELOCITY_FRAME = b"v"
+VELOCITY_FRAME_SIZE = 4
+VELOCITY_SCALE = 63         # 속도 프레임 값 범위 (±63 - 7비트에 0x80을 더해 명령 바이트와 구분)
+PAYLOAD_FLAG = 0x80         # 속도 프레임 'v' 뒤 바이트는 모두 이 비트가 켜짐
+CAPABILITY_QUERY = b"?"
+VELOCITY_CAPABLE = "V"      # '?'에 대한 응답 - 속도 프레임 지원
+CAPABILITY_TIMEOUT = 0.5    # '?' 응답 대기 (초) - 응답이 없으면 구형 펌웨어
+
+# 펌웨어 고정 속도 (시뮬레이터/벤치마크 기준 값 - 실측해서 조정)
+FORWARD_SPEED = 0.15        # m/s
+SLIDE_SPEED = 0.10          # m/s
+TURN_TIME = 3.0             # 90도 회전 시간 (초)
+WHEEL_SPEED_LIMIT = 0.25    # 속도 프레임에서 바퀴 하나 최대 속도 (m/s)
+
+DEADBAND = 0.2              # 최대 속도 대비 이 비율보다 작은 성분은 0 (정지)
+COMMAND_REFRESH = 0.5       # 같은 명령도 이 간격마다 다시 보냄 (바이트 유실 대비)
+ACK_TIMEOUT = 20.0          # 회전/리프트 완료 신호 대기 (초)
+
+
+def velocity_frame(forward_ratio, left_ratio):
+    """최대 속도 대비 비율 (-1 ~ 1) → 'v' 속도 프레임 (뒤 3바이트는 0x80 이상)"""
+    values = [max(-VELOCITY_SCALE, min(VELOCITY_SCALE, int(round(ratio * VELOCITY_SCALE))))
+              for ratio in (forward_ratio, left_ratio)]
+    payload = [PAYLOAD_FLAG | (value + VELOCITY_SCALE + 1) for value in values]
+    return VELOCITY_FRAME + bytes(payload + [PAYLOAD_FLAG | (sum(values) & 0x7F)])
+
+
+def parse_velocity_frame(frame):
+    """'v' 속도 프레임 → (전진 비율, 왼쪽 비율), 형식/체크섬이 틀리면 None"""
+    if len(frame) != VELOCITY_FRAME_SIZE or frame[:1] != VELOCITY_FRAME:
+        return None
+    if any(byte < PAYLOAD_FLAG for byte in frame[1:]):
+        return None
+    values = [(byte & 0x7F) - VELOCITY_SCALE - 1 for byte in frame[1:3]]
+    if PAYLOAD_FLAG | (sum(values) & 0x7F) != frame[3] or min(values) < -VELOCITY_SCALE:
+        return None
+    return tuple(value / VELOCITY_SCALE for value in values)
+
+
+_capabilities = weakref.WeakKeyDictionary()     # 시리얼 객체 → 속도 프레임 지원 여부 (확인은 포트당 한 번)
+
+
+def supports_velocity_frames(serial_port, timeout=CAPABILITY_TIMEOUT):
+    """
+    '?'를 보내 펌웨어가 속도 프레임을 지원하는지 확인 ('V' 응답) - 결과는 포트별로 저장
+    로봇이 멈춰 있을 때 호출 (응답을 기다리는 동안 받은 다른 문자는 출력만 하고 버림)
+    """
+    try:
+        return _capabilities[serial_port]
+    except (KeyError, TypeError):
+        pass
+    serial_port.write(CAPABILITY_QUERY)
+    supported = False
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if serial_port.in_waiting:
+            recv = serial_port.read().decode(errors="ignore")
+            if recv == VELOCITY_CAPABLE:
+                supported = True
+                break
+            print(f"[HAL stm32] 시리얼 수신: '{recv}' ('{VELOCITY_CAPABLE}' 대기 중)")
+        else:
+            time.sleep(0.01)
+    print(f"[HAL stm32] 속도 프레임 {'지원' if supported else '미지원 (기능 확인 응답 없음)'}")
+    try:
+        _capabilities[serial_port] = supported
+    except TypeError:
+        pass    # weakref를 못 만드는 객체 - 매번 확인
+    return supported
+
+
+class Stm32SerialBackend(MotionBackend):
+    name = "stm32"
+    max_forward = FORWARD_SPEED
+    max_lateral = SLIDE_SPEED
+    max_turn = 0.0
+
+    def __init__(self, serial_port, ack_timeout=ACK_TIMEOUT, velocity_frames=False):
+        """
+        :param serial_port: serial.Serial (또는 write/read/in_waiting이 있는 객체 - telemetry.SerialCommandTap 등)
+        :param velocity_frames: True면 set_velocity를 'v' 속도 프레임으로 보냄
+                                ('?' 확인에 응답하지 않는 구형 펌웨어면 방향 명령으로 대신 보냄)
+        """
+        self.serial = serial_port
+        self.ack_timeout = ack_timeout
+        self.velocity_frames = velocity_frames and supports_velocity_frames(serial_port)
+        self.lock = threading.Lock()
+        self.current = None         # 마지막으로 보낸 이동 명령
+        self.sent_at = 0.0
+        self.busy = None            # 완료 신호를 기다리는 Motion
+
+    def write(self, command, force=False):
+        with self.lock:
+            now = time.time()
+            if not force and command == self.current and now - self.sent_at < COMMAND_REFRESH:
+                return
+            self.serial.write(command)
+            self.current = command
+            self.sent_at = now
+
+    def command_for(self, forward, left):
+        """속도 → 방향 명령 1개 (최대 속도 대비 가장 큰 성분)"""
+        ratios = {"forward": forward / self.max_forward, "left": left / self.max_lateral}
+        axis = max(ratios, key=lambda k: abs(ratios[k]))
+        ratio = ratios[axis]
+        if abs(ratio) < DEADBAND:
+            return COMMANDS["stop"]
+        if axis == "forward":
+            return COMMANDS["forward"] if ratio > 0 else COMMANDS["backward"]
+        return COMMANDS["left_slide"] if ratio > 0 else COMMANDS["right_slide"]
+
+    def frame_for(self, forward, left):
+        """속도 → 'v' 속도 프레임 (둘 다 0이면 정지 명령)"""
+        frame = velocity_frame(forward / self.max_forward, left / self.max_lateral)
+        if frame == velocity_frame(0.0, 0.0):
+            return COMMANDS["stop"]
+        return frame
+
+    def set_velocity(self, forward=0.0, left=0.0, turn=0.0):
+        if self.busy is not None and not self.busy.done():
+            return      # 회전/리프트 중에는 이동 명령을 보내지 않음 (펌웨어 루틴 방해 방지)
+        if self.velocity_frames:
+            forward, left, _ = self.clip(forward, left, turn)
+            self.write(self.frame_for(forward, left))
+        else:
+            self.write(self.command_for(forward, left))
+
+    def stop(self):
+        self.write(COMMANDS["stop"], force=True)
+
+    def wait_ack(self, expected):
+        """시리얼에서 expected 문자가 올 때까지 대기 (다른 문자는 출력만)"""
+        deadline = time.time() + self.ack_timeout
+        while time.time() < deadline:
+            if self.serial.in_waiting:
+                recv = self.serial.read().decode(errors="ignore")
+                if recv == expected:
+                    return True
+                print(f"[HAL stm32] 시리얼 수신: '{recv}' ('{expected}' 대기 중)")
+            else:
+                time.sleep(0.01)
+        print(f"[HAL stm32] '{expected}' 신호 타임아웃 ({self.ack_timeout}초)")
+        return False
+
+    def routine(self, name, commands, ack):
+        """펌웨어 루틴 명령 (회전/리프트) 전송 후 완료 신호 대기 - 스레드에서 실행"""
+        def run():
+            for command in commands:
+                self.serial.reset_input_buffer()
+                self.write(command, force=True)
+                if not self.wait_ack(ack):
+                    return False
+            self.current = None
+            return True
+
+        if self.busy is not None and not self.busy.done():
+            return Motion.failed(name, f"{self.busy.name} 진행 중")
+        self.busy = Motion.run(name, run)
+        return self.busy
+
+    def rotate(self, angle, speed=None):
+        """90도 단위 회전 ('3' 좌회전 / '4' 우회전을 반복, 각각 's' 대기) - speed는 펌웨어 고정"""
+        turns = int(round(angle / 90.0))
+        if turns == 0 or abs(angle - turns * 90.0) > 1e-6:
+            return Motion.failed("rotate", f"STM32는 90도 단위 회전만 가능합니다 ({angle}도)")
+        command = COMMANDS["left_turn"] if turns > 0 else COMMANDS["right_turn"]
+        return self.routine(f"rotate {angle:+.0f}", [command] * abs(turns), TURN_ACK)
+
+    def lift(self, up=True):
+        """'7' 들어올리기 → 'a' / '8' 내려놓기 → 'c'"""
+        if up:
+            return self.routine("lift up", [COMMANDS["lift_up"]], LIFT_UP_ACK)
+        return self.routine("lift down", [COMMANDS["lift_down"]], LIFT_DOWN_ACK)